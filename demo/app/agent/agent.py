@@ -1,9 +1,15 @@
-from .nlu import predict_intent
-from .slots import extract_bs, extract_var, extract_row, extract_capm, extract_markowitz
-from .registry import TOOLS
-from langdetect import detect
-from .slots import extract_stock_predict, extract_montecarlo
-from app.calculators.black_scholes import calc_black_scholes_internal
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from .nlu import predict_intent, predict_intents
+from .slots import scan
+from . import registry
+from app import render
+from app.metrics import span
+from . import langid
+from .qcache import Understanding, cache
 
 def _fmt_money(x: float) -> str:
     return f"{x:,.2f}"
@@ -12,301 +18,275 @@ def _fmt_pct(x: float) -> str:
     return f"{x*100:.2f}%"
 
 
+_COURTESY = re.compile(r"\b(?:hola|hey|valerio|por favor|calcula(?:r|me)?|dime|puedes)\b")
+_SPACES = re.compile(r"\s+")
+
 def _normalize_question(text: str) -> str:
     """
     Limpia saludos y palabras de cortesía para que el NLU detecte mejor la intención.
     """
-    import re
-    patrones = [
-        r"\bhola\b", r"\bhey\b", r"\bvalerio\b", r"\bpor favor\b",
-        r"\bcalcula(r|me)?\b", r"\bdime\b", r"\bpuedes\b"
-    ]
-    out = text.lower()
-    for pat in patrones:
-        out = re.sub(pat, "", out, flags=re.IGNORECASE)
-    return re.sub(r"\s+", " ", out).strip()
+    return _SPACES.sub(" ", _COURTESY.sub("", text.lower())).strip()
 
 
-def answer(q: str) -> dict:
-    q_clean = _normalize_question(q)   # limpiamos la pregunta
-    intent = predict_intent(q_clean)
-    lang = "es"
-    try:
-        lang = detect(q)
-    except:
-        pass
+ASK_WORKERS = int(os.getenv("VALERIO_ASK_WORKERS", "8"))
+# plazo total de un lote: pasado, las preguntas que quedan no se ejecutan
+ASK_BATCH_SECONDS = float(os.getenv("VALERIO_ASK_BATCH_SECONDS", "60"))
 
-    resp = {"intent": intent, "question": q}
+def _understand(q: str, q_clean: str, intent: str) -> Understanding:
+    with span("langid"):
+        lang = langid.detect(q)
+    with span("slots"):
+        sc = scan(q_clean)
+    u = Understanding(q_clean, intent, lang, sc)
+    cache.put(q_clean, u)
+    return u
 
-    HELP_MSG = {
-        "es": (
-            "¡Hola! Soy Valerio.\n"
-            "• Black-Scholes: 'black scholes S=100 K=105 r=2.5% sigma=25% T=0.5'\n"
-            "• ML: 'predict row 7'\n"
-            "• VaR: 'VaR 95% 5 días 200k [histórico|ewma]'\n"
-            "• CAPM: 'CAPM rf=0.02 beta=1.1 rm=0.08'\n"
-            "• Markowitz: 'Markowitz rend=[0.1,0.15,0.2] cov=[[...]]'\n"
-            "¿Qué te gustaría probar?"
-        ),
-        "en": (
-            "Hi! I’m Valerio.\n"
-            "• Black-Scholes: 'black scholes S=100 K=105 r=2.5% sigma=25% T=0.5'\n"
-            "• ML: 'predict row 7'\n"
-            "• VaR: 'VaR 95% 5 days 200k [historical|ewma]'\n"
-            "• CAPM: 'CAPM rf=0.02 beta=1.1 rm=0.08'\n"
-            "• Markowitz: 'Markowitz returns=[0.1,0.15,0.2] cov=[[...]]'\n"
-            "What would you like to try?"
-        )
-    }
+def understand(q: str) -> Understanding:
+    """
+    Intención, idioma y slots de una pregunta, compartidos vía qcache por
+    /ask, /ask/batch y /valerio/ask. La clave es el texto normalizado; el
+    idioma es el de la primera pregunta que produjo esa clave.
+    """
+    q_clean = _normalize_question(q)
+    u = cache.get(q_clean)
+    if u is None:
+        u = _understand(q, q_clean, predict_intent(q_clean))
+    return u
+
+def understand_many(questions: list) -> list:
+    """Como understand() para una lista: un único predict para las preguntas que no están en caché."""
+    cleaned = [_normalize_question(q) for q in questions]
+    out = [cache.get(c) for c in cleaned]
+    pending = {}
+    for i, u in enumerate(out):
+        if u is None:
+            pending.setdefault(cleaned[i], []).append(i)
+    if pending:
+        keys = list(pending)
+        for key, intent in zip(keys, predict_intents(keys)):
+            idx = pending[key]
+            u = _understand(questions[idx[0]], key, intent)
+            for i in idx:
+                out[i] = u
+    return out
 
-    try:
+def answer(q: str) -> dict:
+    return _answer(q, understand(q))
 
-        # ---------- Black-Scholes ----------
-        if intent == "calc_black_scholes" or "black scholes" in q_clean.lower():
-            try:
-                slots = extract_bs(q_clean)
-                need = [k for k in ("S", "K", "r", "sigma", "T") if k not in slots]
-                if need:
-                    msg = (
-                        f"Faltan parámetros: {need} (usa S= K= r= sigma= T=)." if lang == "es"
-                        else f"Missing parameters: {need} (use S= K= r= sigma= T=)."
-                    )
-                    return {**resp, "need": need, "message": msg, "result": None, "lang": lang}
-
-                data = calc_black_scholes_internal(
-                    S=slots["S"],
-                    K=slots["K"],
-                    r=slots["r"],
-                    sigma=slots["sigma"],
-                    T=slots["T"],
-                    option=slots.get("option", "call"),
-                    lang=lang
-                )
-                return {**resp, **data}
-
-            except Exception as e:
-                msg = "Error en el cálculo de Black-Scholes" if lang == "es" else "Error in Black-Scholes calculation"
-                return {**resp, "error": str(e), "message": msg, "result": None, "lang": lang}
-
-        # ---------- VaR ----------
-        if intent in ("calc_var", "calc_var_simple") or "var" in q_clean.lower():
-            slots = extract_var(q_clean)
-            faltan = [k for k in ("alpha", "horizon") if k not in slots]
-            if faltan:
-                msg = (
-                    "Especifica nivel (ej. VaR 95%) y horizonte (ej. 5 días)." if lang == "es"
-                    else "Specify level (e.g. VaR 95%) and horizon (e.g. 5 days)."
-                )
-                return {**resp, "need": faltan, "message": msg}
-
-            try:
-                if intent == "calc_var":
-                    res = TOOLS["calc_var"](
-                        alpha=slots["alpha"],
-                        horizon=slots["horizon"],
-                        amount=slots.get("amount"),
-                        method=slots.get("method", "montecarlo"),
-                    )
+def tools_for(understood: list) -> list:
+    """Herramienta de cada pregunta entendida (None: solo ayuda, no ejecuta nada)."""
+    return [registry.route(u.intent, u.scan.words) for u in understood]
+
+_LATE = ("Sin tiempo: el lote superó su plazo de {seconds:g} s y esta pregunta no se ejecutó.",
+         "Out of time: the batch exceeded its {seconds:g} s deadline and this question was not run.")
+
+def answer_many(questions: list, max_workers: int = None, graphs: bool = True, understood: list = None,
+                deadline: float = None) -> list:
+    """
+    Responde una lista de preguntas: normaliza todas, clasifica las intenciones
+    que no estén en caché con un único predict, agrupa por intención y atiende
+    cada grupo en un hilo. Con graphs=False los calculadores no dibujan.
+    'understood' reutiliza un understand_many ya hecho; pasados 'deadline'
+    segundos las preguntas pendientes salen con error sin ejecutarse.
+    Devuelve las respuestas en el orden de entrada.
+    """
+    understood = understood if understood is not None else understand_many(questions)
+    groups = {}
+    for i, u in enumerate(understood):
+        groups.setdefault(u.intent, []).append(i)
+
+    out = [None] * len(questions)
+    t_end = None if deadline is None else time.perf_counter() + deadline
+
+    def run(idx):
+        with nullcontext() if graphs else render.disabled():
+            for i in idx:
+                u = understood[i]
+                if t_end is not None and time.perf_counter() > t_end:
+                    out[i] = {"intent": u.intent, "question": questions[i], "error": "deadline",
+                              "message": _pick(_LATE, u.lang).format(seconds=deadline), "result": None,
+                              "lang": u.lang}
                 else:
-                    res = TOOLS["calc_var_simple"](
-                        alpha=slots["alpha"],
-                        horizon=slots["horizon"],
-                        amount=slots.get("amount"),
-                        method=slots.get("method", "ewma"),
-                        lam=slots.get("lambda", 0.94),
-                    )
-            except Exception as e:
-                msg = "Error en cálculo VaR" if lang == "es" else "Error in VaR calculation"
-                return {**resp, "error": str(e), "message": msg}
-
-            nivel = int(round((1 - slots["alpha"]) * 100))
-            if "var_money" in res:
-                msg = (
-                    f"VaR {res['method'].upper()} {nivel}% a {slots['horizon']} día(s): {_fmt_money(res['var_money'])}"
-                    if lang == "es" else
-                    f"VaR {res['method'].upper()} {nivel}% over {slots['horizon']} day(s): {_fmt_money(res['var_money'])}"
-                )
-            else:
-                msg = (
-                    f"VaR {res['method'].upper()} {nivel}% a {slots['horizon']} día(s): {_fmt_pct(res['var_ret'])} (retorno)"
-                    if lang == "es" else
-                    f"VaR {res['method'].upper()} {nivel}% over {slots['horizon']} day(s): {_fmt_pct(res['var_ret'])} (return)"
-                )
-            return {**resp, "result": res, "message": msg}
-
-        # ---------- Monte Carlo ----------
-        if intent == "calc_montecarlo" or "monte carlo" in q_clean.lower():
-            slots = extract_montecarlo(q_clean)
-            need = [k for k in ("s0", "mu", "sigma", "t", "steps", "sims") if k not in slots]
-            if need:
-                msg = (
-                    f"Faltan parámetros: {need}. Ejemplo: 'monte carlo S0=100 mu=0.05 sigma=0.2 T=1 steps=252 sims=10000'" if lang == "es"
-                    else f"Missing parameters: {need}. Example: 'monte carlo S0=100 mu=0.05 sigma=0.2 T=1 steps=252 sims=10000'"
-                )
-                return {**resp, "need": need, "message": msg}
-
-            try:
-                resultado = TOOLS["calc_montecarlo"](
-                    S0=slots["s0"],
-                    mu=slots["mu"],
-                    sigma=slots["sigma"],
-                    T=slots["t"],
-                    steps=slots["steps"],
-                    sims=slots["sims"]
-                )
-                msg = (
-                    f"Monte Carlo finalizado con {slots['sims']} simulaciones. "
-                    f"Precio esperado: {resultado['expected_price']:.2f}, "
-                    f"Riesgo (volatilidad): {resultado['volatility']:.4f}"
-                    if lang == "es" else
-                    f"Monte Carlo completed with {slots['sims']} simulations. "
-                    f"Expected price: {resultado['expected_price']:.2f}, "
-                    f"Risk (volatility): {resultado['volatility']:.4f}"
-                )
-                return {**resp, "result": resultado, "message": msg}
-
-            except Exception as e:
-                msg = "Error en simulación Monte Carlo" if lang == "es" else "Error in Monte Carlo simulation"
-                return {**resp, "error": str(e), "message": msg}
-
-        # ---------- CAPM ----------
-        if intent == "calc_capm" or "capm" in q_clean.lower():
-            slots = extract_capm(q_clean)
-            faltan = [k for k in ("rf", "beta", "rm") if k not in slots]
-            if faltan:
-                msg = (
-                    "Faltan parámetros. Ejemplo: 'CAPM rf=0.02 beta=1.1 rm=0.08'" if lang == "es"
-                    else "Missing parameters. Example: 'CAPM rf=0.02 beta=1.1 rm=0.08'"
-                )
-                return {**resp, "need": faltan, "message": msg}
-
-            resultado = TOOLS["calc_capm"](rf=slots["rf"], beta=slots["beta"], rm=slots["rm"])
-            msg = (
-                f"CAPM calculado con rf={slots['rf']}, beta={slots['beta']}, rm={slots['rm']} → Retorno esperado: {resultado:.2%}"
-                if lang == "es" else
-                f"CAPM calculated with rf={slots['rf']}, beta={slots['beta']}, rm={slots['rm']} → Expected return: {resultado:.2%}"
-            )
-            return {**resp, "result": {"expected_return": resultado}, "message": msg}
-
-        # ---------- Markowitz ----------
-        if intent == "calc_markowitz" or "markowitz" in q_clean.lower():
-            slots = extract_markowitz(q_clean)
-            if "rendimientos" not in slots or "covarianzas" not in slots:
-                msg = (
-                    "Debes indicar rendimientos y covarianzas. Ejemplo: 'Markowitz rend=[0.1,0.15,0.2] cov=[[...]]'" if lang == "es"
-                    else "You must specify returns and covariances. Example: 'Markowitz returns=[0.1,0.15,0.2] cov=[[...]]'"
-                )
-                return {**resp, "need": ["rendimientos", "covarianzas"], "message": msg}
-
-            try:
-                resultado = TOOLS["calc_markowitz"](slots["rendimientos"], slots["covarianzas"])
-                msg = (
-                    f"Según Markowitz, el portafolio óptimo asigna los pesos {resultado['weights']}. "
-                    f"Retorno esperado: {resultado['retorno']:.2%}, Riesgo: {resultado['riesgo']:.2%}, Sharpe: {resultado['sharpe']:.2f}."
-                    if lang == "es" else
-                    f"According to Markowitz, the optimal portfolio assigns the weights {resultado['weights']}. "
-                    f"Expected return: {resultado['retorno']:.2%}, Risk: {resultado['riesgo']:.2%}, Sharpe: {resultado['sharpe']:.2f}."
-                )
-                return {**resp, "result": resultado, "message": msg}
-            except Exception as e:
-                msg = (
-                    f"Error en el cálculo de Markowitz: {str(e)}" if lang == "es"
-                    else f"Error in Markowitz calculation: {str(e)}"
-                )
-                return {**resp, "error": str(e), "message": msg}
-                
-        # ---------- Predict Risk ----------
-        if intent == "predict_risk":
-            import re, numpy as np
-
-            def get_number(key, text):
-                m = re.search(rf"{key}\s*=?\s*([0-9]*\.?[0-9]+)", q_clean)
-                return float(m.group(1)) if m else None
-
-            zscore = get_number("zscore", q_clean)
-            volatility = get_number("volatility", q_clean)
-            returns = get_number("returns", q_clean)
-            debt_ratio = get_number("debt_ratio", q_clean)
-
-            faltan = [k for k, v in {
-                "zscore": zscore,
-                "volatility": volatility,
-                "returns": returns,
-                "debt_ratio": debt_ratio
-            }.items() if v is None]
-
-            if faltan:
-                msg = (
-                    f"Faltan parámetros: {faltan}. Ejemplo: 'predice riesgo zscore=2.1 volatility=0.15 returns=0.08 debt_ratio=0.3'"
-                    if lang == "es" else
-                    f"Missing parameters: {faltan}. Example: 'predict risk zscore=2.1 volatility=0.15 returns=0.08 debt_ratio=0.3'"
-                )
-                return {**resp, "need": faltan, "message": msg}
-
-            X = np.array([[zscore, volatility, returns, debt_ratio]])
-            pred = TOOLS["predict_risk_model"].predict(X)[0]
-            prob = TOOLS["predict_risk_model"].predict_proba(X)[0].tolist()
-
-            label = "BAJO" if pred == 0 else "ALTO"
-            label_en = "LOW" if pred == 0 else "HIGH"
-            prob_percent = round(max(prob) * 100, 2)
-
-            msg = (
-                f"Riesgo {label} con {prob_percent}% de probabilidad." if lang == "es"
-                else f"Risk {label_en} with {prob_percent}% probability."
-            )
-            return {**resp, "result": {"label": label, "prob": prob_percent}, "message": msg}
-
-        # ---------- Stock Prediction ----------
-        if intent == "predict_stock":
-            slots = extract_stock_predict(q_clean)
-
-            if "ticker" not in slots:
-                msg = (
-                    "Indica un ticker (ej. AAPL, TSLA)." if lang == "es"
-                    else "Specify a ticker (e.g., AAPL, TSLA)."
-                )
-                return {**resp, "need": ["ticker"], "message": msg}
-
-            ticker = slots["ticker"]
-            days = slots.get("days", 1)
-            # Mapeo de alias de modelos
-            model_aliases = {
-                "xgboost": "xgboost_reg",
-                "xgboost_reg": "xgboost_reg",
-                "linear": "linear_regression",
-                "linear_regression": "linear_regression",
-                "random_forest": "random_forest_reg",
-                "random_forest_reg": "random_forest_reg",
-                "svr": "svr",
-                "support_vector": "svr",
-            }
-
-            raw_model = slots.get("model", "xgboost_reg")
-            model = model_aliases.get(raw_model, raw_model)
-
-            try:
-                res = TOOLS["predict_stock"](ticker=ticker, days=days, model=model)
-
-                # Mensaje breve SOLO encabezado (sin repetir los valores)
-                msg = (
-                    f"Predicción de precios para {ticker} usando {model} (horizonte {days} días)."
-                    if lang == "es" else
-                    f"Price prediction for {ticker} using {model} (horizon {days} days)."
-                )
-
-                return {**resp, "result": res, "message": msg}
-
-            except Exception as e:
-                msg = (
-                    f"Error en la predicción bursátil: {str(e)}" if lang == "es"
-                    else f"Error in stock prediction: {str(e)}"
-                )
-                return {**resp, "result": {}, "error": str(e), "message": msg}
-
-        # ---------- Help ----------
-        if intent in ("help", "other", None):
-            return {**resp, "message": HELP_MSG["es" if lang == "es" else "en"]}
+                    out[i] = _answer(questions[i], u)
+
+    workers = max(1, min(max_workers or ASK_WORKERS, len(groups)))
+    if workers == 1:
+        for idx in groups.values():
+            run(idx)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="valerio-ask") as pool:
+            for f in [pool.submit(run, idx) for idx in groups.values()]:
+                f.result()
+    return out
+
+HELP_MSG = {
+    "es": (
+        "¡Hola! Soy Valerio.\n"
+        "• Black-Scholes: 'black scholes S=100 K=105 r=2.5% sigma=25% T=0.5'\n"
+        "• ML: 'predict row 7'\n"
+        "• VaR: 'VaR 95% 5 días 200k [histórico|ewma]'\n"
+        "• CAPM: 'CAPM rf=0.02 beta=1.1 rm=0.08'\n"
+        "• Markowitz: 'Markowitz rend=[0.1,0.15,0.2] cov=[[...]]'\n"
+        "¿Qué te gustaría probar?"
+    ),
+    "en": (
+        "Hi! I’m Valerio.\n"
+        "• Black-Scholes: 'black scholes S=100 K=105 r=2.5% sigma=25% T=0.5'\n"
+        "• ML: 'predict row 7'\n"
+        "• VaR: 'VaR 95% 5 days 200k [historical|ewma]'\n"
+        "• CAPM: 'CAPM rf=0.02 beta=1.1 rm=0.08'\n"
+        "• Markowitz: 'Markowitz returns=[0.1,0.15,0.2] cov=[[...]]'\n"
+        "What would you like to try?"
+    )
+}
+
+# ---------- Mensajes por herramienta: faltan datos / error ----------
+_VAR_NEED = ("Especifica nivel (ej. VaR 95%) y horizonte (ej. 5 días).",
+             "Specify level (e.g. VaR 95%) and horizon (e.g. 5 days).")
+NEED_MSG = {
+    "calc_black_scholes": ("Faltan parámetros: {need} (usa S= K= r= sigma= T=).",
+                           "Missing parameters: {need} (use S= K= r= sigma= T=)."),
+    "calc_var_montecarlo": _VAR_NEED,
+    "calc_var_simple": _VAR_NEED,
+    "calc_montecarlo": ("Faltan parámetros: {need}. Ejemplo: 'monte carlo S0=100 mu=0.05 sigma=0.2 T=1 steps=252 sims=10000'",
+                        "Missing parameters: {need}. Example: 'monte carlo S0=100 mu=0.05 sigma=0.2 T=1 steps=252 sims=10000'"),
+    "calc_capm": ("Faltan parámetros. Ejemplo: 'CAPM rf=0.02 beta=1.1 rm=0.08'",
+                  "Missing parameters. Example: 'CAPM rf=0.02 beta=1.1 rm=0.08'"),
+    "calc_markowitz": ("Debes indicar rendimientos y covarianzas. Ejemplo: 'Markowitz rend=[0.1,0.15,0.2] cov=[[...]]'",
+                       "You must specify returns and covariances. Example: 'Markowitz returns=[0.1,0.15,0.2] cov=[[...]]'"),
+    "ml_predict": ("Indica la fila. Ejemplo: 'predice la fila 7'", "Specify the row. Example: 'predict row 7'"),
+    "predict_risk": ("Faltan parámetros: {need}. Ejemplo: 'predice riesgo zscore=2.1 volatility=0.15 returns=0.08 debt_ratio=0.3'",
+                     "Missing parameters: {need}. Example: 'predict risk zscore=2.1 volatility=0.15 returns=0.08 debt_ratio=0.3'"),
+    "predict_stock": ("Indica un ticker (ej. AAPL, TSLA).", "Specify a ticker (e.g., AAPL, TSLA)."),
+}
+NEED_MSG["predict_stocks"] = NEED_MSG["predict_stock"]
+
+_VAR_ERROR = ("Error en cálculo VaR", "Error in VaR calculation")
+ERROR_MSG = {
+    "calc_black_scholes": ("Error en el cálculo de Black-Scholes", "Error in Black-Scholes calculation"),
+    "calc_var_montecarlo": _VAR_ERROR,
+    "calc_var_simple": _VAR_ERROR,
+    "calc_montecarlo": ("Error en simulación Monte Carlo", "Error in Monte Carlo simulation"),
+    "calc_capm": ("Error en el cálculo CAPM: {error}", "Error in CAPM calculation: {error}"),
+    "calc_markowitz": ("Error en el cálculo de Markowitz: {error}", "Error in Markowitz calculation: {error}"),
+    "ml_predict": ("Error en la predicción ML: {error}", "Error in ML prediction: {error}"),
+    "predict_risk": ("Error en la predicción de riesgo: {error}", "Error in risk prediction: {error}"),
+    "predict_stock": ("Error en la predicción bursátil: {error}", "Error in stock prediction: {error}"),
+}
+ERROR_MSG["predict_stocks"] = ERROR_MSG["predict_stock"]
+
+def _pick(pair, lang: str) -> str:
+    return pair[0] if lang == "es" else pair[1]
+
+# ---------- Mensajes por herramienta: resultado ----------
+def _reply_var(res, args, lang):
+    out = res["result"]
+    nivel = int(round((1 - args["alpha"]) * 100))
+    h = args["horizon"]
+    method = out.get("method", "montecarlo").upper()
+    if "var_money" in out:
+        return (f"VaR {method} {nivel}% a {h} día(s): {_fmt_money(out['var_money'])}" if lang == "es"
+                else f"VaR {method} {nivel}% over {h} day(s): {_fmt_money(out['var_money'])}")
+    return (f"VaR {method} {nivel}% a {h} día(s): {_fmt_pct(out['var_ret'])} (retorno)" if lang == "es"
+            else f"VaR {method} {nivel}% over {h} day(s): {_fmt_pct(out['var_ret'])} (return)")
+
+def _reply_montecarlo(res, args, lang):
+    out = res["result"]
+    return (
+        f"Monte Carlo finalizado con {args['sims']} simulaciones. "
+        f"Precio esperado: {out['expected_price']:.2f}, "
+        f"Riesgo (volatilidad): {out['volatility']:.4f}"
+        if lang == "es" else
+        f"Monte Carlo completed with {args['sims']} simulations. "
+        f"Expected price: {out['expected_price']:.2f}, "
+        f"Risk (volatility): {out['volatility']:.4f}"
+    )
+
+def _reply_capm(res, args, lang):
+    er = res["result"]["expected_return"]
+    return (
+        f"CAPM calculado con rf={args['rf']}, beta={args['beta']}, rm={args['rm']} → Retorno esperado: {er:.2%}"
+        if lang == "es" else
+        f"CAPM calculated with rf={args['rf']}, beta={args['beta']}, rm={args['rm']} → Expected return: {er:.2%}"
+    )
+
+def _reply_markowitz(res, args, lang):
+    out = res["result"]
+    return (
+        f"Según Markowitz, el portafolio óptimo asigna los pesos {out['weights']}. "
+        f"Retorno esperado: {out['retorno']:.2%}, Riesgo: {out['riesgo']:.2%}, Sharpe: {out['sharpe']:.2f}."
+        if lang == "es" else
+        f"According to Markowitz, the optimal portfolio assigns the weights {out['weights']}. "
+        f"Expected return: {out['retorno']:.2%}, Risk: {out['riesgo']:.2%}, Sharpe: {out['sharpe']:.2f}."
+    )
+
+def _reply_ml(res, args, lang):
+    p = res["probability"]
+    prob = f" ({p:.1%})" if p is not None else ""
+    return (f"Fila {res['row']}: predicción {res['prediction']}{prob}." if lang == "es"
+            else f"Row {res['row']}: prediction {res['prediction']}{prob}.")
+
+def _reply_risk(res, args, lang):
+    label = ("BAJO", "ALTO")[res["prediction"]] if lang == "es" else ("LOW", "HIGH")[res["prediction"]]
+    return (f"Riesgo {label} con {res['prob']}% de probabilidad." if lang == "es"
+            else f"Risk {label} with {res['prob']}% probability.")
+
+def _reply_stock(res, args, lang):
+    # Mensaje breve SOLO encabezado (sin repetir los valores)
+    ticker = args.get("ticker") or ", ".join(args["tickers"])
+    return (f"Predicción de precios para {ticker} usando {args['model']} (horizonte {args['days']} días)."
+            if lang == "es" else
+            f"Price prediction for {ticker} using {args['model']} (horizon {args['days']} days).")
+
+REPLY = {
+    "calc_var_montecarlo": _reply_var, "calc_var_simple": _reply_var, "calc_montecarlo": _reply_montecarlo,
+    "calc_capm": _reply_capm, "calc_markowitz": _reply_markowitz, "ml_predict": _reply_ml,
+    "predict_risk": _reply_risk, "predict_stock": _reply_stock, "predict_stocks": _reply_stock,
+}
+
+# Mapeo de alias de modelos
+MODEL_ALIASES = {
+    "xgboost": "xgboost_reg",
+    "linear": "linear_regression",
+    "random_forest": "random_forest_reg",
+    "support_vector": "svr",
+}
+
+def _answer(q: str, u: Understanding) -> dict:
+    intent, lang = u.intent, u.lang
+    resp = {"intent": intent, "question": q}
+
+    # una búsqueda en el registro (intención + palabras clave ya escaneadas)
+    tool = registry.route(intent, u.scan.words)
+    if tool is None:
+        return {**resp, "message": HELP_MSG["es" if lang == "es" else "en"]}
+
+    args = tool.extract(u)
+    if tool.name == "predict_stock":
+        tickers = u.slots("predict_stock").get("tickers", [])
+        if len(tickers) > 1:
+            # varios tickers -> una sola predicción por lotes
+            tool = registry.TOOLS["predict_stocks"]
+            args = tool.extract(u)
+        args["model"] = MODEL_ALIASES.get(args["model"], args["model"])
+    if "lang" in tool.schema:
+        args["lang"] = lang
+
+    need = tool.missing(args)
+    slot_error = u.slots(tool.slot_intent).get("error")
+    if need or slot_error:
+        msg = slot_error or _pick(NEED_MSG[tool.name], lang).format(need=need)
+        return {**resp, "need": need, "message": msg, "result": None, "lang": lang}
 
+    try:
+        res = tool.run(**args)
     except Exception as e:
-        return {**resp, "error": str(e)}
+        msg = _pick(ERROR_MSG[tool.name], lang).format(error=e)
+        return {**resp, "error": str(e), "message": msg, "result": None, "lang": lang}
+
+    if "job" in res or tool.name not in REPLY:   # en cola, o la herramienta ya redacta (Black-Scholes)
+        return {**resp, **res}
+    msg = REPLY[tool.name](res, args, lang)
+    if "message" in res:   # calculadores: {message, result, graph}
+        return {**resp, "result": res["result"], "graph": res.get("graph"), "message": msg}
+    return {**resp, "result": res, "message": msg}
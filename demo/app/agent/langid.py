@@ -0,0 +1,140 @@
+"""
+Identificación de idioma (es/en) para el agente y /valerio/ask.
+
+1) Atajo heurístico: signos propios del español (ñ, ¿, ¡, tildes) o palabras
+   funcionales que solo aparecen en uno de los dos idiomas.
+2) Si no decide, perfil de n-gramas de caracteres (2 y 3, por palabra)
+   calculado una vez a partir de un corpus semilla pequeño: naive Bayes con
+   suavizado de Laplace. Es determinista: el mismo texto da siempre el mismo
+   idioma (langdetect no, salvo que se fije la semilla).
+
+Los resultados se guardan en una caché LRU por texto normalizado.
+"""
+import math
+import re
+from functools import lru_cache
+
+from app.metrics import register_cache
+
+LANGS = ("es", "en")
+DEFAULT = "es"
+CACHE_SIZE = 4096
+
+_SPANISH_CHARS = re.compile(r"[ñ¿¡áéíóú]")
+_NON_LETTERS = re.compile(r"[^a-zñáéíóúü]+")
+_WORDS = {
+    "es": {"el", "la", "los", "las", "de", "del", "que", "con", "para", "por", "una", "un", "y", "en", "al",
+           "es", "se", "lo", "mi", "me", "qué", "cual", "como", "dime", "dame", "calcula", "calcular", "quiero",
+           "necesito", "haz", "hazme", "hola", "ayuda", "gracias", "buenas", "buenos", "sobre", "precio",
+           "riesgo", "fila", "dias", "semanas", "mes", "horizonte", "nivel", "monto", "valor", "predice"},
+    "en": {"the", "of", "for", "with", "what", "is", "and", "to", "a", "an", "me", "my", "how", "can", "you",
+           "please", "compute", "calculate", "price", "risk", "row", "days", "day", "weeks", "month",
+           "horizon", "level", "amount", "value", "predict", "prediction", "give", "using", "over", "next",
+           "hello", "help", "thanks", "expected", "return", "simple", "need"},
+}
+# palabras de ambos idiomas (o de la jerga común) no votan
+_SHARED = _WORDS["es"] & _WORDS["en"]
+
+_CORPUS = {
+    "es": """
+        hola quiero saber cuánto vale la opción de compra con estos datos
+        calcula el valor en riesgo de mi cartera para los próximos días
+        necesito una predicción del precio de la acción para la semana que viene
+        cuál es el retorno esperado según el modelo de valoración de activos
+        dame el riesgo de la fila que te indico y explícame el resultado
+        optimiza la cartera con estos rendimientos y la matriz de covarianzas
+        qué puedes hacer por mí hoy gracias por la ayuda
+        simula las trayectorias del precio con muchas simulaciones y pasos
+        el nivel de confianza es del noventa y cinco por ciento y el horizonte de diez días
+        por favor ejecuta el cálculo con la tasa libre de riesgo y la beta del activo
+        buenos días me gustaría conocer la volatilidad esperada del portafolio
+        haz el análisis de la frontera eficiente con tres activos
+        muéstrame las pérdidas posibles en un mes para este monto
+        con qué modelo se hace la predicción de mañana y de pasado
+        la empresa tiene una deuda alta y los retornos son bajos
+        cuánto podría perder en el peor de los casos con esta inversión
+    """,
+    "en": """
+        hello i want to know how much the call option is worth with these inputs
+        compute the value at risk of my portfolio for the next few days
+        i need a forecast of the stock price for the coming week
+        what is the expected return according to the asset pricing model
+        give me the risk for the row i mention and explain the result
+        optimize the portfolio with these returns and the covariance matrix
+        what can you do for me today thanks for the help
+        simulate the price paths with many simulations and steps
+        the confidence level is ninety five percent and the horizon is ten days
+        please run the calculation with the risk free rate and the beta of the asset
+        good morning i would like to know the expected volatility of the portfolio
+        run the efficient frontier analysis with three assets
+        show me the possible losses over one month for this amount
+        which model is used for the prediction of tomorrow and the day after
+        the company has high debt and the returns are low
+        how much could i lose in the worst case with this investment
+    """,
+}
+
+def _ngrams(text: str):
+    for w in _NON_LETTERS.split(text.lower()):
+        if not w:
+            continue
+        w = f" {w} "
+        for n in (2, 3):
+            for i in range(len(w) - n + 1):
+                yield w[i:i + n]
+
+def _build_profiles(corpus: dict) -> dict:
+    counts = {lang: {} for lang in corpus}
+    for lang, text in corpus.items():
+        for g in _ngrams(text):
+            counts[lang][g] = counts[lang].get(g, 0) + 1
+    vocab = set().union(*counts.values())
+    profiles = {}
+    for lang, c in counts.items():
+        total = sum(c.values()) + len(vocab) + 1
+        profiles[lang] = ({g: math.log((c.get(g, 0) + 1) / total) for g in vocab}, math.log(1 / total))
+    return profiles
+
+_PROFILES = _build_profiles(_CORPUS)
+
+def heuristic(text: str):
+    """'es'/'en' si la pista es inequívoca; None si hay que puntuar."""
+    low = text.lower()
+    if _SPANISH_CHARS.search(low):
+        return "es"
+    words = set(_NON_LETTERS.split(low)) - _SHARED
+    es, en = len(words & _WORDS["es"]), len(words & _WORDS["en"])
+    if es and not en:
+        return "es"
+    if en and not es:
+        return "en"
+    return None
+
+def scores(text: str) -> dict:
+    """Log-verosimilitud de cada idioma según el perfil de n-gramas."""
+    out = {}
+    for lang, (logp, unseen) in _PROFILES.items():
+        out[lang] = sum(logp.get(g, unseen) for g in _ngrams(text))
+    return out
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _detect(text: str) -> str:
+    lang = heuristic(text)
+    if lang is not None:
+        return lang
+    s = scores(text)
+    if s["es"] == s["en"]:
+        return DEFAULT
+    return max(s, key=s.get)
+
+def detect(text: str) -> str:
+    """Idioma de 'text' ('es' o 'en'); sin letras devuelve DEFAULT."""
+    return _detect(" ".join(text.lower().split()))
+
+def cache_info() -> dict:
+    info = _detect.cache_info()
+    calls = info.hits + info.misses
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize,
+            "hit_rate": info.hits / calls if calls else 0.0}
+
+register_cache("langid", cache_info)
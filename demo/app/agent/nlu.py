@@ -1,16 +1,71 @@
 from pathlib import Path
+import os
+import threading
 import joblib
 
+from app.metrics import span
+
 HERE = Path(__file__).resolve().parent
 MODEL_PKL = HERE / "models" / "nlu_intents.pkl"
+MODEL_NPZ = HERE / "models" / "nlu_online.npz"
+
+# tfidf: pipeline TF-IDF + LinearSVC (nlu_train.py); online: hashing + SGD (nlu_online.py)
+BACKEND = os.getenv("VALERIO_NLU_BACKEND", "tfidf").lower()
 
 _model = None
+_model_sig = None
+_lock = threading.Lock()
+
+def model_path() -> Path:
+    return MODEL_NPZ if BACKEND == "online" else MODEL_PKL
+
+def model_signature() -> tuple:
+    """(mtime_ns, tamaño) del modelo activo: cambia cuando se reentrena o se sustituye."""
+    st = model_path().stat()
+    return (st.st_mtime_ns, st.st_size)
+
+def _read(path: Path):
+    with span("nlu.load"):
+        if BACKEND == "online":
+            from .nlu_online import OnlineIntentModel
+            return OnlineIntentModel.load(path)
+        return joblib.load(path)
+
 def load_model():
-    global _model
-    if _model is None:
-        _model = joblib.load(MODEL_PKL)
+    """Modelo de intenciones; se recarga en caliente si el fichero ha cambiado en disco."""
+    global _model, _model_sig
+    sig = model_signature()
+    if _model is None or sig != _model_sig:
+        with _lock:
+            if _model is None or sig != _model_sig:
+                _model = _read(model_path())
+                _model_sig = sig
     return _model
 
+def learn(texts: list, intents: list) -> dict:
+    """
+    Añade ejemplos etiquetados al backend online: se entrena una copia, se
+    guarda (nlu_online.append) y se cambia el modelo en uso sin reiniciar.
+    qcache ve la nueva firma y se vacía sola.
+    """
+    global _model, _model_sig
+    if BACKEND != "online":
+        raise ValueError("Solo el backend online admite ejemplos nuevos (VALERIO_NLU_BACKEND=online).")
+    from .nlu_online import append, examples_log
+    with _lock:
+        model = append(list(texts), list(intents), MODEL_NPZ, examples_log(MODEL_NPZ))
+        _model, _model_sig = model, model_signature()
+    return {"examples": model.n_examples, "intents": [str(c) for c in model.classes_], "bytes": model.nbytes}
+
 def predict_intent(text: str) -> str:
     mdl = load_model()
-    return str(mdl.predict([text])[0])
+    with span("nlu.predict"):
+        return str(mdl.predict([text])[0])
+
+def predict_intents(texts: list) -> list:
+    """Intenciones de una lista de preguntas con un solo predict (vectorización en bloque)."""
+    if not texts:
+        return []
+    mdl = load_model()
+    with span("nlu.predict_batch"):
+        return [str(i) for i in mdl.predict(list(texts))]
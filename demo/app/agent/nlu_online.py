@@ -0,0 +1,178 @@
+# app/agent/nlu_online.py
+"""
+Backend NLU de tamaño fijo y entrenable en línea (alternativa a nlu_intents.pkl).
+
+- HashingVectorizer char_wb(3–5), como el TF-IDF del pipeline actual pero sin
+  vocabulario: las n-gramas van a N_FEATURES cubos, así que la memoria no
+  crece con el corpus (pesos = intenciones × N_FEATURES en float32).
+- SGDClassifier (hinge) con partial_fit: se pueden añadir frases etiquetadas
+  sin reentrenar desde cero.
+- Los pesos se guardan como .npz (coef, intercept, clases, configuración);
+  save() escribe a un temporal y renombra, y nlu.load_model() recarga en
+  caliente cuando cambia el fichero (sin reiniciar el proceso).
+
+Entrenar desde data/dataset.csv (desde demo/):
+    python -m app.agent.nlu_online [--features 16384] [--epochs 30]
+Añadir ejemplos etiquetados (CSV text,intent):
+    python -m app.agent.nlu_online --append nuevos.csv
+"""
+import argparse
+import copy
+import csv
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+HERE = Path(__file__).resolve().parent
+DATA = HERE.parents[0] / "data" / "dataset.csv"
+MODEL_NPZ = HERE / "models" / "nlu_online.npz"
+
+def examples_log(path: Path) -> Path:
+    """Registro JSONL de ejemplos añadidos, junto al modelo: nlu_online.npz -> nlu_online_examples.jsonl."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}_examples.jsonl")
+
+EXAMPLES_LOG = examples_log(MODEL_NPZ)
+
+N_FEATURES = int(os.getenv("VALERIO_NLU_FEATURES", str(2 ** 14)))
+EPOCHS = 30
+APPEND_EPOCHS = 5
+SEED = 42
+
+def _vectorizer(n_features: int) -> HashingVectorizer:
+    return HashingVectorizer(analyzer="char_wb", ngram_range=(3, 5), lowercase=True,
+                             n_features=n_features, alternate_sign=False, norm="l2", dtype=np.float32)
+
+def _classifier(alpha: float) -> SGDClassifier:
+    return SGDClassifier(loss="hinge", alpha=alpha, random_state=SEED)
+
+class OnlineIntentModel:
+    """Clasificador de intenciones con vectorizador hashing y pesos actualizables."""
+
+    def __init__(self, n_features: int = N_FEATURES, alpha: float = 1e-4):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.vectorizer = _vectorizer(n_features)
+        self.clf = _classifier(alpha)
+        self.n_examples = 0
+
+    @property
+    def classes_(self):
+        return self.clf.classes_
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria de los pesos (fija: intenciones × N_FEATURES)."""
+        return int(self.clf.coef_.nbytes + self.clf.intercept_.nbytes) if hasattr(self.clf, "coef_") else 0
+
+    def fit(self, texts, labels, epochs: int = EPOCHS) -> "OnlineIntentModel":
+        """Entrenamiento inicial: 'epochs' pasadas de partial_fit en orden aleatorio (determinista)."""
+        X = self.vectorizer.transform(list(texts))
+        y = np.asarray(labels, dtype=object).astype(str)
+        classes = np.unique(y)
+        rng = np.random.default_rng(SEED)
+        self.clf = _classifier(self.alpha)
+        for _ in range(epochs):
+            idx = rng.permutation(len(y))
+            self.clf.partial_fit(X[idx], y[idx], classes=classes)
+        self.n_examples = len(y)
+        self._compact()
+        return self
+
+    def partial_fit(self, texts, labels, epochs: int = APPEND_EPOCHS) -> "OnlineIntentModel":
+        """Añade ejemplos etiquetados de intenciones ya conocidas."""
+        y = np.asarray(labels, dtype=object).astype(str)
+        unknown = sorted(set(y) - set(self.classes_))
+        if unknown:
+            raise ValueError(f"Intenciones desconocidas: {unknown}. Reentrena con fit() para añadir clases.")
+        X = self.vectorizer.transform(list(texts))
+        for _ in range(epochs):
+            self.clf.partial_fit(X, y)
+        self.n_examples += len(y)
+        self._compact()
+        return self
+
+    def predict(self, texts) -> np.ndarray:
+        X = self.vectorizer.transform(list(texts))
+        scores = X @ self.clf.coef_.T + self.clf.intercept_
+        return self.clf.classes_[np.asarray(scores).argmax(axis=1)]
+
+    def _compact(self):
+        self.clf.coef_ = np.ascontiguousarray(self.clf.coef_, dtype=np.float32)
+        self.clf.intercept_ = self.clf.intercept_.astype(np.float32)
+
+    def copy(self) -> "OnlineIntentModel":
+        return copy.deepcopy(self)
+
+    # ---------- Persistencia ----------
+    def save(self, path: Path = MODEL_NPZ) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        config = {"n_features": self.n_features, "alpha": self.alpha, "n_examples": self.n_examples}
+        np.savez_compressed(tmp, coef=self.clf.coef_, intercept=self.clf.intercept_,
+                            classes=self.clf.classes_.astype(str), config=json.dumps(config))
+        tmp.replace(path)   # el lector nunca ve un fichero a medias
+        return path
+
+    @classmethod
+    def load(cls, path: Path = MODEL_NPZ) -> "OnlineIntentModel":
+        with np.load(path, allow_pickle=False) as z:
+            config = json.loads(str(z["config"]))
+            model = cls(config["n_features"], config["alpha"])
+            model.n_examples = config.get("n_examples", 0)
+            clf = model.clf
+            clf.classes_ = z["classes"].astype(object)
+            clf.coef_ = z["coef"]
+            clf.intercept_ = z["intercept"]
+            # estado mínimo para que partial_fit continúe donde se quedó
+            clf.t_ = 1.0 + model.n_examples
+            clf.n_features_in_ = model.n_features
+        return model
+
+def read_csv(path: Path) -> tuple:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [(r["text"], r["intent"]) for r in csv.DictReader(f)]
+    return [t for t, _ in rows], [i for _, i in rows]
+
+def train(n_features: int = N_FEATURES, epochs: int = EPOCHS, path: Path = MODEL_NPZ) -> OnlineIntentModel:
+    texts, labels = read_csv(DATA)
+    model = OnlineIntentModel(n_features).fit(texts, labels, epochs)
+    model.save(path)
+    return model
+
+def append(texts, labels, path: Path = MODEL_NPZ, log: Path = None) -> OnlineIntentModel:
+    """
+    Actualiza los pesos guardados con nuevos ejemplos y los registra en 'log'
+    (JSONL, por defecto examples_log(path)) para poder reconstruir el modelo.
+    Se entrena sobre una copia y se guarda de forma atómica: los procesos que
+    sirven lo recargan al ver el cambio.
+    """
+    log = Path(log) if log is not None else examples_log(path)
+    model = OnlineIntentModel.load(path)
+    model.partial_fit(texts, labels)
+    model.save(path)
+    with open(log, "a", encoding="utf-8") as f:
+        for t, i in zip(texts, labels):
+            f.write(json.dumps({"text": t, "intent": i}, ensure_ascii=False) + "\n")
+    return model
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--features", type=int, default=N_FEATURES)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--append", type=Path, help="CSV text,intent con ejemplos nuevos")
+    args = parser.parse_args(argv)
+    if args.append:
+        model = append(*read_csv(args.append))
+    else:
+        model = train(args.features, args.epochs)
+    print(f"Saved -> {MODEL_NPZ} ({len(model.classes_)} intenciones, {model.n_examples} ejemplos, "
+          f"{model.nbytes / 1024:.0f} KB en memoria, {MODEL_NPZ.stat().st_size / 1024:.0f} KB en disco)")
+
+if __name__ == "__main__":
+    main()
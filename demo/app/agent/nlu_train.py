@@ -4,7 +4,9 @@ from sklearn.pipeline import Pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.svm import LinearSVC
 from sklearn.model_selection import StratifiedKFold, cross_val_score
-import joblib
+import time
+
+from app.ml.artifacts import data_hash, save_artifact
 
 # app/agent/nlu_train.py
 
@@ -38,11 +40,19 @@ def train():
     f1 = cross_val_score(pipe, X, y, cv=cv, scoring="f1_macro")
     print(f"CV f1_macro: {f1.mean():.3f} +/- {f1.std():.3f}  ({n_splits} folds)")
 
-    # Entrena en TODO el dataset y guarda el modelo final
+    # Entrena en TODO el dataset y guarda el modelo final (+ sidecar de metadatos)
+    t0 = time.perf_counter()
     pipe.fit(X, y)
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(pipe, MODEL_PKL)
-    print("Saved ->", MODEL_PKL)
+    meta = save_artifact(pipe, MODEL_PKL.stem, {
+        "intents": sorted(y.unique().tolist()),
+        "metrics": {"f1_macro": {"mean": float(f1.mean()), "std": float(f1.std())}},
+        "cv": f"StratifiedKFold(n_splits={n_splits})",
+        "data_files": [DATA.name],
+        "data_hash": data_hash(DATA),
+        "n_rows": int(len(X)),
+        "training_seconds": round(time.perf_counter() - t0, 3),
+    }, models_dir=MODEL_DIR)
+    print("Saved ->", MODEL_PKL, f"(version {meta['version']})")
 
 
 if __name__ == "__main__":
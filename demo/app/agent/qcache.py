@@ -0,0 +1,95 @@
+"""
+Caché de comprensión de preguntas: texto normalizado -> (intención, idioma, slots).
+
+El tráfico del chat se repite mucho ("VaR 95% 5 días 200k", "capm rf=0.02
+beta=1.1 rm=0.08"); con la caché, una pregunta ya vista se salta la
+vectorización TF-IDF, el SVM, la detección de idioma y el escaneo de slots.
+
+- LRU con límite de entradas (VALERIO_QCACHE_SIZE) y de longitud de la
+  clave: las preguntas más largas que MAX_KEY_CHARS no se guardan.
+- Se vacía sola cuando cambia el modelo NLU activo (nlu.model_signature).
+- stats() da aciertos, fallos, tasa de acierto, expulsiones e invalidaciones.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from app.metrics import register_cache
+from .nlu import model_signature
+from .slots import typed_slots
+
+MAX_ENTRIES = int(os.getenv("VALERIO_QCACHE_SIZE", "10000"))
+MAX_KEY_CHARS = int(os.getenv("VALERIO_QCACHE_MAX_KEY", "500"))
+
+class Understanding:
+    """Intención, idioma y escaneo de slots de una pregunta normalizada."""
+    __slots__ = ("text", "intent", "lang", "scan", "_slots")
+
+    def __init__(self, text: str, intent: str, lang: str, scan):
+        self.text, self.intent, self.lang, self.scan = text, intent, lang, scan
+        self._slots = {}
+
+    def slots(self, intent: str = None) -> dict:
+        """Slots tipados de 'intent' (por defecto la predicha), calculados una vez; se devuelve una copia."""
+        intent = intent or self.intent
+        if intent not in self._slots:
+            self._slots[intent] = typed_slots(self.scan, intent)
+        return dict(self._slots[intent])
+
+class QuestionCache:
+    def __init__(self, maxsize: int = MAX_ENTRIES, max_key_chars: int = MAX_KEY_CHARS):
+        self.maxsize = maxsize
+        self.max_key_chars = max_key_chars
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._sig = None
+        self.hits = self.misses = self.evictions = self.invalidations = self.skipped = 0
+
+    def _check_model(self):
+        sig = model_signature()
+        if sig != self._sig:
+            if self._sig is not None:
+                self._data.clear()
+                self.invalidations += 1
+            self._sig = sig
+
+    def get(self, key: str):
+        with self._lock:
+            self._check_model()
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value) -> None:
+        if len(key) > self.max_key_chars or self.maxsize <= 0:
+            with self._lock:
+                self.skipped += 1
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.hits + self.misses
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / calls if calls else 0.0, "evictions": self.evictions,
+                    "invalidations": self.invalidations, "skipped": self.skipped}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = self.skipped = 0
+
+cache = QuestionCache()
+register_cache("questions", cache.stats)
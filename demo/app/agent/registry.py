@@ -1,22 +1,333 @@
 # app/agent/registry.py
+"""
+Registro declarativo de herramientas del agente y de /valerio/ask.
 
+Cada Tool declara:
+  intents    intenciones del NLU que la seleccionan (índice intención -> tool)
+  keywords   conjuntos de palabras que la seleccionan aunque el NLU falle
+             ({"var", "montecarlo"} gana a {"montecarlo"}: manda el más específico)
+  schema     argumentos de la función con su tipo
+  slots      intención de agent/slots.py de la que salen los argumentos (+ renombres)
+  cost       light | medium | heavy (informativo, para /tools)
+  policy     inline | thread | process | job
+  timeout    segundos; concurrency: llamadas simultáneas como máximo
+
+route() resuelve la herramienta con búsquedas en diccionario sobre las palabras
+ya escaneadas de la pregunta (sin cadenas de if/elif ni búsquedas de subcadenas),
+y Tool.run() aplica política, timeout, límite de concurrencia y métricas.
+
+Política, timeout y concurrencia se pueden cambiar por entorno:
+VALERIO_TOOL_<NOMBRE>_POLICY / _TIMEOUT / _CONCURRENCY, p. ej.
+VALERIO_TOOL_CALC_MARKOWITZ_POLICY=process, o para todas a la vez con
+VALERIO_TOOL_POLICY / _TIMEOUT / _CONCURRENCY. VALERIO_TOOL_POLICY=job solo
+se aplica a las herramientas con target de jobs; las demás mantienen la suya.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from app import metrics, progress, render
 from ..calculators.black_scholes import calc_black_scholes_internal
 from ..calculators.var_montecarlo import var_montecarlo
-from ..calculators.var_simple import calculate_var
+from ..calculators.var_simple import calc_var_simple
 from ..calculators.capm import calcular_capm
 from ..calculators.markowitz import optimizar_portafolio
 from ..calculators.montecarlo import calc_montecarlo
-from ..ml.model import risk_model
+from ..ml.model import predict_risk
 from ..ml.predict_stock import predict_stock
+from ..ml.batch_forecast import predict_stocks
+from ..ml.valerio_core_adapter import predict_one
+
+POLICIES = ("inline", "thread", "process", "job")
+COSTS = ("light", "medium", "heavy")
+THREADS = int(os.getenv("VALERIO_TOOL_THREADS", "8"))
+PROCESSES = int(os.getenv("VALERIO_TOOL_PROCESSES", str(max(1, (os.cpu_count() or 2) // 2))))
+LATENCY_WINDOW = 1024   # últimas latencias por herramienta para p50/p95
+
+class ToolTimeout(TimeoutError):
+    """La herramienta superó su timeout."""
+
+class ToolBusy(RuntimeError):
+    """La herramienta está en su límite de concurrencia."""
+
+_threads = None
+_processes = None
+_pools_lock = threading.Lock()
+
+def _thread_pool() -> ThreadPoolExecutor:
+    global _threads
+    with _pools_lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="valerio-tool")
+        return _threads
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _processes
+    with _pools_lock:
+        if _processes is None:
+            _processes = ProcessPoolExecutor(max_workers=PROCESSES)
+        return _processes
+
+def _call_in_process(fn, graphs: bool, kwargs: dict):
+    # en el proceso hijo no llegan las ContextVar: se reaplica el interruptor de gráficos
+    if graphs:
+        return fn(**kwargs)
+    with render.disabled():
+        return fn(**kwargs)
+
+def _call_with_deadline(fn, kwargs: dict, deadline: float, cancel: threading.Event):
+    """Ejecuta fn; los motores por bloques (progress.report) paran al vencer el plazo o si se cancela."""
+    def on_progress(done, total):
+        if cancel.is_set() or time.perf_counter() > deadline:
+            raise progress.Cancelled()
+
+    token = progress.bind(on_progress)
+    try:
+        return fn(**kwargs)
+    finally:
+        progress.reset(token)
+
+def _env(name: str, key: str, default, cast, applies=lambda value: True):
+    # por herramienta y, si no, para todas (VALERIO_TOOL_POLICY=process) si 'applies' a esta
+    value = os.getenv(f"VALERIO_TOOL_{name.upper()}_{key}")
+    if value:
+        return cast(value)
+    value = os.getenv(f"VALERIO_TOOL_{key}")
+    return cast(value) if value and applies(cast(value)) else default
+
+class Tool:
+    def __init__(self, name: str, fn, schema: dict, intents=(), keywords=(), slots: str = None,
+                 rename: dict = None, required=(), cost: str = "light", policy: str = "inline",
+                 timeout: float = 30.0, concurrency: int = 8, job: str = None, demo: dict = None):
+        self.name = name
+        self.fn = fn
+        self.schema = schema
+        self.intents = tuple(intents)
+        self.keywords = tuple(frozenset(k) for k in keywords)
+        self.slot_intent = slots or name
+        self.rename = rename or {}
+        self.required = tuple(required)
+        self.cost = cost
+        self.policy = _env(name, "POLICY", policy, str, applies=lambda p: p != "job" or bool(job))
+        self.timeout = _env(name, "TIMEOUT", timeout, float)
+        self.concurrency = _env(name, "CONCURRENCY", concurrency, int)
+        self.job = job
+        self.demo = dict(demo or {})   # entradas de ejemplo para /valerio/ask
+        if cost not in COSTS or self.policy not in POLICIES:
+            raise ValueError(f"{name}: cost en {COSTS} y policy en {POLICIES}.")
+        if self.policy == "job" and not job:
+            raise ValueError(f"{name}: la política 'job' necesita el nombre del target de jobs.")
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._latency = deque(maxlen=LATENCY_WINDOW)
+        self.calls = self.errors = self.timeouts = self.busy = self.in_flight = 0
+        self.seconds = 0.0
+        self._span = metrics.SPANS.labels(f"tool.{name}")
+
+    # ---------- Argumentos ----------
+    def extract(self, understanding) -> dict:
+        """Argumentos de la función a partir de los slots (cacheados) de la pregunta."""
+        out = {}
+        for k, v in understanding.slots(self.slot_intent).items():
+            k = self.rename.get(k, k)
+            if k in self.schema:
+                out[k] = v
+        return out
+
+    def missing(self, kwargs: dict) -> list:
+        return [k for k in self.required if k not in kwargs]
+
+    def coerce(self, kwargs: dict) -> dict:
+        """Valida contra el schema: argumentos desconocidos -> ValueError; tipos numéricos convertidos."""
+        unknown = set(kwargs) - set(self.schema)
+        if unknown:
+            raise ValueError(f"{self.name}: argumentos desconocidos {sorted(unknown)}.")
+        out = {}
+        for k, v in kwargs.items():
+            typ = self.schema[k]
+            out[k] = typ(v) if typ in (int, float) and v is not None else v
+        return out
+
+    # ---------- Ejecución ----------
+    def run(self, tenant: str = None, **kwargs):
+        kwargs = self.coerce(kwargs)
+        if self.policy == "job":
+            return self._submit_job(kwargs, tenant)
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.busy += 1
+            raise ToolBusy(f"{self.name}: {self.concurrency} ejecuciones en curso; inténtalo de nuevo.")
+        with self._lock:
+            self.in_flight += 1
+        t0 = time.perf_counter()
+        ok = timed_out = False
+        try:
+            out = self._execute(kwargs)
+            ok = True
+            return out
+        except (ToolTimeout, progress.Cancelled):
+            timed_out = True
+            raise ToolTimeout(f"{self.name}: superó el timeout de {self.timeout:g} s.") from None
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._slots.release()
+            self._span.observe(elapsed)
+            with self._lock:
+                self.in_flight -= 1
+                self.calls += 1
+                self.seconds += elapsed
+                self._latency.append(elapsed)
+                if timed_out:
+                    self.timeouts += 1
+                elif not ok:
+                    self.errors += 1
+
+    def _execute(self, kwargs: dict):
+        # inline: sin hilo extra; el plazo solo se comprueba en los progress.report del motor
+        deadline = time.perf_counter() + self.timeout
+        cancel = threading.Event()
+        if self.policy == "inline":
+            return _call_with_deadline(self.fn, kwargs, deadline, cancel)
+        if self.policy == "thread":
+            # copy_context: el hilo hereda render.disabled() y demás ContextVar
+            ctx = contextvars.copy_context()
+            future = _thread_pool().submit(ctx.run, _call_with_deadline, self.fn, kwargs, deadline, cancel)
+        else:
+            future = _process_pool().submit(_call_in_process, self.fn, render.enabled(), kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            cancel.set()          # el hilo se detiene en su siguiente progress.report
+            future.cancel()
+            raise ToolTimeout() from None
+
+    def _submit_job(self, kwargs: dict, tenant: str) -> dict:
+        from app.jobs import manager
+        job = manager.submit(self.job, kwargs, tenant=tenant or "default")
+        with self._lock:
+            self.calls += 1
+        return {
+            "message": "Cálculo largo: enviado a la cola de jobs.",
+            "job": job.to_dict(with_result=False),
+            "status_url": f"/jobs/{job.id}",
+            "result": None,
+            "graph": None,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latency)
+            n = len(lat)
+            return {
+                "intents": list(self.intents), "cost": self.cost, "policy": self.policy,
+                "timeout": self.timeout, "concurrency": self.concurrency,
+                "calls": self.calls, "errors": self.errors, "timeouts": self.timeouts, "busy": self.busy,
+                "in_flight": self.in_flight,
+                "mean_seconds": self.seconds / self.calls if self.calls else None,
+                "p50_seconds": lat[n // 2] if n else None,
+                "p95_seconds": lat[min(n - 1, int(n * 0.95))] if n else None,
+                "max_seconds": lat[-1] if n else None,
+            }
+
+# ============================
+# Herramientas
+# ============================
+_VAR_SCHEMA = {"returns": list, "alpha": float, "horizon": int, "amount": float}
+
+REGISTRY = [
+    Tool("calc_black_scholes", calc_black_scholes_internal,
+         {"S": float, "K": float, "r": float, "sigma": float, "T": float, "option": str, "lang": str},
+         intents=("calc_black_scholes",), keywords=({"black", "scholes"},),
+         required=("S", "K", "r", "sigma", "T"),
+         demo={"S": 150, "K": 145, "T": 1, "r": 0.05, "sigma": 0.2, "option": "call"}),
+    Tool("calc_var_montecarlo", var_montecarlo, {**_VAR_SCHEMA, "sims": int},
+         intents=("calc_var", "calc_var_montecarlo"), keywords=({"var", "montecarlo"},), slots="calc_var",
+         required=("alpha", "horizon"), cost="medium", policy="thread", timeout=60.0, concurrency=4,
+         job="calc_var_montecarlo", demo={"alpha": 0.05, "horizon": 5, "sims": 10_000, "amount": 200_000}),
+    Tool("calc_var_simple", calc_var_simple, {**_VAR_SCHEMA, "method": str, "lam": float},
+         intents=("calc_var_simple",), slots="calc_var", rename={"lambda": "lam"},
+         keywords=({"var", "ewma"}, {"var", "historico"}, {"var", "historical"}, {"var", "hist"}),
+         required=("alpha", "horizon"),
+         demo={"returns": [-0.02, 0.01, 0.015, -0.01], "alpha": 0.05, "horizon": 1}),
+    Tool("calc_montecarlo", calc_montecarlo,
+         {"S0": float, "mu": float, "sigma": float, "T": float, "steps": int, "sims": int},
+         intents=("calc_montecarlo",), keywords=({"montecarlo"},), rename={"s0": "S0", "t": "T"},
+         required=("S0", "mu", "sigma", "T", "steps", "sims"), cost="heavy", policy="thread",
+         timeout=120.0, concurrency=2, job="calc_montecarlo",
+         demo={"S0": 100, "mu": 0.05, "sigma": 0.2, "T": 1.0, "steps": 252, "sims": 10_000}),
+    Tool("calc_capm", calcular_capm, {"rf": float, "beta": float, "rm": float},
+         intents=("calc_capm",), keywords=({"capm"},), required=("rf", "beta", "rm"),
+         demo={"rf": 0.02, "beta": 1.1, "rm": 0.08}),
+    Tool("calc_markowitz", optimizar_portafolio, {"rendimientos": list, "covarianzas": list, "rf": float},
+         intents=("calc_markowitz",), keywords=({"markowitz"},), required=("rendimientos", "covarianzas"),
+         cost="medium", policy="thread", timeout=60.0, concurrency=4, job="calc_markowitz",
+         demo={"rendimientos": [0.1, 0.15, 0.2],
+               "covarianzas": [[0.005, -0.010, 0.004], [-0.010, 0.040, -0.002], [0.004, -0.002, 0.023]]}),
+    Tool("ml_predict", predict_one, {"row_idx": int}, intents=("ml_predict",), rename={"row": "row_idx"},
+         required=("row_idx",)),
+    Tool("predict_risk", predict_risk, {"zscore": float, "volatility": float, "returns": float, "debt_ratio": float},
+         intents=("predict_risk",), required=("zscore", "volatility", "returns", "debt_ratio")),
+    Tool("predict_stock", predict_stock, {"ticker": str, "days": int, "model": str},
+         intents=("predict_stock",), keywords=tuple({w} for w in ("apple", "tesla", "amazon", "microsoft",
+                                                                   "google", "meta")),
+         required=("ticker",), cost="medium", policy="thread", timeout=60.0, concurrency=4),
+    Tool("predict_stocks", predict_stocks, {"tickers": list, "days": int, "model": str},
+         slots="predict_stock", required=("tickers",), cost="heavy", policy="thread", timeout=300.0,
+         concurrency=2),
+]
+
+TOOLS = {t.name: t for t in REGISTRY}
+BY_INTENT = {intent: t for t in REGISTRY for intent in t.intents}
+
+# palabra disparadora -> reglas (rango, palabras, tool); el rango ordena de más a
+# menos específica y, a igualdad, por orden de declaración
+_TRIGGERS = {}
+for _i, _tool in enumerate(REGISTRY):
+    for _words in _tool.keywords:
+        for _w in _words:
+            _TRIGGERS.setdefault(_w, []).append(((-len(_words), _i), _words, _tool))
+for _rules in _TRIGGERS.values():
+    _rules.sort(key=lambda r: r[0])
+# 'var' a secas: VaR simple, salvo que el NLU ya haya elegido el Monte Carlo
+_VAR_FAMILY = (TOOLS["calc_var_simple"], TOOLS["calc_var_montecarlo"])
+
+def route(intent: str, words: set):
+    """
+    Herramienta para una intención y las palabras escaneadas de la pregunta.
+    Una palabra clave explícita (p. ej. 'capm', 'var' + 'montecarlo') manda
+    sobre el NLU; sin palabras clave decide la intención. None: sin herramienta.
+    """
+    best = None
+    for w in words & _TRIGGERS.keys():
+        rank, rule, tool = next((r for r in _TRIGGERS[w] if r[1] <= words), (None, None, None))
+        if rule is not None and (best is None or rank < best[0]):
+            best = (rank, tool)
+    if best is not None:
+        return best[1]
+    by_intent = BY_INTENT.get(intent)
+    if "var" in words and by_intent not in _VAR_FAMILY:
+        return _VAR_FAMILY[0]
+    return by_intent
+
+def stats() -> dict:
+    return {"threads": THREADS, "processes": PROCESSES, "tools": {t.name: t.stats() for t in REGISTRY}}
+
+_METRICS = (("calls", "counter", "Ejecuciones por herramienta."),
+            ("errors", "counter", "Ejecuciones con error."),
+            ("timeouts", "counter", "Ejecuciones que superaron el timeout."),
+            ("busy", "counter", "Llamadas rechazadas por el límite de concurrencia."),
+            ("in_flight", "gauge", "Ejecuciones en curso."))
 
-TOOLS = {
-    "calc_black_scholes": calc_black_scholes_internal,   # Black-Scholes
-    "calc_var_montecarlo": var_montecarlo,               
-    "calc_var_simple": calculate_var,                    # VaR simple
-    "calc_capm": calcular_capm,                          # CAPM
-    "calc_markowitz": optimizar_portafolio,              # Markowitz
-    "calc_montecarlo": calc_montecarlo,                  # Monte Carlo Simulation
-    "predict_risk_model": risk_model,                    # Modelo ML de riesgo
-    "predict_stock": predict_stock                       # Predicción bursátil
-}
+def _collect() -> list:
+    lines = []
+    for key, kind, doc in _METRICS:
+        name = f"valerio_tool_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{tool="{t.name}"}} {getattr(t, key)}' for t in REGISTRY]
+    return lines
 
+metrics.register_collector(_collect)
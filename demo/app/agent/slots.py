@@ -1,212 +1,347 @@
-import re, ast
-
-def _to_float(x: str) -> float:
-    return float(x.replace(",", ".").strip())
+"""
+Extracción de slots del agente en una sola pasada.
+
+scan() tokeniza la pregunta una vez con una gramática precompilada y reconoce
+a la vez:
+  clave=valor   'S=100', 'beta 1.2', 'horizonte: 10' (alias en ES/EN)
+  porcentajes   '2.5%', '95 percent'
+  dinero        '200k', '1M', '$5000'
+  horizontes    '5 días', '2 semanas', '1 mes', '1 año' (días hábiles)
+  listas        '[0.1,0.15]', '[[0.005,-0.01],[...]]' (parser numérico acotado)
+
+typed_slots(scan, intent) convierte ese resultado en los slots tipados de
+cada intención; extract(text, intent) hace las dos cosas. Las funciones
+extract_* de siempre se mantienen como atajos.
+"""
+import re
 
-def parse_percent(val: str):
-    v = float(val.replace("%", ""))
-    return v / 100.0 if "%" in val else v
+MAX_LIST_CHARS = 20_000
+MAX_LIST_ITEMS = 10_000
+
+_FOLD = (("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u"), ("ü", "u"), ("ñ", "n"))
+
+# grupos: lista | ($)número(k/m | %) | palabra. Lo que no casa (':', '=',
+# comas, paréntesis...) se salta sin cortar la clave pendiente.
+_TOKEN = re.compile(r"""
+    (\[(?:[-+\d\s.,e]|\[[-+\d\s.,e]*\])*\])
+  | (\$\s*)?([-+]?\d+(?:[.,]\d+)?)(?:([km])\b|\s*(%))?
+  | ([^\W\d_]\w*)
+""", re.X)
+_LIST_ROW = re.compile(r"\[([^\[\]]*)\]")
+
+# palabra (minúsculas, sin tildes) -> clave canónica
+KEYS = {
+    "s": "S", "k": "K", "r": "r", "sigma": "sigma", "vol": "sigma", "t": "T",
+    "s0": "S0", "mu": "mu", "steps": "steps", "pasos": "steps",
+    "sims": "sims", "simulaciones": "sims", "simulations": "sims",
+    "rf": "rf", "tasa_libre": "rf", "beta": "beta", "rm": "rm", "mercado": "rm",
+    "lambda": "lambda", "λ": "lambda",
+    "horizonte": "horizon", "horizon": "horizon", "hor": "horizon",
+    "monto": "amount", "amount": "amount",
+    "nivel": "level", "level": "level", "at": "level", "alfa": "alpha", "alpha": "alpha",
+    "row": "row", "fila": "row",
+    "zscore": "zscore", "volatility": "volatility", "volatilidad": "volatility",
+    "returns": "returns", "retornos": "returns", "debt_ratio": "debt_ratio",
+    "rend": "rend", "rendimientos": "rend",
+    "cov": "cov", "covariance": "cov", "covarianza": "cov", "covarianzas": "cov",
+}
+# pares de palabras que funcionan como una sola
+BIGRAMS = {("monte", "carlo"): "montecarlo", ("debt", "ratio"): "debt_ratio", ("de", "deuda"): "debt_ratio",
+           ("tasa", "libre"): "tasa_libre", ("random", "forest"): "random_forest"}
+LIST_KEYS = {"rend": "rend", "returns": "rend", "cov": "cov"}
+
+# unidades que siguen a un número suelto: horizonte en días hábiles o conteos
+DAY_UNITS = {"d": 1, "dia": 1, "dias": 1, "day": 1, "days": 1,
+             "semana": 5, "semanas": 5, "week": 5, "weeks": 5,
+             "mes": 21, "meses": 21, "month": 21, "months": 21,
+             "ano": 252, "anos": 252, "year": 252, "years": 252}
+COUNT_UNITS = {"simulaciones": "sims", "simulations": "sims", "sims": "sims",
+               "pasos": "steps", "steps": "steps"}
+PERCENT_WORDS = {"percent", "porciento"}
+
+VALID_TICKERS = {"AAPL", "TSLA", "MSFT", "AMZN", "GOOGL", "META"}
+COMPANY_TICKERS = {"apple": "AAPL", "tesla": "TSLA", "amazon": "AMZN", "microsoft": "MSFT",
+                   "google": "GOOGL", "meta": "META"}
+STOCK_MODELS = (   # por prioridad
+    ({"xgboost"}, "xgboost_reg"),
+    ({"svm", "svr", "vector"}, "svr"),
+    ({"forest", "bosque", "random_forest"}, "random_forest_reg"),
+    ({"linear", "regresion", "regression"}, "linear_regression"),
+)
+
+# tipos de los slots por intención (los enteros se redondean)
+SCHEMAS = {
+    "calc_black_scholes": {"S": float, "K": float, "r": float, "sigma": float, "T": float, "option": str},
+    "calc_var": {"method": str, "lambda": float, "horizon": int, "amount": float, "alpha": float, "sims": int},
+    "calc_montecarlo": {"s0": float, "mu": float, "sigma": float, "t": float, "steps": int, "sims": int},
+    "ml_predict": {"row": int},
+    "calc_capm": {"rf": float, "beta": float, "rm": float},
+    "calc_markowitz": {"rendimientos": list, "covarianzas": list, "error": str},
+    "predict_risk": {"zscore": float, "volatility": float, "returns": float, "debt_ratio": float},
+    "predict_stock": {"ticker": str, "tickers": list, "days": int, "model": str},
+}
+SCHEMAS["calc_var_simple"] = SCHEMAS["calc_var_montecarlo"] = SCHEMAS["calc_var"]
+
+class Num:
+    """Número reconocido con sus modificadores (%, k/m, $, unidad)."""
+    __slots__ = ("value", "pct", "mult", "cur", "unit")
+
+    def __init__(self, value: float, pct: bool, mult: str, cur: bool):
+        self.value, self.pct, self.mult, self.cur, self.unit = value, pct, mult, cur, None
+
+    @property
+    def money(self) -> float:
+        return self.value * {"k": 1e3, "m": 1e6}.get(self.mult, 1.0)
+
+    @property
+    def frac(self) -> float:
+        """Tasa como fracción: '2.5%' o '2.5' -> 0.025; '0.025' se queda igual."""
+        return self.value / 100 if self.pct or self.value > 1 else self.value
+
+    @property
+    def plain(self) -> bool:
+        return not (self.pct or self.mult or self.cur or self.unit)
+
+class Scan:
+    """Resultado de la pasada: claves, números sueltos, listas y palabras."""
+    __slots__ = ("kv", "bare", "lists", "words", "tickers")
+
+    def __init__(self):
+        self.kv = {}          # clave canónica -> Num (la primera aparición gana)
+        self.bare = []        # números sin clave, en orden
+        self.lists = []       # (clave o None, texto de la lista)
+        self.words = set()    # palabras en minúsculas y sin tildes
+        self.tickers = []
+
+def _to_float(s: str) -> float:
+    return float(s.replace(",", "."))
+
+def scan(text: str) -> Scan:
+    """Una pasada sobre el texto con la gramática precompilada."""
+    out = Scan()
+    key = None            # clave pendiente de valor
+    last = None           # último número (para unidades y 'percent')
+    bound = False         # ... y si ya tenía clave
+    prev = None           # palabra anterior (para BIGRAMS)
+    text = text.lower()
+    if not text.isascii():
+        for a, b in _FOLD:
+            text = text.replace(a, b)
+    for lst, cur, num, mult, pct, w in _TOKEN.findall(text):
+        if num:
+            n = Num(_to_float(num), bool(pct), mult, bool(cur))
+            bound = key is not None
+            if bound:
+                out.kv.setdefault(key, n)
+            else:
+                out.bare.append(n)
+            key, last, prev = None, n, None
+            continue
+        if lst:
+            out.lists.append((LIST_KEYS.get(key), lst))
+            key = last = prev = None
+            continue
+        if prev is not None and (prev, w) in BIGRAMS:
+            w = BIGRAMS[prev, w]
+        prev = w
+        out.words.add(w)
+        t = COMPANY_TICKERS.get(w) or w.upper()
+        if t in VALID_TICKERS and t not in out.tickers:
+            out.tickers.append(t)
+        if last is not None and last.unit is None and (w in DAY_UNITS or (w in COUNT_UNITS and not bound)):
+            last.unit = w
+            key = None
+        elif last is not None and w in PERCENT_WORDS:
+            last.pct = True
+        else:
+            key = KEYS.get(w)
+        last = None
+    return out
 
-def parse_money(val: str):
-    v = val.lower().replace(",", "").replace("$", "").strip()
-    mult = 1.0
-    if v.endswith("k"):
-        mult, v = 1e3, v[:-1]
-    if v.endswith("m"):
-        mult, v = 1e6, v[:-1]
-    return float(v) * mult
+def parse_numeric_list(s: str) -> list:
+    """
+    '[0.1, 0.2]' -> [0.1, 0.2];  '[[1,2],[3,4]]' -> [[1.0, 2.0], [3.0, 4.0]].
+    Solo números y como mucho dos niveles; tamaño acotado. ValueError si no cuadra.
+    """
+    s = s.strip()
+    if len(s) > MAX_LIST_CHARS:
+        raise ValueError(f"lista demasiado larga (máx. {MAX_LIST_CHARS} caracteres)")
+    if not (s.startswith("[") and s.endswith("]")):
+        raise ValueError("la lista debe ir entre corchetes")
+    inner = s[1:-1].strip()
+    if not inner.startswith("["):
+        if "[" in inner or "]" in inner:
+            raise ValueError("corchetes desbalanceados")
+        return _row(inner)
+    rows = _LIST_ROW.findall(inner)
+    if _LIST_ROW.sub("", inner).replace(",", "").strip():
+        raise ValueError("formato de matriz no válido")
+    out = [_row(r) for r in rows]
+    if sum(map(len, out)) > MAX_LIST_ITEMS:
+        raise ValueError(f"demasiados elementos (máx. {MAX_LIST_ITEMS})")
+    if len({len(r) for r in out}) > 1:
+        raise ValueError("las filas tienen distinta longitud")
+    return out
 
+def _row(s: str) -> list:
+    parts = [p.strip() for p in s.split(",")]
+    if parts == [""]:
+        return []
+    if len(parts) > MAX_LIST_ITEMS:
+        raise ValueError(f"demasiados elementos (máx. {MAX_LIST_ITEMS})")
+    return [float(p) for p in parts]
+
+# ---------------- Slots por intención ----------------
+def _first(nums, cond):
+    return next((n for n in nums if cond(n)), None)
+
+def _horizon(sc: Scan):
+    if "horizon" in sc.kv:
+        n = sc.kv["horizon"]
+        return n.value * DAY_UNITS.get(n.unit, 1)
+    n = _first(sc.bare, lambda n: n.unit in DAY_UNITS)
+    return n.value * DAY_UNITS[n.unit] if n else None
+
+def _count(sc: Scan, key: str):
+    if key in sc.kv:
+        return sc.kv[key].value
+    n = _first(sc.bare, lambda n: COUNT_UNITS.get(n.unit) == key)
+    return n.value if n else None
+
+def _bs(sc: Scan) -> dict:
+    out = {k: sc.kv[k].value for k in ("S", "K", "T") if k in sc.kv}
+    for k in ("r", "sigma"):
+        if k in sc.kv:
+            out[k] = sc.kv[k].frac
+    if sc.words & {"call", "llamada"}:
+        out["option"] = "call"
+    elif sc.words & {"put", "venta"}:
+        out["option"] = "put"
+    return out
 
-# ---------------- Black-Scholes ----------------
-def extract_bs(text: str) -> dict:
+def _var(sc: Scan) -> dict:
     out = {}
-    num = r"([-+]?\d+(?:[\.,]\d+)?)"
-
-    S = re.search(r"\bS\s*[:=]?\s*" + num, text, re.I)
-    K = re.search(r"\bK\s*[:=]?\s*" + num, text, re.I)
-    r_ = re.search(r"\br\s*[:=]?\s*" + num + r"\s*%?", text, re.I)
-    sg = re.search(r"\b(?:sigma|vol)\s*[:=]?\s*" + num + r"\s*%?", text, re.I)
-    T = re.search(r"\bT\s*[:=]?\s*" + num, text, re.I)
-    opt = re.search(r"\b(call|put|llamada|venta)\b", text, re.I)
-
-    if S: out["S"] = _to_float(S.group(1))
-    if K: out["K"] = _to_float(K.group(1))
-    if r_:
-        rv = _to_float(r_.group(1))
-        out["r"] = rv / 100 if "%" in r_.group(0) or rv > 1 else rv
-    if sg:
-        sv = _to_float(sg.group(1))
-        out["sigma"] = sv / 100 if "%" in sg.group(0) or sv > 1 else sv
-    if T: out["T"] = _to_float(T.group(1))
-    if opt:
-        out["option"] = "call" if opt.group(1).lower().startswith(("call", "llam")) else "put"
+    w = sc.words
+    if w & {"historico", "historical", "hist"}:
+        out["method"] = "historic"
+    elif "ewma" in w:
+        out["method"] = "ewma"
+    elif "montecarlo" in w:
+        out["method"] = "montecarlo"
+    if "lambda" in sc.kv:
+        out["lambda"] = sc.kv["lambda"].value
+    h = _horizon(sc)
+    if h is not None:
+        out["horizon"] = h
+    amt = sc.kv.get("amount") or _first(sc.bare, lambda n: n.mult or n.cur) \
+        or _first(sc.bare, lambda n: n.plain and n.value >= 1000)
+    if amt is not None:
+        out["amount"] = amt.money
+    if "alpha" in sc.kv:
+        a = sc.kv["alpha"].frac
+        out["alpha"] = 1 - a if a > 0.5 else a               # 'alpha 95' = nivel
+    else:
+        lvl = sc.kv.get("level") or _first(sc.bare, lambda n: n.pct) \
+            or _first(sc.bare, lambda n: n.plain and 0 < n.value <= 100)
+        if lvl is not None:
+            out["alpha"] = 1 - lvl.value / 100 if lvl.pct or lvl.value > 1 else lvl.value
+    if "alpha" in out:
+        out["alpha"] = round(out["alpha"], 6)
+    sims = _count(sc, "sims")
+    if sims is not None:
+        out["sims"] = sims
     return out
 
-# ---------------- Helpers ----------------
-def _to_float(s: str) -> float | None:
-    """Convierte string a float de forma robusta."""
-    try:
-        s = s.replace(",", ".").strip()
-        if s.endswith("."):
-            s = s[:-1]
-        return float(s)
-    except ValueError:
-        return None
-
-# ---------------- VaR (simple, histórico, montecarlo, ewma) ----------------
-def extract_var(text: str) -> dict:
+def _montecarlo(sc: Scan) -> dict:
     out = {}
+    for src, dst in (("S0", "s0"), ("mu", "mu"), ("sigma", "sigma"), ("T", "t")):
+        if src in sc.kv:
+            n = sc.kv[src]
+            out[dst] = n.value / 100 if n.pct else n.value
+    if "t" not in out:
+        h = _horizon(sc)
+        if h is not None:
+            out["t"] = h / 252
+    for k in ("steps", "sims"):
+        v = _count(sc, k)
+        if v is not None:
+            out[k] = v
+    return out
 
-    # método: hist | ewma | montecarlo
-    m = re.search(r"\b(hist[oó]rico|historical|ewma|monte\s*carlo|montecarlo)\b", text, re.I)
-    if m:
-        method = m.group(1).lower().replace(" ", "")
-        if "hist" in method:
-            out["method"] = "historic"
-        elif "ewma" in method:
-            out["method"] = "ewma"
-        elif "monte" in method:
-            out["method"] = "montecarlo"
-
-    # lambda (para ewma)
-    lam = re.search(r"(?:lambda|λ)\s*[:=]?\s*([\d\.,]+)", text, re.I)
-    if lam:
-        val = _to_float(lam.group(1))
-        if val is not None:
-            out["lambda"] = val
-
-    # horizonte
-    hz = re.search(r"(?:horizonte|hor|horizon)\s*[:=]?\s*(\d+)", text, re.I) or \
-         re.search(r"\b(\d+)\s*(?:d[ií]as|days|d)\b", text, re.I) or \
-         re.search(r"over\s+(\d+)\s+days", text, re.I)
-    if hz:
-        out["horizon"] = int(hz.group(1))
-
-    # monto
-    amt = re.search(r"(?:monto|amount)\s*[:=]?\s*([\d\.,]+)\s*[kKmM]?", text, re.I)
-    if amt:
-        val = _to_float(amt.group(1))
-        if val is not None:
-            raw = amt.group(0).lower()
-            if "k" in raw:
-                val *= 1000
-            elif "m" in raw:
-                val *= 1_000_000
-            out["amount"] = val
-
-    # nivel/alpha
-    lvl = re.search(r"(?:nivel|alfa|alpha|at|level)\s*[:=]?\s*([\d\.,]+)\s*%?", text, re.I) or \
-          re.search(r"\b(\d{1,3})\s*%?\b", text, re.I)
-    if lvl:
-        x = _to_float(lvl.group(1))
-        if x is not None:
-            if x > 1:   # 95 → 0.05
-                out["alpha"] = round(1 - x / 100.0, 6)
-            else:       # 0.05 → 0.05
-                out["alpha"] = round(x, 6)
+def _row_slot(sc: Scan) -> dict:
+    return {"row": sc.kv["row"].value} if "row" in sc.kv else {}
 
+def _capm(sc: Scan) -> dict:
+    out = {k: sc.kv[k].frac for k in ("rf", "rm") if k in sc.kv}
+    if "beta" in sc.kv:
+        out["beta"] = sc.kv["beta"].value
     return out
 
-# ---------------- Monte Carlo ----------------
-import re
+def _markowitz(sc: Scan) -> dict:
+    out = {}
+    names = {"rend": "rendimientos", "cov": "covarianzas"}
+    for key, raw in sc.lists:
+        try:
+            values = parse_numeric_list(raw)
+        except ValueError as e:
+            out["error"] = f"Formato inválido en {names.get(key, 'lista')}: {e}"
+            continue
+        if key is None:   # sin clave: vector -> rendimientos, matriz -> covarianzas
+            key = "cov" if values and isinstance(values[0], list) else "rend"
+        out.setdefault(names[key], values)
+    return out
 
-def extract_montecarlo(text: str) -> dict:
-    slots = {}
-    text = text.lower()
+def _risk(sc: Scan) -> dict:
+    return {k: sc.kv[k].value for k in ("zscore", "volatility", "returns", "debt_ratio") if k in sc.kv}
 
-    patterns = {
-        "s0": r"s0\s*=\s*([\d\.]+)",
-        "mu": r"mu\s*=\s*([\d\.]+)",
-        "sigma": r"sigma\s*=\s*([\d\.]+)",
-        "t": r"t\s*=\s*([\d\.]+)",
-        "steps": r"(?:steps|pasos)\s*=\s*(\d+)",
-        "sims": r"(?:sims|simulaciones)\s*=\s*(\d+)",
-    }
-
-    for key, pat in patterns.items():
-        m = re.search(pat, text, re.IGNORECASE)  # 👈 ignora mayúsculas/minúsculas
-        if m:
-            try:
-                slots[key] = float(m.group(1)) if key not in ("steps", "sims") else int(m.group(1))
-            except:
-                pass
-
-    return slots
-
-# ---------------- ML row ----------------
-def extract_row(text: str):
-    # Busca expresiones como: "row=7", "fila 7", "predice la fila 10"
-    m = re.search(r"(?:row|fila)\s*[:=]?\s*(\d+)", text, re.I)
-    if m:
-        return {"row": int(m.group(1))}
-    return {}
-
-# ---------------- CAPM ----------------
-def extract_capm(text: str) -> dict:
+def _stock(sc: Scan) -> dict:
     out = {}
+    if sc.tickers:
+        out["ticker"] = sc.tickers[0]
+        out["tickers"] = list(sc.tickers)
+    h = _horizon(sc)
+    out["days"] = h if h is not None else 1
+    out["model"] = next((m for aliases, m in STOCK_MODELS if sc.words & aliases), "xgboost_reg")
+    return out
+
+_BUILDERS = {
+    "calc_black_scholes": _bs, "calc_var": _var, "calc_var_simple": _var, "calc_var_montecarlo": _var,
+    "calc_montecarlo": _montecarlo, "ml_predict": _row_slot, "calc_capm": _capm,
+    "calc_markowitz": _markowitz, "predict_risk": _risk, "predict_stock": _stock,
+}
+
+def typed_slots(sc: Scan, intent: str) -> dict:
+    """Slots de 'intent' con los tipos de SCHEMAS ({} para intenciones sin slots)."""
+    build = _BUILDERS.get(intent)
+    if build is None:
+        return {}
+    out = build(sc)
+    for k, typ in SCHEMAS[intent].items():
+        if typ is int and k in out:
+            out[k] = int(round(out[k]))
+    return out
 
-    # rf puede venir como "0.02", "2%", "rf=2", etc.
-    rf = re.search(r"rf\s*=?\s*([\d\.,]+)\s*%?", text, re.I)
-    beta = re.search(r"beta\s*=?\s*([\d\.,]+)", text, re.I)
-    rm = re.search(r"rm\s*=?\s*([\d\.,]+)\s*%?", text, re.I)
+def extract(text: str, intent: str) -> dict:
+    return typed_slots(scan(text), intent)
 
-    if rf:
-        val = float(rf.group(1).replace(",", "."))
-        out["rf"] = val / 100 if "%" in rf.group(0) or val > 1 else val
+# ---------------- Atajos (API anterior) ----------------
+def extract_bs(text: str) -> dict:
+    return extract(text, "calc_black_scholes")
 
-    if beta:
-        out["beta"] = float(beta.group(1).replace(",", "."))
+def extract_var(text: str) -> dict:
+    return extract(text, "calc_var")
 
-    if rm:
-        val = float(rm.group(1).replace(",", "."))
-        out["rm"] = val / 100 if "%" in rm.group(0) or val > 1 else val
+def extract_montecarlo(text: str) -> dict:
+    return extract(text, "calc_montecarlo")
 
-    return out
+def extract_row(text: str) -> dict:
+    return extract(text, "ml_predict")
+
+def extract_capm(text: str) -> dict:
+    return extract(text, "calc_capm")
 
-# ---------------- Markowitz ----------------
 def extract_markowitz(text: str) -> dict:
-    out = {}
-    rend = re.search(r"(?:rend|returns)[=:\s]*([\[\]0-9.,\s-]+)", text, re.I)
-    cov = re.search(r"(?:cov|covariance)[=:\s]*([\[\]0-9.,\s\-\[\]]+)", text, re.I)
+    return extract(text, "calc_markowitz")
 
-    if rend:
-        try:
-            out["rendimientos"] = ast.literal_eval(rend.group(1))
-        except Exception as e:
-            out["error"] = f"Formato inválido en rendimientos: {e}"
-    if cov:
-        try:
-            out["covarianzas"] = ast.literal_eval(cov.group(1))
-        except Exception as e:
-            out["error"] = f"Formato inválido en covarianzas: {e}"
-        return out
-    
-# ---------------- Stock Prediction ----------------
 def extract_stock_predict(text: str) -> dict:
-    out = {}
-    clean = re.sub(r"[^A-Z0-9ÁÉÍÓÚÜÑ ]", " ", text.upper())
-
-    # --- Captura ticker ---
-    VALID_TICKERS = {"AAPL", "TSLA", "MSFT", "AMZN"}
-    words = re.findall(r"\b[A-Z]{2,5}\b", text.upper())
-    for w in words:
-        if w in VALID_TICKERS:
-            out["ticker"] = w
-            break
-
-    # --- Captura días (soporta español e inglés, con o sin "próximos") ---
-    d = re.search(r"(\d+)\s*(DAY|DAYS?|DIA|DIAS?)", clean)
-    out["days"] = int(d.group(1)) if d else 1
-
-    # --- Captura modelo (alias en ES/EN, con tilde y sin tilde) ---
-    if re.search(r"XGBOOST", clean):
-        out["model"] = "xgboost_reg"
-    elif re.search(r"SVM|SVR|VECTOR", clean):
-        out["model"] = "svr"
-    elif re.search(r"FOREST|BOSQUE", clean):
-        out["model"] = "random_forest_reg"
-    elif re.search(r"LINEAR|REGRESION|REGRESSION", clean):
-        out["model"] = "linear_regression"
-    else:
-        out["model"] = "xgboost_reg"  # default seguro
-    return out
+    return extract(text, "predict_stock")
@@ -0,0 +1,312 @@
+# demo/app/budget.py
+"""
+Control de admisión para los cálculos con tamaño elegido por el usuario.
+
+Antes de ejecutar se estima memoria y tiempo a partir de los parámetros
+(sims, steps, nº de activos, horizonte...) y se decide:
+
+- inline    cabe en el presupuesto: se ejecuta tal cual.
+- chunked   no cabe en memoria de una vez pero sí por bloques (Monte Carlo).
+- queue     cabe pero es lento para una petición síncrona: los endpoints HTTP
+            lo mandan a la cola de jobs (202 + id).
+- reject    supera el máximo absoluto (memoria o tiempo).
+
+Los límites son por endpoint y se pueden cambiar por entorno:
+VALERIO_BUDGET_<ENDPOINT>_<LÍMITE>, p. ej. VALERIO_BUDGET_MONTECARLO_MAX_BYTES=2e9.
+
+Cada ejecución registra coste estimado frente a real (segundos y, con
+VALERIO_BUDGET_TRACE_MEMORY=1, pico de memoria vía tracemalloc) para poder
+ajustar los coeficientes del estimador (GET /budget).
+"""
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+MB = 1024 ** 2
+TRACE_MEMORY = os.getenv("VALERIO_BUDGET_TRACE_MEMORY", "0") == "1"
+
+# Límites por endpoint (bytes / segundos / tamaños)
+_DEFAULT_LIMITS = {
+    "montecarlo": {"inline_bytes": 256 * MB, "max_bytes": 1024 * MB, "sync_seconds": 15, "max_seconds": 900},
+    "exotics": {"inline_bytes": 256 * MB, "max_bytes": 512 * MB, "sync_seconds": 15, "max_seconds": 900,
+                "max_contracts": 500},
+    "american": {"inline_bytes": 512 * MB, "max_bytes": 1024 * MB, "sync_seconds": 15, "max_seconds": 900,
+                 "max_contracts": 10_000},
+    "var_montecarlo": {"inline_bytes": 512 * MB, "max_bytes": 512 * MB, "sync_seconds": 15, "max_seconds": 300},
+    "markowitz": {"inline_bytes": 256 * MB, "max_bytes": 256 * MB, "sync_seconds": 15, "max_seconds": 300,
+                  "max_assets": 2000},
+    "predict_stock": {"inline_bytes": 256 * MB, "max_bytes": 256 * MB, "sync_seconds": 30, "max_seconds": 600,
+                      "max_days": 365, "max_tickers": 1000},
+    "backtest": {"inline_bytes": 256 * MB, "max_bytes": 512 * MB, "sync_seconds": 15, "max_seconds": 900,
+                 "max_refits": 200},
+    # streaming: el cliente ve el progreso, así que no hay cola (sync = max); solo se rechaza
+    "montecarlo_stream": {"inline_bytes": 256 * MB, "max_bytes": 256 * MB, "sync_seconds": 900,
+                          "max_seconds": 900},
+    "markowitz_stream": {"inline_bytes": 256 * MB, "max_bytes": 256 * MB, "sync_seconds": 600,
+                         "max_seconds": 600, "max_assets": 2000},
+}
+
+def _load_limits() -> dict:
+    limits = {}
+    for endpoint, defaults in _DEFAULT_LIMITS.items():
+        limits[endpoint] = {}
+        for key, value in defaults.items():
+            env = os.getenv(f"VALERIO_BUDGET_{endpoint.upper()}_{key.upper()}")
+            limits[endpoint][key] = type(value)(float(env)) if env else value
+    return limits
+
+LIMITS = _load_limits()
+
+# ============================
+# Estimadores (coeficientes medidos en un portátil; ajustar con /budget)
+# ============================
+def _montecarlo(steps: int, sims: int, itemsize: int = 8, model: str = "gbm", **_) -> dict:
+    from .calculators.streaming import CHUNK_ELEMENTS, QUANTILE_SAMPLE
+    from .calculators.path_models import COST_FACTOR
+    cells = (steps + 1) * sims
+    return {
+        "bytes": itemsize * (cells + 2 * sims),                               # matriz de precios + temporales
+        # bloque + muestra de retornos finales (VaR/ES)
+        "bytes_chunked": itemsize * 2 * min(cells, CHUNK_ELEMENTS) + 16 * min(sims, QUANTILE_SAMPLE),
+        "seconds": 0.3 + 45e-9 * cells * COST_FACTOR.get(model, 1.0),   # gráfico + ~45 ns/celda (GBM)
+    }
+
+def _montecarlo_stream(steps: int, sims: int, chunk: int, itemsize: int = 8, model: str = "gbm", **_) -> dict:
+    from .calculators.streaming import QUANTILE_SAMPLE
+    from .calculators.path_models import COST_FACTOR
+    return {
+        "bytes": itemsize * 2 * chunk * (steps + 1) + 16 * min(sims, QUANTILE_SAMPLE),
+        "seconds": 45e-9 * (steps + 1) * sims * COST_FACTOR.get(model, 1.0),
+    }
+
+def _exotics(steps: int, sims: int, contracts: int = 1, **_) -> dict:
+    from .calculators.exotics import MAX_CHUNK
+    chunk = min(sims, MAX_CHUNK)
+    return {
+        "bytes": 8 * chunk * (16 + 4 * contracts),          # reducciones corrientes + muestras por contrato
+        "seconds": 0.05 + 80e-9 * steps * sims + 30e-9 * sims * contracts,
+    }
+
+def _american(method: str = "binomial", contracts: int = 1, steps: int = 500, sims: int = 50_000,
+              exercise_dates: int = 50, **_) -> dict:
+    if method == "lsm":
+        return {
+            "bytes": 8 * sims * (exercise_dates + 8),                  # trayectorias de un subyacente + regresión
+            "seconds": 0.01 + sims * exercise_dates * (30e-9 + 60e-9 * contracts),
+        }
+    nodes = (2 if method == "trinomial" else 1) * steps + 1
+    return {
+        "bytes": 8 * contracts * nodes * 4,
+        "seconds": 0.01 + contracts * steps * nodes * (4e-9 if method == "trinomial" else 6e-9),
+    }
+
+def _var_montecarlo(sims: int = 10_000, itemsize: int = 8, model: str = "gbm", horizon: int = 1, **_) -> dict:
+    from .calculators.path_models import COST_FACTOR
+    steps = 1 if model == "gbm" else max(horizon, 1)
+    return {"bytes": itemsize * 4 * sims, "seconds": 0.2 + 60e-9 * sims * steps * COST_FACTOR.get(model, 1.0)}
+
+def _markowitz(n_assets: int, n_portafolios: int = 5000, itemsize: int = 8, **_) -> dict:
+    return {
+        "bytes": itemsize * (n_assets * n_assets + 2 * n_portafolios * n_assets),
+        "seconds": 0.4 + n_portafolios * (5e-6 + 1e-9 * n_assets * n_assets),
+    }
+
+def _markowitz_stream(n_assets: int, n_portafolios: int, chunk: int, itemsize: int = 8, **_) -> dict:
+    return {
+        "bytes": itemsize * (n_assets * n_assets + 3 * chunk * n_assets),   # cov + pesos y temporales del bloque
+        "seconds": n_portafolios * (50e-9 * n_assets + 1e-9 * n_assets * n_assets),
+    }
+
+def _predict_stock(days: int = 1, tickers: int = 1, **_) -> dict:
+    from .ml.feature_store import LOOKBACK
+    return {
+        "bytes": 8 * tickers * (LOOKBACK + days) * 16,
+        "seconds": 1.0 + days * (1e-3 + 2e-6 * tickers) + 0.2 * min(tickers, 1),
+    }
+
+# segundos por ajuste de cada candidato con ~250 filas (random forest domina)
+BACKTEST_FIT_SECONDS = {"xgboost_reg": 0.16, "linear_regression": 0.003, "random_forest_reg": 0.45, "svr": 0.005}
+
+def _backtest(refits: int, models=(), rows: int = 250, **_) -> dict:
+    per_refit = sum(BACKTEST_FIT_SECONDS.get(m, 0.5) for m in models)
+    return {
+        "bytes": 8 * rows * 16 * max(len(models), 1),             # features, objetivo y predicciones
+        "seconds": 0.1 + refits * per_refit * max(rows / 250, 1.0),
+    }
+
+ESTIMATORS = {
+    "montecarlo": _montecarlo,
+    "exotics": _exotics,
+    "american": _american,
+    "var_montecarlo": _var_montecarlo,
+    "markowitz": _markowitz,
+    "predict_stock": _predict_stock,
+    "montecarlo_stream": _montecarlo_stream,
+    "markowitz_stream": _markowitz_stream,
+    "backtest": _backtest,
+}
+
+def estimate(endpoint: str, **params) -> dict:
+    return ESTIMATORS[endpoint](**params)
+
+# ============================
+# Decisión
+# ============================
+class BudgetExceeded(ValueError):
+    """La petición supera el presupuesto del endpoint."""
+
+    def __init__(self, decision: "Decision"):
+        super().__init__(decision.reason)
+        self.decision = decision
+
+class Decision:
+    def __init__(self, endpoint: str, estimate: dict, mode: str, reason: str = None):
+        self.endpoint = endpoint
+        self.estimate = estimate
+        self.mode = mode          # inline | chunked | queue | reject
+        self.reason = reason
+
+    @property
+    def chunked(self) -> bool:
+        return self.estimate.get("mode") == "chunked"
+
+    def to_dict(self) -> dict:
+        return {"endpoint": self.endpoint, "mode": self.mode, "reason": self.reason,
+                "estimate": self.estimate, "limits": LIMITS[self.endpoint]}
+
+def _size_reason(endpoint: str, params: dict):
+    lim = LIMITS[endpoint]
+    for key, limit_key in (("n_assets", "max_assets"), ("days", "max_days"), ("tickers", "max_tickers"),
+                           ("contracts", "max_contracts"), ("refits", "max_refits")):
+        if limit_key in lim and params.get(key, 0) > lim[limit_key]:
+            return f"'{key}'={params[key]} supera el máximo ({lim[limit_key]})."
+    for key in ("steps", "sims", "days", "n_assets", "tickers", "contracts", "n_portafolios", "chunk", "refits"):
+        if key in params and params[key] < 1:
+            return f"'{key}' debe ser >= 1."
+    return None
+
+def admit(endpoint: str, **params) -> Decision:
+    """Estima el coste y decide inline / chunked / queue / reject."""
+    lim = LIMITS[endpoint]
+    reason = _size_reason(endpoint, params)
+    est = dict(estimate(endpoint, **params)) if reason is None else {}
+    mode = "inline"
+    if reason is None:
+        if est["bytes"] > lim["inline_bytes"]:
+            if est.get("bytes_chunked", float("inf")) <= lim["max_bytes"]:
+                mode = "chunked"
+                est["bytes"] = est["bytes_chunked"]
+            else:
+                reason = f"Memoria estimada {est['bytes'] / MB:,.0f} MB > {lim['inline_bytes'] / MB:,.0f} MB."
+        if reason is None and est["bytes"] > lim["max_bytes"]:
+            reason = f"Memoria estimada {est['bytes'] / MB:,.0f} MB > {lim['max_bytes'] / MB:,.0f} MB."
+        if reason is None and est["seconds"] > lim["max_seconds"]:
+            reason = f"Tiempo estimado {est['seconds']:,.0f} s > {lim['max_seconds']:,.0f} s."
+    est["mode"] = mode
+    if reason is not None:
+        decision = Decision(endpoint, est, "reject", reason)
+    elif est["seconds"] > lim["sync_seconds"]:
+        decision = Decision(endpoint, est, "queue")
+    else:
+        decision = Decision(endpoint, est, mode)
+    return decision
+
+def check(endpoint: str, **params) -> Decision:
+    """
+    Como admit(), pero lanza BudgetExceeded si se rechaza. Lo usan las propias
+    funciones de cálculo (llamadas desde HTTP, agente o jobs), así que aquí
+    'queue' no aplica: se ejecuta inline o por bloques.
+    """
+    decision = admit(endpoint, **params)
+    _record_decision(decision.mode if decision.mode == "reject" else decision.estimate["mode"], endpoint)
+    if decision.mode == "reject":
+        raise BudgetExceeded(decision)
+    return decision
+
+# ============================
+# Estimado vs real
+# ============================
+_lock = threading.Lock()
+_stats = {}
+
+def _entry(endpoint: str) -> dict:
+    return _stats.setdefault(endpoint, {
+        "admitted": 0, "chunked": 0, "queued": 0, "rejected": 0,
+        "runs": 0, "est_seconds": 0.0, "actual_seconds": 0.0,
+        "memory_runs": 0, "est_bytes": 0.0, "actual_peak_bytes": 0.0,
+    })
+
+def _record_decision(mode: str, endpoint: str):
+    key = {"inline": "admitted", "chunked": "chunked", "queue": "queued", "reject": "rejected"}[mode]
+    with _lock:
+        _entry(endpoint)[key] += 1
+
+@contextmanager
+def track(decision: Decision):
+    """Mide la ejecución y la acumula junto a la estimación de 'decision'."""
+    trace = TRACE_MEMORY
+    if trace:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    try:
+        yield decision
+    finally:
+        elapsed = time.perf_counter() - t0
+        # con peticiones concurrentes el pico de tracemalloc es del proceso: aproximado
+        peak = tracemalloc.get_traced_memory()[1] - base if trace else None
+        with _lock:
+            e = _entry(decision.endpoint)
+            e["runs"] += 1
+            e["est_seconds"] += decision.estimate.get("seconds", 0.0)
+            e["actual_seconds"] += elapsed
+            if peak is not None:
+                e["memory_runs"] += 1
+                e["est_bytes"] += decision.estimate.get("bytes", 0.0)
+                e["actual_peak_bytes"] += peak
+
+def stats() -> dict:
+    """Contadores por endpoint y ratio real/estimado (>1: el estimador se queda corto)."""
+    out = {}
+    with _lock:
+        for endpoint, e in _stats.items():
+            s = dict(e)
+            s["seconds_ratio"] = e["actual_seconds"] / e["est_seconds"] if e["est_seconds"] else None
+            s["memory_ratio"] = e["actual_peak_bytes"] / e["est_bytes"] if e["est_bytes"] else None
+            out[endpoint] = s
+    return {"limits": LIMITS, "trace_memory": TRACE_MEMORY, "endpoints": out}
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+# ============================
+# Respuestas HTTP
+# ============================
+def http_response(decision: Decision, tool: str, params: dict, tenant: str = None):
+    """
+    Para endpoints HTTP: None si se puede ejecutar ya; si no, la respuesta
+    (413 si se rechaza, 202 con el job si se encola).
+    """
+    from fastapi.responses import JSONResponse
+    if decision.mode in ("reject", "queue"):
+        _record_decision(decision.mode, decision.endpoint)
+    if decision.mode == "reject":
+        return JSONResponse(status_code=413, content={"error": decision.reason, "budget": decision.to_dict()})
+    if decision.mode == "queue":
+        from .jobs import manager, QueueFull
+        try:
+            job = manager.submit(tool, params, tenant=tenant or "default")
+        except QueueFull as e:
+            return JSONResponse(status_code=429, content={"error": str(e)})
+        return JSONResponse(status_code=202, content={
+            "message": "Cálculo largo: enviado a la cola de jobs.",
+            "job": job.to_dict(with_result=False),
+            "status_url": f"/jobs/{job.id}",
+            "budget": decision.to_dict(),
+        })
+    return None
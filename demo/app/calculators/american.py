@@ -0,0 +1,243 @@
+# demo/app/calculators/american.py
+"""
+Opciones americanas.
+
+(a) Árbol binomial (CRR) o trinomial (Boyle). La inducción hacia atrás es
+    vectorizada por corte temporal y un lote de contratos se valora en la
+    misma pasada: los valores viven en un array (contratos × nodos).
+(b) Longstaff–Schwartz: regresión por mínimos cuadrados sobre trayectorias
+    del generador GBM compartido con montecarlo.py (path_models.gbm_steps). Los contratos con el mismo
+    subyacente (S0, r, q, sigma, T) comparten trayectorias.
+"""
+import math
+import time
+from typing import List, Literal, Optional
+import numpy as np
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app import progress, budget
+from app.rng import resolve
+from .path_models import gbm_steps
+
+router = APIRouter()
+
+METHODS = ("binomial", "trinomial", "lsm")
+
+def _N(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+def european_price(S, K, r, sigma, T, option="call", q=0.0) -> float:
+    """Black–Scholes–Merton (con dividendo continuo q) como referencia."""
+    d1 = (math.log(S / K) + (r - q + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
+    d2 = d1 - sigma * math.sqrt(T)
+    if option == "call":
+        return S * math.exp(-q * T) * _N(d1) - K * math.exp(-r * T) * _N(d2)
+    return K * math.exp(-r * T) * _N(-d2) - S * math.exp(-q * T) * _N(-d1)
+
+def _batch(contracts: List[dict]) -> dict:
+    """Columnas (arrays) de un lote de contratos, validadas."""
+    if not contracts:
+        raise ValueError("Indica al menos un contrato.")
+    cols = {k: np.array([float(c.get(k, 0.0) or 0.0) for c in contracts])
+            for k in ("S", "K", "r", "sigma", "T", "q")}
+    options = [c.get("option", "call") for c in contracts]
+    if any(o not in ("call", "put") for o in options):
+        raise ValueError("'option' debe ser 'call' o 'put'.")
+    if (cols["S"] <= 0).any() or (cols["K"] <= 0).any() or (cols["sigma"] <= 0).any() or (cols["T"] <= 0).any():
+        raise ValueError("S, K, sigma y T deben ser > 0.")
+    cols["sign"] = np.array([1.0 if o == "call" else -1.0 for o in options])   # payoff = max(sign·(S-K), 0)
+    return cols
+
+# ============================
+# (a) Árboles
+# ============================
+def lattice_prices(contracts: List[dict], steps: int = 500, method: str = "binomial",
+                   american: bool = True) -> np.ndarray:
+    """
+    Precio de cada contrato con un árbol de 'steps' pasos. Cada corte temporal
+    es una operación de arrays (contratos × nodos): sin bucles por nodo ni por contrato.
+    """
+    if method not in ("binomial", "trinomial"):
+        raise ValueError("method debe ser 'binomial' o 'trinomial'.")
+    if steps < 1:
+        raise ValueError("'steps' debe ser >= 1.")
+    c = _batch(contracts)
+    S, K, sign = c["S"][:, None], c["K"][:, None], c["sign"][:, None]
+    dt = c["T"] / steps
+    disc = np.exp(-c["r"] * dt)[:, None]
+    b = c["r"] - c["q"]
+
+    if method == "binomial":
+        u = np.exp(c["sigma"] * np.sqrt(dt))
+        pu = (np.exp(b * dt) - 1.0 / u) / (u - 1.0 / u)
+        if ((pu <= 0) | (pu >= 1)).any():
+            raise ValueError("Probabilidades fuera de (0,1): aumenta 'steps'.")
+        pu, pd = pu[:, None], 1.0 - pu[:, None]
+    else:
+        u = np.exp(c["sigma"] * np.sqrt(3.0 * dt))
+        nu = b - 0.5 * c["sigma"] ** 2
+        a = nu * np.sqrt(dt / (12.0 * c["sigma"] ** 2))
+        pu, pm, pd = (1.0 / 6.0 + a)[:, None], 2.0 / 3.0, (1.0 / 6.0 - a)[:, None]
+        if ((pu <= 0) | (pd <= 0)).any():
+            raise ValueError("Probabilidades negativas: aumenta 'steps'.")
+    u = u[:, None]
+
+    # precios del último corte; los cortes anteriores se obtienen sin exp:
+    # binomial S_j[i] = S_{j+1}[i]·u, trinomial S_j[i] = S_{j+1}[i+1]
+    k = np.arange(-steps, steps + 1, 2 if method == "binomial" else 1)
+    prices = S * np.exp(np.log(u) * k)
+    V = np.maximum(sign * (prices - K), 0.0)
+    for j in range(steps - 1, -1, -1):
+        if method == "binomial":
+            V = disc * (pu * V[:, 1:] + pd * V[:, :-1])
+            prices = prices[:, :-1] * u
+        else:
+            V = disc * (pu * V[:, 2:] + pm * V[:, 1:-1] + pd * V[:, :-2])
+            prices = prices[:, 1:-1]
+        if american:
+            np.maximum(V, sign * (prices - K), out=V)
+        if j % 100 == 0:
+            progress.report(steps - j, steps)
+    return V[:, 0]
+
+# ============================
+# (b) Longstaff–Schwartz
+# ============================
+def _basis(x: np.ndarray) -> np.ndarray:
+    """Polinomios de Laguerre ponderados (grado 0..2) sobre S/K."""
+    e = np.exp(-0.5 * x)
+    return np.column_stack([np.ones_like(x), e, e * (1.0 - x), e * (1.0 - 2.0 * x + 0.5 * x * x)])
+
+def _lsm_one(paths: np.ndarray, K: float, sign: float, r: float, dt: float) -> tuple:
+    """LSM para un contrato sobre 'paths' (fechas de ejercicio × sims). Devuelve (precio, error estándar)."""
+    n_dates, sims = paths.shape
+    cash = np.maximum(sign * (paths[-1] - K), 0.0)        # flujo en la fecha de ejercicio óptima
+    growth = math.exp(-r * dt)
+    for t in range(n_dates - 2, -1, -1):
+        cash *= growth
+        ex = np.maximum(sign * (paths[t] - K), 0.0)
+        itm = ex > 0
+        if itm.sum() > 4:
+            X = _basis(paths[t, itm] / K)
+            coef, *_ = np.linalg.lstsq(X, cash[itm], rcond=None)
+            cont = X @ coef
+            exercise = ex[itm] > cont
+            idx = np.flatnonzero(itm)[exercise]
+            cash[idx] = ex[idx]
+    cash *= growth                                        # de la 1ª fecha de ejercicio a t=0
+    return float(cash.mean()), float(cash.std(ddof=1) / math.sqrt(sims))
+
+def lsm_prices(contracts: List[dict], sims: int = 50_000, exercise_dates: int = 50,
+               seed: Optional[int] = None, rng: Optional[np.random.Generator] = None) -> list:
+    """
+    Longstaff–Schwartz con 'exercise_dates' fechas equiespaciadas. Simula un
+    juego de trayectorias por subyacente distinto y valora sobre él todos
+    sus contratos. Devuelve [(precio, error estándar)] en el orden de entrada.
+    """
+    if sims < 2 or exercise_dates < 1:
+        raise ValueError("'sims' >= 2 y 'exercise_dates' >= 1.")
+    c = _batch(contracts)
+    rng = resolve(rng, seed)
+    groups = {}
+    for i in range(len(contracts)):
+        key = (c["S"][i], c["r"][i], c["q"][i], c["sigma"][i], c["T"][i])
+        groups.setdefault(key, []).append(i)
+
+    out = [None] * len(contracts)
+    for g, ((S0, r, q, sigma, T), idx) in enumerate(groups.items()):
+        paths = np.empty((exercise_dates, sims))
+        for t, (St, _) in enumerate(gbm_steps(S0, r - q, sigma, T, exercise_dates, sims, rng)):
+            paths[t] = St
+        dt = T / exercise_dates
+        for i in idx:
+            out[i] = _lsm_one(paths, c["K"][i], c["sign"][i], r, dt)
+        progress.report(g + 1, len(groups))
+    return out
+
+# ============================
+# API
+# ============================
+def price_american(contracts: List[dict], method: str = "binomial", steps: int = 500,
+                   sims: int = 50_000, exercise_dates: int = 50, seed: Optional[int] = None) -> dict:
+    """Valora un lote de contratos americanos; añade el europeo y la prima de ejercicio anticipado."""
+    if method not in METHODS:
+        raise ValueError(f"method debe ser uno de {METHODS}.")
+    contracts = [dict(c) for c in contracts]
+    decision = budget.check("american", method=method, contracts=len(contracts), steps=steps,
+                            sims=sims, exercise_dates=exercise_dates)
+    t0 = time.perf_counter()
+    with budget.track(decision):
+        if method == "lsm":
+            priced = lsm_prices(contracts, sims, exercise_dates, seed)
+        else:
+            priced = [(float(p), None) for p in lattice_prices(contracts, steps, method)]
+    seconds = time.perf_counter() - t0
+
+    results = []
+    for ct, (price, se) in zip(contracts, priced):
+        euro = european_price(ct["S"], ct["K"], ct.get("r", 0.0), ct["sigma"], ct["T"],
+                              ct.get("option", "call"), ct.get("q", 0.0) or 0.0)
+        row = {**ct, "price": price, "european": euro, "early_exercise_premium": price - euro}
+        if se is not None:
+            row["std_error"] = se
+        results.append(row)
+    return {"method": method, "steps": steps if method != "lsm" else exercise_dates,
+            "simulations": sims if method == "lsm" else None, "seconds": seconds, "results": results}
+
+# --- Endpoint ---
+class AmericanContractIn(BaseModel):
+    S: float
+    K: float
+    r: float
+    sigma: float
+    T: float
+    q: float = 0.0
+    option: Literal["call", "put"] = "put"
+
+class AmericanIn(BaseModel):
+    # un contrato (campos sueltos) o un lote en 'contracts'
+    S: Optional[float] = None
+    K: Optional[float] = None
+    r: Optional[float] = None
+    sigma: Optional[float] = None
+    T: Optional[float] = None
+    q: float = 0.0
+    option: Literal["call", "put"] = "put"
+    contracts: Optional[List[AmericanContractIn]] = None
+    method: Literal["binomial", "trinomial", "lsm"] = "binomial"
+    steps: int = 500
+    sims: int = 50_000
+    exercise_dates: int = 50
+    seed: Optional[int] = None
+
+def american_params(body: AmericanIn) -> dict:
+    """Argumentos de price_american a partir del cuerpo (un contrato suelto o un lote)."""
+    if body.contracts:
+        contracts = [c.dict() for c in body.contracts]
+    elif None not in (body.S, body.K, body.r, body.sigma, body.T):
+        contracts = [{"S": body.S, "K": body.K, "r": body.r, "sigma": body.sigma, "T": body.T,
+                      "q": body.q, "option": body.option}]
+    else:
+        raise ValueError("Indica S, K, r, sigma, T o una lista 'contracts'.")
+    return {"contracts": contracts, "method": body.method, "steps": body.steps, "sims": body.sims,
+            "exercise_dates": body.exercise_dates, "seed": body.seed}
+
+@router.post("/american")
+def american_endpoint(body: AmericanIn, x_tenant: Optional[str] = Header(None)):
+    try:
+        params = american_params(body)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    contracts = params["contracts"]
+    decision = budget.admit("american", method=body.method, contracts=len(contracts), steps=body.steps,
+                            sims=body.sims, exercise_dates=body.exercise_dates)
+    queued = budget.http_response(decision, "price_american", params, x_tenant)
+    if queued is not None:
+        return queued
+    try:
+        out = price_american(**params)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return out if body.contracts else {**out, **out["results"][0]}
@@ -1,28 +1,25 @@
 # demo/app/calculators/capm.py
-import matplotlib.pyplot as plt
-import io, base64
 from fastapi import APIRouter
 from pydantic import BaseModel
+from app import render
 
 router = APIRouter()
 
 def calcular_capm(rf: float, beta: float, rm: float) -> dict:
     expected_return = rf + beta * (rm - rf)
 
-    # --- Gráfico ---
-    fig, ax = plt.subplots()
-    ax.axhline(rf, color="red", linestyle="--", label="Rf (Libre de riesgo)")
-    ax.plot([0, beta], [rf, expected_return], marker="o", label="Línea CAPM")
-    ax.set_xlabel("Beta")
-    ax.set_ylabel("Retorno esperado")
-    ax.set_title("Capital Asset Pricing Model (CAPM)")
-    ax.legend()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+    img_base64 = None
+    if render.enabled():
+        # --- Gráfico ---
+        fig, ax = render.subplots()
+        ax.axhline(rf, color="red", linestyle="--", label="Rf (Libre de riesgo)")
+        ax.plot([0, beta], [rf, expected_return], marker="o", label="Línea CAPM")
+        ax.set_xlabel("Beta")
+        ax.set_ylabel("Retorno esperado")
+        ax.set_title("Capital Asset Pricing Model (CAPM)")
+        ax.legend()
+
+        img_base64 = render.png_base64(fig)
 
     message = (
         f"Según el modelo CAPM, el activo debería rendir aproximadamente "
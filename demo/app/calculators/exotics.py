@@ -0,0 +1,298 @@
+# demo/app/calculators/exotics.py
+"""
+Pricer Monte Carlo de opciones exóticas sobre el generador GBM (path_models.gbm_steps).
+
+Tipos de contrato:
+  european      payoff sobre S_T (útil como referencia frente a Black–Scholes)
+  asian_arith   media aritmética de S_t (t = 1..steps)
+  asian_geo     media geométrica de S_t
+  barrier       up/down-and-in/out, monitorizada en cada paso (incluido S0)
+  lookback      floating (S_T - min / max - S_T) o fixed (max - K / K - min)
+
+Las trayectorias se simulan por bloques y solo se guardan reducciones
+corrientes (suma, suma de logs, mínimo, máximo y sus sensibilidades), así
+que la memoria depende del bloque y no de sims × steps. Todos los contratos
+se valoran con las mismas trayectorias: el coste lo pone la simulación, no el
+número de contratos.
+
+Greeks:
+  delta  pathwise (payoffs continuos: todas las estadísticas son homogéneas
+         de grado 1 en S0) y likelihood ratio para las barreras.
+  vega   pathwise (dS_t/dσ = S_t (W_t - σ t)) y LR para las barreras.
+
+Las asiáticas aritméticas usan la geométrica (fórmula cerrada, monitorización
+discreta) como variable de control.
+"""
+import math
+import time
+from typing import List, Literal, Optional
+import numpy as np
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app import progress, budget
+from app.rng import resolve
+from .path_models import gbm_steps
+
+router = APIRouter()
+
+CHUNK_ELEMENTS = 2_000_000   # pasos × trayectorias por bloque (solo afecta al tiempo, no a la memoria)
+MAX_CHUNK = 50_000
+KINDS = ("european", "asian_arith", "asian_geo", "barrier", "lookback")
+BARRIER_TYPES = ("up-and-out", "up-and-in", "down-and-out", "down-and-in")
+
+def _N(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+def geometric_asian_price(S0: float, K: float, r: float, sigma: float, T: float, steps: int,
+                          option: str = "call", q: float = 0.0) -> float:
+    """Fórmula cerrada de la asiática geométrica con 'steps' fechas de observación equiespaciadas."""
+    dt = T / steps
+    n = steps
+    mean = math.log(S0) + (r - q - 0.5 * sigma ** 2) * dt * (n + 1) / 2.0
+    var = sigma ** 2 * dt * (n + 1) * (2 * n + 1) / (6.0 * n)
+    sd = math.sqrt(var)
+    d1 = (mean - math.log(K) + var) / sd
+    d2 = d1 - sd
+    fwd = math.exp(mean + 0.5 * var)
+    disc = math.exp(-r * T)
+    if option == "call":
+        return disc * (fwd * _N(d1) - K * _N(d2))
+    return disc * (K * _N(-d2) - fwd * _N(-d1))
+
+# ============================
+# Contratos
+# ============================
+class ContractIn(BaseModel):
+    kind: Literal["european", "asian_arith", "asian_geo", "barrier", "lookback"]
+    option: Literal["call", "put"] = "call"
+    K: Optional[float] = None                       # no aplica a lookback floating
+    barrier: Optional[float] = None
+    barrier_type: Optional[Literal["up-and-out", "up-and-in", "down-and-out", "down-and-in"]] = None
+    lookback: Literal["floating", "fixed"] = "floating"
+    name: Optional[str] = None
+
+def _validate(c: dict) -> dict:
+    c = {"option": "call", "lookback": "floating", **c}
+    if c["kind"] not in KINDS:
+        raise ValueError(f"Tipo de contrato desconocido: {c['kind']}. Usa {KINDS}.")
+    if c["option"] not in ("call", "put"):
+        raise ValueError("'option' debe ser 'call' o 'put'.")
+    needs_strike = not (c["kind"] == "lookback" and c["lookback"] == "floating")
+    if needs_strike and not c.get("K"):
+        raise ValueError(f"Falta 'K' en el contrato {c.get('name') or c['kind']}.")
+    if c["kind"] == "barrier":
+        if c.get("barrier_type") not in BARRIER_TYPES or not c.get("barrier"):
+            raise ValueError(f"Las barreras necesitan 'barrier' y 'barrier_type' en {BARRIER_TYPES}.")
+    return c
+
+# ============================
+# Reducciones por bloque
+# ============================
+def _simulate_chunk(S0, r, q, sigma, T, steps, m, rng):
+    """
+    Simula m trayectorias y devuelve solo las reducciones corrientes y sus
+    derivadas respecto a σ (pathwise): S_T, media, media geométrica, min, max,
+    más Z_1 y la puntuación LR de vega.
+    """
+    dt = T / steps
+    sqdt = math.sqrt(dt)
+    total = np.zeros(m)
+    d_total = np.zeros(m)               # Σ dS_t/dσ
+    log_sum = np.zeros(m)
+    d_log_sum = np.zeros(m)             # Σ d log S_t/dσ = Σ (W_t - σ t)
+    lo = np.full(m, float(S0))
+    hi = np.full(m, float(S0))
+    d_lo = np.zeros(m)
+    d_hi = np.zeros(m)
+    W = np.zeros(m)
+    score_vega = np.zeros(m)
+    z1 = None
+    for i, (S, z) in enumerate(gbm_steps(S0, r - q, sigma, T, steps, m, rng), start=1):
+        if z1 is None:
+            z1 = z.copy()
+        W += sqdt * z
+        dlog = W - sigma * i * dt
+        dS = S * dlog
+        total += S
+        d_total += dS
+        log_sum += np.log(S)
+        d_log_sum += dlog
+        lower = S < lo
+        lo = np.where(lower, S, lo)
+        d_lo = np.where(lower, dS, d_lo)
+        higher = S > hi
+        hi = np.where(higher, S, hi)
+        d_hi = np.where(higher, dS, d_hi)
+        score_vega += (z * z - 1.0) / sigma - z * sqdt
+    geo = np.exp(log_sum / steps)
+    return {
+        "ST": S, "dST": dS,
+        "mean": total / steps, "dmean": d_total / steps,
+        "geo": geo, "dgeo": geo * d_log_sum / steps,
+        "min": lo, "dmin": d_lo, "max": hi, "dmax": d_hi,
+        "score_delta": z1 / (S0 * sigma * sqdt),
+        "score_vega": score_vega,
+    }
+
+def _vanilla(x, dx, K, option):
+    """Payoff call/put sobre la estadística x, su derivada respecto a x y la de σ."""
+    if option == "call":
+        itm = x > K
+        return np.maximum(x - K, 0.0), itm * 1.0, np.where(itm, dx, 0.0)
+    itm = x < K
+    return np.maximum(K - x, 0.0), -(itm * 1.0), np.where(itm, -dx, 0.0)
+
+def _payoff(c: dict, red: dict, S0: float):
+    """
+    Muestras (payoff, delta, vega) sin descontar para un contrato.
+    delta/vega son pathwise salvo en barreras (LR).
+    """
+    kind, option, K = c["kind"], c["option"], c.get("K")
+    if kind in ("european", "asian_arith", "asian_geo"):
+        key = {"european": "ST", "asian_arith": "mean", "asian_geo": "geo"}[kind]
+        x = red[key]
+        pay, dpay, vega = _vanilla(x, red["d" + key], K, option)
+        return pay, dpay * x / S0, vega
+    if kind == "lookback":
+        if c["lookback"] == "floating":
+            if option == "call":
+                pay, vega = red["ST"] - red["min"], red["dST"] - red["dmin"]
+            else:
+                pay, vega = red["max"] - red["ST"], red["dmax"] - red["dST"]
+            return pay, pay / S0, vega
+        key = "max" if option == "call" else "min"
+        x = red[key]
+        pay, dpay, vega = _vanilla(x, red["d" + key], K, option)
+        return pay, dpay * x / S0, vega
+    # barrera: indicador discontinuo -> Greeks por likelihood ratio
+    B, btype = c["barrier"], c["barrier_type"]
+    hit = red["max"] >= B if btype.startswith("up") else red["min"] <= B
+    alive = ~hit if btype.endswith("out") else hit
+    pay = np.where(alive, _vanilla(red["ST"], red["dST"], K, option)[0], 0.0)
+    return pay, pay * red["score_delta"], pay * red["score_vega"]
+
+class _Acc:
+    """Sumas para media, error estándar y covarianza con la variable de control."""
+
+    def __init__(self):
+        self.n = 0
+        self.s = {}
+
+    def add(self, **arrays):
+        self.n += len(next(iter(arrays.values())))
+        for k, v in arrays.items():
+            self.s[k] = self.s.get(k, 0.0) + float(v.sum())
+            self.s[k + k] = self.s.get(k + k, 0.0) + float(np.dot(v, v))
+        if "x" in arrays:
+            self.s["xy"] = self.s.get("xy", 0.0) + float(np.dot(arrays["x"], arrays["y"]))
+
+    def mean(self, k):
+        return self.s[k] / self.n
+
+    def var(self, k):
+        m = self.mean(k)
+        return max(self.s[k + k] / self.n - m * m, 0.0) * self.n / max(self.n - 1, 1)
+
+    def se(self, k):
+        return math.sqrt(self.var(k) / self.n)
+
+# ============================
+# API
+# ============================
+def price_exotics(S0: float, r: float, sigma: float, T: float, contracts: List[dict],
+                  steps: int = 252, sims: int = 100_000, q: float = 0.0,
+                  control_variate: bool = True, greeks: bool = True,
+                  seed: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                  chunk: Optional[int] = None) -> dict:
+    """Valora todos los 'contracts' sobre las mismas 'sims' trayectorias GBM neutrales al riesgo."""
+    if S0 <= 0 or sigma <= 0 or T <= 0 or steps < 1 or sims < 2:
+        raise ValueError("Parámetros inválidos: S0, sigma, T > 0, steps >= 1, sims >= 2.")
+    if not contracts:
+        raise ValueError("Indica al menos un contrato.")
+    contracts = [_validate(dict(c)) for c in contracts]
+    rng = resolve(rng, seed)
+    decision = budget.check("exotics", steps=steps, sims=sims, contracts=len(contracts))
+
+    chunk = int(max(1, min(chunk or max(1000, min(MAX_CHUNK, CHUNK_ELEMENTS // steps)), sims)))
+    disc = math.exp(-r * T)
+    use_cv = [control_variate and c["kind"] == "asian_arith" for c in contracts]
+    cv_exact = [geometric_asian_price(S0, c["K"], r, sigma, T, steps, c["option"], q) if cv else None
+                for c, cv in zip(contracts, use_cv)]
+    accs = [_Acc() for _ in contracts]
+
+    t0 = time.perf_counter()
+    with budget.track(decision):
+        n = 0
+        while n < sims:
+            m = min(chunk, sims - n)
+            red = _simulate_chunk(S0, r, q, sigma, T, steps, m, rng)
+            for c, acc, cv in zip(contracts, accs, use_cv):
+                pay, delta, vega = _payoff(c, red, S0)
+                arrays = {"y": disc * pay}
+                if greeks:
+                    arrays.update(d=disc * delta, v=disc * vega)
+                if cv:
+                    arrays["x"] = disc * _vanilla(red["geo"], red["dgeo"], c["K"], c["option"])[0]
+                acc.add(**arrays)
+            n += m
+            progress.report(n, sims)
+    seconds = time.perf_counter() - t0
+
+    results = []
+    for c, acc, cv, exact in zip(contracts, accs, use_cv, cv_exact):
+        out = {**{k: v for k, v in c.items() if v is not None},
+               "price": acc.mean("y"), "std_error": acc.se("y")}
+        if cv and acc.var("x") > 0:
+            cov = acc.s["xy"] / acc.n - acc.mean("x") * acc.mean("y")
+            beta = cov / (acc.var("x") * (acc.n - 1) / acc.n)
+            resid_var = max(acc.var("y") - beta * beta * acc.var("x"), 0.0)
+            out.update({
+                "price_mc": out["price"],
+                "std_error_mc": out["std_error"],
+                "price": acc.mean("y") - beta * (acc.mean("x") - exact),
+                "std_error": math.sqrt(resid_var / acc.n),
+                "control_variate": {"kind": "asian_geo", "exact": exact, "beta": beta},
+            })
+        if greeks:
+            method = "likelihood_ratio" if c["kind"] == "barrier" else "pathwise"
+            out.update({"delta": acc.mean("d"), "delta_se": acc.se("d"),
+                        "vega": acc.mean("v") / 100.0, "vega_se": acc.se("v") / 100.0,   # por 1% de vol (como black_scholes)
+                        "greeks_method": method})
+        results.append(out)
+
+    return {
+        "model": "gbm",
+        "simulations": sims,
+        "steps": steps,
+        "contracts": len(contracts),
+        "seconds": seconds,
+        "results": results,
+    }
+
+# --- Endpoint ---
+class ExoticsIn(BaseModel):
+    S0: float
+    r: float
+    sigma: float
+    T: float
+    contracts: List[ContractIn]
+    steps: int = 252
+    sims: int = 100_000
+    q: float = 0.0
+    control_variate: bool = True
+    greeks: bool = True
+    seed: Optional[int] = None
+
+@router.post("/exotics")
+def exotics_endpoint(body: ExoticsIn, x_tenant: Optional[str] = Header(None)):
+    params = body.dict()
+    decision = budget.admit("exotics", steps=body.steps, sims=body.sims, contracts=len(body.contracts))
+    queued = budget.http_response(decision, "price_exotics", params, x_tenant)
+    if queued is not None:
+        return queued
+    try:
+        return price_exotics(**params)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
@@ -1,9 +1,10 @@
 # demo/app/calculators/markowitz.py
 import numpy as np
-import matplotlib.pyplot as plt
-import io, base64
-from fastapi import APIRouter
+from typing import Literal, Optional
+from fastapi import APIRouter, Header
 from pydantic import BaseModel
+from app import progress, budget, render
+from app.rng import resolve, as_dtype
 
 router = APIRouter()
 
@@ -12,18 +13,34 @@ class MarkowitzIn(BaseModel):
     rendimientos: list[float]
     covarianzas: list[list[float]]
     rf: float = 0.02
+    seed: Optional[int] = None
+    dtype: Literal["float32", "float64"] = "float64"
 
-def optimizar_portafolio(rendimientos: list, covarianzas: list, rf: float = 0.02) -> dict:
-    rendimientos = np.array(rendimientos)
-    covarianzas = np.array(covarianzas)
+N_PORTAFOLIOS = 5000
+
+def optimizar_portafolio(rendimientos: list, covarianzas: list, rf: float = 0.02,
+                         seed: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                         dtype: str = "float64") -> dict:
+    dtype = as_dtype(dtype)
+    decision = budget.check("markowitz", n_assets=len(rendimientos), n_portafolios=N_PORTAFOLIOS,
+                            itemsize=dtype.itemsize)
+    with budget.track(decision):
+        return _optimizar_portafolio(rendimientos, covarianzas, rf, resolve(rng, seed), dtype)
+
+def _optimizar_portafolio(rendimientos: list, covarianzas: list, rf: float,
+                          rng: np.random.Generator, dtype=np.dtype(np.float64)) -> dict:
+    rendimientos = np.array(rendimientos, dtype=dtype)
+    covarianzas = np.array(covarianzas, dtype=dtype)
     n = len(rendimientos)
 
-    n_portafolios = 5000
-    resultados = np.zeros((3, n_portafolios))
+    n_portafolios = N_PORTAFOLIOS
+    resultados = np.zeros((3, n_portafolios), dtype=dtype)
     pesos_array = []
+    # todas las muestras de una vez (una sola llamada al generador)
+    aleatorios = rng.random((n_portafolios, n), dtype=dtype)
 
     for i in range(n_portafolios):
-        pesos = np.random.random(n)
+        pesos = aleatorios[i]
         pesos /= np.sum(pesos)
         retorno = np.dot(pesos, rendimientos)
         riesgo = np.sqrt(np.dot(pesos.T, np.dot(covarianzas, pesos)))
@@ -33,25 +50,25 @@ def optimizar_portafolio(rendimientos: list, covarianzas: list, rf: float = 0.02
         resultados[1, i] = retorno
         resultados[2, i] = sharpe
         pesos_array.append(pesos)
+        if i % 500 == 499:
+            progress.report(i + 1, n_portafolios)
 
     max_sharpe_idx = np.argmax(resultados[2])
     mejor_riesgo, mejor_retorno, mejor_sharpe = resultados[:, max_sharpe_idx]
     mejores_pesos = pesos_array[max_sharpe_idx]
 
-    # --- Gráfico ---
-    fig, ax = plt.subplots()
-    scatter = ax.scatter(resultados[0,:], resultados[1,:], c=resultados[2,:], cmap='viridis')
-    ax.scatter(mejor_riesgo, mejor_retorno, color='red', marker='*', s=200, label="Portafolio Óptimo")
-    ax.set_xlabel("Riesgo (σ)")
-    ax.set_ylabel("Retorno esperado")
-    ax.legend()
-    plt.colorbar(scatter, label="Sharpe Ratio")
+    img_base64 = None
+    if render.enabled():
+        # --- Gráfico ---
+        fig, ax = render.subplots()
+        scatter = ax.scatter(resultados[0,:], resultados[1,:], c=resultados[2,:], cmap='viridis')
+        ax.scatter(mejor_riesgo, mejor_retorno, color='red', marker='*', s=200, label="Portafolio Óptimo")
+        ax.set_xlabel("Riesgo (σ)")
+        ax.set_ylabel("Retorno esperado")
+        ax.legend()
+        fig.colorbar(scatter, ax=ax, label="Sharpe Ratio")
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+        img_base64 = render.png_base64(fig)
 
     message = (
         f"Según Markowitz, el portafolio óptimo asigna los pesos {np.round(mejores_pesos, 2)}. "
@@ -71,5 +88,9 @@ def optimizar_portafolio(rendimientos: list, covarianzas: list, rf: float = 0.02
 
 # --- Endpoint ---
 @router.post("/markowitz")
-def markowitz_endpoint(body: MarkowitzIn):
-    return optimizar_portafolio(body.rendimientos, body.covarianzas, body.rf)
+def markowitz_endpoint(body: MarkowitzIn, x_tenant: Optional[str] = Header(None)):
+    decision = budget.admit("markowitz", n_assets=len(body.rendimientos), n_portafolios=N_PORTAFOLIOS,
+                            itemsize=as_dtype(body.dtype).itemsize)
+    return (budget.http_response(decision, "calc_markowitz", body.dict(), x_tenant)
+            or optimizar_portafolio(body.rendimientos, body.covarianzas, body.rf, seed=body.seed,
+                                    dtype=body.dtype))
@@ -1,8 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import io, base64
-from fastapi import APIRouter
+from typing import Dict, Literal, Optional
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from app import progress, budget, render
+from app.rng import resolve, as_dtype
+from .streaming import stream_montecarlo
+from .path_models import model_steps
 
 router = APIRouter()
 
@@ -13,34 +17,61 @@ class MonteCarloIn(BaseModel):
     T: float
     steps: int
     sims: int
+    seed: Optional[int] = None
+    dtype: Literal["float32", "float64"] = "float64"
+    model: Literal["gbm", "heston", "merton"] = "gbm"
+    model_params: Optional[Dict[str, float]] = None   # ver app/calculators/path_models.py
 
-def calc_montecarlo(S0: float, mu: float, sigma: float, T: float, steps: int, sims: int):
-    dt = T / steps
-    prices = np.zeros((steps + 1, sims))
+N_PLOT_PATHS = 20
+
+def _simulate_paths(S0: float, mu: float, sigma: float, T: float, steps: int, sims: int,
+                    rng: np.random.Generator, dtype=np.dtype(np.float64), model: str = "gbm",
+                    model_params: Optional[dict] = None) -> np.ndarray:
+    prices = np.zeros((steps + 1, sims), dtype=dtype)
     prices[0] = S0
 
-    for t in range(1, steps + 1):
-        rand = np.random.normal(0, 1, sims)
-        prices[t] = prices[t-1] * np.exp((mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * rand)
+    paths = model_steps(model, S0, mu, sigma, T, steps, sims, rng, dtype, model_params)
+    for t, (S, _) in enumerate(paths, start=1):
+        prices[t] = S
+        progress.report(t, steps)
+    return prices
 
-    final_prices = prices[-1]
-    expected_price = np.mean(final_prices)
-    volatility = np.std(final_prices)
+def calc_montecarlo(S0: float, mu: float, sigma: float, T: float, steps: int, sims: int,
+                    seed: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                    dtype: str = "float64", model: str = "gbm", model_params: Optional[dict] = None):
+    rng = resolve(rng, seed)
+    dtype = as_dtype(dtype)
+    decision = budget.check("montecarlo", steps=steps, sims=sims, itemsize=dtype.itemsize, model=model)
+    with budget.track(decision):
+        if decision.chunked:
+            # No cabe la matriz completa: estadísticos por bloques y solo se guardan las trayectorias del gráfico
+            est = None
+            for est in stream_montecarlo(S0, mu, sigma, T, steps, sims, rng=rng, dtype=dtype,
+                                         model=model, model_params=model_params):
+                progress.report(est["simulations"], sims)
+            expected_price, volatility = est["expected_price"], est["volatility"]
+            prices = _simulate_paths(S0, mu, sigma, T, steps, N_PLOT_PATHS, rng, dtype, model, model_params)
+        else:
+            prices = _simulate_paths(S0, mu, sigma, T, steps, sims, rng, dtype, model, model_params)
+            final_prices = prices[-1]
+            # estadísticos acumulados en float64 aunque las trayectorias sean float32
+            expected_price = np.mean(final_prices, dtype=np.float64)
+            volatility = np.std(final_prices, dtype=np.float64)
+        return _render(prices, T, steps, sims, expected_price, volatility)
 
-    # 📊 Gráfico (20 trayectorias)
-    fig, ax = plt.subplots()
-    for i in range(min(20, prices.shape[1])):
-        ax.plot(np.linspace(0, T, steps+1), prices[:, i], alpha=0.5)
+def _render(prices, T, steps, sims, expected_price, volatility) -> dict:
+    img_base64 = None
+    if render.enabled():
+        # 📊 Gráfico (20 trayectorias)
+        fig, ax = render.subplots()
+        for i in range(min(N_PLOT_PATHS, prices.shape[1])):
+            ax.plot(np.linspace(0, T, steps+1), prices[:, i], alpha=0.5)
 
-    ax.set_title("Simulación Monte Carlo")
-    ax.set_xlabel("Tiempo")
-    ax.set_ylabel("Precio")
+        ax.set_title("Simulación Monte Carlo")
+        ax.set_xlabel("Tiempo")
+        ax.set_ylabel("Precio")
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+        img_base64 = render.png_base64(fig)
 
     return {
         "message": (
@@ -58,5 +89,14 @@ def calc_montecarlo(S0: float, mu: float, sigma: float, T: float, steps: int, si
 
 # --- Endpoint FastAPI ---
 @router.post("/montecarlo")
-def montecarlo_endpoint(body: MonteCarloIn):
-    return calc_montecarlo(**body.dict())
+def montecarlo_endpoint(body: MonteCarloIn, x_tenant: Optional[str] = Header(None)):
+    params = body.dict()
+    decision = budget.admit("montecarlo", steps=body.steps, sims=body.sims,
+                            itemsize=as_dtype(body.dtype).itemsize, model=body.model)
+    queued = budget.http_response(decision, "calc_montecarlo", params, x_tenant)
+    if queued is not None:
+        return queued
+    try:
+        return calc_montecarlo(**params)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
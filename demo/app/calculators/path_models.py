@@ -0,0 +1,110 @@
+# demo/app/calculators/path_models.py
+"""
+Generadores de trayectorias paso a paso (compartidos por todos los motores).
+
+Cada generador emite (S_t, Z_t) tras cada paso para n trayectorias, usando
+solo operaciones de arrays por paso (nada de bucles por trayectoria) y el
+Generator de la petición, así que sirven igual para la matriz completa,
+para los bloques del streaming o para las reducciones de las exóticas.
+
+Modelos:
+  gbm     volatilidad constante 'sigma'.
+  heston  varianza estocástica CIR con esquema full truncation:
+            v0, theta (por defecto sigma²), kappa=2.0, xi=0.5, rho=-0.7
+  merton  GBM + saltos log-normales compuestos de Poisson:
+            lam=1.0 (saltos/año), mu_j=-0.05, sigma_j=0.10
+          el drift se compensa para que E[S_T] sea el mismo que sin saltos.
+"""
+import math
+import numpy as np
+
+MODELS = ("gbm", "heston", "merton")
+# coste relativo por paso frente a GBM (para el estimador de presupuesto)
+COST_FACTOR = {"gbm": 1.0, "heston": 2.8, "merton": 1.8}
+
+def gbm_steps(S0: float, mu: float, sigma: float, T: float, steps: int, n: int,
+              rng: np.random.Generator, dtype=np.dtype(np.float64)):
+    """
+    Generador GBM paso a paso para n trayectorias: emite (S_t, Z_t) en cada
+    paso sin guardar la matriz completa. Base de los motores por bloques.
+    """
+    dt = T / steps
+    drift = dtype.type((mu - 0.5 * sigma**2) * dt)
+    vol = dtype.type(sigma * np.sqrt(dt))
+    S = np.full(n, S0, dtype=dtype)
+    for _ in range(steps):
+        z = rng.standard_normal(n, dtype=dtype)
+        S = S * np.exp(drift + vol * z)
+        yield S, z
+
+def heston_steps(S0: float, mu: float, sigma: float, T: float, steps: int, n: int,
+                 rng: np.random.Generator, dtype=np.dtype(np.float64), v0: float = None,
+                 theta: float = None, kappa: float = 2.0, xi: float = 0.5, rho: float = -0.7):
+    """Heston con full truncation: la varianza puede hacerse negativa pero solo entra v⁺ = max(v, 0)."""
+    if not -1.0 <= rho <= 1.0 or kappa < 0 or xi < 0:
+        raise ValueError("Heston: rho en [-1, 1], kappa >= 0 y xi >= 0.")
+    v0 = sigma ** 2 if v0 is None else v0
+    theta = sigma ** 2 if theta is None else theta
+    dt = T / steps
+    sqdt = math.sqrt(dt)
+    rho_c = math.sqrt(1.0 - rho * rho)
+    S = np.full(n, S0, dtype=dtype)
+    v = np.full(n, v0, dtype=dtype)
+    for _ in range(steps):
+        z = rng.standard_normal(n, dtype=dtype)
+        zv = rho * z + rho_c * rng.standard_normal(n, dtype=dtype)
+        vp = np.maximum(v, 0.0)
+        sv = np.sqrt(vp)
+        S = S * np.exp((mu - 0.5 * vp) * dt + sv * (sqdt * z))
+        v = v + kappa * (theta - vp) * dt + xi * sv * (sqdt * zv)
+        yield S, z
+
+def merton_steps(S0: float, mu: float, sigma: float, T: float, steps: int, n: int,
+                 rng: np.random.Generator, dtype=np.dtype(np.float64), lam: float = 1.0,
+                 mu_j: float = -0.05, sigma_j: float = 0.10):
+    """Merton jump-diffusion: nº de saltos Poisson(lam·dt) por paso y tamaño log-normal."""
+    if lam < 0 or sigma_j < 0:
+        raise ValueError("Merton: lam >= 0 y sigma_j >= 0.")
+    dt = T / steps
+    kbar = math.exp(mu_j + 0.5 * sigma_j ** 2) - 1.0
+    drift = dtype.type((mu - lam * kbar - 0.5 * sigma ** 2) * dt)
+    vol = dtype.type(sigma * math.sqrt(dt))
+    S = np.full(n, S0, dtype=dtype)
+    for _ in range(steps):
+        z = rng.standard_normal(n, dtype=dtype)
+        log_step = drift + vol * z
+        k = rng.poisson(lam * dt, n)
+        jumps = np.flatnonzero(k)
+        if len(jumps):
+            kj = k[jumps]
+            log_step[jumps] += mu_j * kj + sigma_j * np.sqrt(kj) * rng.standard_normal(len(jumps))
+        S = S * np.exp(log_step)
+        yield S, z
+
+_STEPPERS = {"gbm": gbm_steps, "heston": heston_steps, "merton": merton_steps}
+
+def model_steps(model: str, S0: float, mu: float, sigma: float, T: float, steps: int, n: int,
+                rng: np.random.Generator, dtype=np.dtype(np.float64), params: dict = None):
+    """Generador paso a paso del modelo pedido ('params': parámetros propios del modelo)."""
+    if model not in _STEPPERS:
+        raise ValueError(f"Modelo desconocido: {model}. Usa {MODELS}.")
+    params = dict(params or {})
+    if model == "gbm" and params:
+        raise ValueError("El modelo 'gbm' no admite parámetros adicionales.")
+    try:
+        return _STEPPERS[model](S0, mu, sigma, T, steps, n, rng, dtype, **params)
+    except TypeError as e:
+        raise ValueError(f"Parámetros no válidos para '{model}': {sorted(params)}") from e
+
+def terminal_values(model: str, S0: float, mu: float, sigma: float, T: float, steps: int, sims: int,
+                    rng: np.random.Generator, dtype=np.dtype(np.float64), params: dict = None,
+                    chunk: int = 100_000) -> np.ndarray:
+    """S_T de 'sims' trayectorias simuladas por bloques de 'chunk' (memoria O(chunk) por paso)."""
+    out = np.empty(sims, dtype=dtype)
+    for start in range(0, sims, chunk):
+        m = min(chunk, sims - start)
+        S = None
+        for S, _ in model_steps(model, S0, mu, sigma, T, steps, m, rng, dtype, params):
+            pass
+        out[start:start + m] = S
+    return out
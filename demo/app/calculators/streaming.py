@@ -0,0 +1,324 @@
+# demo/app/calculators/streaming.py
+"""
+Simulaciones por bloques con estimaciones parciales en streaming.
+
+Cada bloque de trayectorias (o de portafolios) produce una estimación
+actualizada; el cliente la recibe en cuanto está lista y puede parar
+cuando el error estándar baja de su tolerancia.
+
+- WebSocket  /calc/montecarlo/stream, /calc/markowitz/stream
+  1º mensaje del cliente: parámetros (JSON). Después puede enviar
+  {"action": "stop"} en cualquier momento.
+- SSE (POST) mismas rutas, con los parámetros en el body; se para cerrando la conexión.
+
+Mensajes: {"type": "estimate", ...} por bloque y {"type": "done", "reason": ...}
+al final ("completed", "tolerance", "stopped").
+
+Antes de abrir el stream se pasa por el control de admisión (budget,
+endpoints montecarlo_stream / markowitz_stream): si se rechaza, SSE
+responde 413 y el WebSocket envía el error y cierra con código 1009.
+"""
+import asyncio
+import json
+import threading
+from typing import Dict, List, Literal, Optional
+import numpy as np
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app import budget
+from app.rng import resolve, as_dtype
+from .path_models import model_steps
+
+router = APIRouter()
+
+# Elementos (pasos × trayectorias) por bloque: acota la memoria de cada bloque
+CHUNK_ELEMENTS = 2_000_000
+MIN_CHUNKS = 2   # no parar por tolerancia con una sola estimación
+# Retornos finales guardados para VaR/ES: exactos hasta este nº de trayectorias,
+# por encima una muestra uniforme (reservoir) de este tamaño
+QUANTILE_SAMPLE = 200_000
+
+# ============================
+# Monte Carlo (GBM)
+# ============================
+class MonteCarloStreamIn(BaseModel):
+    S0: float
+    mu: float
+    sigma: float
+    T: float
+    steps: int
+    sims: int
+    alpha: float = 0.05
+    tol: Optional[float] = None       # error estándar objetivo del precio medio
+    chunk: Optional[int] = None       # trayectorias por bloque
+    seed: Optional[int] = None
+    dtype: Literal["float32", "float64"] = "float64"
+    model: Literal["gbm", "heston", "merton"] = "gbm"
+    model_params: Optional[Dict[str, float]] = None
+
+def _chunk_size(steps: int, sims: int, chunk: Optional[int]) -> int:
+    # el bloque nunca pasa de CHUNK_ELEMENTS celdas, lo pida o no el cliente
+    limit = max(1, CHUNK_ELEMENTS // max(steps, 1))
+    chunk = limit if chunk is None else min(chunk, limit)
+    return int(max(1, min(chunk, sims)))
+
+def _reservoir_add(sample: np.ndarray, seen: int, values: np.ndarray, rng: np.random.Generator) -> int:
+    """
+    Algoritmo R vectorizado: tras añadir 'values', 'sample' es una muestra
+    uniforme de todos los vistos. Devuelve cuántos hay guardados.
+    """
+    k = len(sample)
+    free = max(0, min(k - seen, len(values)))
+    sample[seen:seen + free] = values[:free]
+    rest = values[free:]
+    if len(rest):
+        idx = rng.integers(0, np.arange(seen + free, seen + free + len(rest)) + 1)
+        keep = idx < k
+        sample[idx[keep]] = rest[keep]   # con índices repetidos gana el último, como en el algoritmo secuencial
+    return min(k, seen + len(values))
+
+def stream_montecarlo(S0: float, mu: float, sigma: float, T: float, steps: int, sims: int,
+                      alpha: float = 0.05, tol: Optional[float] = None, chunk: Optional[int] = None,
+                      seed: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                      dtype: str = "float64", model: str = "gbm", model_params: Optional[dict] = None):
+    """
+    Generador: simula 'sims' trayectorias GBM en bloques y emite tras cada bloque
+    media del precio final, su error estándar y VaR/ES del retorno a T.
+    Termina al completar las simulaciones o cuando el error estándar <= tol.
+    Memoria acotada: un bloque (<= CHUNK_ELEMENTS celdas) y QUANTILE_SAMPLE
+    retornos para VaR/ES (exactos hasta ese nº de trayectorias, muestreados después).
+    Con dtype float32 las normales y los retornos guardados van en float32;
+    sumas y momentos se acumulan en float64. 'model' elige el generador de
+    trayectorias (gbm, heston, merton; ver path_models).
+    """
+    if steps < 1 or sims < 1:
+        raise ValueError("'steps' y 'sims' deben ser >= 1.")
+    rng = resolve(rng, seed)
+    dtype = as_dtype(dtype)
+    dt = T / steps
+    drift = (mu - 0.5 * sigma ** 2) * dt
+    vol = sigma * np.sqrt(dt)
+    size = _chunk_size(steps, sims, chunk)
+
+    rets = np.empty(min(sims, QUANTILE_SAMPLE), dtype=dtype)   # retornos finales (para VaR/ES)
+    sample_rng = rng.spawn(1)[0]   # generador aparte: no altera las trayectorias de la semilla
+    kept = 0
+    n, total, total_sq = 0, 0.0, 0.0
+    chunks = 0
+    while n < sims:
+        m = min(size, sims - n)
+        if model == "gbm" and not model_params:
+            # GBM: basta la suma de las normales de cada trayectoria
+            log_ret = drift * steps + vol * rng.standard_normal((m, steps), dtype=dtype).sum(axis=1, dtype=np.float64)
+            final = S0 * np.exp(log_ret)
+        else:
+            for final, _ in model_steps(model, S0, mu, sigma, T, steps, m, rng, dtype, model_params):
+                pass
+            final = final.astype(np.float64)
+        total += final.sum()
+        total_sq += np.dot(final, final)
+        kept = _reservoir_add(rets, n, final / S0 - 1.0, sample_rng)
+        n += m
+        chunks += 1
+
+        mean = total / n
+        var = max(total_sq / n - mean * mean, 0.0) * n / max(n - 1, 1)
+        std_error = float(np.sqrt(var / n))
+        q = np.quantile(rets[:kept], alpha)
+        tail = rets[:kept][rets[:kept] <= q]
+        converged = tol is not None and chunks >= MIN_CHUNKS and std_error <= tol
+        yield {
+            "type": "estimate",
+            "simulations": n,
+            "progress": n / sims,
+            "expected_price": float(mean),
+            "volatility": float(np.sqrt(var)),
+            "std_error": std_error,
+            "var_ret": float(abs(q)),
+            "es_ret": float(abs(tail.mean())) if len(tail) else float(abs(q)),
+            "converged": converged,
+        }
+        if converged:
+            return
+
+# ============================
+# Markowitz (portafolios aleatorios)
+# ============================
+class MarkowitzStreamIn(BaseModel):
+    rendimientos: List[float]
+    covarianzas: List[List[float]]
+    rf: float = 0.02
+    n_portafolios: int = 100_000
+    chunk: int = 5000
+    tol: Optional[float] = None       # mejora mínima del Sharpe entre bloques
+    patience: int = 3                 # bloques seguidos sin mejorar > tol antes de parar
+    seed: Optional[int] = None
+    dtype: Literal["float32", "float64"] = "float64"
+
+def _portfolio_chunk(n_assets: int, n_portafolios: int, chunk: int) -> int:
+    return int(max(1, min(chunk, n_portafolios, CHUNK_ELEMENTS // max(n_assets, 1))))
+
+def stream_markowitz(rendimientos, covarianzas, rf: float = 0.02, n_portafolios: int = 100_000,
+                     chunk: int = 5000, tol: Optional[float] = None, patience: int = 3,
+                     seed: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                     dtype: str = "float64"):
+    """
+    Generador: evalúa portafolios aleatorios por bloques (vectorizado) y emite
+    el mejor Sharpe encontrado hasta el momento. Con 'tol' para cuando el
+    Sharpe no mejora más de 'tol' durante 'patience' bloques seguidos.
+    """
+    dtype = as_dtype(dtype)
+    mu = np.asarray(rendimientos, dtype=dtype)
+    cov = np.asarray(covarianzas, dtype=dtype)
+    if cov.shape != (len(mu), len(mu)):
+        raise ValueError("'covarianzas' debe ser una matriz n×n con n = len(rendimientos).")
+    rng = resolve(rng, seed)
+    chunk = _portfolio_chunk(len(mu), n_portafolios, chunk)
+
+    best = {"sharpe": -np.inf}
+    n, stale = 0, 0
+    while n < n_portafolios:
+        m = min(chunk, n_portafolios - n)
+        w = rng.random((m, len(mu)), dtype=dtype)
+        w /= w.sum(axis=1, keepdims=True)
+        ret = w @ mu
+        risk = np.sqrt(np.einsum("ij,jk,ik->i", w, cov, w))
+        sharpe = (ret - rf) / risk
+        i = int(np.argmax(sharpe))
+        n += m
+
+        gain = sharpe[i] - best["sharpe"]
+        if gain > 0:
+            best = {"sharpe": float(sharpe[i]), "retorno": float(ret[i]), "riesgo": float(risk[i]),
+                    "weights": np.round(w[i], 4).tolist()}
+        stale = stale + 1 if tol is not None and gain <= tol else 0
+        converged = tol is not None and stale >= patience
+        yield {
+            "type": "estimate",
+            "portfolios": n,
+            "progress": n / n_portafolios,
+            **best,
+            "converged": converged,
+        }
+        if converged:
+            return
+
+# ============================
+# Transporte
+# ============================
+STREAMS = {
+    "montecarlo": (MonteCarloStreamIn, stream_montecarlo),
+    "markowitz": (MarkowitzStreamIn, stream_markowitz),
+}
+
+def _admit(kind: str, body: BaseModel) -> budget.Decision:
+    """budget.check con el tamaño real de bloque; lanza BudgetExceeded si se rechaza."""
+    itemsize = as_dtype(body.dtype).itemsize
+    if kind == "montecarlo":
+        return budget.check("montecarlo_stream", steps=body.steps, sims=body.sims, itemsize=itemsize,
+                            chunk=_chunk_size(body.steps, body.sims, body.chunk), model=body.model)
+    n_assets = len(body.rendimientos)
+    return budget.check("markowitz_stream", n_assets=n_assets, n_portafolios=body.n_portafolios, itemsize=itemsize,
+                        chunk=_portfolio_chunk(n_assets, body.n_portafolios, body.chunk))
+
+def _rejected(e: budget.BudgetExceeded) -> dict:
+    return {"type": "error", "error": str(e), "budget": e.decision.to_dict()}
+
+def _done(last: Optional[dict], reason: str) -> dict:
+    return {"type": "done", "reason": reason, "result": last}
+
+async def _websocket_stream(ws: WebSocket, kind: str):
+    schema, fn = STREAMS[kind]
+    await ws.accept()
+    try:
+        body = schema(**await ws.receive_json())
+        _admit(kind, body)
+        gen = fn(**body.model_dump())
+    except budget.BudgetExceeded as e:
+        await ws.send_json(_rejected(e))
+        await ws.close(code=1009)   # message too big
+        return
+    except (ValidationError, ValueError, TypeError) as e:
+        await ws.send_json({"type": "error", "error": str(e)})
+        await ws.close()
+        return
+
+    stop = threading.Event()
+
+    async def listen():
+        # {"action": "stop"} o desconexión -> parar en el siguiente bloque
+        try:
+            while True:
+                msg = await ws.receive_json()
+                if isinstance(msg, dict) and msg.get("action") == "stop":
+                    stop.set()
+        except (WebSocketDisconnect, RuntimeError, json.JSONDecodeError):
+            stop.set()
+
+    listener = asyncio.create_task(listen())
+    last, reason = None, "completed"
+    try:
+        while True:
+            if stop.is_set():
+                reason = "stopped"
+                break
+            try:
+                est = await run_in_threadpool(next, gen, None)
+            except ValueError as e:
+                await ws.send_json({"type": "error", "error": str(e)})
+                reason = "error"
+                break
+            if est is None:
+                break
+            last = est
+            await ws.send_json(est)
+            if est["converged"]:
+                reason = "tolerance"
+                break
+        await ws.send_json(_done(last, reason))
+        await ws.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        listener.cancel()
+        gen.close()
+
+def _sse(gen):
+    last, reason = None, "completed"
+    try:
+        for est in gen:
+            last = est
+            yield f"data: {json.dumps(est)}\n\n"
+            if est["converged"]:
+                reason = "tolerance"
+    except ValueError as e:
+        yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+        return
+    yield f"data: {json.dumps(_done(last, reason))}\n\n"
+
+@router.websocket("/montecarlo/stream")
+async def montecarlo_ws(ws: WebSocket):
+    await _websocket_stream(ws, "montecarlo")
+
+@router.websocket("/markowitz/stream")
+async def markowitz_ws(ws: WebSocket):
+    await _websocket_stream(ws, "markowitz")
+
+def _sse_response(kind: str, body: BaseModel):
+    fn = STREAMS[kind][1]
+    try:
+        _admit(kind, body)
+    except budget.BudgetExceeded as e:
+        return JSONResponse(status_code=413, content=_rejected(e))
+    return StreamingResponse(_sse(fn(**body.model_dump())), media_type="text/event-stream")
+
+@router.post("/montecarlo/stream")
+def montecarlo_sse(body: MonteCarloStreamIn):
+    return _sse_response("montecarlo", body)
+
+@router.post("/markowitz/stream")
+def markowitz_sse(body: MarkowitzStreamIn):
+    return _sse_response("markowitz", body)
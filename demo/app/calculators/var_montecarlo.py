@@ -1,16 +1,17 @@
 # demo/app/calculators/var_montecarlo.py
-from typing import Optional, List, Dict
+from typing import Literal, Optional, List, Dict
 import numpy as np
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-import matplotlib.pyplot as plt
-import io, base64
+from app import budget, render
+from app.rng import make_rng, resolve, as_dtype
+from .path_models import terminal_values
 
 router = APIRouter()
 
 # --- Retornos sintéticos por defecto (igual que var_simple) ---
-_RNG = np.random.default_rng(seed=123)
-DEFAULT_RETURNS = _RNG.normal(0.0, 0.01, size=750).astype(float)
+DEFAULT_RETURNS = make_rng(123).normal(0.0, 0.01, size=750).astype(float)
 
 def _ensure_returns(returns):
     if returns is None or len(returns) == 0:
@@ -23,17 +24,40 @@ def var_montecarlo(
     horizon: int = 1,
     sims: int = 10_000,
     amount: Optional[float] = None,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+    dtype: str = "float64",
+    model: str = "gbm",
+    model_params: Optional[Dict[str, float]] = None,
 ) -> Dict:
+    dtype = as_dtype(dtype)
+    decision = budget.check("var_montecarlo", sims=sims, itemsize=dtype.itemsize, model=model, horizon=horizon)
+    with budget.track(decision):
+        return _var_montecarlo(returns, alpha, horizon, sims, amount, resolve(rng, seed), dtype,
+                               model, model_params)
+
+def _var_montecarlo(returns, alpha: float, horizon: int, sims: int, amount: Optional[float],
+                    rng: np.random.Generator, dtype=np.dtype(np.float64),
+                    model: str = "gbm", model_params: Optional[Dict[str, float]] = None) -> Dict:
     rets = _ensure_returns(returns)
 
     mu = rets.mean()
     sigma = rets.std(ddof=1)
 
-    sims_1d = np.random.normal(mu, sigma, size=sims)
-    sims_H = sims_1d * np.sqrt(horizon)
+    if model == "gbm" and not model_params:
+        # normal(mu, sigma) = mu + sigma·z, con z ya en el dtype pedido
+        sims_1d = rng.standard_normal(sims, dtype=dtype)
+        sims_1d *= dtype.type(sigma)
+        sims_1d += dtype.type(mu)
+        sims_H = sims_1d * dtype.type(np.sqrt(horizon))
+    else:
+        # trayectorias diarias del modelo con mu/sigma históricos anualizados;
+        # retorno simple acumulado a 'horizon' días
+        sims_H = terminal_values(model, 1.0, mu * 252, sigma * np.sqrt(252), horizon / 252, horizon,
+                                 sims, rng, dtype, model_params) - 1.0
 
     var = np.quantile(sims_H, alpha)
-    es = sims_H[sims_H <= var].mean()
+    es = sims_H[sims_H <= var].mean(dtype=np.float64)
 
     var_mag = float(abs(var))
     es_mag  = float(abs(es))
@@ -49,19 +73,17 @@ def var_montecarlo(
         out["var_money"] = float(amount) * var_mag
         out["es_money"]  = float(amount) * es_mag
 
-    # --- Gráfico de distribución ---
-    fig, ax = plt.subplots()
-    ax.hist(sims_H, bins=50, color="skyblue", edgecolor="black", alpha=0.7)
-    ax.axvline(out["var_ret"], color="red", linestyle="--", label="VaR")
-    ax.axvline(out["es_ret"], color="orange", linestyle="--", label="ES")
-    ax.set_title("Distribución de pérdidas simuladas (Monte Carlo)")
-    ax.legend()
+    img_base64 = None
+    if render.enabled():
+        # --- Gráfico de distribución ---
+        fig, ax = render.subplots()
+        ax.hist(sims_H, bins=50, color="skyblue", edgecolor="black", alpha=0.7)
+        ax.axvline(out["var_ret"], color="red", linestyle="--", label="VaR")
+        ax.axvline(out["es_ret"], color="orange", linestyle="--", label="ES")
+        ax.set_title("Distribución de pérdidas simuladas (Monte Carlo)")
+        ax.legend()
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+        img_base64 = render.png_base64(fig)
 
     # --- Mensaje amigable ---
     msg = (
@@ -69,6 +91,8 @@ def var_montecarlo(
         f"{out['var_pct']:.2f}% (retorno), "
         f"ES ≈ {out['es_pct']:.2f}%."
     )
+    if model != "gbm":
+        msg += f" Modelo: {model}."
     if amount:
         msg += f" Equivale a pérdidas de hasta ${out['var_money']:,.2f}."
 
@@ -85,14 +109,30 @@ class VarMontecarloIn(BaseModel):
     horizon: int = 1
     sims: int = 10000
     amount: Optional[float] = None
+    seed: Optional[int] = None
+    dtype: Literal["float32", "float64"] = "float64"
+    model: Literal["gbm", "heston", "merton"] = "gbm"
+    model_params: Optional[Dict[str, float]] = None
 
 # --- Endpoint ---
 @router.post("/var-montecarlo")
-def calc_var_montecarlo(body: VarMontecarloIn):
-    return var_montecarlo(
-        returns=body.returns,
-        alpha=body.alpha,
-        horizon=body.horizon,
-        sims=body.sims,
-        amount=body.amount,
-    )
+def calc_var_montecarlo(body: VarMontecarloIn, x_tenant: Optional[str] = Header(None)):
+    decision = budget.admit("var_montecarlo", sims=body.sims, itemsize=as_dtype(body.dtype).itemsize,
+                            model=body.model, horizon=body.horizon)
+    rejected = budget.http_response(decision, "calc_var_montecarlo", body.dict(), x_tenant)
+    if rejected is not None:
+        return rejected
+    try:
+        return var_montecarlo(
+            returns=body.returns,
+            alpha=body.alpha,
+            horizon=body.horizon,
+            sims=body.sims,
+            amount=body.amount,
+            seed=body.seed,
+            dtype=body.dtype,
+            model=body.model,
+            model_params=body.model_params,
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
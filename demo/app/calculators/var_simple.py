@@ -3,14 +3,14 @@ from __future__ import annotations
 import numpy as np
 from fastapi import APIRouter
 from pydantic import BaseModel
-import io, base64
-import matplotlib.pyplot as plt
+from app import render
+from app.rng import make_rng
+from statistics import NormalDist
 
 router = APIRouter()
 
 # --- Dataset sintético por defecto ---
-_RNG = np.random.default_rng(seed=42)
-DEFAULT_RETURNS = _RNG.normal(0.0, 0.01, size=750).astype(float)
+DEFAULT_RETURNS = make_rng(42).normal(0.0, 0.01, size=750).astype(float)
 
 def _ensure_returns(returns):
     if returns is None or len(returns) == 0:
@@ -22,49 +22,69 @@ class VarSimpleIn(BaseModel):
     returns: list[float] | None = None
     confidence: float = 0.95
 
-# --- Endpoint con gráfico ---
-@router.post("/var")
-def calculate_var(body: VarSimpleIn):
+EWMA_LAMBDA = 0.94
+
+def _ewma_sigma(returns: np.ndarray, lam: float) -> float:
+    """Volatilidad diaria EWMA (RiskMetrics): σ²_t = λ·σ²_{t-1} + (1-λ)·r²_{t-1}."""
+    weights = (1 - lam) * lam ** np.arange(len(returns) - 1, -1, -1)
+    return float(np.sqrt(np.dot(weights, returns ** 2) / weights.sum()))
+
+def calc_var_simple(returns=None, alpha: float = 0.05, horizon: int = 1, amount: float | None = None,
+                    method: str = "historic", lam: float = EWMA_LAMBDA) -> dict:
     """
-    Calcula el VaR simple a partir de retornos explícitos y genera un gráfico.
+    VaR histórico (percentil de cola) o EWMA (paramétrico normal con
+    volatilidad EWMA) a 'horizon' días por la regla de la raíz del tiempo.
     """
-    returns = _ensure_returns(body.returns)
-    confidence = body.confidence
+    if method not in ("historic", "ewma"):
+        raise ValueError("method debe ser 'historic' o 'ewma'.")
+    if not 0 < alpha < 1 or horizon < 1:
+        raise ValueError("alpha debe estar en (0,1) y horizon >= 1.")
+    returns = _ensure_returns(returns)
+    confidence = 1 - alpha
 
-    # cálculo VaR (percentil de cola)
-    var = np.percentile(returns, (1 - confidence) * 100)
+    if method == "ewma":
+        var = NormalDist().inv_cdf(alpha) * _ewma_sigma(returns, lam)
+    else:
+        var = float(np.percentile(returns, alpha * 100))
+    var *= np.sqrt(horizon)
     var_mag = abs(float(var))
     var_pct = var_mag * 100
 
-    # --- Gráfico ---
-    fig, ax = plt.subplots()
-    ax.hist(returns, bins=30, color="skyblue", alpha=0.7, edgecolor="black")
-    ax.axvline(var, color="red", linestyle="--", linewidth=2,
-               label=f"VaR {confidence*100:.0f}%")
-    ax.set_title("Distribución de Retornos y VaR")
-    ax.set_xlabel("Retorno")
-    ax.set_ylabel("Frecuencia")
-    ax.legend()
+    img_base64 = None
+    if render.enabled():
+        # --- Gráfico ---
+        fig, ax = render.subplots()
+        ax.hist(returns, bins=30, color="skyblue", alpha=0.7, edgecolor="black")
+        ax.axvline(var, color="red", linestyle="--", linewidth=2,
+                   label=f"VaR {confidence*100:.0f}%")
+        ax.set_title("Distribución de Retornos y VaR")
+        ax.set_xlabel("Retorno")
+        ax.set_ylabel("Frecuencia")
+        ax.legend()
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+        img_base64 = render.png_base64(fig)
 
     # ✅ Mensaje claro y homogéneo
     msg = (
-        f"VaR Simple ({int(confidence*100)}% confianza): "
+        f"VaR Simple ({int(round(confidence*100))}% confianza): "
         f"{var_pct:.2f}% (retorno). "
         "Esto significa que, bajo condiciones normales, "
         "las pérdidas no deberían superar este nivel."
     )
 
+    out = {"method": method, "horizon": horizon, "var_ret": var_mag, "var_pct": var_pct}
+    if amount is not None:
+        out["var_money"] = float(amount) * var_mag
     return {
         "message": msg,
-        "result": {
-            "var_ret": var_mag,
-            "var_pct": var_pct
-        },
+        "result": out,
         "graph": img_base64
     }
+
+# --- Endpoint con gráfico ---
+@router.post("/var")
+def calculate_var(body: VarSimpleIn):
+    """
+    Calcula el VaR simple a partir de retornos explícitos y genera un gráfico.
+    """
+    return calc_var_simple(body.returns, alpha=1 - body.confidence)
@@ -0,0 +1,206 @@
+# demo/app/jobs.py
+"""
+Cola de jobs para simulaciones y scoring largos.
+
+- Pool acotado de workers (hilos: NumPy/XGBoost sueltan el GIL en el cálculo).
+- Límite de jobs simultáneos por tenant, para que un usuario pesado no
+  acapare el pool; el resto espera en cola (FIFO) sin bloquear a los demás.
+- Progreso desde los motores por bloques (app.progress.report).
+- Cancelación cooperativa y almacén de resultados con TTL.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from . import progress
+
+JOB_WORKERS = int(os.getenv("VALERIO_JOB_WORKERS", str(max(2, (os.cpu_count() or 2) // 2))))
+TENANT_CONCURRENCY = int(os.getenv("VALERIO_JOB_TENANT_CONCURRENCY", "2"))
+TENANT_QUEUE = int(os.getenv("VALERIO_JOB_TENANT_QUEUE", "50"))
+RESULT_TTL = float(os.getenv("VALERIO_JOB_RESULT_TTL", "3600"))   # segundos
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class QueueFull(Exception):
+    """El tenant ya tiene demasiados jobs en cola."""
+
+def _targets() -> dict:
+    """Funciones ejecutables como job (import diferido para evitar ciclos)."""
+    from .calculators.montecarlo import calc_montecarlo
+    from .calculators.var_montecarlo import var_montecarlo
+    from .calculators.markowitz import optimizar_portafolio
+    from .calculators.black_scholes import black_scholes
+    from .calculators.capm import calcular_capm
+    from .calculators.exotics import price_exotics
+    from .calculators.american import price_american
+    from .ml.batch_forecast import predict_stocks
+    from .ml.backtest import run as backtest
+    from .ml.valerio_core_adapter import predict_rows
+    from .ml.risk_explain import explain_matrix
+    return {
+        "calc_montecarlo": calc_montecarlo,
+        "calc_var_montecarlo": var_montecarlo,
+        "calc_markowitz": optimizar_portafolio,
+        "calc_black_scholes": black_scholes,
+        "calc_capm": calcular_capm,
+        "price_exotics": price_exotics,
+        "price_american": price_american,
+        "predict_stocks": predict_stocks,
+        "backtest": backtest,
+        "ml_predict_rows": predict_rows,
+        "risk_explain": explain_matrix,
+    }
+
+class Job:
+    def __init__(self, tool: str, params: dict, tenant: str):
+        self.id = uuid.uuid4().hex
+        self.tool = tool
+        self.params = params
+        self.tenant = tenant
+        self.status = PENDING
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+
+    def to_dict(self, with_result: bool = True) -> dict:
+        out = {
+            "id": self.id,
+            "tool": self.tool,
+            "tenant": self.tenant,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.finished_at is not None:
+            out["expires_at"] = self.finished_at + RESULT_TTL
+        if self.error is not None:
+            out["error"] = self.error
+        if with_result and self.status == DONE:
+            out["result"] = self.result
+        return out
+
+class JobManager:
+    def __init__(self, workers: int = JOB_WORKERS, tenant_concurrency: int = TENANT_CONCURRENCY,
+                 tenant_queue: int = TENANT_QUEUE, ttl: float = RESULT_TTL, targets: dict = None):
+        self.workers = workers
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_queue = tenant_queue
+        self.ttl = ttl
+        self._targets = targets
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="valerio-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending = deque()
+        self._running = {}   # tenant -> nº de jobs en ejecución
+
+    @property
+    def targets(self) -> dict:
+        if self._targets is None:
+            self._targets = _targets()
+        return self._targets
+
+    # ---------- API ----------
+    def submit(self, tool: str, params: dict = None, tenant: str = "default") -> Job:
+        if tool not in self.targets:
+            raise KeyError(f"Herramienta desconocida: {tool}. Disponibles: {sorted(self.targets)}")
+        job = Job(tool, dict(params or {}), tenant)
+        with self._lock:
+            self._sweep()
+            queued = sum(1 for j in self._pending if j.tenant == tenant)
+            if queued >= self.tenant_queue:
+                raise QueueFull(f"Demasiados jobs en cola para '{tenant}' ({queued}).")
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._dispatch()
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            self._sweep()
+            return self._jobs.get(job_id)
+
+    def list(self, tenant: str = None) -> list:
+        with self._lock:
+            self._sweep()
+            return [j for j in self._jobs.values() if tenant is None or j.tenant == tenant]
+
+    def cancel(self, job_id: str):
+        """Cancela un job: si está en cola sale de ella; si corre, se para en el siguiente bloque."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job.cancel_requested = True
+            if job.status == PENDING:
+                self._pending.remove(job)
+                self._finish(job, CANCELLED)
+        return job
+
+    # ---------- Interno ----------
+    def _dispatch(self):
+        """Lanza jobs en cola respetando el pool y el límite por tenant (con el lock tomado)."""
+        busy = sum(self._running.values())
+        skipped = deque()
+        while self._pending and busy < self.workers:
+            job = self._pending.popleft()
+            if self._running.get(job.tenant, 0) >= self.tenant_concurrency:
+                skipped.append(job)
+                continue
+            self._running[job.tenant] = self._running.get(job.tenant, 0) + 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            busy += 1
+            self._pool.submit(self._run, job)
+        skipped.extend(self._pending)
+        self._pending = skipped
+
+    def _run(self, job: Job):
+        def on_progress(done, total):
+            if total:
+                job.progress = min(1.0, float(done) / float(total))
+            if job.cancel_requested:
+                raise progress.Cancelled()
+
+        token = progress.bind(on_progress)
+        status, result, error = DONE, None, None
+        try:
+            result = self.targets[job.tool](**job.params)
+        except progress.Cancelled:
+            status = CANCELLED
+        except Exception as e:
+            status, error = FAILED, f"{type(e).__name__}: {e}"
+        finally:
+            progress.reset(token)
+
+        with self._lock:
+            job.result, job.error = result, error
+            if status == DONE:
+                job.progress = 1.0
+            self._running[job.tenant] -= 1
+            self._finish(job, status)
+            self._dispatch()
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        job.params = None   # no retener entradas grandes
+
+    def _sweep(self):
+        """Elimina resultados caducados (TTL desde que terminó el job)."""
+        now = time.time()
+        expired = [k for k, j in self._jobs.items()
+                   if j.finished_at is not None and now - j.finished_at > self.ttl]
+        for k in expired:
+            del self._jobs[k]
+
+manager = JobManager()
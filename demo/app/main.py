@@ -1,20 +1,30 @@
 # demo/app/main.py
 from typing import List, Optional
-from fastapi import FastAPI, Body, Query
+from fastapi import FastAPI, Body, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import joblib
 import numpy as np
 from pathlib import Path
 import random
-import matplotlib.pyplot as plt
-import io, base64
-from fastapi.responses import JSONResponse
+import time
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app import routes_openai
+from app import routes_jobs
+from app import routes_profiling
+from app import budget, metrics, profiling, render
 
-from .schemas import AskIn, AskOut
-from .agent.agent import answer as agent_answer
-from .ml.valerio_core_adapter import predict_by_row_index  
+from .schemas import AskIn, AskOut, AskBatchIn, NluExamplesIn, StockBatchIn, BacktestIn
+from .agent import nlu
+from .agent.agent import answer as agent_answer, answer_many, understand_many, tools_for, ASK_BATCH_SECONDS
+from .agent.qcache import cache as question_cache
+from .agent import registry as tool_registry
+from .ml.valerio_core_adapter import predict_by_row_index, predict_rows, parse_rows, get_matrix
+from .ml.model import predict_risk as predict_risk_case
+from .ml.risk_explain import explain_matrix, explain_one, global_importance
+from .ml.artifacts import list_artifacts
+from .ml.batch_forecast import predict_stocks
+from .ml.backtest import run as run_backtest, cost_params as backtest_cost
 
 # Routers de calculadoras
 # main.py
@@ -24,6 +34,9 @@ from .calculators.var_montecarlo import router as var_montecarlo_router
 from .calculators.capm import router as capm_router
 from .calculators.markowitz import router as markowitz_router
 from .calculators.montecarlo import router as montecarlo_router
+from .calculators.streaming import router as streaming_router
+from .calculators.exotics import router as exotics_router
+from .calculators.american import router as american_router
 
 
 app = FastAPI(title="Valerio AI - MVP", version="0.1.0")
@@ -35,12 +48,15 @@ app.include_router(capm_router, prefix="/calc", tags=["CAPM"])
 app.include_router(markowitz_router, prefix="/calc", tags=["Markowitz"])
 app.include_router(routes_openai.router, prefix="/valerio", tags=["Valerio AI"])
 app.include_router(montecarlo_router, prefix="/calc", tags=["Monte Carlo"])
+app.include_router(streaming_router, prefix="/calc", tags=["Streaming"])
+app.include_router(exotics_router, prefix="/calc", tags=["Exóticas"])
+app.include_router(american_router, prefix="/calc", tags=["Americanas"])
+app.include_router(routes_jobs.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(routes_profiling.router, prefix="/admin/profiles", tags=["Admin"])
 
-# --- Cargar modelo de riesgo ---
-MODEL_PATH = Path(__file__).resolve().parent / "ml" / "models" / "risk_xgboost.pkl"
-risk_model = joblib.load(MODEL_PATH)
+# --- Modelo de riesgo (cargado una vez en app.ml.model) ---
 features = ["zscore", "volatility", "returns", "debt_ratio"]
-print("Clases del modelo:", risk_model.classes_)
+global_importance()   # importancia global + gráfico precalculados al arrancar
 
 # CORS básico para poder llamar desde el frontend (puedes limitar orígenes luego)
 app.add_middleware(
@@ -50,26 +66,140 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# latencia, tamaños y peticiones en curso por ruta (ver GET /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+# perfilado bajo demanda: sin middleware (coste cero) con VALERIO_PROFILE=off
+if profiling.MODE != "off":
+    app.add_middleware(profiling.ProfilingMiddleware)
 
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # formato de texto Prometheus: rutas HTTP, spans del pipeline, cachés y herramientas
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# --- Agente: una pregunta o un lote (un solo predict de intención) ---
+MAX_ASK_BATCH = 10_000          # preguntas por lote (las de ayuda no ejecutan nada)
+MAX_ASK_BATCH_TOOLS = 200       # de ellas, las que ejecutan una herramienta
+
+def _drop_graphs(resp):
+    if not isinstance(resp, dict):
+        return resp
+    out = {k: v for k, v in resp.items() if k != "graph"}
+    if isinstance(out.get("result"), dict):
+        out["result"] = {k: v for k, v in out["result"].items() if k != "graph"}
+    return out
+
+@app.post("/ask")
+def ask(body: AskIn):
+    return agent_answer(body.q)
+
+@app.post("/ask/batch")
+def ask_batch(body: AskBatchIn):
+    if len(body.questions) > MAX_ASK_BATCH:
+        return JSONResponse(status_code=413, content={"error": f"Máximo {MAX_ASK_BATCH} preguntas por lote."})
+    t0 = time.perf_counter()
+    understood = understand_many(body.questions)
+    n_tools = sum(t is not None for t in tools_for(understood))
+    if n_tools > MAX_ASK_BATCH_TOOLS:
+        return JSONResponse(status_code=413, content={
+            "error": f"Máximo {MAX_ASK_BATCH_TOOLS} preguntas con cálculo por lote ({n_tools} en este)."})
+    results = answer_many(body.questions, graphs=body.graphs, understood=understood, deadline=ASK_BATCH_SECONDS)
+    if not body.graphs:
+        results = [_drop_graphs(r) for r in results]
+    intents = {}
+    for r in results:
+        if r:
+            intents[r["intent"]] = intents.get(r["intent"], 0) + 1
+    return {"count": len(results), "seconds": time.perf_counter() - t0, "intents": intents, "results": results}
+
+@app.get("/ask/cache")
+def ask_cache():
+    # aciertos/fallos de la caché de preguntas (intención, idioma, slots)
+    return question_cache.stats()
+
+@app.post("/nlu/examples")
+def nlu_examples(body: NluExamplesIn, x_admin_token: Optional[str] = Header(None)):
+    # frases etiquetadas para el backend NLU online (partial_fit + cambio en caliente); solo admin
+    if not profiling.authorized(x_admin_token):
+        return JSONResponse(status_code=403, content={"error": "Cabecera X-Admin-Token ausente o incorrecta."})
+    try:
+        return nlu.learn([e.text for e in body.examples], [e.intent for e in body.examples])
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+@app.get("/tools")
+def tools():
+    # herramientas del agente: política, timeout, concurrencia y latencias
+    return tool_registry.stats()
+
 # --- Endpoints “oficiales” que consumirá el frontend ---
 @app.get("/ml/predict")
-def ml_predict(row: int = Query(..., ge=0)):
+def ml_predict(row: Optional[int] = Query(None, ge=0), rows: Optional[str] = Query(None)):
     # usando la función pública del adapter
-    return predict_by_row_index(row)
+    # - row=7           -> una fila
+    # - rows=0-5000     -> rango (inclusivo) / rows=1,5,7 -> lista; un solo predict_proba
+    try:
+        if rows is not None:
+            return predict_rows(rows)
+        if row is None:
+            return JSONResponse(status_code=400, content={"error": "Indica 'row' o 'rows'."})
+        return predict_by_row_index(row)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+# --- Artefactos de modelos y sus metadatos (versión, features, métricas) ---
+@app.get("/ml/models")
+def ml_models():
+    return list_artifacts()
+
+# --- Presupuesto: límites por endpoint y coste estimado vs real ---
+@app.get("/budget")
+def budget_stats():
+    return budget.stats()
+
+# --- Predicción bursátil para una lista de tickers (un predict por paso) ---
+@app.post("/ml/predict_stock/batch")
+def predict_stock_batch(body: StockBatchIn, x_tenant: Optional[str] = Header(None)):
+    decision = budget.admit("predict_stock", days=body.days, tickers=len(set(body.tickers)))
+    queued = budget.http_response(decision, "predict_stocks", body.dict(), x_tenant)
+    if queued is not None:
+        return queued
+    try:
+        return predict_stocks(body.tickers, days=body.days, model=body.model, charts=body.charts,
+                              seed=body.seed)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+# --- Backtest walk-forward de los regresores (datos locales, reajuste por ventana) ---
+@app.post("/ml/backtest")
+def ml_backtest(body: BacktestIn, x_tenant: Optional[str] = Header(None)):
+    try:
+        cost = backtest_cost(body.models, start=body.start, end=body.end, refit_every=body.refit_every,
+                             min_train=body.min_train)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    decision = budget.admit("backtest", **cost)
+    queued = budget.http_response(decision, "backtest", body.dict(), x_tenant)
+    if queued is not None:
+        return queued
+    try:
+        return run_backtest(body.models, start=body.start, end=body.end, refit_every=body.refit_every,
+                            min_train=body.min_train)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
 
 # --- Endpoint de predicción de riesgo con gráfico ---
 @app.post("/predict_risk")
 def predict_risk(zscore: float, volatility: float, returns: float, debt_ratio: float):
-    X = np.array([[zscore, volatility, returns, debt_ratio]])
-    pred = risk_model.predict(X)[0]
-    prob = risk_model.predict_proba(X)[0].tolist()
+    risk = predict_risk_case(zscore, volatility, returns, debt_ratio)
+    prob = risk["probabilities"]
 
-    label = "BAJO" if pred == 0 else "ALTO"
-    prob_percent = round(max(prob) * 100, 2)
+    label = "BAJO" if risk["prediction"] == 0 else "ALTO"
+    prob_percent = risk["prob"]
 
     responses = [
         f"Según mis cálculos, el riesgo de esta empresa es {label}, con una probabilidad del {prob_percent}%.",
@@ -85,37 +215,42 @@ def predict_risk(zscore: float, volatility: float, returns: float, debt_ratio: f
         response += " Los indicadores sugieren una posición financiera relativamente estable."
 
     # --- Gráfico de barras: Probabilidades ---
-    fig, ax = plt.subplots()
+    fig, ax = render.subplots()
     ax.bar(["BAJO", "ALTO"], prob, color=["green", "red"])
     ax.set_title("Probabilidad de Riesgo")
     ax.set_ylabel("Probabilidad")
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+    img_base64 = render.png_base64(fig)
 
     return {
         "message": response,
         "graph": img_base64
     }
 
-# --- Endpoint de gráfico de importancia de features ---
+# --- Endpoint de gráfico de importancia de features (desde caché) ---
 @app.get("/risk_feature_importance")
 def risk_feature_importance():
-    importance = risk_model.feature_importances_
-
-    plt.figure(figsize=(6,4))
-    plt.bar(features, importance, color="steelblue")
-    plt.title("Importancia de variables en el modelo de riesgo")
-    plt.ylabel("Peso")
-    plt.tight_layout()
+    return global_importance()
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    buf.close()
+# --- Explicaciones por empresa (contribuciones XGBoost pred_contribs) ---
+class RiskExplainIn(BaseModel):
+    X: Optional[List[List[float]]] = None   # filas [zscore, volatility, returns, debt_ratio]
+    rows: Optional[str] = None              # o filas del dataset: "0-500", "1,5,7"
 
-    return {"image_base64": img_base64}
+@app.get("/risk_explain")
+def risk_explain_one(zscore: float, volatility: float, returns: float, debt_ratio: float):
+    return explain_one(zscore, volatility, returns, debt_ratio)
 
+@app.post("/risk_explain")
+def risk_explain_batch(body: RiskExplainIn):
+    try:
+        if body.X is not None:
+            if any(len(r) != len(features) for r in body.X):
+                raise ValueError(f"Cada fila debe tener {len(features)} valores: {features}")
+            return explain_matrix(body.X)
+        if body.rows is not None:
+            X, _ = get_matrix()
+            idx = parse_rows(body.rows, len(X))
+            return {"rows": idx.tolist(), **explain_matrix(X[idx])}
+        raise ValueError("Indica 'X' o 'rows'.")
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
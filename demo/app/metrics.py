@@ -0,0 +1,243 @@
+# demo/app/metrics.py
+"""
+Métricas de rendimiento en formato de texto Prometheus (GET /metrics).
+
+- MetricsMiddleware (ASGI): latencia y tamaño de petición/respuesta por ruta
+  (plantilla de la ruta, p. ej. /jobs/{job_id}, no la URL) y peticiones en curso.
+- span("etapa"): temporizador de una etapa del pipeline (NLU, idioma, slots, cálculo,
+  gráfico, descarga de precios, carga de modelos, LLM...). Un span cuesta
+  ~1 µs: perf_counter, bisect en los límites del histograma y un lock.
+- register_cache / register_collector: cachés y contadores que se leen solo
+  al pedir /metrics, sin coste en el camino de la petición.
+
+Sin dependencias: se genera el formato de exposición 0.0.4 a mano.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SPAN_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(x) -> str:
+    return repr(float(x)) if isinstance(x, float) else str(x)
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1) -> None:
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1) -> None:
+        with self.lock:
+            self.value -= amount
+
+class Family:
+    """Métrica con etiquetas: labels(*valores) devuelve (y crea una vez) la serie."""
+
+    def __init__(self, name: str, doc: str, kind: str, labelnames=(), buckets=None):
+        self.name, self.doc, self.kind = name, doc, kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        _FAMILIES.append(self)
+
+    def labels(self, *values):
+        s = self._series.get(values)
+        if s is None:
+            with self._lock:
+                s = self._series.get(values)
+                if s is None:
+                    s = _Histogram(self.buckets) if self.kind == "histogram" else _Value()
+                    self._series[values] = s
+        return s
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        for values, s in list(self._series.items()):
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_labels(self.labelnames, values)} {_num(s.value)}")
+                continue
+            with s.lock:
+                counts, total, count = list(s.counts), s.sum, s.count
+            cum = 0
+            for bound, c in zip(s.bounds + (float("inf"),), counts):
+                cum += c
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_num(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cum}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {count}")
+        return lines
+
+_FAMILIES = []
+_COLLECTORS = []
+_CACHES = {}
+
+HTTP_REQUESTS = Family("valerio_http_requests_total", "Peticiones HTTP por ruta y estado.", "counter",
+                       ("method", "route", "status"))
+HTTP_LATENCY = Family("valerio_http_request_duration_seconds", "Latencia de las peticiones HTTP.", "histogram",
+                      ("method", "route"), LATENCY_BUCKETS)
+HTTP_REQUEST_SIZE = Family("valerio_http_request_size_bytes", "Tamaño del cuerpo de la petición.", "histogram",
+                           ("method", "route"), SIZE_BUCKETS)
+HTTP_RESPONSE_SIZE = Family("valerio_http_response_size_bytes", "Tamaño del cuerpo de la respuesta.", "histogram",
+                            ("method", "route"), SIZE_BUCKETS)
+IN_FLIGHT_FAMILY = Family("valerio_http_requests_in_flight", "Peticiones HTTP en curso.", "gauge")
+IN_FLIGHT = IN_FLIGHT_FAMILY.labels()
+SPANS = Family("valerio_span_duration_seconds", "Duración de cada etapa del pipeline.", "histogram",
+               ("stage",), SPAN_BUCKETS)
+
+# ============================
+# Spans
+# ============================
+class _Span:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+def span(stage: str) -> _Span:
+    """with span("nlu.predict"): ... -> observa la duración en valerio_span_duration_seconds."""
+    return _Span(SPANS.labels(stage))
+
+# ============================
+# Cachés y colectores (se leen al exportar)
+# ============================
+def register_cache(name: str, stats) -> None:
+    """'stats()' devuelve un dict con hits, misses y (opcional) size."""
+    _CACHES[name] = stats
+
+def lru_stats(fn):
+    """Adaptador de functools.lru_cache para register_cache."""
+    def stats():
+        info = fn.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+    return stats
+
+def register_collector(fn) -> None:
+    """'fn()' devuelve líneas de texto Prometheus ya formateadas (con HELP/TYPE)."""
+    _COLLECTORS.append(fn)
+
+def _cache_lines() -> list:
+    rows = []
+    for name, stats in list(_CACHES.items()):
+        try:
+            rows.append((name, stats()))
+        except Exception:
+            continue
+    lines = []
+    for metric, key, kind, doc in (("valerio_cache_hits_total", "hits", "counter", "Aciertos de caché."),
+                                   ("valerio_cache_misses_total", "misses", "counter", "Fallos de caché."),
+                                   ("valerio_cache_size", "size", "gauge", "Entradas en caché.")):
+        lines += [f"# HELP {metric} {doc}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{cache="{_escape(n)}"}} {_num(s[key])}' for n, s in rows if s.get(key) is not None]
+    return lines
+
+def render() -> str:
+    lines = []
+    for fam in _FAMILIES:
+        lines += fam.render()
+    lines += _cache_lines()
+    for collect in list(_COLLECTORS):
+        try:
+            lines += collect()
+        except Exception:
+            continue
+    return "\n".join(lines) + "\n"
+
+# ============================
+# Middleware ASGI
+# ============================
+def route_template(scope) -> str:
+    """
+    Ruta como plantilla (/jobs/{job_id}) para no crear una serie por URL.
+    Se reconstruye desde path y path_params: con routers incluidos con prefijo,
+    scope["route"].path no lleva el prefijo en todas las versiones de FastAPI.
+    """
+    if "route" not in scope:
+        return "<unmatched>"
+    names = {str(v): k for k, v in scope.get("path_params", {}).items()}
+    if not names:
+        return scope["path"]
+    return "/".join(f"{{{names[seg]}}}" if seg in names else seg for seg in scope["path"].split("/"))
+
+class MetricsMiddleware:
+    """Mide cada petición HTTP; las rutas sin coincidencia se agrupan en '<unmatched>'."""
+
+    def __init__(self, app, skip=("/metrics",)):
+        self.app = app
+        self.skip = set(skip)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip:
+            await self.app(scope, receive, send)
+            return
+        sizes = [0, 0]          # petición, respuesta
+        status = [500]
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes[0] += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes[1] += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            IN_FLIGHT.dec()
+            key = (scope.get("method", ""), route_template(scope))
+            HTTP_REQUESTS.labels(*key, str(status[0])).inc()
+            HTTP_LATENCY.labels(*key).observe(elapsed)
+            HTTP_REQUEST_SIZE.labels(*key).observe(sizes[0])
+            HTTP_RESPONSE_SIZE.labels(*key).observe(sizes[1])
@@ -1,4 +1,5 @@
 # app/ml/__init__.py
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import joblib
@@ -21,6 +22,14 @@ except Exception as e:
     risk_model = None
     print("⚠️ No se pudo cargar risk_xgboost.pkl:", e)
 
+# matriz de features y target precalculados una sola vez
+if df is not None:
+    FEATURES = [c for c in df.columns if c != "target"]
+    X = np.ascontiguousarray(df[FEATURES].to_numpy(dtype=np.float32))
+    y = df["target"].to_numpy()
+else:
+    FEATURES, X, y = [], None, None
+
 def ml_predict(row: int):
     """
     Devuelve la predicción para la fila 'row' del dataset financiero.
@@ -31,15 +40,13 @@ def ml_predict(row: int):
     if row < 0 or row >= len(df):
         return {"error": f"Fila {row} fuera de rango (0 - {len(df)-1})."}
     
-    X = df.drop("target", axis=1)
-    y = df["target"]
-    
-    pred = risk_model.predict([X.iloc[row]])[0]
-    prob = risk_model.predict_proba([X.iloc[row]])[0].tolist()
+    # una sola pasada del modelo: la clase sale de las probabilidades
+    prob = risk_model.predict_proba(X[row:row+1])[0]
+    pred = risk_model.classes_[int(np.argmax(prob))]
     
     return {
         "row": row,
-        "features": X.iloc[row].to_dict(),
+        "features": df.loc[row, FEATURES].to_dict(),
         "prediction": int(pred),
-        "probabilities": prob
+        "probabilities": prob.tolist()
     }
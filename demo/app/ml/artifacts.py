@@ -0,0 +1,77 @@
+# demo/app/ml/artifacts.py
+"""
+Artefactos de modelos versionados con metadatos.
+
+Cada entrenamiento guarda:
+  models/versions/<nombre>-<versión>.pkl   (histórico, nunca se sobrescribe)
+  models/versions/<nombre>-<versión>.json  (sidecar con metadatos)
+y actualiza el artefacto "actual" que usa el servidor:
+  models/<nombre>.pkl + models/<nombre>.json
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+import joblib
+
+MODELS_DIR = Path(__file__).resolve().parent / "models"
+VERSIONS_DIR = MODELS_DIR / "versions"
+
+def data_hash(*paths) -> str:
+    """SHA-256 (16 hex) del contenido de uno o varios ficheros de datos."""
+    h = hashlib.sha256()
+    for p in paths:
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:16]
+
+def new_version(dhash: str = "") -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return f"{stamp}-{dhash[:8]}" if dhash else stamp
+
+def save_artifact(model, name: str, metadata: dict, models_dir: Path = MODELS_DIR) -> dict:
+    """
+    Guarda 'model' como <name>.pkl (actual) y como copia versionada, junto a su
+    sidecar JSON. 'metadata' debería incluir features, métricas y data_hash.
+    Devuelve los metadatos completos escritos.
+    """
+    models_dir = Path(models_dir)
+    versions_dir = models_dir / "versions"
+    versions_dir.mkdir(parents=True, exist_ok=True)
+
+    meta = dict(metadata)
+    meta.setdefault("version", new_version(meta.get("data_hash", "")))
+    meta.setdefault("created_at", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    meta["name"] = name
+    meta["model_class"] = type(model).__name__
+
+    versioned = versions_dir / f"{name}-{meta['version']}.pkl"
+    joblib.dump(model, versioned)
+    meta["artifact"] = str(versioned.relative_to(models_dir))
+
+    # el "actual" se escribe a un temporal y se renombra (no deja pkl a medias)
+    current = models_dir / f"{name}.pkl"
+    tmp = current.with_suffix(".pkl.tmp")
+    joblib.dump(model, tmp)
+    tmp.replace(current)
+
+    text = json.dumps(meta, indent=2, ensure_ascii=False, default=float)
+    (versions_dir / f"{name}-{meta['version']}.json").write_text(text, encoding="utf-8")
+    (models_dir / f"{name}.json").write_text(text, encoding="utf-8")
+    return meta
+
+def read_metadata(name: str, models_dir: Path = MODELS_DIR):
+    """Metadatos del artefacto actual <name> (sin .pkl), o None si no hay sidecar."""
+    path = Path(models_dir) / f"{name}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def list_artifacts(models_dir: Path = MODELS_DIR) -> list:
+    """Metadatos de todos los artefactos actuales que tienen sidecar."""
+    out = []
+    for pkl in sorted(Path(models_dir).glob("*.pkl")):
+        meta = read_metadata(pkl.stem, models_dir)
+        out.append(meta or {"name": pkl.stem, "artifact": pkl.name, "version": None})
+    return out
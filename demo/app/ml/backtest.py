@@ -0,0 +1,198 @@
+# demo/app/ml/backtest.py
+"""
+Backtest walk-forward (fuera de muestra) de los regresores de precio.
+
+Para cada fecha t de prueba se predice el cierre de t+1 con las features de t
+(feature store). Las fechas de prueba se parten en ventanas de 'refit_every'
+días; antes de cada ventana se ajusta un modelo nuevo (mismos candidatos que
+pipeline.py) solo con las filas cuyo objetivo ya se conocía al empezarla
+(ventana creciente) y toda la ventana sale de UN solo model.predict.
+Los .pkl del servidor no se usan: se entrenaron con apple_data.csv y
+puntuarlos sobre ese mismo CSV sería in-sample.
+
+Métricas vectorizadas: MAE, RMSE, MAPE, acierto direccional y PnL de una
+estrategia long/short simple, para dos variantes:
+  raw     predicción del modelo tal cual
+  clamp   + corrección de extremos (±5% sobre el último cierre), lo que sirve
+          predict_stock a un día (su ruido solo sustituye a la predicción desde el día 2)
+
+Uso (desde demo/):
+    python -m app.ml.backtest --models all --start 2025-01-01 --refit-every 20 --n-jobs -1
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from .feature_store import FEATURES, panel_features
+from app import budget, progress
+from .pipeline import CANDIDATES
+from .predict_stock import MAX_CHANGE
+
+DEFAULT_DATA = Path(__file__).resolve().parents[1] / "data" / "apple_data.csv"
+TRADING_DAYS = 252
+REFIT_EVERY = 20   # días de prueba por reajuste
+MIN_TRAIN = 60     # filas mínimas de entrenamiento antes de la primera ventana
+
+def load_prices(path=DEFAULT_DATA) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["Date"] = pd.to_datetime(df["Date"], utc=True)
+    return df.set_index("Date").sort_index()[["Close", "Volume"]]
+
+def _metrics(pred: np.ndarray, actual: np.ndarray, last: np.ndarray) -> dict:
+    err = pred - actual
+    pred_dir = np.sign(pred - last)
+    real_ret = actual / last - 1.0
+    # estrategia: largo si el modelo espera subida, corto si espera bajada
+    pnl = pred_dir * real_ret
+    equity = np.cumprod(1.0 + pnl)
+    drawdown = 1.0 - equity / np.maximum.accumulate(equity)
+    std = pnl.std(ddof=1) if len(pnl) > 1 else 0.0
+    return {
+        "mae": float(np.abs(err).mean()),
+        "rmse": float(np.sqrt((err ** 2).mean())),
+        "mape_pct": float(100.0 * np.abs(err / actual).mean()),
+        "hit_rate": float((pred_dir == np.sign(real_ret)).mean()),
+        "strategy_return_pct": float(100.0 * (equity[-1] - 1.0)),
+        "buy_hold_return_pct": float(100.0 * (actual[-1] / last[0] - 1.0)),
+        "sharpe": float(np.sqrt(TRADING_DAYS) * pnl.mean() / std) if std > 0 else 0.0,
+        "max_drawdown_pct": float(100.0 * drawdown.max()),
+    }
+
+def _fit_predict(model: str, X: np.ndarray, y: np.ndarray, train_end: int, test_idx: np.ndarray):
+    """Ajusta 'model' con las filas < train_end y predice test_idx en una sola llamada."""
+    train = np.flatnonzero(np.isfinite(y[:train_end]))
+    clf = CANDIDATES[model]()
+    t0 = time.perf_counter()
+    clf.fit(X[train], y[train])
+    t1 = time.perf_counter()
+    pred = np.asarray(clf.predict(X[test_idx]), dtype=float)
+    return pred, len(train), t1 - t0, time.perf_counter() - t1
+
+def resolve_models(models=None) -> list:
+    """'all' (o vacío) son todos los candidatos; ValueError si alguno no existe."""
+    models = list(CANDIDATES) if not models or list(models) == ["all"] else list(models)
+    unknown = [m for m in models if m not in CANDIDATES]
+    if unknown:
+        raise ValueError(f"Modelo desconocido: {unknown[0]}. Disponibles: {list(CANDIDATES)}")
+    return models
+
+def _test_dates(prices: pd.DataFrame, start=None, end=None, min_train: int = MIN_TRAIN):
+    """
+    Cierres, matriz de features, objetivo y fechas de prueba. Una fecha t es de
+    prueba si hay al menos min_train filas con objetivo conocido antes de t.
+    """
+    close = prices["Close"].to_numpy(dtype=float)
+    volume = prices["Volume"].to_numpy(dtype=float)
+    feats = panel_features(close, volume)
+    X = np.column_stack([feats[f] for f in FEATURES])
+
+    # fila t: features de t y objetivo = cierre de t+1 (NaN si falta algo)
+    valid = np.isfinite(X).all(axis=1)
+    valid[-1] = False
+    y = np.full(len(close), np.nan)
+    y[:-1] = close[1:]
+    y[~valid] = np.nan
+
+    known = np.concatenate([[0], np.cumsum(valid)[:-1]])
+    mask = valid & (known >= min_train)
+    dates = prices.index
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start, tz=dates.tz)
+    if end is not None:
+        mask &= dates <= pd.Timestamp(end, tz=dates.tz)
+    idx = np.flatnonzero(mask)
+    if len(idx) < 2:
+        raise ValueError(f"Ventana sin suficientes fechas para el backtest (se necesitan {min_train} "
+                         "filas de entrenamiento antes de la primera fecha de prueba).")
+    return close, X, y, idx
+
+def cost_params(models=None, prices: pd.DataFrame = None, start=None, end=None,
+                refit_every: int = REFIT_EVERY, min_train: int = MIN_TRAIN) -> dict:
+    """Parámetros para budget.admit("backtest", ...): modelos, reajustes por modelo y filas."""
+    if refit_every < 1 or min_train < 2:
+        raise ValueError("'refit_every' debe ser >= 1 y 'min_train' >= 2.")
+    prices = load_prices() if prices is None else prices
+    idx = _test_dates(prices, start, end, min_train)[3]
+    return {"models": resolve_models(models), "refits": -(-len(idx) // refit_every), "rows": len(prices)}
+
+def backtest(model: str = "xgboost_reg", prices: pd.DataFrame = None, start=None, end=None,
+             refit_every: int = REFIT_EVERY, min_train: int = MIN_TRAIN, n_jobs: int = 1) -> dict:
+    """
+    Backtest walk-forward one-step-ahead de 'model' entre 'start' y 'end' (fechas, inclusive).
+    'prices' es un DataFrame Close/Volume indexado por fecha (por defecto el CSV local).
+    Las ventanas se ajustan en paralelo con joblib ('n_jobs' procesos).
+    """
+    if model not in CANDIDATES:
+        raise ValueError(f"Modelo desconocido: {model}. Disponibles: {list(CANDIDATES)}")
+    if refit_every < 1 or min_train < 2:
+        raise ValueError("'refit_every' debe ser >= 1 y 'min_train' >= 2.")
+    prices = load_prices() if prices is None else prices
+    close, X, y, idx = _test_dates(prices, start, end, min_train)
+    dates = prices.index
+
+    windows = [idx[i:i + refit_every] for i in range(0, len(idx), refit_every)]
+    # en t solo se conoce el cierre de t: se entrena con las filas < t (objetivo <= cierre de t)
+    fits = Parallel(n_jobs=n_jobs)(delayed(_fit_predict)(model, X, y, int(w[0]), w) for w in windows)
+    raw = np.concatenate([f[0] for f in fits])
+
+    last, actual = close[idx], close[idx + 1]
+    clamped = np.clip(raw, last * (1 - MAX_CHANGE), last * (1 + MAX_CHANGE))
+
+    return {
+        "model": model,
+        "start": dates[idx[0]].isoformat(),
+        "end": dates[idx[-1]].isoformat(),
+        "n_predictions": int(len(idx)),
+        "refits": len(windows),
+        "train_rows": [int(f[1]) for f in fits],
+        "fit_seconds": float(sum(f[2] for f in fits)),
+        "predict_seconds": float(sum(f[3] for f in fits)),
+        "variants": {
+            "raw": _metrics(raw, actual, last),
+            "clamp": _metrics(clamped, actual, last),
+        },
+    }
+
+def run(models=None, data=DEFAULT_DATA, start=None, end=None, refit_every: int = REFIT_EVERY,
+        min_train: int = MIN_TRAIN, n_jobs: int = 1) -> list:
+    prices = load_prices(data)
+    cost = cost_params(models, prices, start, end, refit_every, min_train)
+    models = cost["models"]
+    decision = budget.check("backtest", **cost)
+    results = []
+    with budget.track(decision):
+        for i, m in enumerate(models):
+            results.append(backtest(m, prices, start, end, refit_every, min_train, n_jobs))
+            progress.report(i + 1, len(models))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest walk-forward one-step-ahead de los regresores de precio.")
+    parser.add_argument("--models", nargs="+", default=["all"], help=f"{list(CANDIDATES)} o 'all'")
+    parser.add_argument("--data", default=str(DEFAULT_DATA), help="CSV con Date, Close, Volume.")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--refit-every", type=int, default=REFIT_EVERY, help="Días de prueba por reajuste.")
+    parser.add_argument("--min-train", type=int, default=MIN_TRAIN, help="Filas mínimas de entrenamiento.")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Procesos (-1 = todos los núcleos).")
+    parser.add_argument("--json", action="store_true", help="Salida JSON.")
+    args = parser.parse_args(argv)
+
+    results = run(args.models, args.data, args.start, args.end, args.refit_every, args.min_train, args.n_jobs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"\n=== {r['model']} | {r['start'][:10]} → {r['end'][:10]} ({r['n_predictions']} días, "
+              f"{r['refits']} reajustes) ===")
+        for name, m in r["variants"].items():
+            print(f"{name:12s} | MAE: {m['mae']:.3f} | RMSE: {m['rmse']:.3f} | Hit: {m['hit_rate']:.1%} "
+                  f"| PnL: {m['strategy_return_pct']:+.2f}% (B&H {m['buy_hold_return_pct']:+.2f}%) "
+                  f"| Sharpe: {m['sharpe']:.2f} | MaxDD: {m['max_drawdown_pct']:.2f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# demo/app/ml/batch_forecast.py
+"""
+Predicción bursátil para una lista de tickers en una sola llamada.
+
+- Descarga todos los históricos en bloque (prices.load_histories).
+- Construye una matriz de features común (tickers × features).
+- Cada paso del horizonte es UN model.predict sobre todos los tickers.
+- Solo se dibujan los gráficos de los tickers pedidos en 'charts'.
+"""
+import numpy as np
+
+from app import budget
+from .feature_store import LOOKBACK
+from .prices import load_histories
+from .predict_stock import (
+    load_artifact, feature_index, forecast_panel, future_business_days, plot_forecast,
+)
+
+MAX_TICKERS = 1000
+
+def predict_stocks(tickers, days: int = 1, model: str = "xgboost_reg", charts=None, seed=None) -> dict:
+    """
+    Predice 'days' cierres para cada ticker con el mismo modelo.
+    'charts': lista de tickers con gráfico, True para todos, None para ninguno.
+    Los tickers sin datos suficientes se devuelven en 'errors'.
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    if not tickers:
+        raise ValueError("Indica al menos un ticker.")
+    if len(tickers) > MAX_TICKERS:
+        raise ValueError(f"Máximo {MAX_TICKERS} tickers por petición.")
+    if days < 1:
+        raise ValueError("'days' debe ser >= 1.")
+
+    decision = budget.check("predict_stock", days=days, tickers=len(tickers))
+    with budget.track(decision):
+        return _predict_stocks(tickers, days, model, charts, seed)
+
+def _predict_stocks(tickers: list, days: int, model: str, charts, seed) -> dict:
+    clf, info = load_artifact(model)
+    histories = load_histories(tickers)
+
+    errors, valid = {}, []
+    for t in tickers:
+        hist = histories.get(t)
+        if hist is None or hist.empty:
+            errors[t] = "Sin datos de precios."
+        elif len(hist) < LOOKBACK:
+            errors[t] = f"Histórico insuficiente ({len(hist)} barras, mínimo {LOOKBACK})."
+        else:
+            valid.append(t)
+
+    results = {}
+    if valid:
+        # Ventanas de las últimas LOOKBACK barras de cada ticker (fechas × tickers)
+        close = np.column_stack([np.asarray(histories[t]["Close"], dtype=float)[-LOOKBACK:] for t in valid])
+        volume = np.column_stack([np.asarray(histories[t]["Volume"], dtype=float)[-LOOKBACK:] for t in valid])
+        paths = forecast_panel(clf, close, volume, days, model, feature_index(info), seed=seed)
+
+        wanted = set(valid) if charts is True else {c.upper() for c in (charts or [])}
+        for j, t in enumerate(valid):
+            hist = histories[t]
+            dates = future_business_days(hist.index[-1], days)
+            preds = paths[:, j].tolist()
+            results[t] = {
+                "last_close": float(hist["Close"].iloc[-1]),
+                "dates": [d.isoformat() for d in dates],
+                "predictions": preds,
+            }
+            if t in wanted:
+                results[t]["graph"] = plot_forecast(t, hist.index, hist["Close"].to_numpy(),
+                                                    dates, preds, model, days)
+
+    return {
+        "model": model,
+        "model_version": info.get("version"),
+        "days": days,
+        "results": results,
+        "errors": errors,
+    }
@@ -0,0 +1,204 @@
+# demo/app/ml/feature_store.py
+"""
+Feature store compartido por entrenamiento y servidor.
+
+Calcula Return, MA5, MA10, Volatility5 y Volume_Ratio para un panel completo
+(fechas × tickers) de una vez, con medias/varianzas móviles basadas en sumas
+acumuladas sobre arrays 2-D. Mismo resultado que pandas `rolling` (ddof=1 en
+la volatilidad), sin bucles por ticker.
+
+Cada store lleva la versión de sus datos de precio y, al llegar barras nuevas,
+solo se recalcula la cola. El servidor solo necesita la última fila
+(last_features sobre LOOKBACK barras), así que no se cachean stores en memoria.
+"""
+import hashlib
+import numpy as np
+import pandas as pd
+
+FEATURES = ["Return", "MA5", "MA10", "Volatility5", "Volume_Ratio"]
+# ventana más larga usada por las features (+1 por el retorno)
+LOOKBACK = 10 + 1
+
+# ============================
+# Núcleo vectorizado
+# ============================
+def _window_diff(cs: np.ndarray, window: int) -> np.ndarray:
+    """Suma móvil a partir de la suma acumulada (NaN en las primeras window-1 filas)."""
+    out = np.full(cs.shape, np.nan)
+    if len(cs) >= window:
+        out[window - 1] = cs[window - 1]
+        out[window:] = cs[window:] - cs[:-window]
+    return out
+
+def _rolling_sums(a: np.ndarray, window: int, squares: bool = False):
+    """
+    Sumas móviles de a (y de a² si 'squares') por columna, más una máscara de
+    ventanas completas. Los NaN cuentan como 0 en las sumas e invalidan la ventana.
+    """
+    valid = np.isfinite(a)
+    complete = valid.all()
+    z = a if complete else np.where(valid, a, 0.0)
+    s1 = _window_diff(np.cumsum(z, axis=0), window)
+    s2 = _window_diff(np.cumsum(z * z, axis=0), window) if squares else None
+    if complete:
+        full = np.ones(a.shape, dtype=bool)
+        full[:window - 1] = False
+    else:
+        full = _window_diff(np.cumsum(valid, axis=0, dtype=np.int32), window) == window
+    return s1, s2, full
+
+def rolling_mean(a: np.ndarray, window: int) -> np.ndarray:
+    s1, _, full = _rolling_sums(a, window)
+    s1 /= window
+    s1[~full] = np.nan
+    return s1
+
+def rolling_std(a: np.ndarray, window: int) -> np.ndarray:
+    """Desviación típica muestral (ddof=1), como pandas."""
+    s1, s2, full = _rolling_sums(a, window, squares=True)
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    np.maximum(var, 0.0, out=var)
+    np.sqrt(var, out=var)
+    var[~full] = np.nan
+    return var
+
+def panel_features(close, volume) -> dict:
+    """
+    Features de un panel. 'close' y 'volume' son arrays (fechas × tickers)
+    o 1-D para un solo ticker. Devuelve {feature: array de la misma forma}.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    ret = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret[1:] = close[1:] / close[:-1] - 1.0
+        vol_ratio = volume / rolling_mean(volume, 5)
+    return {
+        "Return": ret,
+        "MA5": rolling_mean(close, 5),
+        "MA10": rolling_mean(close, 10),
+        "Volatility5": rolling_std(ret, 5),
+        "Volume_Ratio": vol_ratio,
+    }
+
+def last_features(close, volume) -> np.ndarray:
+    """
+    Features de la última fecha usando solo la cola necesaria (LOOKBACK barras).
+    Devuelve (tickers × features), o (features,) para series 1-D.
+    """
+    feats = panel_features(np.asarray(close)[-LOOKBACK:], np.asarray(volume)[-LOOKBACK:])
+    return np.stack([feats[f][-1] for f in FEATURES], axis=-1)
+
+def build_features(df: pd.DataFrame, dropna: bool = True) -> pd.DataFrame:
+    """Versión DataFrame (un ticker, columnas Close/Volume) usada por servidor y entrenamiento."""
+    df = df.copy()
+    close = np.asarray(df["Close"], dtype=np.float64).reshape(len(df), -1)[:, 0]
+    volume = np.asarray(df["Volume"], dtype=np.float64).reshape(len(df), -1)[:, 0]
+    for name, values in panel_features(close, volume).items():
+        df[name] = values
+    return df.dropna(subset=FEATURES) if dropna else df
+
+# ============================
+# Store incremental
+# ============================
+def data_version(close: np.ndarray, volume: np.ndarray, parent: str = "") -> str:
+    """Huella de los precios; con 'parent' encadena sobre una versión previa."""
+    h = hashlib.blake2b(parent.encode(), digest_size=12) if parent else hashlib.blake2b(digest_size=12)
+    h.update(np.ascontiguousarray(close, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(volume, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+class FeatureStore:
+    """
+    Panel de precios (fechas × tickers) y sus features precalculadas.
+    append() añade barras nuevas recalculando solo la cola; los arrays tienen
+    capacidad extra para no copiar el panel entero en cada barra.
+    """
+
+    def __init__(self, close, volume, dates=None, tickers=None, version=None):
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        if close.ndim == 1:
+            close, volume = close[:, None], volume[:, None]
+        self.dates = pd.Index(dates if dates is not None else range(len(close)))
+        self.tickers = list(tickers if tickers is not None else range(close.shape[1]))
+        self.version = version or data_version(close, volume)
+        self._n = len(close)
+        self._buf = {"Close": close, "Volume": volume, **panel_features(close, volume)}
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame, date_col="Date", ticker_col="Ticker", version=None):
+        """Construye el store desde un frame largo (Date, Ticker, Close, Volume)."""
+        close = df.pivot_table(index=date_col, columns=ticker_col, values="Close", aggfunc="last").sort_index()
+        volume = df.pivot_table(index=date_col, columns=ticker_col, values="Volume", aggfunc="last")
+        volume = volume.reindex(index=close.index, columns=close.columns)
+        return cls(close.to_numpy(), volume.to_numpy(), close.index, close.columns, version)
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._buf["Close"][:self._n]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._buf["Volume"][:self._n]
+
+    def features(self) -> dict:
+        return {f: self._buf[f][:self._n] for f in FEATURES}
+
+    def matrix(self, row: int = -1) -> np.ndarray:
+        """Matriz (tickers × features) de una fecha (por defecto la última)."""
+        row = row % self._n
+        return np.stack([self._buf[f][row] for f in FEATURES], axis=-1)
+
+    def _reserve(self, extra: int):
+        cap = len(self._buf["Close"])
+        if self._n + extra <= cap:
+            return
+        new_cap = max(self._n + extra, int(cap * 1.5) + 16)
+        for key, arr in self._buf.items():
+            grown = np.full((new_cap,) + arr.shape[1:], np.nan)
+            grown[:self._n] = arr[:self._n]
+            self._buf[key] = grown
+
+    def append(self, close_rows, volume_rows, dates=None) -> "FeatureStore":
+        """Añade k barras (k × tickers) y recalcula solo las k filas nuevas de features."""
+        n_tickers = self._buf["Close"].shape[1]
+        close_rows = np.asarray(close_rows, dtype=np.float64).reshape(-1, n_tickers)
+        volume_rows = np.asarray(volume_rows, dtype=np.float64).reshape(-1, n_tickers)
+        k = len(close_rows)
+        tail = panel_features(
+            np.concatenate([self.close[-LOOKBACK:], close_rows]),
+            np.concatenate([self.volume[-LOOKBACK:], volume_rows]),
+        )
+
+        self._reserve(k)
+        rows = slice(self._n, self._n + k)
+        self._buf["Close"][rows] = close_rows
+        self._buf["Volume"][rows] = volume_rows
+        for f in FEATURES:
+            self._buf[f][rows] = tail[f][-k:]
+        self._n += k
+
+        new_dates = dates if dates is not None else range(len(self.dates), len(self.dates) + k)
+        self.dates = self.dates.append(pd.Index(new_dates))
+        # versión encadenada: solo se hashean las barras nuevas
+        self.version = data_version(close_rows, volume_rows, parent=self.version)
+        return self
+
+    def long_frame(self, dropna: bool = True) -> pd.DataFrame:
+        """Frame largo (Date, Ticker, Close, Volume, features...) ordenado por fecha."""
+        T, N = self.close.shape
+        out = pd.DataFrame({
+            "Date": np.repeat(np.asarray(self.dates), N),
+            "Ticker": np.tile(np.asarray(self.tickers, dtype=object), T),
+            "Close": self.close.ravel(),
+            "Volume": self.volume.ravel(),
+        })
+        for f in FEATURES:
+            out[f] = self._buf[f][:self._n].ravel()
+        if dropna:
+            out = out.dropna(subset=["Close"] + FEATURES).reset_index(drop=True)
+        return out
+
+__all__ = ["FEATURES", "panel_features", "last_features", "build_features", "rolling_mean",
+           "rolling_std", "FeatureStore", "data_version"]
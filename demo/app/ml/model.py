@@ -2,7 +2,20 @@
 from pathlib import Path
 import joblib
 
+from app.metrics import span
+
 MODEL_PKL = Path(__file__).resolve().parent / "models" / "risk_xgboost.pkl"
 
 # Cargar modelo entrenado
-risk_model = joblib.load(MODEL_PKL)
+with span("model.load"):
+    risk_model = joblib.load(MODEL_PKL)
+
+def predict_risk(zscore: float, volatility: float, returns: float, debt_ratio: float) -> dict:
+    """Clase del modelo de riesgo (0 bajo / 1 alto) y sus probabilidades para un caso."""
+    import numpy as np
+    from .tree_inference import get_predictor
+    X = np.array([[zscore, volatility, returns, debt_ratio]])
+    model = get_predictor(risk_model)   # backend compilado si VALERIO_TREE_BACKEND=compiled
+    prob = model.predict_proba(X)[0].tolist()
+    pred = int(model.classes_[int(np.argmax(prob))])
+    return {"prediction": pred, "probabilities": prob, "prob": round(max(prob) * 100, 2)}
@@ -0,0 +1,195 @@
+# demo/app/ml/pipeline.py
+"""
+Pipeline de entrenamiento de los regresores de precio.
+
+- Ajusta los modelos candidatos en paralelo (joblib, todos los núcleos).
+- Evaluación walk-forward con TimeSeriesSplit (sin mezclar el futuro en el train).
+- Cachea las features calculadas por hash de datos entre ejecuciones.
+- Guarda artefactos versionados con sidecar de metadatos (ver artifacts.py).
+
+Uso (desde demo/):
+    python -m app.ml.pipeline
+    python -m app.ml.pipeline --data panel.csv --models xgboost_reg svr --splits 5 --n-jobs -1
+"""
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import joblib
+from joblib import Parallel, delayed
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from xgboost import XGBRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.svm import SVR
+
+from .artifacts import data_hash, new_version, save_artifact
+from .feature_store import FEATURES, FeatureStore
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+DEFAULT_DATA = DATA_DIR / "apple_data.csv"
+CACHE_DIR = Path(__file__).resolve().parent / "cache"
+
+TARGET = "Target"
+# cambiar si cambia la definición de las features (invalida la caché)
+FEATURES_VERSION = "v2"
+
+# Candidatos: un solo hilo por modelo, el paralelismo lo pone joblib
+CANDIDATES = {
+    "xgboost_reg": lambda: XGBRegressor(
+        n_estimators=300, max_depth=5, learning_rate=0.05,
+        subsample=0.8, colsample_bytree=0.8, random_state=42, n_jobs=1
+    ),
+    "linear_regression": lambda: LinearRegression(),
+    "random_forest_reg": lambda: RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=1),
+    "svr": lambda: SVR(kernel="rbf"),
+}
+
+# ============================
+# Datos y features
+# ============================
+def _read_panel(paths) -> pd.DataFrame:
+    """
+    Lee uno o varios CSV de precios. Si el CSV no trae columna 'Ticker',
+    se usa el nombre del fichero (apple_data.csv -> 'apple_data').
+    """
+    frames = []
+    for p in paths:
+        df = pd.read_csv(p)
+        if "Ticker" not in df.columns:
+            df["Ticker"] = Path(p).stem
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    df["Date"] = pd.to_datetime(df["Date"], utc=True)
+    return df.sort_values(["Ticker", "Date"], kind="stable").reset_index(drop=True)
+
+def build_feature_frame(paths, use_cache: bool = True):
+    """
+    Frame de features + target de todo el panel, ordenado por fecha
+    (requisito de TimeSeriesSplit). Las features salen del feature store,
+    igual que en el servidor. Devuelve (frame, data_hash).
+    """
+    dhash = data_hash(*paths)
+    cache_file = CACHE_DIR / f"features-{FEATURES_VERSION}-{dhash}.pkl"
+    if use_cache and cache_file.exists():
+        return joblib.load(cache_file), dhash
+
+    store = FeatureStore.from_long(_read_panel(paths), version=dhash)
+    frame = store.long_frame(dropna=False)
+    # Target = próximo precio del mismo ticker
+    next_close = np.full(store.close.shape, np.nan)
+    next_close[:-1] = store.close[1:]
+    frame[TARGET] = next_close.ravel()
+    frame = frame.dropna(subset=["Close"] + FEATURES + [TARGET]).reset_index(drop=True)
+    frame = frame[["Date", "Ticker"] + FEATURES + [TARGET]]
+
+    if use_cache:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        joblib.dump(frame, cache_file)
+    return frame, dhash
+
+# ============================
+# Entrenamiento y evaluación
+# ============================
+def _fit_eval(name: str, X: np.ndarray, y: np.ndarray, train_idx, test_idx) -> dict:
+    """Ajusta un candidato en un fold walk-forward y devuelve sus métricas."""
+    model = CANDIDATES[name]()
+    model.fit(X[train_idx], y[train_idx])
+    preds = model.predict(X[test_idx])
+    y_test = y[test_idx]
+    return {
+        "model": name,
+        "mse": float(mean_squared_error(y_test, preds)),
+        "mae": float(mean_absolute_error(y_test, preds)),
+        "r2": float(r2_score(y_test, preds)),
+        "n_train": int(len(train_idx)),
+        "n_test": int(len(test_idx)),
+    }
+
+def _fit_final(name: str, X: np.ndarray, y: np.ndarray):
+    t0 = time.perf_counter()
+    model = CANDIDATES[name]()
+    model.fit(X, y)
+    return name, model, time.perf_counter() - t0
+
+def run(paths=None, models=None, n_splits: int = 5, n_jobs: int = -1,
+        use_cache: bool = True, suffix: str = "apple", save: bool = True) -> dict:
+    """
+    Entrena y evalúa 'models' (por defecto todos los candidatos) sobre 'paths'.
+    Los folds de todos los modelos y los ajustes finales se reparten en un
+    único pool de procesos. Devuelve {modelo: metadatos}.
+    """
+    paths = [Path(p) for p in (paths or [DEFAULT_DATA])]
+    models = list(models or CANDIDATES)
+    unknown = [m for m in models if m not in CANDIDATES]
+    if unknown:
+        raise ValueError(f"Modelos desconocidos: {unknown}. Disponibles: {list(CANDIDATES)}")
+
+    t0 = time.perf_counter()
+    frame, dhash = build_feature_frame(paths, use_cache=use_cache)
+    X = frame[FEATURES].to_numpy(dtype=np.float64)
+    y = frame[TARGET].to_numpy(dtype=np.float64)
+    t_features = time.perf_counter() - t0
+
+    splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    pool = Parallel(n_jobs=n_jobs)
+    fold_tasks = [delayed(_fit_eval)(m, X, y, tr, te) for m in models for tr, te in splits]
+    final_tasks = [delayed(_fit_final)(m, X, y) for m in models]
+    outputs = pool(fold_tasks + final_tasks)
+    fold_results, finals = outputs[:len(fold_tasks)], outputs[len(fold_tasks):]
+
+    version = new_version(dhash)
+    summary = {}
+    for name, model, fit_seconds in finals:
+        folds = [r for r in fold_results if r["model"] == name]
+        metrics = {
+            k: {"mean": float(np.mean([f[k] for f in folds])), "std": float(np.std([f[k] for f in folds]))}
+            for k in ("mse", "mae", "r2")
+        }
+        meta = {
+            "version": version,
+            "features": FEATURES,
+            "target": "next_close",
+            "metrics": metrics,
+            "folds": [{k: v for k, v in f.items() if k != "model"} for f in folds],
+            "cv": f"TimeSeriesSplit(n_splits={n_splits})",
+            "data_files": [p.name for p in paths],
+            "data_hash": dhash,
+            "n_rows": int(len(X)),
+            "n_tickers": int(frame["Ticker"].nunique()),
+            "training_seconds": round(fit_seconds, 3),
+            "features_seconds": round(t_features, 3),
+        }
+        if save:
+            meta = save_artifact(model, f"{name}_{suffix}", meta)
+        summary[name] = meta
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrena los regresores de precio (walk-forward, en paralelo).")
+    parser.add_argument("--data", nargs="+", default=[str(DEFAULT_DATA)],
+                        help="CSV de precios (uno por ticker o panel con columna 'Ticker').")
+    parser.add_argument("--models", nargs="+", default=list(CANDIDATES), choices=list(CANDIDATES))
+    parser.add_argument("--splits", type=int, default=5, help="Folds de TimeSeriesSplit.")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Procesos (-1 = todos los núcleos).")
+    parser.add_argument("--suffix", default="apple", help="Sufijo del artefacto: <modelo>_<sufijo>.pkl")
+    parser.add_argument("--no-cache", action="store_true", help="Recalcula las features.")
+    parser.add_argument("--dry-run", action="store_true", help="Evalúa sin guardar artefactos.")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    summary = run(args.data, args.models, n_splits=args.splits, n_jobs=args.n_jobs,
+                  use_cache=not args.no_cache, suffix=args.suffix, save=not args.dry_run)
+
+    print("\n=== Comparación de Modelos (walk-forward) ===")
+    for name, meta in summary.items():
+        m = meta["metrics"]
+        print(f"{name:20s} | MSE: {m['mse']['mean']:.3f} ± {m['mse']['std']:.3f} "
+              f"| MAE: {m['mae']['mean']:.3f} | R2: {m['r2']['mean']:.3f}"
+              + (f" | ✅ {meta['artifact']}" if "artifact" in meta else ""))
+    print(f"Tiempo total: {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
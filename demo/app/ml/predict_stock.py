@@ -1,127 +1,186 @@
 # demo/app/ml/predict_stock.py
-import yfinance as yf
 import numpy as np
 import pandas as pd
 import joblib
-import matplotlib.pyplot as plt
-import io, base64
-from datetime import datetime, timedelta
+from datetime import timedelta
 import os
+import threading
+from typing import Optional
+from .tree_inference import get_predictor
+from .artifacts import read_metadata
+from .feature_store import FEATURES, LOOKBACK, build_features, last_features
+from .prices import load_history
+from app import progress, budget, render
+from app.metrics import register_cache, span
+from app.rng import resolve
 
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
 
-def _load_model(model_name: str):
-    model_files = {
-        "xgboost_reg": "xgboost_reg_apple.pkl",
-        "linear_regression": "linear_regression_apple.pkl",
-        "random_forest_reg": "random_forest_reg_apple.pkl",
-        "svr": "svr_apple.pkl"
-    }
-    filename = model_files.get(model_name)
+MODEL_FILES = {
+    "xgboost_reg": "xgboost_reg_apple.pkl",
+    "linear_regression": "linear_regression_apple.pkl",
+    "random_forest_reg": "random_forest_reg_apple.pkl",
+    "svr": "svr_apple.pkl"
+}
+DEFAULT_FEATURES = FEATURES
+# ruido multiplicativo que sustituye a la predicción a partir del día 2
+MODEL_NOISE = {"svr": 0.003, "xgboost_reg": 0.005}   # ±0.3% / ±0.5%
+MAX_CHANGE = 0.05                                    # corrección de extremos (±5%)
+
+# nombre -> (firma, predictor, metadatos): modelo y sidecar se cargan y se invalidan juntos
+_artifacts = {}
+_artifacts_lock = threading.Lock()
+_artifact_stats = {"hits": 0, "misses": 0}
+
+def _artifact_paths(model_name: str):
+    filename = MODEL_FILES.get(model_name)
     if not filename:
         raise ValueError(f"Modelo desconocido: {model_name}")
     path = os.path.join(MODELS_DIR, filename)
-    if not os.path.exists(path):
+    return path, path[:-4] + ".json"
+
+def _signature(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def load_artifact(model_name: str) -> tuple:
+    """
+    (predictor, metadatos) del artefacto actual. Se recargan en caliente, y
+    siempre a la vez, cuando cambia en disco el pkl o su sidecar JSON
+    (mtime/tamaño, como nlu.load_model). Metadatos {} si es un pkl antiguo.
+    """
+    path, sidecar = _artifact_paths(model_name)
+    sig = (_signature(path), _signature(sidecar))
+    if sig[0] is None:
         raise FileNotFoundError(f"Modelo no encontrado: {path}")
-    return joblib.load(path)
+    cached = _artifacts.get(model_name)
+    if cached is not None and cached[0] == sig:
+        _artifact_stats["hits"] += 1
+        return cached[1], cached[2]
+    with _artifacts_lock:
+        cached = _artifacts.get(model_name)
+        if cached is None or cached[0] != sig:
+            _artifact_stats["misses"] += 1
+            # ensembles -> backend compilado si está activo
+            with span("model.load"):
+                clf = get_predictor(joblib.load(path))
+            cached = (sig, clf, read_metadata(os.path.basename(path)[:-4], MODELS_DIR) or {})
+            _artifacts[model_name] = cached
+    return cached[1], cached[2]
+
+def model_info(model_name: str) -> dict:
+    """Metadatos del artefacto (sidecar JSON del pipeline); {} si es un pkl antiguo."""
+    return load_artifact(model_name)[1]
+
+register_cache("stock_models", lambda: {**_artifact_stats, "size": len(_artifacts)})
 
 def _prepare_features(df: pd.DataFrame):
-    df["Return"] = df["Close"].pct_change()
-    df["MA5"] = df["Close"].rolling(5).mean()
-    df["MA10"] = df["Close"].rolling(10).mean()
-    df["Volatility5"] = df["Return"].rolling(5).std()
-    df["Volume_Ratio"] = df["Volume"] / df["Volume"].rolling(5).mean()
-    df = df.dropna()
-    return df
-
-def predict_stock(ticker: str, days: int = 1, model: str = "xgboost_reg"):
-    # Descargar datos recientes
-    end = datetime.today()
-    start = end - timedelta(days=365)
-    df = yf.download(ticker, start=start, end=end, progress=False)
-    if df.empty:
-        raise ValueError(f"No se pudieron descargar datos para {ticker}.")
-
-    # Features iniciales
-    df = _prepare_features(df)
-
-    # Cargar modelo
-    clf = _load_model(model)
+    return build_features(df)
 
-    predictions = []
-    df_future = df.copy()
-
-    for d in range(days):
-        last_row = df_future.iloc[-1].copy()
+def _next_business_day(date):
+    """Siguiente día hábil (salta fines de semana)."""
+    next_date = date + timedelta(days=1)
+    while next_date.weekday() >= 5:  # 5 = sábado, 6 = domingo
+        next_date += timedelta(days=1)
+    return next_date
 
-        # Features actuales
-        features = last_row[["Return", "MA5", "MA10", "Volatility5", "Volume_Ratio"]].astype(float).to_numpy().reshape(1, -1)
-        features = np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+def plot_forecast(ticker, hist_dates, hist_close, future_dates, predictions, model, days) -> str:
+    """Gráfico histórico + predicción en base64 (PNG)."""
+    fig, ax = render.subplots(figsize=(8, 4))
+    ax.plot(hist_dates, hist_close, color="black", label="Historical Price")
 
-        # Predicción
-        y_pred = float(clf.predict(features)[0])
+    # Solo mostrar últimos 'days' predichos
+    ax.plot(future_dates, predictions, color="blue", label="Predicted Price")
 
-        # --- Ajustes por modelo ---
-        if model == "svr" and d > 0:
-            last_close = predictions[-1]
-            noise = np.random.uniform(-0.003, 0.003)  # ±0.3%
-            y_pred = last_close * (1 + noise)
+    ax.set_title(f"{ticker} Stock Price Prediction ({model}, {days} days)")
+    ax.set_ylabel("Price")
+    ax.axvline(hist_dates[-1], color="orange", linestyle="--", label="Prediction Start")
+    ax.legend()
+
+    img_base64 = render.png_base64(fig)
+    return img_base64
+
+def feature_index(info: dict) -> list:
+    """Posiciones (en FEATURES) de las columnas que espera el modelo, según su sidecar ('info')."""
+    return [FEATURES.index(c) for c in info.get("features", DEFAULT_FEATURES)]
+
+def forecast_panel(clf, close, volume, days: int, model: str, feature_idx=None,
+                   seed: Optional[int] = None, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Predicción recursiva de 'days' pasos para N tickers a la vez.
+    'close'/'volume' son (fechas × tickers) con al menos LOOKBACK barras.
+    Cada paso es UN solo clf.predict sobre la matriz (tickers × features).
+    Devuelve un array (days × tickers).
+    """
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    if close.ndim == 1:
+        close, volume = close[:, None], volume[:, None]
+    close, volume = close[-LOOKBACK:].copy(), volume[-LOOKBACK:].copy()
+    feature_idx = feature_idx if feature_idx is not None else list(range(len(FEATURES)))
+    n = close.shape[1]
+    out = np.empty((days, n))
+    rng = resolve(rng, seed)
 
-        if model == "xgboost_reg" and d > 0:
-            noise = np.random.uniform(-0.005, 0.005)  # ±0.5%
-            y_pred = predictions[-1] * (1 + noise)
+    for d in range(days):
+        # --- Ajustes por modelo: desde el día 2, último valor + ruido ---
+        if d > 0 and model in MODEL_NOISE:
+            a = MODEL_NOISE[model]
+            y_pred = out[d - 1] * (1 + rng.uniform(-a, a, size=n))
+        else:
+            # Features actuales (solo la cola necesaria de la serie)
+            features = last_features(close, volume)[:, feature_idx]
+            features = np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+            y_pred = np.asarray(clf.predict(features), dtype=float).reshape(n)
 
         # --- Corrección de valores extremos (±5%) ---
-        last_close = float(last_row["Close"])
-        max_change = 0.05
-        y_pred = max(last_close * (1 - max_change),
-                     min(y_pred, last_close * (1 + max_change)))
-
-        predictions.append(y_pred)
-
-        # Crear nueva fecha (saltar fines de semana)
-        next_date = df_future.index[-1] + timedelta(days=1)
-        while next_date.weekday() >= 5:  # 5 = sábado, 6 = domingo
-            next_date += timedelta(days=1)
-
-        # Simular nueva fila
-        df_future.loc[next_date, "Close"] = y_pred
-        df_future.loc[next_date, "Volume"] = df_future["Volume"].iloc[-1]
-
-        # Recalcular features
-        df_future.loc[next_date, "Return"] = df_future["Close"].pct_change().iloc[-1]
-        df_future.loc[next_date, "MA5"] = df_future["Close"].iloc[-5:].mean()
-        df_future.loc[next_date, "MA10"] = df_future["Close"].iloc[-10:].mean()
-        df_future.loc[next_date, "Volatility5"] = df_future["Return"].iloc[-5:].std()
-        df_future.loc[next_date, "Volume_Ratio"] = df_future["Volume"].iloc[-1] / df_future["Volume"].iloc[-5:].mean()
-
-        # Rellenar posibles NaN
-        df_future.fillna(method="ffill", inplace=True)
-
-        # --- Gráfico ---
-    fig, ax = plt.subplots(figsize=(8, 4))
-    df["Close"].plot(ax=ax, color="black", label="Historical Price")
-
-    # Solo mostrar últimos 'days' predichos
-    future_index = df_future.index[-days:]
-    df_future.loc[future_index, "Close"].plot(ax=ax, color="blue", label="Predicted Price")
+        last_close = close[-1]
+        out[d] = np.clip(y_pred, last_close * (1 - MAX_CHANGE), last_close * (1 + MAX_CHANGE))
+
+        # Nueva barra simulada: precio predicho, volumen igual al último
+        close = np.vstack([close[1:], out[d]])
+        volume = np.vstack([volume[1:], volume[-1]])
+        progress.report(d + 1, days)
+    return out
+
+def future_business_days(last_date, days: int) -> list:
+    dates = []
+    for _ in range(days):
+        dates.append(_next_business_day(dates[-1] if dates else last_date))
+    return dates
+
+def predict_stock(ticker: str, days: int = 1, model: str = "xgboost_reg", seed: Optional[int] = None):
+    decision = budget.check("predict_stock", days=days, tickers=1)
+    with budget.track(decision):
+        return _predict_stock(ticker, days, model, seed)
+
+def _predict_stock(ticker: str, days: int, model: str, seed: Optional[int]) -> dict:
+    # Descargar datos recientes (último año)
+    df = load_history(ticker)
+
+    # Features iniciales (feature store compartido con el entrenamiento)
+    df = _prepare_features(df)
 
-    ax.set_title(f"{ticker} Stock Price Prediction ({model}, {days} days)")
-    ax.set_ylabel("Price")
-    ax.axvline(df.index[-1], color="orange", linestyle="--", label="Prediction Start")
-    plt.legend()
+    # Cargar modelo + orden de features del sidecar (misma versión, si existe)
+    clf, info = load_artifact(model)
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+    close = np.asarray(df["Close"], dtype=float).reshape(len(df), -1)[:, 0]
+    volume = np.asarray(df["Volume"], dtype=float).reshape(len(df), -1)[:, 0]
+    predictions = forecast_panel(clf, close, volume, days, model, feature_index(info),
+                                 seed=seed)[:, 0].tolist()
+    future_dates = future_business_days(df.index[-1], days)
 
+    img_base64 = (plot_forecast(ticker, df.index, close, future_dates, predictions, model, days)
+                  if render.enabled() else None)
 
     return {
         "ticker": ticker,
         "days": days,
         "model": model,
+        "model_version": info.get("version"),
         "predictions": predictions,
         "graph": img_base64
     }
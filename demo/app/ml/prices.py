@@ -0,0 +1,68 @@
+# demo/app/ml/prices.py
+"""
+Carga de históricos de precios (Close/Volume) para uno o muchos tickers.
+
+Por defecto usa yfinance con UNA descarga en bloque para toda la lista.
+El backend se puede sustituir (set_backend) por una fuente local, p. ej. en
+benchmarks o pruebas sin red.
+"""
+from datetime import datetime, timedelta
+import pandas as pd
+
+from app.metrics import span
+
+HISTORY_DAYS = 365
+
+def _yfinance_backend(tickers: list, start, end) -> dict:
+    import yfinance as yf
+    raw = yf.download(tickers, start=start, end=end, progress=False,
+                      group_by="ticker", threads=True)
+    return split_download(raw, tickers)
+
+_backend = _yfinance_backend
+
+def set_backend(fn):
+    """
+    Sustituye la fuente de precios. 'fn(tickers, start, end)' debe devolver
+    {ticker: DataFrame con columnas Close y Volume indexado por fecha}.
+    Con fn=None se vuelve a yfinance.
+    """
+    global _backend
+    _backend = fn or _yfinance_backend
+
+def split_download(raw: pd.DataFrame, tickers: list) -> dict:
+    """Separa una descarga de yfinance (columnas MultiIndex o planas) por ticker."""
+    out = {}
+    if raw is None or raw.empty:
+        return out
+    if isinstance(raw.columns, pd.MultiIndex):
+        # el nivel de los tickers es el que NO tiene los campos (Close, Volume...);
+        # no depende de qué tickers hayan llegado en la descarga
+        level = 1 if "Close" in raw.columns.get_level_values(0) else 0
+        present = set(raw.columns.get_level_values(level))
+        for t in tickers:
+            if t in present:
+                sub = raw.xs(t, axis=1, level=level)
+                if {"Close", "Volume"} <= set(sub.columns):
+                    sub = sub[["Close", "Volume"]].dropna()
+                    if not sub.empty:
+                        out[t] = sub
+    elif len(tickers) == 1 and {"Close", "Volume"} <= set(raw.columns):
+        out[tickers[0]] = raw[["Close", "Volume"]].dropna()
+    return out
+
+def load_histories(tickers, days: int = HISTORY_DAYS) -> dict:
+    """Históricos de los últimos 'days' días naturales; omite los tickers sin datos."""
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not tickers:
+        return {}
+    end = datetime.today()
+    start = end - timedelta(days=days)
+    with span("prices.download"):
+        return _backend(tickers, start, end)
+
+def load_history(ticker: str, days: int = HISTORY_DAYS) -> pd.DataFrame:
+    hist = load_histories([ticker], days).get(ticker.upper())
+    if hist is None or hist.empty:
+        raise ValueError(f"No se pudieron descargar datos para {ticker}.")
+    return hist
@@ -0,0 +1,66 @@
+# demo/app/ml/risk_explain.py
+from functools import lru_cache
+import numpy as np
+import xgboost as xgb
+
+from .model import risk_model
+from app import render
+from app.metrics import lru_stats, register_cache
+
+FEATURES = ["zscore", "volatility", "returns", "debt_ratio"]
+# filas por bloque al explicar lotes grandes (acota la memoria del DMatrix)
+CHUNK_ROWS = 50_000
+
+def _booster():
+    return risk_model.get_booster()
+
+def explain_matrix(X) -> dict:
+    """
+    Contribuciones por fila (SHAP exactos de XGBoost, pred_contribs) para una
+    matriz (n, 4). La suma de contribuciones + base_value es el margen (log-odds).
+    """
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float32).reshape(-1, len(FEATURES)))
+    booster = _booster()
+
+    contribs = np.empty((len(X), len(FEATURES) + 1), dtype=np.float32)
+    for start in range(0, len(X), CHUNK_ROWS):
+        block = X[start:start + CHUNK_ROWS]
+        dm = xgb.DMatrix(block, feature_names=FEATURES)
+        contribs[start:start + len(block)] = booster.predict(dm, pred_contribs=True)
+
+    margin = contribs.sum(axis=1, dtype=np.float64)
+    prob = 1.0 / (1.0 + np.exp(-margin))
+    return {
+        "features": FEATURES,
+        "base_value": float(contribs[0, -1]) if len(X) else None,
+        "contributions": contribs[:, :-1].tolist(),
+        "margin": margin.tolist(),
+        "probability": prob.tolist(),
+    }
+
+def explain_one(zscore: float, volatility: float, returns: float, debt_ratio: float) -> dict:
+    """Explicación de una sola empresa como diccionario feature -> contribución."""
+    out = explain_matrix([[zscore, volatility, returns, debt_ratio]])
+    return {
+        "base_value": out["base_value"],
+        "contributions": dict(zip(FEATURES, out["contributions"][0])),
+        "margin": out["margin"][0],
+        "probability": out["probability"][0],
+    }
+
+# --- Importancia global: se calcula una vez y se sirve desde caché ---
+@lru_cache(maxsize=1)
+def global_importance() -> dict:
+    importance = [float(v) for v in risk_model.feature_importances_]
+
+    fig, ax = render.subplots(figsize=(6, 4))
+    ax.bar(FEATURES, importance, color="steelblue")
+    ax.set_title("Importancia de variables en el modelo de riesgo")
+    ax.set_ylabel("Peso")
+    fig.tight_layout()
+
+    img_base64 = render.png_base64(fig)
+
+    return {"importance": dict(zip(FEATURES, importance)), "image_base64": img_base64}
+
+register_cache("risk_importance", lru_stats(global_importance))
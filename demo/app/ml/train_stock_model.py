@@ -1,11 +1,16 @@
 # ml/train_stock_model.py
+# Uso (desde demo/):  python -m app.ml.train_stock_model
 import pandas as pd
 import numpy as np
+import time
 from pathlib import Path
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import accuracy_score, f1_score, confusion_matrix, classification_report
 from xgboost import XGBClassifier
-import joblib
+from joblib import Parallel, delayed
+
+from .artifacts import data_hash, save_artifact
+from .feature_store import FEATURES, build_features as fs_build_features
 
 # Ruta del dataset
 DATA = Path(__file__).resolve().parents[1] / "data" / "apple_data.csv"
@@ -13,50 +18,71 @@ MODEL_DIR = Path(__file__).resolve().parent / "models"
 MODEL_PKL = MODEL_DIR / "xgboost_apple.pkl"
 
 def build_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Crea features a partir de precios de Apple."""
-    df = df.copy()
-    df["Return"] = df["Close"].pct_change()
-    df["MA5"] = df["Close"].rolling(window=5).mean()
-    df["MA10"] = df["Close"].rolling(window=10).mean()
-    df["Volatility5"] = df["Close"].pct_change().rolling(window=5).std()
-    df["Volume_Ratio"] = df["Volume"] / df["Volume"].rolling(window=5).mean()
+    """Crea features a partir de precios de Apple (mismo feature store que el servidor)."""
+    df = fs_build_features(df, dropna=False)
     df["Target"] = (df["Close"].shift(-1) > df["Close"]).astype(int)  # 1 si sube mañana
-    return df.dropna()
-
-def train():
-    df = pd.read_csv(DATA)
-    df = build_features(df)
+    return df.dropna(subset=FEATURES)
 
-    X = df[["Return", "MA5", "MA10", "Volatility5", "Volume_Ratio"]]
-    y = df["Target"]
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-
-    model = XGBClassifier(
+def _make_model():
+    return XGBClassifier(
         n_estimators=300,
         max_depth=5,
         learning_rate=0.05,
         subsample=0.8,
         colsample_bytree=0.8,
         random_state=42,
-        eval_metric="logloss"
+        eval_metric="logloss",
+        n_jobs=1
     )
 
-    model.fit(X_train, y_train)
-    preds = model.predict(X_test)
+def _fit_eval(X, y, train_idx, test_idx):
+    model = _make_model()
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    preds = model.predict(X.iloc[test_idx])
+    y_test = y.iloc[test_idx]
+    return accuracy_score(y_test, preds), f1_score(y_test, preds), y_test, preds
 
-    acc = accuracy_score(y_test, preds)
-    f1 = f1_score(y_test, preds)
+def train(n_splits: int = 5, n_jobs: int = -1):
+    df = pd.read_csv(DATA)
+    df = build_features(df)
+
+    X = df[FEATURES]
+    y = df["Target"]
+
+    # Evaluación walk-forward: cada fold entrena solo con el pasado
+    folds = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_eval)(X, y, tr, te) for tr, te in TimeSeriesSplit(n_splits=n_splits).split(X)
+    )
+    accs = [f[0] for f in folds]
+    f1s = [f[1] for f in folds]
+    _, _, y_last, preds_last = folds[-1]
 
     print("=== Stock Prediction Model (Apple) ===")
-    print("Accuracy:", round(acc, 3))
-    print("F1 Score:", round(f1, 3))
-    print("Confusion Matrix:\n", confusion_matrix(y_test, preds))
-    print("Classification Report:\n", classification_report(y_test, preds))
-
-    MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, MODEL_PKL)
-    print("✅ Modelo guardado en:", MODEL_PKL)
+    print(f"Accuracy: {np.mean(accs):.3f} ± {np.std(accs):.3f}  ({n_splits} folds walk-forward)")
+    print(f"F1 Score: {np.mean(f1s):.3f} ± {np.std(f1s):.3f}")
+    print("Confusion Matrix (último fold):\n", confusion_matrix(y_last, preds_last))
+    print("Classification Report (último fold):\n", classification_report(y_last, preds_last))
+
+    # Modelo final con todo el histórico
+    t0 = time.perf_counter()
+    model = _make_model()
+    model.fit(X, y)
+    fit_seconds = time.perf_counter() - t0
+
+    meta = save_artifact(model, MODEL_PKL.stem, {
+        "features": FEATURES,
+        "target": "next_close_up",
+        "metrics": {
+            "accuracy": {"mean": float(np.mean(accs)), "std": float(np.std(accs))},
+            "f1": {"mean": float(np.mean(f1s)), "std": float(np.std(f1s))},
+        },
+        "cv": f"TimeSeriesSplit(n_splits={n_splits})",
+        "data_files": [DATA.name],
+        "data_hash": data_hash(DATA),
+        "n_rows": int(len(X)),
+        "training_seconds": round(fit_seconds, 3),
+    }, models_dir=MODEL_DIR)
+    print("✅ Modelo guardado en:", MODEL_PKL, f"(versión {meta['version']})")
 
 if __name__ == "__main__":
     train()
@@ -0,0 +1,271 @@
+# demo/app/ml/tree_inference.py
+"""
+Backend opcional de inferencia para ensembles de árboles.
+
+Exporta los modelos cargados (XGBoost y RandomForest de sklearn) a arrays planos
+de NumPy (feature, threshold, hijos, valor de hoja) y los evalúa recorriendo
+todos los árboles a la vez, nivel a nivel. Evita el overhead por llamada de
+sklearn/XGBoost (validación, DMatrix, pool de hilos), que domina con 1 fila.
+
+Se activa con la variable de entorno VALERIO_TREE_BACKEND=compiled.
+"""
+import os
+import json
+import numpy as np
+
+TREE_BACKEND = os.getenv("VALERIO_TREE_BACKEND", "native").lower()
+
+# filas por bloque en la travesía (acota los temporales filas × árboles)
+CHUNK_ROWS = 2048
+# a partir de este tamaño de lote, el modelo nativo (multihilo) es más rápido
+NATIVE_BATCH_ROWS = 256
+
+
+class CompiledTrees:
+    """Ensemble de árboles en arrays planos; los nodos de todos los árboles van seguidos."""
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots,
+                 max_depth, n_features, strict=True, aggregate="sum", base=0.0,
+                 link="identity", classes=None):
+        self.feature = feature              # int32, -1 en hojas
+        self.threshold = threshold          # float32 (XGBoost) / float64 (sklearn)
+        self.left = left                    # índice global del hijo izquierdo
+        self.right = right                  # índice global del hijo derecho
+        self.default_left = default_left    # dirección para NaN
+        self.value = value                  # valor de hoja (float64)
+        self.roots = roots                  # índice global de la raíz de cada árbol
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        self.strict = strict                # XGBoost: x < thr ; sklearn: x <= thr
+        self.aggregate = aggregate          # "sum" (boosting) | "mean" (bosque)
+        self.base = float(base)             # margen inicial
+        self.link = link                    # "identity" | "logistic"
+        self.classes_ = classes
+        self.native = None                  # modelo original para lotes grandes (opcional)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _leaf_sum(self, X: np.ndarray) -> np.ndarray:
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            feat = self.feature[node]
+            internal = feat >= 0
+            if not internal.any():
+                break
+            x = X[rows, np.maximum(feat, 0)]
+            thr = self.threshold[node]
+            go_left = (x < thr) if self.strict else (x <= thr)
+            go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            nxt = np.where(go_left, self.left[node], self.right[node])
+            node = np.where(internal, nxt, node)
+        return self.value[node].sum(axis=1)
+
+    def decision_function(self, X) -> np.ndarray:
+        """Salida cruda del ensemble (margen en XGBoost, media en bosques)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} features, llegaron {X.shape[1]}.")
+        if self.threshold.dtype == np.float64:
+            X = X.astype(np.float64)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            out[start:start + CHUNK_ROWS] = self._leaf_sum(X[start:start + CHUNK_ROWS])
+        if self.aggregate == "mean":
+            out /= self.n_trees
+        return out + self.base
+
+    def _use_native(self, X) -> bool:
+        return self.native is not None and np.ndim(X) == 2 and len(X) >= NATIVE_BATCH_ROWS
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.link != "logistic":
+            raise AttributeError("predict_proba solo está disponible para clasificadores binarios.")
+        if self._use_native(X):
+            return self.native.predict_proba(X)
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        if self._use_native(X):
+            return self.native.predict(X)
+        if self.link == "logistic":
+            p = self.predict_proba(X)[:, 1]
+            return np.asarray(self.classes_)[(p > 0.5).astype(int)]
+        return self.decision_function(X)
+
+
+def _depth(left, right, root):
+    """Profundidad máxima de un árbol dado por arrays de hijos (locales)."""
+    depth, frontier = 0, [root]
+    while True:
+        frontier = [c for n in frontier for c in (left[n], right[n]) if c >= 0]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def _concat(trees):
+    """Une árboles locales (feature, thr, left, right, default_left, value) en arrays globales."""
+    feats, thrs, lefts, rights, dlefts, vals, roots = [], [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for feature, thr, left, right, dleft, value in trees:
+        n = len(feature)
+        is_leaf = left < 0
+        roots.append(offset)
+        feats.append(np.where(is_leaf, -1, feature))
+        thrs.append(thr)
+        lefts.append(np.where(is_leaf, np.arange(n), left) + offset)
+        rights.append(np.where(is_leaf, np.arange(n), right) + offset)
+        dlefts.append(dleft)
+        vals.append(value)
+        max_depth = max(max_depth, _depth(left, right, 0))
+        offset += n
+    return (
+        np.concatenate(feats).astype(np.int32),
+        np.concatenate(thrs),
+        np.concatenate(lefts).astype(np.int32),
+        np.concatenate(rights).astype(np.int32),
+        np.concatenate(dlefts).astype(bool),
+        np.concatenate(vals).astype(np.float64),
+        np.asarray(roots, dtype=np.int32),
+        max_depth,
+    )
+
+
+def compile_xgboost(model) -> CompiledTrees:
+    """Exporta un XGBRegressor / XGBClassifier binario desde su modelo JSON."""
+    booster = model.get_booster()
+    raw = json.loads(booster.save_raw("json"))
+    learner = raw["learner"]
+    objective = learner["objective"]["name"]
+    params = learner["learner_model_param"]
+    if int(params.get("num_class", "0")) > 1:
+        raise NotImplementedError("Clasificación multiclase no soportada.")
+    if learner["gradient_booster"].get("name") != "gbtree":
+        raise NotImplementedError(f"Booster no soportado: {learner['gradient_booster'].get('name')}")
+
+    base_score = float(str(params["base_score"]).strip("[]"))
+    if objective in ("binary:logistic", "reg:logistic"):
+        link, base = "logistic", float(np.log(base_score / (1.0 - base_score)))
+    elif objective in ("reg:squarederror", "reg:linear", "reg:absoluteerror", "reg:pseudohubererror"):
+        link, base = "identity", base_score
+    else:
+        raise NotImplementedError(f"Objetivo no soportado: {objective}")
+
+    trees = []
+    for t in learner["gradient_booster"]["model"]["trees"]:
+        left = np.asarray(t["left_children"], dtype=np.int64)
+        right = np.asarray(t["right_children"], dtype=np.int64)
+        cond = np.asarray(t["split_conditions"], dtype=np.float32)
+        # en hojas, split_conditions guarda el valor de la hoja
+        trees.append((
+            np.asarray(t["split_indices"], dtype=np.int64), cond, left, right,
+            np.asarray(t["default_left"], dtype=bool), cond.astype(np.float64),
+        ))
+
+    arrays = _concat(trees)
+    return CompiledTrees(
+        *arrays, n_features=int(params["num_feature"]), strict=True, aggregate="sum",
+        base=base, link=link, classes=getattr(model, "classes_", None),
+    )
+
+
+def compile_sklearn_forest(model) -> CompiledTrees:
+    """Exporta un RandomForestRegressor / ExtraTreesRegressor (salida única)."""
+    trees = []
+    for est in model.estimators_:
+        t = est.tree_
+        if t.value.shape[1] != 1 or t.value.shape[2] != 1:
+            raise NotImplementedError("Solo regresores de una salida.")
+        dleft = getattr(t, "missing_go_to_left", None)
+        trees.append((
+            t.feature.astype(np.int64), t.threshold.astype(np.float64),
+            t.children_left.astype(np.int64), t.children_right.astype(np.int64),
+            np.zeros(t.node_count, dtype=bool) if dleft is None else np.asarray(dleft, dtype=bool),
+            t.value[:, 0, 0],
+        ))
+    arrays = _concat(trees)
+    return CompiledTrees(
+        *arrays, n_features=model.n_features_in_, strict=False, aggregate="mean",
+    )
+
+
+def compile_model(model) -> CompiledTrees:
+    """Exporta el modelo a arrays; lanza NotImplementedError si no es un ensemble soportado."""
+    if hasattr(model, "get_booster"):
+        return compile_xgboost(model)
+    if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        return compile_sklearn_forest(model)
+    raise NotImplementedError(f"Modelo no soportado: {type(model).__name__}")
+
+
+def _probe_matrix(compiled: CompiledTrees, n: int = 512, seed: int = 0) -> np.ndarray:
+    """Entradas sintéticas repartidas alrededor de los umbrales reales de cada feature."""
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n, compiled.n_features_in_), dtype=np.float32)
+    for f in range(compiled.n_features_in_):
+        thr = compiled.threshold[compiled.feature == f]
+        if len(thr):
+            lo, hi = float(thr.min()), float(thr.max())
+            pad = 0.1 * (hi - lo) + 1e-6
+            X[:, f] = rng.uniform(lo - pad, hi + pad, size=n)
+            # incluimos umbrales exactos para comprobar el lado de la igualdad
+            k = min(len(thr), n // 4)
+            X[:k, f] = rng.choice(thr, size=k)
+    return X
+
+
+def validate_parity(model, compiled: CompiledTrees, X=None, atol: float = 1e-4) -> float:
+    """
+    Compara predicciones del modelo original y del compilado.
+    Devuelve la diferencia máxima y lanza ValueError si supera 'atol'
+    (relativa a la escala de la salida en regresores).
+    """
+    X = _probe_matrix(compiled) if X is None else np.asarray(X, dtype=np.float32)
+    if compiled.link == "logistic":
+        ref = model.predict_proba(X)[:, 1]
+        got = compiled.predict_proba(X)[:, 1]
+        scale = 1.0
+    else:
+        ref = np.asarray(model.predict(X), dtype=np.float64)
+        got = compiled.predict(X)
+        scale = max(1.0, float(np.abs(ref).max()))
+    diff = float(np.abs(ref - got).max())
+    if diff > atol * scale:
+        raise ValueError(f"Paridad fallida: diferencia máxima {diff:.3g}")
+    return diff
+
+
+_compiled_cache = {}
+
+def get_predictor(model):
+    """
+    Devuelve la versión compilada del modelo si el backend está activado y la
+    paridad se valida; si no, el modelo original. Se compila una vez por modelo.
+    Los lotes de NATIVE_BATCH_ROWS filas o más se delegan al modelo original.
+    """
+    if TREE_BACKEND != "compiled" or model is None:
+        return model
+    key = id(model)
+    if key not in _compiled_cache:
+        try:
+            compiled = compile_model(model)
+            validate_parity(model, compiled)
+            compiled.native = model
+            _compiled_cache[key] = compiled
+        except NotImplementedError:
+            # modelos sin árboles (SVR, lineal): se usan tal cual
+            _compiled_cache[key] = model
+        except ValueError as e:
+            print(f"⚠️ Backend compilado descartado para {type(model).__name__}: {e}")
+            _compiled_cache[key] = model
+    return _compiled_cache[key]
+
+
+__all__ = ["CompiledTrees", "compile_model", "compile_xgboost", "compile_sklearn_forest",
+           "validate_parity", "get_predictor", "TREE_BACKEND"]
@@ -1,7 +1,11 @@
 from pathlib import Path
-import json, pickle
+from collections import namedtuple
+import json, pickle, threading
+import numpy as np
 import pandas as pd
 
+from app.metrics import register_cache
+
 # --- rutas ---
 THIS_DIR = Path(__file__).resolve().parent
 VALERIO_ROOT = THIS_DIR.parents[2]              # .../VALERIO
@@ -13,45 +17,151 @@ VECTORIZER_PKL = None
 META_JSON = None
 TARGET_COL = "target"   # <-- tu CSV tiene 'target', no 'risk'
 
-_df = _model = _vec = None
-_features = None
-
-def load_core():
-    global _df, _model, _vec, _features
-    if _df is None:
-        _df = pd.read_csv(DATA_CSV)
-    if _model is None:
-        with open(MODEL_PKL, "rb") as f:
-            _model = pickle.load(f)
-    if _vec is None and VECTORIZER_PKL and VECTORIZER_PKL.exists():
-        with open(VECTORIZER_PKL, "rb") as f:
-            _vec = pickle.load(f)
-    if _features is None:
-        if META_JSON and Path(META_JSON).exists():
-            with open(META_JSON) as f:
-                meta = json.load(f)
-            _features = meta.get("features") or [c for c in _df.columns if c.lower() not in ("risk", "target")]
-        else:
-            # quitamos siempre la columna target/risk de las features
-            _features = [c for c in _df.columns if c.lower() not in ("risk", "target")]
-    return _df, _model, _vec, _features
+# Una versión del CSV con todo lo derivado (matriz float32 contigua, target,
+# modelo). Se sustituye entera al recargar: cada llamada toma una instantánea
+# y no vuelve a leer globales, así nunca mezcla X/y de versiones distintas.
+Core = namedtuple("Core", "df model vec features X y version")
+
+_core = None
+_model = _vec = None
+_lock = threading.Lock()
+# probabilidades de todo el dataset, cacheadas por versión del CSV
+_proba_cache = {}
+_proba_stats = {"hits": 0, "misses": 0}
+
+def dataset_version():
+    """Versión del dataset: (mtime_ns, tamaño) del CSV."""
+    st = DATA_CSV.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+def _feature_columns(df: pd.DataFrame) -> list:
+    if META_JSON and Path(META_JSON).exists():
+        with open(META_JSON) as f:
+            meta = json.load(f)
+        if meta.get("features"):
+            return meta["features"]
+    # quitamos siempre la columna target/risk de las features
+    return [c for c in df.columns if c.lower() not in ("risk", "target")]
+
+def load_core() -> Core:
+    """Instantánea de la versión actual del dataset; recarga (bajo lock) si el CSV cambió."""
+    global _core, _model, _vec
+    version = dataset_version()
+    core = _core
+    if core is not None and core.version == version:
+        return core
+    with _lock:
+        if _core is not None and _core.version == version:
+            return _core
+        if _model is None:
+            with open(MODEL_PKL, "rb") as f:
+                _model = pickle.load(f)
+        if _vec is None and VECTORIZER_PKL and VECTORIZER_PKL.exists():
+            with open(VECTORIZER_PKL, "rb") as f:
+                _vec = pickle.load(f)
+        # CSV nuevo o modificado -> recargar e invalidar lo derivado
+        df = pd.read_csv(DATA_CSV)
+        features = _feature_columns(df)
+        X = df[features]
+        if _vec is not None:
+            X = _vec.transform(X)
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+        y = df[TARGET_COL].to_numpy(dtype=np.int64) if TARGET_COL in df.columns else None
+        _core = Core(df, _model, _vec, features, X, y, version)
+        _proba_cache.clear()
+        return _core
+
+def get_matrix():
+    """Devuelve (X float32, y) precalculados para la versión actual del dataset."""
+    core = load_core()
+    return core.X, core.y
 
 def get_features(row_idx: int):
-    df, *_ = load_core()
-    return df[_features].iloc[row_idx:row_idx+1]
+    core = load_core()
+    return core.df[core.features].iloc[row_idx:row_idx+1]
+
+def _scores(core: Core):
+    """
+    Probabilidad de clase 1 (o predicción si el modelo no tiene predict_proba)
+    para TODO el dataset de 'core', calculada con una sola llamada vectorizada.
+    """
+    scores = _proba_cache.get(core.version)
+    if scores is not None:
+        with _lock:
+            _proba_stats["hits"] += 1
+        return scores
+    if hasattr(core.model, "predict_proba"):
+        scores = core.model.predict_proba(core.X)[:, 1].astype(float)
+    else:
+        scores = np.asarray(core.model.predict(core.X), dtype=float)
+    with _lock:
+        _proba_stats["misses"] += 1
+        if core.version == _core.version:   # no cachear una versión que ya se sustituyó
+            _proba_cache[core.version] = scores
+    return scores
+
+register_cache("risk_scores", lambda: {**_proba_stats, "size": len(_proba_cache)})
+
+def parse_rows(spec: str, n_rows: int) -> np.ndarray:
+    """
+    Interpreta 'rows' como lista de índices y/o rangos: "0-5000", "1,5,7", "0-9,15".
+    Los rangos son inclusivos y se recortan al tamaño del dataset;
+    los índices sueltos deben existir.
+    """
+    parts = []
+    for tok in str(spec).replace(" ", "").split(","):
+        if not tok:
+            continue
+        if "-" in tok[1:]:
+            a, b = tok.split("-", 1)
+            start, end = int(a), int(b)
+            if start < 0 or end < start:
+                raise ValueError(f"Rango inválido: {tok}")
+            end = min(end, n_rows - 1)
+            if start < n_rows:
+                parts.append(np.arange(start, end + 1))
+        else:
+            i = int(tok)
+            if i < 0 or i >= n_rows:
+                raise ValueError(f"Fila {i} fuera de rango (0 - {n_rows-1}).")
+            parts.append(np.array([i]))
+    if not parts:
+        raise ValueError(f"Ninguna fila válida en '{spec}'.")
+    return np.concatenate(parts)
+
+def predict_rows(rows):
+    """
+    Predicción para varias filas: 'rows' puede ser un string ("0-5000", "1,5,7")
+    o una lista de índices. Responde en formato columnar.
+    """
+    core = load_core()
+    n = len(core.X)
+    if isinstance(rows, str):
+        idx = parse_rows(rows, n)
+    else:
+        idx = np.asarray(rows, dtype=np.int64)
+        if idx.size and (idx.min() < 0 or idx.max() >= n):
+            raise ValueError(f"Filas fuera de rango (0 - {n-1}).")
+    scores = _scores(core)[idx]
+    has_proba = hasattr(core.model, "predict_proba")
+    return {
+        "rows": idx.tolist(),
+        "predictions": ((scores >= 0.5).astype(int) if has_proba else scores.astype(int)).tolist(),
+        "probabilities": scores.tolist() if has_proba else None,
+        "actual": core.y[idx].tolist() if core.y is not None else None,
+    }
 
 def predict_one(row_idx: int):
-    df, model, vec, feats = load_core()
-    X = df[feats].iloc[row_idx:row_idx+1]
-    if vec is not None:
-        X = vec.transform(X)
-    if hasattr(model, "predict_proba"):
-        p = float(model.predict_proba(X)[0, 1])
+    core = load_core()
+    if row_idx < 0 or row_idx >= len(core.X):
+        raise ValueError(f"Fila {row_idx} fuera de rango (0 - {len(core.X)-1}).")
+    if hasattr(core.model, "predict_proba"):
+        p = float(_scores(core)[row_idx])
         pred = int(p >= 0.5)
     else:
-        pred = int(model.predict(X)[0])
+        pred = int(_scores(core)[row_idx])
         p = None
-    y = int(df[TARGET_COL].iloc[row_idx]) if TARGET_COL in df.columns else None
+    y = int(core.y[row_idx]) if core.y is not None else None
     return {
         "row": row_idx,
         "prediction": pred,
@@ -68,4 +178,5 @@ def predict_by_row_index(row_idx: int = 0):
     """Alias para mantener compatibilidad con imports antiguos."""
     return predict_one(row_idx)
 
-__all__ = ["ml_predict", "predict_one", "get_features", "predict_by_row_index"]
+__all__ = ["ml_predict", "predict_one", "predict_rows", "parse_rows", "get_features",
+           "get_matrix", "dataset_version", "predict_by_row_index"]
@@ -0,0 +1,225 @@
+# demo/app/profiling.py
+"""
+Perfilado bajo demanda de peticiones concretas (p. ej. un Markowitz o un
+ticker de predict_stock que tarda más de lo normal).
+
+VALERIO_PROFILE:
+  off     (por defecto) el middleware no se instala: coste cero.
+  header  se perfila la petición que trae X-Valerio-Profile igual a
+          VALERIO_ADMIN_TOKEN.
+  all     se perfilan todas (solo para depurar en local).
+
+Por cada petición perfilada se guarda, con el id de X-Request-ID (o uno
+nuevo, devuelto en X-Profile-Id):
+- pilas colapsadas de un perfilador por muestreo (cada
+  VALERIO_PROFILE_INTERVAL_MS ms), listas para flamegraph.pl o speedscope;
+- resumen de tracemalloc: pico y líneas que más memoria retienen al final.
+
+Se muestrean todos los hilos con trabajo (bucle de eventos y threadpool),
+sin los que están esperando; con otras peticiones en paralelo, sus pilas
+también aparecen. Los cálculos en ProcessPool no se ven.
+Consulta: GET /admin/profiles (cabecera X-Admin-Token).
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+
+from . import budget
+
+MODE = os.getenv("VALERIO_PROFILE", "off").lower()
+ADMIN_TOKEN = os.getenv("VALERIO_ADMIN_TOKEN", "")
+INTERVAL = float(os.getenv("VALERIO_PROFILE_INTERVAL_MS", "5")) / 1000
+KEEP = int(os.getenv("VALERIO_PROFILE_KEEP", "50"))          # perfiles en memoria
+TOP_ALLOCATIONS = 15
+MAX_DEPTH = 128
+
+MODES = ("off", "header", "all")
+if MODE not in MODES:
+    raise ValueError(f"VALERIO_PROFILE debe ser uno de {MODES}.")
+
+# hojas de pila de un hilo parado (espera de cola, lock o selector)
+_IDLE = {("threading", "wait"), ("threading", "_wait_for_tstate_lock"), ("selectors", "select"),
+         ("queue", "get"), ("concurrent.futures.thread", "_worker")}
+
+def authorized(token: str) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_name}"
+
+class Sampler:
+    """Hilo que toma la pila de los demás hilos cada 'interval' segundos."""
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="valerio-profiler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.is_set():
+            self.sample(skip=me)
+            self._stop.wait(self.interval)
+
+    def sample(self, skip: int = None) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for tid, frame in sys._current_frames().items():
+            if tid == skip:
+                continue
+            leaf = (frame.f_globals.get("__name__"), frame.f_code.co_name)
+            if leaf in _IDLE:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(tid, f"thread-{tid}").replace(" ", "_"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+# ============================
+# tracemalloc (compartido con budget.track)
+# ============================
+_mem_lock = threading.Lock()
+_mem_users = 0
+
+def _memory_start():
+    global _mem_users
+    with _mem_lock:
+        _mem_users += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        return tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[0]
+
+def _memory_stop(before, base) -> dict:
+    global _mem_users
+    after = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    with _mem_lock:
+        _mem_users -= 1
+        if _mem_users == 0 and not budget.TRACE_MEMORY:
+            tracemalloc.stop()
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return {
+        "peak_bytes": peak - base,
+        "retained_bytes": current - base,
+        "top": [{"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                 "size_diff": s.size_diff, "count_diff": s.count_diff}
+                for s in diff[:TOP_ALLOCATIONS]],
+    }
+
+# ============================
+# Perfiles guardados
+# ============================
+class Profile:
+    def __init__(self, profile_id: str, method: str, path: str):
+        self.id = profile_id
+        self.method, self.path = method, path
+        self.started = time.time()
+        self.seconds = None
+        self.status = None
+        self.samples = 0
+        self.stacks = Counter()
+        self.memory = None
+
+    def collapsed(self) -> str:
+        """Formato 'marco;marco;hoja cuenta' (flamegraph.pl, speedscope, inferno)."""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def to_dict(self, top: int = 0) -> dict:
+        out = {"id": self.id, "method": self.method, "path": self.path, "status": self.status,
+               "started": self.started, "seconds": self.seconds, "samples": self.samples,
+               "interval_ms": INTERVAL * 1000}
+        if top:
+            out["memory"] = self.memory
+            out["top_stacks"] = [{"stack": s, "samples": n} for s, n in self.stacks.most_common(top)]
+        return out
+
+class ProfileStore:
+    def __init__(self, keep: int = KEEP):
+        self.keep = keep
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._items[profile.id] = profile
+            self._items.move_to_end(profile.id)
+            while len(self._items) > self.keep:
+                self._items.popitem(last=False)
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self._items.get(profile_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return list(reversed(self._items.values()))
+
+store = ProfileStore()
+
+# ============================
+# Middleware ASGI
+# ============================
+def _header(scope, name: bytes):
+    for k, v in scope.get("headers", ()):
+        if k == name:
+            return v.decode("latin-1")
+    return None
+
+class ProfilingMiddleware:
+    """Solo se instala con VALERIO_PROFILE distinto de off (ver main)."""
+
+    def __init__(self, app, mode: str = None):
+        self.app = app
+        self.mode = mode or MODE
+
+    def wanted(self, scope) -> bool:
+        if scope["type"] != "http" or scope["path"].startswith("/admin/"):
+            return False
+        return self.mode == "all" or authorized(_header(scope, b"x-valerio-profile"))
+
+    async def __call__(self, scope, receive, send):
+        if not self.wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = Profile(_header(scope, b"x-request-id") or uuid.uuid4().hex[:12],
+                          scope.get("method", ""), scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = {**message, "headers": [*message.get("headers", ()),
+                                                  (b"x-profile-id", profile.id.encode("latin-1"))]}
+            await send(message)
+
+        before, base = _memory_start()
+        sampler = Sampler().start()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.seconds = time.perf_counter() - t0
+            profile.stacks = sampler.stop()
+            profile.samples = sampler.samples
+            profile.memory = _memory_stop(before, base)
+            store.add(profile)
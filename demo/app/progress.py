@@ -0,0 +1,26 @@
+# demo/app/progress.py
+"""
+Progreso y cancelación cooperativa para los motores por bloques.
+
+Los motores llaman a report(hecho, total) entre bloques. Fuera de un job no
+hace nada (coste: leer una ContextVar); dentro de un job actualiza el progreso
+y lanza Cancelled si el job se ha cancelado.
+"""
+import contextvars
+
+class Cancelled(Exception):
+    """El job que ejecuta este cálculo fue cancelado."""
+
+_callback = contextvars.ContextVar("valerio_progress", default=None)
+
+def report(done, total) -> None:
+    cb = _callback.get()
+    if cb is not None:
+        cb(done, total)
+
+def bind(callback):
+    """Asocia 'callback(done, total)' al contexto actual; devuelve el token para reset()."""
+    return _callback.set(callback)
+
+def reset(token) -> None:
+    _callback.reset(token)
@@ -0,0 +1,46 @@
+# demo/app/render.py
+"""
+Interruptor de gráficos por contexto.
+
+Los calculadores devuelven un PNG en base64 hecho con matplotlib; en lotes
+sin gráficos (p. ej. /ask/batch) dibujarlo es la mayor parte del coste.
+enabled() indica si hay que dibujar y disabled() lo apaga en el contexto
+actual (hilo o tarea), igual que progress.bind.
+
+Las figuras se crean con subplots() de este módulo (matplotlib.figure.Figure,
+sin pyplot): no pasan por el gestor global de figuras de pyplot ni por el
+backend interactivo, así que se pueden dibujar desde varios hilos a la vez
+(answer_many, pool de herramientas).
+"""
+import base64
+import contextvars
+import io
+from contextlib import contextmanager
+
+from app.metrics import span
+
+_enabled = contextvars.ContextVar("valerio_render", default=True)
+
+def enabled() -> bool:
+    return _enabled.get()
+
+@contextmanager
+def disabled():
+    token = _enabled.set(False)
+    try:
+        yield
+    finally:
+        _enabled.reset(token)
+
+def subplots(*args, figsize=None, **kwargs):
+    """Como plt.subplots pero sin pyplot: (fig, ax) independientes del estado global."""
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots(*args, **kwargs)
+
+def png_base64(fig) -> str:
+    """PNG de la figura en base64 (lienzo Agg). Medido como span 'render'."""
+    with span("render"):
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        return base64.b64encode(buf.getvalue()).decode("utf-8")
@@ -0,0 +1,44 @@
+# demo/app/rng.py
+"""
+Generadores aleatorios por petición.
+
+Cada cálculo crea su propio np.random.Generator (nada de estado global
+compartido entre hilos del threadpool): con 'seed' el resultado es
+reproducible y sin ella cada petición usa entropía fresca.
+
+Bit generator por defecto PCG64; Philox (VALERIO_RNG=philox) es contador,
+útil para repartir streams independientes entre workers.
+
+Precisión: los simuladores aceptan dtype "float32" (mitad de memoria y de
+tráfico en las matrices de trayectorias) o "float64". Medias y varianzas se
+acumulan siempre en float64.
+"""
+import os
+import numpy as np
+
+BIT_GENERATORS = {"pcg64": np.random.PCG64, "philox": np.random.Philox}
+DEFAULT_BIT_GENERATOR = os.getenv("VALERIO_RNG", "pcg64").lower()
+DTYPES = {"float32": np.float32, "float64": np.float64}
+
+def make_rng(seed=None, bit_generator: str = None) -> np.random.Generator:
+    """Generator nuevo; 'seed' puede ser None, un entero o una SeedSequence."""
+    name = (bit_generator or DEFAULT_BIT_GENERATOR).lower()
+    if name not in BIT_GENERATORS:
+        raise ValueError(f"Bit generator desconocido: {name}. Usa {sorted(BIT_GENERATORS)}.")
+    return np.random.Generator(BIT_GENERATORS[name](seed))
+
+def resolve(rng=None, seed=None) -> np.random.Generator:
+    """El 'rng' recibido (si lo hay) o uno nuevo a partir de 'seed'."""
+    return rng if rng is not None else make_rng(seed)
+
+def as_dtype(dtype="float64") -> np.dtype:
+    """'float32' / 'float64' (o el tipo NumPy) -> np.dtype; otros tipos dan ValueError."""
+    dt = np.dtype(DTYPES.get(dtype, dtype) if isinstance(dtype, str) else dtype)
+    if dt not in (np.float32, np.float64):
+        raise ValueError(f"dtype no soportado: {dtype}. Usa {sorted(DTYPES)}.")
+    return dt
+
+def spawn(seed, n: int, bit_generator: str = None) -> list:
+    """n generadores independientes derivados de una semilla (uno por worker/bloque)."""
+    children = np.random.SeedSequence(seed).spawn(n)
+    return [make_rng(s, bit_generator) for s in children]
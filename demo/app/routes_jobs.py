@@ -0,0 +1,131 @@
+# demo/app/routes_jobs.py
+import json
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from .jobs import manager, QueueFull
+from .schemas import StockBatchIn, BacktestIn
+from .calculators.montecarlo import MonteCarloIn
+from .calculators.var_montecarlo import VarMontecarloIn
+from .calculators.markowitz import MarkowitzIn
+from .calculators.black_scholes import BlackScholesIn
+from .calculators.capm import CapmIn
+from .calculators.exotics import ExoticsIn
+from .calculators.american import AmericanIn, american_params
+
+router = APIRouter()
+
+class JobIn(BaseModel):
+    tool: str                       # p. ej. "calc_montecarlo", "predict_stocks", "backtest"
+    params: Dict[str, Any] = {}
+
+# --- Parámetros por herramienta: los mismos modelos de los endpoints, sin claves extra ---
+_STRICT = ConfigDict(extra="forbid")
+
+class MonteCarloJob(MonteCarloIn):
+    model_config = _STRICT
+
+class VarMontecarloJob(VarMontecarloIn):
+    model_config = _STRICT
+
+class MarkowitzJob(MarkowitzIn):
+    model_config = _STRICT
+
+class BlackScholesJob(BlackScholesIn):
+    model_config = _STRICT
+
+class CapmJob(CapmIn):
+    model_config = _STRICT
+
+class ExoticsJob(ExoticsIn):
+    model_config = _STRICT
+
+class AmericanJob(AmericanIn):
+    model_config = _STRICT
+
+class StockBatchJob(StockBatchIn):
+    model_config = _STRICT
+
+class BacktestJob(BacktestIn):
+    model_config = _STRICT
+
+class PredictRowsJob(BaseModel):
+    model_config = _STRICT
+    rows: str                       # "0-5000", "1,5,7"
+
+class RiskExplainJob(BaseModel):
+    model_config = _STRICT
+    X: List[List[float]]            # filas [zscore, volatility, returns, debt_ratio]
+
+def _dump(body: BaseModel) -> dict:
+    return body.model_dump()
+
+# herramienta -> (modelo de entrada, argumentos del target); una herramienta sin
+# entrada aquí no se puede encolar por HTTP
+JOB_SCHEMAS = {
+    "calc_montecarlo": (MonteCarloJob, _dump),
+    "calc_var_montecarlo": (VarMontecarloJob, _dump),
+    "calc_markowitz": (MarkowitzJob, _dump),
+    "calc_black_scholes": (BlackScholesJob, lambda b: b.model_dump(exclude={"lang"})),
+    "calc_capm": (CapmJob, _dump),
+    "price_exotics": (ExoticsJob, _dump),
+    "price_american": (AmericanJob, american_params),
+    "predict_stocks": (StockBatchJob, _dump),
+    "backtest": (BacktestJob, _dump),
+    "ml_predict_rows": (PredictRowsJob, _dump),
+    "risk_explain": (RiskExplainJob, _dump),
+}
+
+def job_params(tool: str, params: dict) -> dict:
+    """Valida 'params' con el modelo de la herramienta; KeyError si no existe, ValueError si no valida."""
+    if tool not in JOB_SCHEMAS:
+        raise KeyError(f"Herramienta desconocida: {tool}. Disponibles: {sorted(JOB_SCHEMAS)}")
+    schema, to_params = JOB_SCHEMAS[tool]
+    return to_params(schema.model_validate(params))
+
+def _not_found(job_id: str):
+    return JSONResponse(status_code=404, content={"error": f"Job {job_id} no encontrado o caducado."})
+
+@router.post("")
+def submit_job(body: JobIn, x_tenant: Optional[str] = Header(None)):
+    try:
+        params = job_params(body.tool, body.params)
+    except KeyError as e:
+        return JSONResponse(status_code=400, content={"error": str(e.args[0])})
+    except ValidationError as e:
+        return JSONResponse(status_code=400, content={"error": f"Parámetros inválidos para {body.tool}.",
+                                                      "detail": json.loads(e.json(include_url=False))})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    try:
+        job = manager.submit(body.tool, params, tenant=x_tenant or "default")
+    except KeyError as e:
+        return JSONResponse(status_code=400, content={"error": str(e.args[0])})
+    except QueueFull as e:
+        return JSONResponse(status_code=429, content={"error": str(e)})
+    return JSONResponse(status_code=202, content=job.to_dict(with_result=False))
+
+@router.get("")
+def list_jobs(x_tenant: Optional[str] = Header(None)):
+    return [j.to_dict(with_result=False) for j in manager.list(x_tenant or "default")]
+
+@router.get("/tools")
+def list_tools():
+    return sorted(set(manager.targets) & set(JOB_SCHEMAS))
+
+def _own(job_id: str, x_tenant: Optional[str]):
+    # un job de otro tenant se trata como inexistente (no se revela que exista)
+    job = manager.get(job_id)
+    return job if job is not None and job.tenant == (x_tenant or "default") else None
+
+@router.get("/{job_id}")
+def get_job(job_id: str, x_tenant: Optional[str] = Header(None)):
+    job = _own(job_id, x_tenant)
+    return job.to_dict() if job else _not_found(job_id)
+
+@router.delete("/{job_id}")
+def cancel_job(job_id: str, x_tenant: Optional[str] = Header(None)):
+    job = _own(job_id, x_tenant) and manager.cancel(job_id)
+    return job.to_dict(with_result=False) if job else _not_found(job_id)
@@ -0,0 +1,35 @@
+# demo/app/routes_profiling.py
+from typing import Optional
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from . import profiling
+
+router = APIRouter()
+
+def _forbidden():
+    return JSONResponse(status_code=403, content={"error": "Cabecera X-Admin-Token ausente o incorrecta."})
+
+def _not_found(profile_id: str):
+    return JSONResponse(status_code=404, content={"error": f"Perfil {profile_id} no encontrado."})
+
+@router.get("")
+def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    if not profiling.authorized(x_admin_token):
+        return _forbidden()
+    return {"mode": profiling.MODE, "profiles": [p.to_dict() for p in profiling.store.list()]}
+
+@router.get("/{profile_id}")
+def get_profile(profile_id: str, top: int = Query(20, ge=1, le=500), x_admin_token: Optional[str] = Header(None)):
+    if not profiling.authorized(x_admin_token):
+        return _forbidden()
+    profile = profiling.store.get(profile_id)
+    return profile.to_dict(top=top) if profile else _not_found(profile_id)
+
+@router.get("/{profile_id}/collapsed", response_class=PlainTextResponse)
+def get_collapsed(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    # pilas colapsadas: flamegraph.pl perfil.txt > perfil.svg
+    if not profiling.authorized(x_admin_token):
+        return _forbidden()
+    profile = profiling.store.get(profile_id)
+    return PlainTextResponse(profile.collapsed()) if profile else _not_found(profile_id)
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 
+from .ml.backtest import REFIT_EVERY, MIN_TRAIN
+
 class AskIn(BaseModel):
     q: str
 
@@ -11,3 +13,29 @@ class AskOut(BaseModel):
     need: Optional[List[str]] = None
     message: str
     error: Optional[str] = None
+
+class AskBatchIn(BaseModel):
+    questions: List[str]
+    graphs: bool = False      # por defecto se omiten los gráficos base64
+
+class NluExample(BaseModel):
+    text: str
+    intent: str
+
+class NluExamplesIn(BaseModel):
+    examples: List[NluExample]
+
+class StockBatchIn(BaseModel):
+    tickers: List[str]
+    days: int = 1
+    model: str = "xgboost_reg"
+    charts: Optional[List[str]] = None   # tickers con gráfico (por defecto ninguno)
+    seed: Optional[int] = None
+
+class BacktestIn(BaseModel):
+    # sin 'data' ni 'n_jobs': por HTTP solo el CSV local y un proceso
+    models: List[str] = ["all"]
+    start: Optional[str] = None
+    end: Optional[str] = None
+    refit_every: int = Field(REFIT_EVERY, ge=5)     # cada reajuste es un fit completo por modelo
+    min_train: int = Field(MIN_TRAIN, ge=20)
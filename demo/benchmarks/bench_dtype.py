@@ -0,0 +1,68 @@
+# demo/benchmarks/bench_dtype.py
+"""
+float32 frente a float64 en los simuladores: tiempo, memoria de la matriz
+de trayectorias y diferencia en los estadísticos.
+
+Uso (desde demo/):  python -m benchmarks.bench_dtype [--steps 252 --sims 100000]
+"""
+import argparse
+import time
+import numpy as np
+
+from app.rng import make_rng, as_dtype
+from app.calculators.montecarlo import _simulate_paths
+from app.calculators.streaming import stream_montecarlo
+from app.calculators.var_montecarlo import _var_montecarlo
+
+def _timed(fn):
+    fn()  # calentamiento
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+def _last(gen):
+    est = None
+    for est in gen:
+        pass
+    return est
+
+def run(steps: int = 252, sims: int = 100_000) -> list:
+    rows = []
+    for name in ("float64", "float32"):
+        dt = as_dtype(name)
+        secs, prices = _timed(lambda: _simulate_paths(100, 0.05, 0.2, 1.0, steps, sims, make_rng(0), dt))
+        final = prices[-1]
+        s_secs, est = _timed(lambda: _last(stream_montecarlo(100, 0.05, 0.2, 1.0, steps, sims, seed=0, dtype=dt)))
+        v_secs, var = _timed(lambda: _var_montecarlo(None, 0.05, 1, 10 * sims, None, make_rng(0), dt))
+        rows.append({
+            "dtype": name,
+            "paths_seconds": secs,
+            "paths_mb": prices.nbytes / 1024 ** 2,
+            "paths_mean": float(np.mean(final, dtype=np.float64)),
+            "stream_seconds": s_secs,
+            "stream_mean": est["expected_price"],
+            "stream_var_ret": est["var_ret"],
+            "var_mc_seconds": v_secs,
+            "var_mc_var_ret": var["result"]["var_ret"],
+        })
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=252)
+    parser.add_argument("--sims", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    rows = run(args.steps, args.sims)
+    for r in rows:
+        print(f"{r['dtype']:8s} | paths {r['paths_seconds'] * 1e3:7.1f} ms {r['paths_mb']:7.1f} MB "
+              f"mean {r['paths_mean']:.4f} | stream {r['stream_seconds'] * 1e3:7.1f} ms "
+              f"mean {r['stream_mean']:.4f} VaR {r['stream_var_ret']:.5f} | "
+              f"VaR MC {r['var_mc_seconds'] * 1e3:6.1f} ms VaR {r['var_mc_var_ret']:.5f}")
+    f64, f32 = rows
+    print(f"speedup paths x{f64['paths_seconds'] / f32['paths_seconds']:.2f}, "
+          f"stream x{f64['stream_seconds'] / f32['stream_seconds']:.2f}, "
+          f"VaR MC x{f64['var_mc_seconds'] / f32['var_mc_seconds']:.2f}; "
+          f"memoria x{f64['paths_mb'] / f32['paths_mb']:.1f}")
+
+if __name__ == "__main__":
+    main()
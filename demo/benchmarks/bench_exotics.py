@@ -0,0 +1,64 @@
+# demo/benchmarks/bench_exotics.py
+"""
+Pricer de exóticas: precisión frente a fórmulas cerradas (Black–Scholes y
+asiática geométrica), efecto de la variable de control y coste de valorar
+1 frente a 100 contratos sobre las mismas trayectorias.
+
+Uso (desde demo/):  python -m benchmarks.bench_exotics [--sims 100000 --steps 252]
+"""
+import argparse
+import time
+
+from app.calculators.black_scholes import black_scholes
+from app.calculators.exotics import price_exotics, geometric_asian_price
+
+S0, R, SIGMA, T = 100.0, 0.05, 0.2, 1.0
+
+def _book(n: int) -> list:
+    kinds = [
+        {"kind": "european"}, {"kind": "asian_arith"}, {"kind": "asian_geo"},
+        {"kind": "barrier", "barrier": 130, "barrier_type": "up-and-out"},
+        {"kind": "barrier", "barrier": 80, "barrier_type": "down-and-in"},
+        {"kind": "lookback", "lookback": "fixed"},
+    ]
+    return [{**kinds[i % len(kinds)], "K": 80 + (i * 7) % 40, "option": "call" if i % 2 else "put"}
+            for i in range(n)]
+
+def run(sims: int = 100_000, steps: int = 252) -> dict:
+    res = price_exotics(S0, R, SIGMA, T, [
+        {"kind": "european", "K": 100}, {"kind": "asian_geo", "K": 100}, {"kind": "asian_arith", "K": 100},
+    ], steps=steps, sims=sims, seed=0)
+    euro, geo, arith = res["results"]
+    timings = {}
+    for n in (1, 10, 100):
+        t0 = time.perf_counter()
+        price_exotics(S0, R, SIGMA, T, _book(n), steps=steps, sims=sims, seed=0)
+        timings[n] = time.perf_counter() - t0
+    return {
+        "european": {"mc": euro["price"], "se": euro["std_error"],
+                     "closed_form": black_scholes(S0, 100, R, SIGMA, T)["price"]},
+        "asian_geo": {"mc": geo["price"], "se": geo["std_error"],
+                      "closed_form": geometric_asian_price(S0, 100, R, SIGMA, T, steps)},
+        "asian_arith": {"price_cv": arith["price"], "se_cv": arith["std_error"],
+                        "price_mc": arith["price_mc"], "se_mc": arith["std_error_mc"]},
+        "seconds_by_contracts": timings,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sims", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=252)
+    args = parser.parse_args(argv)
+    r = run(args.sims, args.steps)
+    for name in ("european", "asian_geo"):
+        x = r[name]
+        print(f"{name:12s} MC {x['mc']:.4f} ± {x['se']:.4f} | cerrada {x['closed_form']:.4f}")
+    a = r["asian_arith"]
+    print(f"asian_arith  MC {a['price_mc']:.4f} ± {a['se_mc']:.4f} | con control {a['price_cv']:.4f} ± {a['se_cv']:.4f} "
+          f"(x{a['se_mc'] / a['se_cv']:.0f} menos error)")
+    base = r["seconds_by_contracts"][1]
+    for n, secs in r["seconds_by_contracts"].items():
+        print(f"{n:4d} contratos: {secs:.2f} s (x{secs / base:.2f})")
+
+if __name__ == "__main__":
+    main()
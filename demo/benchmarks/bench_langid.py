@@ -0,0 +1,60 @@
+# demo/benchmarks/bench_langid.py
+"""
+Identificación de idioma sobre data/dataset.csv (columna 'lang'): acierto y
+latencia por llamada de agent/langid.py (con y sin caché) frente a
+langdetect y a la heurística de tildes que usaba /valerio/ask.
+
+Uso (desde demo/):  python -m benchmarks.bench_langid [--repeat 20]
+"""
+import argparse
+import csv
+import time
+from pathlib import Path
+
+from langdetect import detect as ld_detect, DetectorFactory
+
+from app.agent import langid
+
+DATASET = Path(__file__).resolve().parents[1] / "app" / "data" / "dataset.csv"
+
+def _langdetect(text: str) -> str:
+    try:
+        return "es" if ld_detect(text) == "es" else "en"
+    except Exception:
+        return "es"
+
+def _accents(text: str) -> str:
+    return "es" if any(c in "áéíóúñ¿¡" for c in text) or " el " in text.lower() else "en"
+
+def _langid_cold(text: str) -> str:
+    langid._detect.cache_clear()
+    return langid.detect(text)
+
+def run(repeat: int = 20) -> list:
+    DetectorFactory.seed = 0   # langdetect solo es determinista con semilla
+    with open(DATASET, newline="", encoding="utf-8") as f:
+        rows = [(r["text"], r["lang"]) for r in csv.DictReader(f)]
+    texts = [t for t, _ in rows]
+    out = []
+    for name, fn, rep in (("langdetect", _langdetect, max(1, repeat // 10)),
+                          ("heurística tildes", _accents, repeat),
+                          ("langid (sin caché)", _langid_cold, repeat),
+                          ("langid (caché)", langid.detect, repeat)):
+        correct = sum(fn(t) == lang for t, lang in rows)
+        t0 = time.perf_counter()
+        for _ in range(rep):
+            for t in texts:
+                fn(t)
+        us = (time.perf_counter() - t0) / (rep * len(texts)) * 1e6
+        out.append({"detector": name, "accuracy": correct / len(rows), "us_per_call": us})
+    return out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    for r in run(args.repeat):
+        print(f"{r['detector']:20s} | acierto {r['accuracy'] * 100:5.1f}% | {r['us_per_call']:9.2f} µs/llamada")
+
+if __name__ == "__main__":
+    main()
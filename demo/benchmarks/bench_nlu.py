@@ -0,0 +1,102 @@
+# demo/benchmarks/bench_nlu.py
+"""
+Backends NLU: nlu_intents.pkl (TF-IDF char_wb + LinearSVC) frente a
+nlu_online.npz (hashing + SGD con partial_fit). Compara tamaño en disco y
+en memoria, tiempo de carga, latencia por pregunta, lote completo y acierto
+en validación cruzada (5 folds estratificados) sobre data/dataset.csv.
+
+Uso (desde demo/):  python -m benchmarks.bench_nlu [--repeat 50] [--features 4096 16384 65536]
+"""
+import argparse
+import pickle
+import time
+import warnings
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+from app.agent.agent import _normalize_question
+from app.agent import nlu, nlu_online
+from app.agent.nlu_online import OnlineIntentModel
+
+def _load_time(fn, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times))
+
+def _latency(model, texts, repeat: int) -> list:
+    lat = []
+    for t in texts:
+        model.predict([t])
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            model.predict([t])
+        lat.append((time.perf_counter() - t0) / repeat)
+    return sorted(lat)
+
+def _cv_accuracy(make, texts, labels, folds: int = 5) -> float:
+    X, y = np.asarray(texts, dtype=object), np.asarray(labels, dtype=object)
+    hits = 0
+    for tr, te in StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(X, y):
+        model = make(list(X[tr]), list(y[tr]))
+        hits += int((np.asarray(model.predict(list(X[te]))) == y[te]).sum())
+    return hits / len(y)
+
+def run(repeat: int = 50, features=(4096, 16384, 65536)) -> list:
+    warnings.filterwarnings("ignore")   # aviso de versión de sklearn al cargar el pkl
+    texts, labels = nlu_online.read_csv(nlu_online.DATA)
+    queries = [_normalize_question(t) for t in texts]
+    pipe = joblib.load(nlu.MODEL_PKL)
+    if not nlu.MODEL_NPZ.exists():
+        nlu_online.train()
+    online = OnlineIntentModel.load(nlu.MODEL_NPZ)
+
+    rows = []
+    backends = [("tfidf (pkl)", pipe, nlu.MODEL_PKL, lambda: joblib.load(nlu.MODEL_PKL),
+                 lambda X, y: clone(pipe).fit(X, y)),
+                (f"online {online.n_features} (npz)", online, nlu.MODEL_NPZ, lambda: OnlineIntentModel.load(nlu.MODEL_NPZ),
+                 lambda X, y: OnlineIntentModel(online.n_features).fit(X, y))]
+    for name, model, path, load, make in backends:
+        lat = _latency(model, queries, repeat)
+        n = len(lat)
+        t0 = time.perf_counter()
+        model.predict(queries)
+        batch = time.perf_counter() - t0
+        rows.append({
+            "backend": name,
+            "disk_kb": path.stat().st_size / 1024,
+            "memory_kb": len(pickle.dumps(model)) / 1024,
+            "vocabulary": len(model.named_steps["tfidf"].vocabulary_) if hasattr(model, "named_steps") else None,
+            "load_ms": _load_time(load) * 1e3,
+            "p50_us": lat[n // 2] * 1e6, "p95_us": lat[int(n * 0.95)] * 1e6,
+            "batch_ms": batch * 1e3, "questions": n,
+            "cv_accuracy": _cv_accuracy(make, texts, labels),
+        })
+    for nf in features:
+        if nf == online.n_features:
+            continue
+        rows.append({"backend": f"online {nf} (solo acierto)",
+                     "cv_accuracy": _cv_accuracy(lambda X, y: OnlineIntentModel(nf).fit(X, y), texts, labels)})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--features", type=int, nargs="*", default=[4096, 16384, 65536])
+    args = parser.parse_args(argv)
+    for r in run(args.repeat, args.features):
+        if "load_ms" not in r:
+            print(f"{r['backend']:24s} | acierto CV {r['cv_accuracy']:.3f}")
+            continue
+        vocab = f" | vocabulario {r['vocabulary']}" if r["vocabulary"] else ""
+        print(f"{r['backend']:24s} | disco {r['disk_kb']:6.0f} KB | memoria {r['memory_kb']:6.0f} KB{vocab} | "
+              f"carga {r['load_ms']:6.1f} ms | p50 {r['p50_us']:6.0f} µs | p95 {r['p95_us']:6.0f} µs | "
+              f"lote {r['questions']} {r['batch_ms']:5.1f} ms | acierto CV {r['cv_accuracy']:.3f}")
+
+if __name__ == "__main__":
+    main()
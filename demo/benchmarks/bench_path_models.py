@@ -0,0 +1,38 @@
+# demo/benchmarks/bench_path_models.py
+"""
+Coste por modelo de trayectorias (gbm / heston / merton) en un núcleo:
+S_T de sims × steps trayectorias por bloques, en float64 y float32.
+
+Uso (desde demo/):  python -m benchmarks.bench_path_models [--sims 100000] [--steps 252]
+"""
+import argparse
+import time
+
+from app.rng import make_rng, as_dtype
+from app.calculators.path_models import MODELS, terminal_values
+
+def run(sims: int = 100_000, steps: int = 252, dtypes=("float64", "float32")) -> list:
+    rows = []
+    for dtype in dtypes:
+        base = None
+        for model in MODELS:
+            t0 = time.perf_counter()
+            ST = terminal_values(model, 100.0, 0.05, 0.2, 1.0, steps, sims, make_rng(0), as_dtype(dtype))
+            secs = time.perf_counter() - t0
+            base = base or secs
+            rows.append({"model": model, "dtype": dtype, "seconds": secs,
+                         "ns_per_cell": secs / (sims * steps) * 1e9, "vs_gbm": secs / base,
+                         "mean_ST": float(ST.mean())})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sims", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=252)
+    args = parser.parse_args(argv)
+    for r in run(args.sims, args.steps):
+        print(f"{r['model']:7s} {r['dtype']:8s} | {r['seconds']:6.2f} s | {r['ns_per_cell']:5.1f} ns/celda "
+              f"| x{r['vs_gbm']:.2f} vs gbm | E[S_T] {r['mean_ST']:.3f}")
+
+if __name__ == "__main__":
+    main()
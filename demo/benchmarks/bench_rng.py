@@ -0,0 +1,80 @@
+# demo/benchmarks/bench_rng.py
+"""
+Throughput de generación de aleatorios: API global legada (np.random.normal,
+RandomState) frente a Generator por petición (PCG64 y Philox, ziggurat),
+y el bucle de trayectorias de calc_montecarlo con ambos.
+
+Uso (desde demo/):  python -m benchmarks.bench_rng [--n 10000000]
+"""
+import argparse
+import time
+import numpy as np
+
+from app.rng import make_rng
+
+def _best(fn, repeat: int = 5) -> float:
+    fn()  # calentamiento
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def _paths_legacy(steps: int, sims: int):
+    prices = np.empty((steps + 1, sims))
+    prices[0] = 100.0
+    for t in range(1, steps + 1):
+        rand = np.random.normal(0, 1, sims)
+        prices[t] = prices[t - 1] * np.exp(0.0002 + 0.0126 * rand)
+    return prices
+
+def _paths_generator(steps: int, sims: int, rng: np.random.Generator):
+    prices = np.empty((steps + 1, sims))
+    prices[0] = 100.0
+    for t in range(1, steps + 1):
+        rand = rng.standard_normal(sims)
+        prices[t] = prices[t - 1] * np.exp(0.0002 + 0.0126 * rand)
+    return prices
+
+def run(n: int = 10_000_000, steps: int = 252, sims: int = 20_000) -> list:
+    pcg, philox = make_rng(0, "pcg64"), make_rng(0, "philox")
+    rows = []
+    draws = {
+        "normal": {
+            "legacy np.random.normal": lambda: np.random.normal(0, 1, n),
+            "Generator(PCG64).standard_normal": lambda: pcg.standard_normal(n),
+            "Generator(Philox).standard_normal": lambda: philox.standard_normal(n),
+        },
+        "uniform": {
+            "legacy np.random.random": lambda: np.random.random(n),
+            "Generator(PCG64).random": lambda: pcg.random(n),
+            "Generator(Philox).random": lambda: philox.random(n),
+        },
+    }
+    for kind, fns in draws.items():
+        base = None
+        for name, fn in fns.items():
+            secs = _best(fn)
+            base = base or secs
+            rows.append({"case": f"{kind}: {name}", "seconds": secs,
+                         "mdraws_per_s": n / secs / 1e6, "speedup": base / secs})
+
+    legacy = _best(lambda: _paths_legacy(steps, sims), repeat=3)
+    fast = _best(lambda: _paths_generator(steps, sims, make_rng(0)), repeat=3)
+    rows.append({"case": f"paths {steps}x{sims}: legacy", "seconds": legacy,
+                 "mdraws_per_s": steps * sims / legacy / 1e6, "speedup": 1.0})
+    rows.append({"case": f"paths {steps}x{sims}: Generator(PCG64)", "seconds": fast,
+                 "mdraws_per_s": steps * sims / fast / 1e6, "speedup": legacy / fast})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=10_000_000)
+    args = parser.parse_args(argv)
+    for r in run(args.n):
+        print(f"{r['case']:45s} | {r['seconds'] * 1e3:8.1f} ms | {r['mdraws_per_s']:7.1f} Mdraws/s "
+              f"| x{r['speedup']:.2f}")
+
+if __name__ == "__main__":
+    main()
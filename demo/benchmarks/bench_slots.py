@@ -0,0 +1,135 @@
+# demo/benchmarks/bench_slots.py
+"""
+Latencia por pregunta de la extracción de slots sobre data/dataset.csv:
+extractores anteriores (normalización con 7 re.sub + 5-10 re.search por
+extractor + ast.literal_eval) frente a la pasada única de agent/slots.py.
+
+Uso (desde demo/):  python -m benchmarks.bench_slots [--repeat 200]
+"""
+import argparse
+import ast
+import csv
+import re
+import time
+from pathlib import Path
+
+from app.agent.agent import _normalize_question
+from app.agent.slots import scan, typed_slots
+
+DATASET = Path(__file__).resolve().parents[1] / "app" / "data" / "dataset.csv"
+
+# ---------------- Versión anterior (referencia) ----------------
+def _legacy_normalize(text: str) -> str:
+    patrones = [r"\bhola\b", r"\bhey\b", r"\bvalerio\b", r"\bpor favor\b",
+                r"\bcalcula(r|me)?\b", r"\bdime\b", r"\bpuedes\b"]
+    out = text.lower()
+    for pat in patrones:
+        out = re.sub(pat, "", out, flags=re.IGNORECASE)
+    return re.sub(r"\s+", " ", out).strip()
+
+def _legacy_bs(text):
+    num = r"([-+]?\d+(?:[\.,]\d+)?)"
+    found = [re.search(p, text, re.I) for p in (
+        r"\bS\s*[:=]?\s*" + num, r"\bK\s*[:=]?\s*" + num, r"\br\s*[:=]?\s*" + num + r"\s*%?",
+        r"\b(?:sigma|vol)\s*[:=]?\s*" + num + r"\s*%?", r"\bT\s*[:=]?\s*" + num,
+        r"\b(call|put|llamada|venta)\b")]
+    return {k: m.group(1) for k, m in zip(("S", "K", "r", "sigma", "T", "option"), found) if m}
+
+def _legacy_var(text):
+    found = [re.search(p, text, re.I) for p in (
+        r"\b(hist[oó]rico|historical|ewma|monte\s*carlo|montecarlo)\b",
+        r"(?:lambda|λ)\s*[:=]?\s*([\d\.,]+)",
+        r"(?:horizonte|hor|horizon)\s*[:=]?\s*(\d+)", r"\b(\d+)\s*(?:d[ií]as|days|d)\b", r"over\s+(\d+)\s+days",
+        r"(?:monto|amount)\s*[:=]?\s*([\d\.,]+)\s*[kKmM]?",
+        r"(?:nivel|alfa|alpha|at|level)\s*[:=]?\s*([\d\.,]+)\s*%?", r"\b(\d{1,3})\s*%?\b")]
+    return {i: m.group(1) for i, m in enumerate(found) if m}
+
+def _legacy_montecarlo(text):
+    text = text.lower()
+    pats = [r"s0\s*=\s*([\d\.]+)", r"mu\s*=\s*([\d\.]+)", r"sigma\s*=\s*([\d\.]+)", r"t\s*=\s*([\d\.]+)",
+            r"(?:steps|pasos)\s*=\s*(\d+)", r"(?:sims|simulaciones)\s*=\s*(\d+)"]
+    return [m.group(1) for m in (re.search(p, text, re.I) for p in pats) if m]
+
+def _legacy_capm(text):
+    pats = [r"rf\s*=?\s*([\d\.,]+)\s*%?", r"beta\s*=?\s*([\d\.,]+)", r"rm\s*=?\s*([\d\.,]+)\s*%?"]
+    return [m.group(1) for m in (re.search(p, text, re.I) for p in pats) if m]
+
+def _legacy_markowitz(text):
+    out = {}
+    for key, pat in (("rend", r"(?:rend|returns)[=:\s]*([\[\]0-9.,\s-]+)"),
+                     ("cov", r"(?:cov|covariance)[=:\s]*([\[\]0-9.,\s\-\[\]]+)")):
+        m = re.search(pat, text, re.I)
+        if m:
+            try:
+                out[key] = ast.literal_eval(m.group(1))
+            except Exception:
+                pass
+    return out
+
+def _legacy_row(text):
+    return re.search(r"(?:row|fila)\s*[:=]?\s*(\d+)", text, re.I)
+
+def _legacy_risk(text):
+    return [re.search(rf"{k}\s*=?\s*([0-9]*\.?[0-9]+)", text) for k in ("zscore", "volatility", "returns", "debt_ratio")]
+
+def _legacy_stock(text):
+    clean = re.sub(r"[^A-Z0-9ÁÉÍÓÚÜÑ ]", " ", text.upper())
+    words = re.findall(r"\b[A-Z]{2,5}\b", text.upper())
+    d = re.search(r"(\d+)\s*(DAY|DAYS?|DIA|DIAS?)", clean)
+    models = [re.search(p, clean) for p in ("XGBOOST", "SVM|SVR|VECTOR", "FOREST|BOSQUE", "LINEAR|REGRESION|REGRESSION")]
+    return words, d, models
+
+_LEGACY = {
+    "calc_black_scholes": _legacy_bs, "calc_var": _legacy_var, "calc_var_simple": _legacy_var,
+    "calc_montecarlo": _legacy_montecarlo, "calc_capm": _legacy_capm, "calc_markowitz": _legacy_markowitz,
+    "ml_predict": _legacy_row, "predict_risk": _legacy_risk, "predict_stock": _legacy_stock,
+}
+
+def legacy(text: str, intent: str):
+    q = _legacy_normalize(text)
+    fn = _LEGACY.get(intent)
+    return fn(q) if fn else None
+
+def compiled(text: str, intent: str):
+    return typed_slots(scan(_normalize_question(text)), intent)
+
+# ---------------- Medición ----------------
+def load_dataset(path: Path = DATASET) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(r["text"], r["intent"]) for r in csv.DictReader(f)]
+
+def _per_question(fn, rows, repeat: int) -> list:
+    lat = []
+    for text, intent in rows:
+        fn(text, intent)  # calentamiento (caché de re)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(text, intent)
+        lat.append((time.perf_counter() - t0) / repeat)
+    return sorted(lat)
+
+def run(repeat: int = 200) -> list:
+    rows = load_dataset()
+    out = []
+    for name, fn in (("legacy", legacy), ("compiled", compiled)):
+        lat = _per_question(fn, rows, repeat)
+        n = len(lat)
+        out.append({"engine": name, "questions": n, "mean_us": sum(lat) / n * 1e6,
+                    "p50_us": lat[n // 2] * 1e6, "p95_us": lat[int(n * 0.95)] * 1e6, "max_us": lat[-1] * 1e6})
+    filled = sum(bool(compiled(t, i)) for t, i in rows if i not in ("help", "other"))
+    out.append({"engine": "compiled (preguntas con slots)", "questions": filled})
+    return out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+    for r in run(args.repeat):
+        if "mean_us" not in r:
+            print(f"{r['engine']}: {r['questions']}")
+            continue
+        print(f"{r['engine']:9s} | {r['questions']} preguntas | media {r['mean_us']:6.1f} µs | "
+              f"p50 {r['p50_us']:6.1f} µs | p95 {r['p95_us']:6.1f} µs | máx {r['max_us']:6.1f} µs")
+
+if __name__ == "__main__":
+    main()
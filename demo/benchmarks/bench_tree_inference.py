@@ -0,0 +1,61 @@
+# demo/benchmarks/bench_tree_inference.py
+"""
+Compara el backend compilado de árboles con los modelos originales:
+latencia con 1 fila y throughput con 100k filas.
+
+Uso (desde demo/):  python -m benchmarks.bench_tree_inference
+"""
+import time
+import warnings
+from pathlib import Path
+import numpy as np
+import joblib
+
+from app.ml.tree_inference import compile_model, validate_parity
+
+MODELS_DIR = Path(__file__).resolve().parents[1] / "app" / "ml" / "models"
+MODELS = ["risk_xgboost.pkl", "random_forest_reg_apple.pkl", "xgboost_reg_apple.pkl"]
+
+def _timeit(fn, repeat: int) -> float:
+    fn()  # calentamiento
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+def _predict_fn(model):
+    return model.predict_proba if hasattr(model, "predict_proba") else model.predict
+
+def run(n_rows: int = 100_000, repeat_single: int = 500) -> list:
+    results = []
+    for name in MODELS:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = joblib.load(MODELS_DIR / name)
+        compiled = compile_model(model)
+        diff = validate_parity(model, compiled)
+
+        rng = np.random.default_rng(0)
+        X_big = rng.normal(size=(n_rows, compiled.n_features_in_)).astype(np.float32)
+        x_one = X_big[:1]
+        native = _predict_fn(model)
+        fast = getattr(compiled, native.__name__)
+
+        results.append({
+            "model": name,
+            "trees": compiled.n_trees,
+            "max_depth": compiled.max_depth,
+            "parity_max_diff": diff,
+            "single_native_us": 1e6 * _timeit(lambda: native(x_one), repeat_single),
+            "single_compiled_us": 1e6 * _timeit(lambda: fast(x_one), repeat_single),
+            "batch_native_rows_s": n_rows / _timeit(lambda: native(X_big), 1),
+            "batch_compiled_rows_s": n_rows / _timeit(lambda: fast(X_big), 1),
+        })
+    return results
+
+if __name__ == "__main__":
+    for r in run():
+        print(f"{r['model']:30s} trees={r['trees']:4d} depth={r['max_depth']:2d} "
+              f"parity={r['parity_max_diff']:.2e} | 1 fila: {r['single_native_us']:8.1f}us -> "
+              f"{r['single_compiled_us']:7.1f}us | 100k: {r['batch_native_rows_s']:>10,.0f} -> "
+              f"{r['batch_compiled_rows_s']:>10,.0f} filas/s")
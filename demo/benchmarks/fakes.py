@@ -0,0 +1,67 @@
+# demo/benchmarks/fakes.py
+"""
+Sustitutos locales de servicios externos para medir sin red.
+
+- synthetic_prices: backend de app.ml.prices.set_backend con históricos
+  sintéticos (GBM con semilla por ticker) y latencia opcional simulada.
+- FakeLLM: sustituto de openai.OpenAI para /valerio/ask (misma forma de
+  chat.completions.create), con latencia configurable.
+- create_app: la app con ambos sustitutos, para uvicorn --factory:
+    uvicorn benchmarks.fakes:create_app --factory
+  Latencias por entorno: VALERIO_FAKE_LLM_LATENCY y VALERIO_FAKE_PRICE_LATENCY (s).
+"""
+import os
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+def synthetic_prices(latency: float = 0.0, seed: int = 0):
+    """
+    Backend de precios: Close/Volume en días hábiles entre start y end.
+    Deterministas por (ticker, seed); 'latency' segundos de espera por llamada.
+    """
+    def backend(tickers: list, start, end) -> dict:
+        if latency:
+            time.sleep(latency)
+        dates = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+        out = {}
+        for t in tickers:
+            rng = np.random.default_rng([seed, zlib.crc32(t.encode())])
+            steps = rng.normal(0.0004, 0.018, len(dates))
+            close = 100.0 * np.exp(np.cumsum(steps))
+            volume = rng.integers(5_000_000, 50_000_000, len(dates)).astype(float)
+            out[t] = pd.DataFrame({"Close": close, "Volume": volume}, index=dates)
+        return out
+    return backend
+
+class FakeLLM:
+    """Cliente con la interfaz chat.completions.create de openai.OpenAI; responde con eco del contexto."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model: str, messages: list, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        content = f"[{model} simulado] {messages[-1]['content'][:200]}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def install(llm_latency: float = 0.0, price_latency: float = 0.0) -> FakeLLM:
+    """Sustituye OpenAI y yfinance en el proceso actual (la app ya importada o por importar)."""
+    os.environ.setdefault("OPENAI_API_KEY", "offline-fake")
+    from app import routes_openai
+    from app.ml import prices
+    prices.set_backend(synthetic_prices(price_latency))
+    routes_openai.client = FakeLLM(llm_latency)
+    return routes_openai.client
+
+def create_app():
+    install(float(os.getenv("VALERIO_FAKE_LLM_LATENCY", "0")), float(os.getenv("VALERIO_FAKE_PRICE_LATENCY", "0")))
+    from app.main import app
+    return app
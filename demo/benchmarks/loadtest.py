@@ -0,0 +1,326 @@
+# demo/benchmarks/loadtest.py
+"""
+Prueba de carga HTTP sin servicios externos: cuántas peticiones por segundo
+aguanta un worker en /calc/*, /ml/predict, /predict_risk, /ask y /valerio/ask.
+
+- Cliente asíncrono (httpx) con N peticiones concurrentes durante --duration s.
+- Mezcla de peticiones sacada de data/dataset.csv: cada pregunta se resuelve
+  con el NLU y el registro de herramientas al endpoint directo equivalente
+  (black_scholes -> POST /calc/black-scholes, ml_predict -> GET /ml/predict...)
+  o se envía tal cual a /ask o /valerio/ask. Pesos por tipo con --mix.
+- OpenAI y yfinance se sustituyen por benchmarks.fakes (latencia configurable).
+- La app corre en este proceso (ASGI, sin red) o bajo uvicorn con 1..N workers.
+- Modo de ejecución de las herramientas del agente (VALERIO_TOOL_POLICY):
+  inline (en el hilo de la petición), thread (pool de hilos) o process
+  (ProcessPool). Los endpoints /calc/* usan siempre el threadpool de Starlette.
+
+Informe: peticiones/s, p50/p95/p99 global y por endpoint, tasa de errores y
+RSS de los workers a lo largo del tiempo; una fila por combinación.
+
+Uso (desde demo/):
+    python -m benchmarks.loadtest --duration 20 --concurrency 16
+    python -m benchmarks.loadtest --server uvicorn --workers 1 2 4 --modes inline thread process \\
+        --llm-latency 0.4 --price-latency 0.2 --out carga.json
+"""
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+import warnings
+from collections import defaultdict
+from pathlib import Path
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+os.environ.setdefault("OPENAI_API_KEY", "offline-fake")
+warnings.filterwarnings("ignore")   # avisos de versión de sklearn/xgboost al cargar los pkl
+
+import httpx
+import numpy as np
+
+DEMO = Path(__file__).resolve().parents[1]
+DATASET = DEMO / "app" / "data" / "dataset.csv"
+MODES = ("inline", "thread", "process")
+DEFAULT_MIX = "calc=4,ml=1,risk=1,ask=1,valerio=2"
+
+# herramienta -> (tipo, método, ruta, argumentos de la herramienta -> (json, params))
+ENDPOINTS = {
+    "calc_black_scholes": ("calc", "POST", "/calc/black-scholes",
+                           lambda a: ({k: a[k] for k in ("S", "K", "r", "sigma", "T", "option") if k in a}, None)),
+    "calc_var_montecarlo": ("calc", "POST", "/calc/var-montecarlo",
+                            lambda a: ({k: a[k] for k in ("returns", "alpha", "horizon", "sims", "amount") if k in a},
+                                       None)),
+    "calc_var_simple": ("calc", "POST", "/calc/var",
+                        lambda a: ({"returns": a.get("returns"), "confidence": 1 - a.get("alpha", 0.05)}, None)),
+    "calc_montecarlo": ("calc", "POST", "/calc/montecarlo",
+                        lambda a: ({k: a[k] for k in ("S0", "mu", "sigma", "T", "steps", "sims")}, None)),
+    "calc_capm": ("calc", "POST", "/calc/capm", lambda a: ({k: a[k] for k in ("rf", "beta", "rm")}, None)),
+    "calc_markowitz": ("calc", "POST", "/calc/markowitz",
+                       lambda a: ({k: a[k] for k in ("rendimientos", "covarianzas", "rf") if k in a}, None)),
+    "ml_predict": ("ml", "GET", "/ml/predict", lambda a: (None, {"row": a.get("row_idx", 0)})),
+    "predict_risk": ("risk", "POST", "/predict_risk", lambda a: (None, a)),
+}
+RISK_DEMO = {"zscore": 1.8, "volatility": 0.25, "returns": 0.03, "debt_ratio": 0.5}
+
+# ============================
+# Mezcla de peticiones
+# ============================
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in filter(None, spec.split(",")):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight or 1)
+    unknown = set(mix) - {"calc", "ml", "risk", "ask", "valerio"}
+    if unknown:
+        raise ValueError(f"Tipos desconocidos en --mix: {sorted(unknown)}")
+    return mix
+
+def build_requests(path: Path = DATASET) -> dict:
+    """{tipo: [(método, ruta, json, params)]} a partir de las preguntas del dataset."""
+    from app.agent import registry
+    from app.agent.agent import understand
+    with open(path, newline="", encoding="utf-8") as f:
+        questions = [row["text"] for row in csv.DictReader(f)]
+    out = defaultdict(list)
+    for q in questions:
+        out["ask"].append(("POST", "/ask", {"q": q}, None))
+        out["valerio"].append(("POST", "/valerio/ask", {"question": q}, None))
+        u = understand(q)
+        tool = registry.route(u.intent, u.scan.words)
+        if tool is None or tool.name not in ENDPOINTS:
+            continue
+        args = {**(RISK_DEMO if tool.name == "predict_risk" else {}), **tool.demo, **tool.extract(u)}
+        if tool.missing(args):
+            continue
+        kind, method, route, build = ENDPOINTS[tool.name]
+        body, params = build(args)
+        out[kind].append((method, route, body, params))
+    return dict(out)
+
+def _pick(requests: dict, mix: dict, rng: random.Random):
+    kinds = [k for k in mix if requests.get(k)]
+    weights = [mix[k] for k in kinds]
+
+    def pick():
+        kind = rng.choices(kinds, weights)[0]
+        return kind, rng.choice(requests[kind])
+    return pick
+
+# ============================
+# Memoria de los workers
+# ============================
+def _children(pid: int) -> list:
+    out = []
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        with contextlib.suppress(OSError):
+            out += [int(c) for c in (task / "children").read_text().split()]
+    return out
+
+def process_tree(pid: int) -> list:
+    """El proceso y todos sus descendientes (workers de uvicorn, ProcessPool)."""
+    out, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        out.append(p)
+        stack += _children(p)
+    return out
+
+def rss_mb(pid: int) -> float:
+    total = 0
+    for p in process_tree(pid):
+        with contextlib.suppress(OSError):
+            for line in Path(f"/proc/{p}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+                    break
+    return total / 1024
+
+# ============================
+# Servidores
+# ============================
+@contextlib.contextmanager
+def inprocess_server(mode: str, llm_latency: float, price_latency: float):
+    from benchmarks import fakes
+    fakes.install(llm_latency, price_latency)
+    from app.main import app
+    from app.agent import registry
+    saved = {t.name: t.policy for t in registry.REGISTRY}
+    for t in registry.REGISTRY:
+        t.policy = mode
+    try:
+        yield httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest"), os.getpid()
+    finally:
+        for t in registry.REGISTRY:
+            t.policy = saved[t.name]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextlib.contextmanager
+def uvicorn_server(mode: str, workers: int, llm_latency: float, price_latency: float, startup: float = 180.0):
+    port = _free_port()
+    env = {**os.environ, "VALERIO_TOOL_POLICY": mode, "VALERIO_FAKE_LLM_LATENCY": str(llm_latency),
+           "VALERIO_FAKE_PRICE_LATENCY": str(price_latency)}
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fakes:create_app", "--factory",
+                             "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+                             "--log-level", "warning"], cwd=DEMO, env=env, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó al arrancar (código {proc.returncode}).")
+            with contextlib.suppress(httpx.HTTPError):
+                if httpx.get(f"{base}/health", timeout=1).status_code == 200:
+                    break
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"uvicorn no respondió en {startup:.0f} s.")
+            time.sleep(0.5)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        yield httpx.AsyncClient(base_url=base, limits=limits), proc.pid
+    finally:
+        tree = process_tree(proc.pid)
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        # hijos de los ProcessPool de cada worker: uvicorn no los espera al salir
+        for p in tree[1:]:
+            with contextlib.suppress(OSError):
+                os.kill(p, signal.SIGKILL)
+
+# ============================
+# Carga
+# ============================
+async def _load(client: httpx.AsyncClient, pid: int, pick, concurrency: int, duration: float,
+                timeout: float, rss_interval: float, warmup: int) -> dict:
+    for _ in range(warmup):   # carga perezosa de modelos, cachés y pools fuera de la medida
+        _, (method, route, body, params) = pick()
+        with contextlib.suppress(httpx.HTTPError):
+            await client.request(method, route, json=body, params=params, timeout=timeout)
+
+    records = []            # (tipo, ruta, estado, segundos); estado 0 = excepción
+    rss = []
+    t_start = time.perf_counter()
+    t_end = t_start + duration
+
+    async def worker():
+        while time.perf_counter() < t_end:
+            kind, (method, route, body, params) = pick()
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, route, json=body, params=params, timeout=timeout)
+                status = r.status_code
+            except httpx.HTTPError:
+                status = 0
+            records.append((kind, f"{method} {route}", status, time.perf_counter() - t0))
+
+    async def sample_rss():
+        while True:
+            rss.append((round(time.perf_counter() - t_start, 2), round(rss_mb(pid), 1)))
+            await asyncio.sleep(rss_interval)
+
+    sampler = asyncio.create_task(sample_rss())
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t_start
+    sampler.cancel()
+    await client.aclose()
+    rss.append((round(elapsed, 2), round(rss_mb(pid), 1)))
+    return summarize(records, elapsed, rss)
+
+def _latency(seconds: list) -> dict:
+    lat = np.asarray(seconds) * 1e3
+    if not len(lat):
+        return {}
+    return {"p50_ms": float(np.percentile(lat, 50)), "p95_ms": float(np.percentile(lat, 95)),
+            "p99_ms": float(np.percentile(lat, 99)), "max_ms": float(lat.max())}
+
+def summarize(records: list, elapsed: float, rss: list) -> dict:
+    by_route = defaultdict(list)
+    for r in records:
+        by_route[r[1]].append(r)
+    errors = [r for r in records if not 200 <= r[2] < 300]
+    codes = defaultdict(int)
+    for r in errors:
+        codes[str(r[2]) if r[2] else "exception"] += 1
+    return {
+        "requests": len(records), "seconds": elapsed,
+        "throughput_rps": len(records) / elapsed if elapsed else 0.0,
+        "error_rate": len(errors) / len(records) if records else 0.0, "errors": dict(codes),
+        **_latency([r[3] for r in records]),
+        "routes": {route: {"requests": len(rs), "rps": len(rs) / elapsed,
+                           "error_rate": sum(not 200 <= r[2] < 300 for r in rs) / len(rs),
+                           **_latency([r[3] for r in rs])}
+                   for route, rs in sorted(by_route.items())},
+        "rss_mb": {"peak": max(m for _, m in rss), "timeline": rss},
+    }
+
+def run(server: str = "inprocess", workers=(1,), modes=("thread",), concurrency: int = 16,
+        duration: float = 20.0, mix: str = DEFAULT_MIX, llm_latency: float = 0.3, price_latency: float = 0.1,
+        timeout: float = 60.0, rss_interval: float = 1.0, warmup: int = 20, seed: int = 0) -> dict:
+    requests = build_requests()
+    weights = parse_mix(mix)
+    if server == "inprocess" and tuple(workers) != (1,):
+        print("⚠️ En proceso solo hay un worker: se ignora --workers.", file=sys.stderr)
+        workers = (1,)
+    runs = []
+    for n in workers:
+        for mode in modes:
+            pick = _pick(requests, weights, random.Random(seed))
+            ctx = (inprocess_server(mode, llm_latency, price_latency) if server == "inprocess"
+                   else uvicorn_server(mode, n, llm_latency, price_latency))
+            with ctx as (client, pid):
+                result = asyncio.run(_load(client, pid, pick, concurrency, duration, timeout,
+                                           rss_interval, warmup))
+            runs.append({"workers": n, "mode": mode, **result})
+            print(f"workers {n} | {mode:7s} | {result['throughput_rps']:8.1f} req/s | "
+                  f"p50 {result.get('p50_ms', 0):8.1f} ms | p95 {result.get('p95_ms', 0):8.1f} ms | "
+                  f"p99 {result.get('p99_ms', 0):8.1f} ms | errores {result['error_rate']:.1%} | "
+                  f"RSS pico {result['rss_mb']['peak']:.0f} MB", file=sys.stderr)
+    return {
+        "config": {"server": server, "concurrency": concurrency, "duration": duration, "mix": weights,
+                   "llm_latency": llm_latency, "price_latency": price_latency, "seed": seed,
+                   "requests_per_kind": {k: len(v) for k, v in requests.items()}},
+        "runs": runs,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--server", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["thread"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="segundos de carga por combinación")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="pesos por tipo: calc, ml, risk, ask, valerio")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="segundos por llamada al LLM simulado")
+    parser.add_argument("--price-latency", type=float, default=0.1, help="segundos por descarga de precios")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--warmup", type=int, default=20, help="peticiones previas sin medir")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="-", help="fichero JSON de salida ('-' = stdout)")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):   # stdout queda solo para el JSON
+        report = run(args.server, args.workers, args.modes, args.concurrency, args.duration, args.mix,
+                     args.llm_latency, args.price_latency, args.timeout, args.rss_interval, args.warmup,
+                     args.seed)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
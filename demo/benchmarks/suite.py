@@ -0,0 +1,265 @@
+# demo/benchmarks/suite.py
+"""
+Suite de rendimiento sin red (CPU, Linux): calculadores, inferencia ML,
+agente y gráficos, con salida JSON y comparación contra una línea base.
+
+Casos: black_scholes, calc_montecarlo por (steps, sims), var_montecarlo por
+sims, optimizar_portafolio por nº de activos, predict_stock (precios
+sintéticos de benchmarks.fakes en lugar de yfinance), POST /predict_risk,
+agent.answer sobre data/dataset.csv (caché de preguntas fría y caliente) y
+los mismos cálculos con gráfico y sin él (render.disabled).
+
+Cada caso se repite hasta min_runs y min_seconds; se informa de p50, p95,
+media, coste por elemento y rendimiento (elementos por segundo: trayectorias,
+preguntas, llamadas). Con --baseline se compara el
+p50 de cada caso: ratio > 1 + umbral es regresión y el proceso sale con 1.
+
+Uso (desde demo/):
+    python -m benchmarks.suite [--quick] [--only montecarlo agent] > base.json
+    python -m benchmarks.suite --baseline base.json [--threshold 0.25] --out nuevo.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")   # main crea el cliente; no se llama
+warnings.filterwarnings("ignore")   # avisos de versión de sklearn/xgboost al cargar los pkl
+
+import numpy as np
+
+from app import render
+from app.ml import prices
+from benchmarks.fakes import synthetic_prices
+
+DEFAULT_THRESHOLD = 0.25
+# casos con más ruido (matplotlib, GC, varios modelos en cadena)
+THRESHOLDS = {"render": 0.40, "agent": 0.40, "predict_stock": 0.35, "predict_risk": 0.35}
+
+SIZES = {
+    "montecarlo": [(252, 1_000), (252, 10_000), (252, 50_000), (52, 200_000)],
+    "var_montecarlo": [10_000, 100_000, 1_000_000],
+    "markowitz": [3, 10, 30, 100],
+}
+QUICK_SIZES = {
+    "montecarlo": [(252, 1_000), (252, 10_000)],
+    "var_montecarlo": [10_000, 100_000],
+    "markowitz": [3, 10],
+}
+
+# ============================
+# Medición
+# ============================
+def measure(fn, min_runs: int = 5, min_seconds: float = 0.5, max_runs: int = 500, warmup: int = 1) -> list:
+    for _ in range(warmup):
+        fn()
+    times = []
+    t_end = time.perf_counter() + min_seconds
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() < t_end):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+def summarize(times: list, items: int = 1) -> dict:
+    t = np.sort(np.asarray(times))
+    mean = float(t.mean())
+    return {
+        "runs": len(t), "items": items,
+        "p50_ms": float(np.percentile(t, 50)) * 1e3, "p95_ms": float(np.percentile(t, 95)) * 1e3,
+        "mean_ms": mean * 1e3, "min_ms": float(t[0]) * 1e3, "per_item_us": mean / items * 1e6,
+        "throughput_per_s": items / mean if mean else None,
+    }
+
+def threshold_for(name: str, default: float = DEFAULT_THRESHOLD) -> float:
+    return max([v for k, v in THRESHOLDS.items() if k in name], default=default)
+
+# ============================
+# Casos: (nombre, fábrica -> (fn, elementos por llamada))
+# ============================
+def _returns(n: int = 250, seed: int = 0) -> list:
+    return np.random.default_rng(seed).normal(0.0005, 0.02, n).tolist()
+
+def _portfolio(n_assets: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    A = rng.normal(0, 0.05, (n_assets, n_assets))
+    cov = A @ A.T / n_assets + np.diag(rng.uniform(0.01, 0.04, n_assets))
+    return rng.uniform(0.03, 0.15, n_assets).tolist(), cov.tolist()
+
+def _no_graph(fn):
+    def run():
+        with render.disabled():
+            return fn()
+    return run
+
+def _repeat(fn, n: int):
+    # llamadas de microsegundos: se mide un bloque de n para que el reloj no domine
+    def run():
+        for _ in range(n):
+            fn()
+    return run, n
+
+def _black_scholes():
+    from app.calculators.black_scholes import black_scholes
+    return _repeat(lambda: black_scholes(100, 105, 0.03, 0.25, 0.5, "call"), 1_000)
+
+def _montecarlo(steps: int, sims: int, graph: bool):
+    from app.calculators.montecarlo import calc_montecarlo
+    fn = lambda: calc_montecarlo(100, 0.05, 0.2, 1.0, steps, sims, seed=0)
+    return (fn if graph else _no_graph(fn)), sims
+
+def _var_montecarlo(sims: int, graph: bool):
+    from app.calculators.var_montecarlo import var_montecarlo
+    r = _returns()
+    fn = lambda: var_montecarlo(r, alpha=0.05, horizon=10, sims=sims, amount=1e6, seed=0)
+    return (fn if graph else _no_graph(fn)), sims
+
+def _markowitz(n_assets: int, graph: bool):
+    from app.calculators.markowitz import optimizar_portafolio
+    mu, cov = _portfolio(n_assets)
+    fn = lambda: optimizar_portafolio(mu, cov, seed=0)
+    return (fn if graph else _no_graph(fn)), 1
+
+def _capm(graph: bool):
+    from app.calculators.capm import calcular_capm
+    fn = lambda: calcular_capm(0.03, 1.2, 0.08)
+    return (fn, 1) if graph else _repeat(_no_graph(fn), 1_000)
+
+def _predict_stock(model: str, graph: bool):
+    from app.ml.predict_stock import predict_stock
+    fn = lambda: predict_stock("AAPL", days=5, model=model, seed=0)
+    return (fn if graph else _no_graph(fn)), 1
+
+def _predict_risk():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    params = {"zscore": 1.8, "volatility": 0.35, "returns": -0.02, "debt_ratio": 0.6}
+
+    def fn():
+        r = client.post("/predict_risk", params=params)
+        r.raise_for_status()
+    return fn, 1
+
+def _questions() -> list:
+    import csv
+    from app.agent.nlu_online import DATA
+    with open(DATA, newline="", encoding="utf-8") as f:
+        return [row["text"] for row in csv.DictReader(f)]
+
+def _agent(warm: bool):
+    # sin gráficos: su coste se mide aparte en los casos render[...]
+    from app.agent.agent import answer
+    from app.agent.qcache import cache
+    questions = _questions()
+
+    def fn():
+        if not warm:
+            cache.clear()
+        for q in questions:
+            answer(q)
+    return _no_graph(fn), len(questions)
+
+def cases(quick: bool = False) -> list:
+    sizes = QUICK_SIZES if quick else SIZES
+    out = [("black_scholes", _black_scholes)]
+    out += [(f"calc_montecarlo[{st}x{si}]", lambda st=st, si=si: _montecarlo(st, si, False))
+            for st, si in sizes["montecarlo"]]
+    out += [(f"var_montecarlo[{s}]", lambda s=s: _var_montecarlo(s, False)) for s in sizes["var_montecarlo"]]
+    out += [(f"optimizar_portafolio[{n}]", lambda n=n: _markowitz(n, False)) for n in sizes["markowitz"]]
+    out += [(f"predict_stock[{m}]", lambda m=m: _predict_stock(m, False))
+            for m in ("xgboost_reg", "linear_regression")]
+    out += [("predict_risk[http]", _predict_risk),
+            ("agent.answer[cold]", lambda: _agent(False)),
+            ("agent.answer[warm]", lambda: _agent(True))]
+    # mismo cálculo con y sin gráfico: la diferencia es el coste de matplotlib
+    for graph in (False, True):
+        tag = "on" if graph else "off"
+        out += [(f"render[{tag}].calc_montecarlo[252x1000]", lambda g=graph: _montecarlo(252, 1_000, g)),
+                (f"render[{tag}].optimizar_portafolio[10]", lambda g=graph: _markowitz(10, g)),
+                (f"render[{tag}].capm", lambda g=graph: _capm(g)),
+                (f"render[{tag}].predict_stock", lambda g=graph: _predict_stock("linear_regression", g))]
+    return out
+
+# ============================
+# Ejecución y comparación
+# ============================
+def _meta(quick: bool) -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(), "numpy": np.__version__,
+        "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(),
+        "quick": quick,
+        "env": {k: v for k, v in os.environ.items()
+                if k.startswith("VALERIO_") and "TOKEN" not in k and "KEY" not in k},
+    }
+
+def run(quick: bool = False, only=None, min_runs: int = None, min_seconds: float = None) -> dict:
+    prices.set_backend(synthetic_prices())
+    min_runs = min_runs or (3 if quick else 5)
+    min_seconds = min_seconds if min_seconds is not None else (0.2 if quick else 0.5)
+    results = {}
+    try:
+        for name, make in cases(quick):
+            if only and not any(o in name for o in only):
+                continue
+            fn, items = make()
+            results[name] = summarize(measure(fn, min_runs, min_seconds), items)
+            print(f"{name:44s} p50 {results[name]['p50_ms']:9.2f} ms | p95 {results[name]['p95_ms']:9.2f} ms"
+                  f" | {results[name]['throughput_per_s']:10.1f}/s", file=sys.stderr)
+    finally:
+        prices.set_backend(None)
+    return {"meta": _meta(quick), "results": results}
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """Ratio de p50 frente a la línea base por caso; 'regression' si supera 1 + umbral."""
+    out = {}
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        thr = threshold_for(name, threshold)
+        ratio = cur["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("inf")
+        status = "regression" if ratio > 1 + thr else "improvement" if ratio < 1 / (1 + thr) else "ok"
+        out[name] = {"baseline_p50_ms": base["p50_ms"], "p50_ms": cur["p50_ms"], "ratio": ratio,
+                     "threshold": thr, "status": status}
+    return out
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="tamaños y repeticiones reducidos")
+    parser.add_argument("--only", nargs="*", help="subcadenas de los casos a ejecutar")
+    parser.add_argument("--min-runs", type=int)
+    parser.add_argument("--min-seconds", type=float)
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--out", default="-", help="fichero JSON de salida ('-' = stdout)")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):   # stdout queda solo para el JSON
+        report = run(args.quick, args.only, args.min_runs, args.min_seconds)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold)
+        regressions = [n for n, c in report["comparison"].items() if c["status"] == "regression"]
+        for name, c in report["comparison"].items():
+            print(f"{name:44s} x{c['ratio']:5.2f} (umbral +{c['threshold']:.0%}) {c['status']}", file=sys.stderr)
+    report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from app.calculators.american import lattice_prices, lsm_prices, price_american, european_price
+
+PUT = {"S": 36.0, "K": 40.0, "r": 0.06, "sigma": 0.2, "T": 1.0, "option": "put"}
+CALL = {"S": 100.0, "K": 100.0, "r": 0.05, "sigma": 0.2, "T": 1.0, "option": "call"}
+
+@pytest.mark.parametrize("method", ["binomial", "trinomial"])
+def test_lattice_call_without_dividends_is_european(method):
+    price = lattice_prices([CALL], 1000, method)[0]
+    assert price == pytest.approx(european_price(100, 100, 0.05, 0.2, 1.0), abs=5e-3)
+
+@pytest.mark.parametrize("method", ["binomial", "trinomial"])
+def test_lattice_american_put_reference(method):
+    # Longstaff–Schwartz (2001), tabla 1: valor por diferencias finitas 4.478
+    price = lattice_prices([PUT], 1000, method)[0]
+    assert price == pytest.approx(4.478, abs=0.015)
+    assert price > european_price(36, 40, 0.06, 0.2, 1.0, "put")
+
+def test_batch_matches_single_contracts():
+    book = [dict(PUT, K=k, sigma=s) for k in (36, 40, 44) for s in (0.2, 0.4)] + [CALL]
+    batch = lattice_prices(book, 200)
+    single = np.array([lattice_prices([c], 200)[0] for c in book])
+    assert np.allclose(batch, single, rtol=1e-12)
+
+def test_lsm_close_to_lattice():
+    (price, se), (call, call_se) = lsm_prices([PUT, CALL], sims=40_000, exercise_dates=50, seed=0)
+    assert abs(price - 4.478) < 4 * se + 0.02
+    assert abs(call - european_price(100, 100, 0.05, 0.2, 1.0)) < 4 * call_se
+
+def test_price_american_report():
+    out = price_american([PUT], method="binomial", steps=200)
+    row = out["results"][0]
+    assert row["early_exercise_premium"] > 0.5
+    with pytest.raises(ValueError):
+        price_american([dict(PUT, sigma=0)], method="binomial")
@@ -0,0 +1,58 @@
+from app import render
+from app.agent.agent import answer, answer_many, _normalize_question
+from app.agent.nlu import predict_intent, predict_intents
+from app.calculators.capm import calcular_capm
+
+QUESTIONS = [
+    "black scholes call S=100 K=95 r=2% sigma=15% T=1",
+    "hola valerio",
+    "Hola Valerio, calcula CAPM con rf=0.02, beta=1.2, rm=0.08",
+    "BS para put s=95 k=100 r=1.5% sigma=0.22 t=0.5",
+    "predice riesgo zscore=2.1 volatility=0.15 returns=0.08 debt_ratio=0.3",
+]
+
+def test_batch_predict_matches_single():
+    cleaned = [_normalize_question(q) for q in QUESTIONS]
+    assert predict_intents(cleaned) == [predict_intent(q) for q in cleaned]
+    assert predict_intents([]) == []
+
+def test_answer_many_keeps_order_and_results():
+    batch = answer_many(QUESTIONS, max_workers=4)
+    single = [answer(q) for q in QUESTIONS]
+    assert [r["question"] for r in batch] == QUESTIONS
+    assert [r["intent"] for r in batch] == [r["intent"] for r in single]
+    assert batch[0]["result"] == single[0]["result"]
+
+def test_render_switch():
+    assert calcular_capm(0.02, 1.1, 0.08)["graph"]
+    with render.disabled():
+        assert calcular_capm(0.02, 1.1, 0.08)["graph"] is None
+    assert render.enabled()
+
+def test_concurrent_graphs_do_not_touch_pyplot():
+    import base64
+    import matplotlib.pyplot as plt
+    questions = ["Hola Valerio, calcula CAPM con rf=0.02, beta=1.2, rm=0.08",
+                 "montecarlo S0=100 mu=5% sigma=20% T=1 steps=50 sims=500",
+                 "markowitz"] * 4
+    batch = answer_many(questions, max_workers=4, graphs=True)
+    graphs = [r["graph"] for r in batch if r.get("graph")]
+    assert len(graphs) >= 8
+    assert all(base64.b64decode(g)[:8] == b"\x89PNG\r\n\x1a\n" for g in graphs)
+    assert plt.get_fignums() == []   # nada queda en el gestor global de figuras
+
+def test_batch_deadline_skips_pending_questions():
+    batch = answer_many(QUESTIONS, max_workers=2, deadline=0.0)
+    assert [r["question"] for r in batch] == QUESTIONS
+    assert all(r["error"] == "deadline" and r["result"] is None for r in batch)
+
+def test_endpoint_limits_questions_with_tools(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline-test")   # main crea el cliente de OpenAI al importarse
+    from fastapi.testclient import TestClient
+    from app import main
+    monkeypatch.setattr(main, "MAX_ASK_BATCH_TOOLS", 2)
+    client = TestClient(main.app)
+    capm = "CAPM rf=0.02 beta=1.1 rm=0.08"
+    assert client.post("/ask/batch", json={"questions": [capm] * 3}).status_code == 413
+    r = client.post("/ask/batch", json={"questions": [capm] * 2 + ["hola valerio"] * 5})
+    assert r.status_code == 200 and r.json()["count"] == 7
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import budget
+from app.ml import backtest
+
+def _prices(T=200, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=T, tz="UTC")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, T)))
+    return pd.DataFrame({"Close": close, "Volume": rng.uniform(1e6, 5e6, T)}, index=dates)
+
+def test_walk_forward_has_no_lookahead():
+    prices = _prices()
+    end = prices.index[150].strftime("%Y-%m-%d")
+    r = backtest.backtest("linear_regression", prices, end=end, refit_every=20, min_train=40)
+    assert r["refits"] == -(-r["n_predictions"] // 20)
+    assert r["train_rows"] == sorted(r["train_rows"]) and r["train_rows"][0] >= 40
+    # cambiar precios posteriores al último objetivo usado no altera nada
+    future = prices.copy()
+    future.iloc[152:, 0] *= 3
+    assert backtest.backtest("linear_regression", future, end=end, refit_every=20, min_train=40)["variants"] \
+        == r["variants"]
+
+def test_backtest_rejects_short_or_unknown():
+    with pytest.raises(ValueError):
+        backtest.backtest("linear_regression", _prices(60), min_train=100)
+    with pytest.raises(ValueError):
+        backtest.backtest("nope", _prices())
+
+def test_budget_counts_refits_per_model():
+    cost = backtest.cost_params(["all"], _prices(), refit_every=5, min_train=40)
+    assert cost["models"] == list(backtest.CANDIDATES)
+    fast = budget.admit("backtest", **{**cost, "models": ["linear_regression"]})
+    slow = budget.admit("backtest", **{**cost, "models": ["random_forest_reg"]})
+    assert fast.mode == "inline" and slow.estimate["seconds"] > 50 * fast.estimate["seconds"]
+    assert budget.admit("backtest", **{**cost, "refits": 10_000}).mode == "reject"
+    with pytest.raises(ValueError):
+        backtest.cost_params(["nope"], _prices())
+
+def test_endpoint_and_cli(capsys, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline-test")   # main crea el cliente de OpenAI al importarse
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    r = client.post("/ml/backtest", json={"models": ["linear_regression"], "start": "2025-06-01"})
+    assert r.status_code == 200
+    (res,) = r.json()
+    assert res["model"] == "linear_regression" and set(res["variants"]) == {"raw", "clamp"}
+    assert client.post("/ml/backtest", json={"models": ["nope"]}).status_code == 400
+    assert client.post("/ml/backtest", json={"models": ["linear_regression"], "refit_every": 1}).status_code == 422
+
+    # todos los modelos con reajustes frecuentes no caben en una petición síncrona: van a la cola
+    from app import jobs
+    monkeypatch.setattr(jobs, "manager", jobs.JobManager(workers=1, targets={"backtest": lambda **kw: kw}))
+    r = client.post("/ml/backtest", json={"models": ["all"], "refit_every": 5})
+    assert r.status_code == 202 and r.json()["budget"]["mode"] == "queue"
+
+    capsys.readouterr()
+    backtest.main(["--models", "linear_regression", "--start", "2025-06-01", "--n-jobs", "1", "--json"])
+    assert json.loads(capsys.readouterr().out)[0]["variants"] == res["variants"]
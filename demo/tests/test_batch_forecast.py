@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import render
+from app.ml import prices
+from app.ml.batch_forecast import predict_stocks
+from app.ml.feature_store import LOOKBACK
+from app.ml.predict_stock import forecast_panel, load_artifact, predict_stock
+
+def _download(tickers, by_ticker: bool) -> pd.DataFrame:
+    dates = pd.bdate_range("2025-01-01", periods=5)
+    frames = {t: pd.DataFrame({"Close": np.arange(5.0) + i, "Volume": 1e6}, index=dates)
+              for i, t in enumerate(tickers)}
+    raw = pd.concat(frames, axis=1)                      # (ticker, campo)
+    return raw if by_ticker else raw.swaplevel(axis=1)   # (campo, ticker)
+
+@pytest.mark.parametrize("by_ticker", [True, False])
+def test_split_download_when_first_ticker_missing(by_ticker):
+    raw = _download(["MSFT", "GOOG"], by_ticker)
+    out = prices.split_download(raw, ["AAPL", "MSFT", "GOOG"])
+    assert set(out) == {"MSFT", "GOOG"}
+    assert list(out["GOOG"].columns) == ["Close", "Volume"] and out["GOOG"]["Close"].iloc[0] == 1.0
+
+def _backend(tickers, start, end):
+    dates = pd.bdate_range(end=pd.Timestamp(end).normalize(), periods=60)
+    out = {}
+    for t in tickers:
+        if t == "EMPTY":
+            continue
+        rng = np.random.default_rng(list(t.encode()))   # mismo histórico pida quien lo pida
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        n = 5 if t == "SHORT" else len(dates)
+        out[t] = pd.DataFrame({"Close": close, "Volume": 1e7}, index=dates)[-n:]
+    return out
+
+@pytest.fixture
+def offline_prices():
+    prices.set_backend(_backend)
+    yield
+    prices.set_backend(None)
+
+def test_batch_matches_single_ticker(offline_prices):
+    with render.disabled():
+        batch = predict_stocks(["aapl", "MSFT", "EMPTY", "SHORT"], days=3, model="linear_regression", seed=0)
+        single = predict_stock("MSFT", days=3, model="linear_regression", seed=0)
+    assert set(batch["results"]) == {"AAPL", "MSFT"} and set(batch["errors"]) == {"EMPTY", "SHORT"}
+    assert np.allclose(batch["results"]["MSFT"]["predictions"], single["predictions"])
+    assert len(batch["results"]["AAPL"]["dates"]) == 3 and "graph" not in batch["results"]["AAPL"]
+
+def test_forecast_panel_is_columnwise(offline_prices):
+    clf, _ = load_artifact("linear_regression")
+    hist = _backend(["A", "B"], None, "2025-06-02")
+    close = np.column_stack([hist[t]["Close"].to_numpy()[-LOOKBACK:] for t in ("A", "B")])
+    volume = np.full_like(close, 1e7)
+    panel = forecast_panel(clf, close, volume, 4, "linear_regression")
+    for j in range(2):
+        assert np.allclose(panel[:, j], forecast_panel(clf, close[:, j], volume[:, j], 4, "linear_regression")[:, 0])
+    assert (np.abs(panel[0] / close[-1] - 1) <= 0.05 + 1e-12).all()
+
+def test_batch_endpoint(offline_prices, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline-test")   # main crea el cliente de OpenAI al importarse
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    r = client.post("/ml/predict_stock/batch", json={"tickers": ["AAPL", "EMPTY"], "days": 2,
+                                                     "model": "linear_regression", "charts": ["AAPL"]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["results"]["AAPL"]["graph"] and "EMPTY" in body["errors"]
+    assert client.post("/ml/predict_stock/batch", json={"tickers": ["AAPL"], "model": "nope"}).status_code == 400
+    assert client.post("/ml/predict_stock/batch", json={"tickers": ["AAPL"], "days": 10_000}).status_code == 413
@@ -0,0 +1,23 @@
+from benchmarks import suite
+from benchmarks.fakes import synthetic_prices
+
+def _report(**p50):
+    return {"results": {k: {"p50_ms": v} for k, v in p50.items()}}
+
+def test_compare_flags_regressions_with_per_case_thresholds():
+    base = _report(black_scholes=1.0, **{"render[on].capm": 100.0, "var_montecarlo[10000]": 1.0})
+    cur = _report(black_scholes=1.3, **{"render[on].capm": 130.0, "var_montecarlo[10000]": 0.5, "nuevo": 1.0})
+    cmp = suite.compare(cur, base, threshold=0.25)
+    assert cmp["black_scholes"]["status"] == "regression"
+    assert cmp["render[on].capm"]["status"] == "ok"          # umbral de render: 40%
+    assert cmp["var_montecarlo[10000]"]["status"] == "improvement"
+    assert "nuevo" not in cmp
+
+def test_summarize_and_synthetic_prices():
+    s = suite.summarize([0.002, 0.001, 0.003], items=10)
+    assert s["p50_ms"] == 2.0 and s["runs"] == 3
+    assert abs(s["throughput_per_s"] - 5000) < 1e-6
+    a = synthetic_prices()(["AAPL", "MSFT"], "2024-01-01", "2024-12-31")
+    b = synthetic_prices()(["AAPL"], "2024-01-01", "2024-12-31")
+    assert set(a) == {"AAPL", "MSFT"} and len(a["AAPL"]) > 250
+    assert a["AAPL"].equals(b["AAPL"])                       # determinista por ticker
@@ -0,0 +1,27 @@
+import pytest
+
+from app import budget
+
+def test_montecarlo_modes():
+    assert budget.admit("montecarlo", steps=252, sims=10_000).mode == "inline"
+    big = budget.admit("montecarlo", steps=252, sims=500_000)
+    assert big.chunked and big.estimate["bytes"] <= budget.LIMITS["montecarlo"]["max_bytes"]
+    assert budget.admit("montecarlo", steps=252, sims=5_000_000).mode == "queue"
+    assert budget.admit("montecarlo", steps=252, sims=10 ** 8).mode == "reject"
+
+def test_size_limits_and_check():
+    assert budget.admit("markowitz", n_assets=10).mode == "inline"
+    assert budget.admit("markowitz", n_assets=10 ** 4).mode == "reject"
+    assert budget.admit("predict_stock", days=0).mode == "reject"
+    with pytest.raises(budget.BudgetExceeded):
+        budget.check("var_montecarlo", sims=10 ** 9)
+
+def test_track_records_estimate_vs_actual():
+    budget.reset_stats()
+    decision = budget.check("var_montecarlo", sims=1000)
+    with budget.track(decision):
+        pass
+    s = budget.stats()["endpoints"]["var_montecarlo"]
+    assert s["admitted"] == 1 and s["runs"] == 1
+    assert s["est_seconds"] == pytest.approx(decision.estimate["seconds"])
+    assert s["seconds_ratio"] < 1
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from app.rng import make_rng, as_dtype
+from app.calculators.montecarlo import _simulate_paths, calc_montecarlo
+from app.calculators.var_montecarlo import var_montecarlo
+from app.calculators.markowitz import optimizar_portafolio
+from app.calculators.streaming import stream_montecarlo
+
+class _FixedNormals:
+    """Mismas normales (float64 redondeadas) para ambos dtypes: aísla el error de redondeo."""
+
+    def __init__(self, seed):
+        self._rng = make_rng(seed)
+
+    def standard_normal(self, size, dtype=np.float64):
+        return self._rng.standard_normal(size).astype(dtype)
+
+def test_as_dtype():
+    assert as_dtype("float32") == np.float32 and as_dtype(np.float64) == np.float64
+    with pytest.raises(ValueError):
+        as_dtype("int32")
+
+def test_path_rounding_error_is_small():
+    p64 = _simulate_paths(100, 0.05, 0.2, 1.0, 252, 2000, _FixedNormals(0), as_dtype("float64"))
+    p32 = _simulate_paths(100, 0.05, 0.2, 1.0, 252, 2000, _FixedNormals(0), as_dtype("float32"))
+    assert p32.dtype == np.float32 and p32.nbytes * 2 == p64.nbytes
+    # 252 productos en float32: error relativo acumulado por debajo de 1e-4
+    assert np.max(np.abs(p32 / p64 - 1)) < 1e-4
+
+def test_statistics_agree_within_monte_carlo_error():
+    r64 = calc_montecarlo(100, 0.05, 0.2, 1.0, 50, 50_000, seed=1)["result"]
+    r32 = calc_montecarlo(100, 0.05, 0.2, 1.0, 50, 50_000, seed=1, dtype="float32")["result"]
+    se = r64["volatility"] / np.sqrt(50_000)
+    assert abs(r32["expected_price"] - r64["expected_price"]) < 5 * se
+    assert abs(r32["volatility"] / r64["volatility"] - 1) < 0.02
+
+    v64 = var_montecarlo(sims=200_000, seed=2)["result"]
+    v32 = var_montecarlo(sims=200_000, seed=2, dtype="float32")["result"]
+    assert abs(v32["var_ret"] / v64["var_ret"] - 1) < 0.02
+
+    e64 = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 20, 40_000, seed=3))[-1]
+    e32 = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 20, 40_000, seed=3, dtype="float32"))[-1]
+    assert abs(e32["expected_price"] - e64["expected_price"]) < 5 * e64["std_error"]
+
+def test_markowitz_float32():
+    mu, cov = [0.1, 0.12, 0.08], [[0.04, 0.01, 0.0], [0.01, 0.05, 0.01], [0.0, 0.01, 0.03]]
+    r64 = optimizar_portafolio(mu, cov, seed=0)["result"]
+    r32 = optimizar_portafolio(mu, cov, seed=0, dtype="float32")["result"]
+    assert abs(r32["sharpe"] - r64["sharpe"]) < 1e-2
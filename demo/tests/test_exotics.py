@@ -0,0 +1,42 @@
+import pytest
+
+from app.calculators.black_scholes import black_scholes
+from app.calculators.exotics import price_exotics, geometric_asian_price
+
+S0, R, SIGMA, T = 100.0, 0.05, 0.2, 1.0
+
+def _price(contracts, sims=40_000, steps=50, **kw):
+    return price_exotics(S0, R, SIGMA, T, contracts, steps=steps, sims=sims, seed=0, **kw)["results"]
+
+def test_european_matches_black_scholes():
+    (call,) = _price([{"kind": "european", "K": 100}])
+    bs = black_scholes(S0, 100, R, SIGMA, T)
+    assert abs(call["price"] - bs["price"]) < 4 * call["std_error"]
+    assert abs(call["delta"] - bs["delta"]) < 4 * call["delta_se"]
+    assert abs(call["vega"] - bs["vega"]) < 4 * call["vega_se"] + 0.01   # discretización de W_t
+
+def test_geometric_asian_closed_form_and_control_variate():
+    geo, arith = _price([{"kind": "asian_geo", "K": 100}, {"kind": "asian_arith", "K": 100}])
+    exact = geometric_asian_price(S0, 100, R, SIGMA, T, 50)
+    assert abs(geo["price"] - exact) < 4 * geo["std_error"]
+    # la variable de control reduce el error al menos 10x
+    assert arith["std_error"] * 10 < arith["std_error_mc"]
+    assert abs(arith["price"] - arith["price_mc"]) < 4 * arith["std_error_mc"]
+    assert arith["price"] > exact     # media aritmética >= geométrica
+
+def test_barrier_in_out_parity_and_lookback_bounds():
+    out, knock_in, euro, lb = _price([
+        {"kind": "barrier", "K": 100, "barrier": 120, "barrier_type": "up-and-out"},
+        {"kind": "barrier", "K": 100, "barrier": 120, "barrier_type": "up-and-in"},
+        {"kind": "european", "K": 100},
+        {"kind": "lookback", "K": 100, "lookback": "fixed"},
+    ], greeks=False)
+    assert out["price"] + knock_in["price"] == pytest.approx(euro["price"], rel=1e-12)
+    assert lb["price"] > euro["price"]
+
+def test_shared_paths_and_validation():
+    one = _price([{"kind": "european", "K": 100}], sims=5000)
+    many = _price([{"kind": "european", "K": 100}, {"kind": "lookback"}], sims=5000)
+    assert one[0]["price"] == many[0]["price"]          # mismas trayectorias para todos
+    with pytest.raises(ValueError):
+        _price([{"kind": "barrier", "K": 100}])
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from app.ml.feature_store import FEATURES, FeatureStore, build_features, panel_features
+
+
+def _pandas_features(close, volume):
+    df = pd.DataFrame({"Close": close, "Volume": volume})
+    df["Return"] = df["Close"].pct_change()
+    df["MA5"] = df["Close"].rolling(5).mean()
+    df["MA10"] = df["Close"].rolling(10).mean()
+    df["Volatility5"] = df["Return"].rolling(5).std()
+    df["Volume_Ratio"] = df["Volume"] / df["Volume"].rolling(5).mean()
+    return df
+
+
+def _panel(T=120, N=4, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (T, N)), axis=0))
+    volume = rng.uniform(1e6, 5e6, (T, N))
+    return close, volume
+
+
+def test_panel_matches_pandas_rolling():
+    close, volume = _panel()
+    close[:7, 2] = np.nan  # ticker que empieza a cotizar más tarde
+    feats = panel_features(close, volume)
+    for j in range(close.shape[1]):
+        ref = _pandas_features(close[:, j], volume[:, j])
+        for f in FEATURES:
+            np.testing.assert_allclose(feats[f][:, j], ref[f].to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+def test_build_features_drops_warmup_rows():
+    close, volume = _panel(N=1)
+    out = build_features(pd.DataFrame({"Close": close[:, 0], "Volume": volume[:, 0]}))
+    assert len(out) == len(close) - 9  # MA10 necesita 10 barras
+    assert not out[FEATURES].isna().any().any()
+
+
+def test_append_recomputes_tail_like_full_panel():
+    close, volume = _panel(T=200)
+    store = FeatureStore(close[:150], volume[:150])
+    v0 = store.version
+    for t in range(150, 200):
+        store.append(close[t], volume[t])
+    full = panel_features(close, volume)
+    for f in FEATURES:
+        np.testing.assert_allclose(store.features()[f], full[f], rtol=1e-8, atol=1e-10)
+    assert store.version != v0
+    np.testing.assert_allclose(store.matrix(), np.stack([full[f][-1] for f in FEATURES], axis=-1), rtol=1e-8)
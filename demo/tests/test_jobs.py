@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app import progress, routes_jobs
+from app.jobs import JobManager, QueueFull, DONE, FAILED, CANCELLED, PENDING
+
+def _wait(manager, job, timeout=5.0):
+    t0 = time.time()
+    while manager.get(job.id).status not in (DONE, FAILED, CANCELLED):
+        assert time.time() - t0 < timeout
+        time.sleep(0.01)
+    return manager.get(job.id)
+
+def _blocking(gate: threading.Event, steps: int = 100):
+    for i in range(steps):
+        gate.wait(0.01)
+        progress.report(i + 1, steps)
+    return steps
+
+def _targets(gate):
+    return {"block": lambda steps=100: _blocking(gate, steps), "add": lambda a, b: a + b,
+            "boom": lambda: 1 / 0}
+
+def test_submit_and_result():
+    m = JobManager(workers=2, targets=_targets(threading.Event()))
+    job = _wait(m, m.submit("add", {"a": 1, "b": 2}))
+    assert job.status == DONE and job.result == 3 and job.progress == 1.0
+    job = _wait(m, m.submit("boom"))
+    assert job.status == FAILED and "ZeroDivisionError" in job.error
+
+def test_unknown_tool():
+    m = JobManager(targets={})
+    with pytest.raises(KeyError):
+        m.submit("nope")
+
+def test_tenant_limit_and_cancel():
+    gate = threading.Event()
+    m = JobManager(workers=4, tenant_concurrency=1, tenant_queue=1, targets=_targets(gate))
+    a = m.submit("block", {"steps": 1000}, tenant="t1")
+    b = m.submit("block", tenant="t1")
+    other = m.submit("add", {"a": 1, "b": 1}, tenant="t2")
+    assert m.get(b.id).status == PENDING          # t1 ya tiene un job en marcha
+    assert _wait(m, other).status == DONE         # otro tenant no espera
+    with pytest.raises(QueueFull):
+        m.submit("add", {"a": 1, "b": 1}, tenant="t1")
+
+    assert m.cancel(b.id).status == CANCELLED     # en cola: sale sin ejecutarse
+    m.cancel(a.id)                                # en marcha: para en el siguiente bloque
+    assert _wait(m, a).status == CANCELLED
+
+def test_ttl_sweep():
+    m = JobManager(ttl=0.0, targets=_targets(threading.Event()))
+    job = m.submit("add", {"a": 1, "b": 1})
+    while job.finished_at is None:
+        time.sleep(0.01)
+    time.sleep(0.01)
+    assert m.get(job.id) is None
+
+class _BlockIn(BaseModel):
+    steps: int = 100
+
+def _client(monkeypatch, targets):
+    monkeypatch.setattr(routes_jobs, "manager", JobManager(workers=2, targets=targets))
+    app = FastAPI()
+    app.include_router(routes_jobs.router, prefix="/jobs")
+    return TestClient(app)
+
+def test_routes_are_scoped_by_tenant(monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setitem(routes_jobs.JOB_SCHEMAS, "block", (_BlockIn, lambda b: b.model_dump()))
+    client = _client(monkeypatch, _targets(gate))
+    t1, t2 = {"X-Tenant": "t1"}, {"X-Tenant": "t2"}
+    job_id = client.post("/jobs", json={"tool": "block", "params": {"steps": 1000}}, headers=t1).json()["id"]
+
+    assert client.get(f"/jobs/{job_id}", headers=t2).status_code == 404
+    assert client.get(f"/jobs/{job_id}").status_code == 404          # sin cabecera = tenant "default"
+    assert client.delete(f"/jobs/{job_id}", headers=t2).status_code == 404
+    assert routes_jobs.manager.get(job_id).status != CANCELLED
+    assert client.get("/jobs", headers=t2).json() == []
+
+    assert client.get(f"/jobs/{job_id}", headers=t1).json()["id"] == job_id
+    assert client.delete(f"/jobs/{job_id}", headers=t1).status_code == 200
+    assert _wait(routes_jobs.manager, routes_jobs.manager.get(job_id)).status == CANCELLED
+
+def test_route_validates_params(monkeypatch):
+    calls = []
+    client = _client(monkeypatch, {"backtest": lambda **kw: calls.append(kw), "calc_capm": lambda **kw: kw})
+
+    for params in ({"data": "/etc/passwd"}, {"n_jobs": -1}, {"models": ["ridge"], "foo": 1}):
+        r = client.post("/jobs", json={"tool": "backtest", "params": params})
+        assert r.status_code == 400 and r.json()["detail"][0]["type"] == "extra_forbidden"
+    assert client.post("/jobs", json={"tool": "calc_capm", "params": {"rf": "x"}}).status_code == 400
+    assert client.post("/jobs", json={"tool": "nope", "params": {}}).status_code == 400
+
+    r = client.post("/jobs", json={"tool": "backtest", "params": {"models": ["ridge"]}})
+    assert r.status_code == 202
+    job = _wait(routes_jobs.manager, routes_jobs.manager.get(r.json()["id"]))
+    assert job.status == DONE and set(calls[0]) == {"models", "start", "end", "refit_every", "min_train"}
+    assert client.get("/jobs/tools").json() == ["backtest", "calc_capm"]
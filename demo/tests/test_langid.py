@@ -0,0 +1,29 @@
+import csv
+from pathlib import Path
+
+from app.agent import langid
+
+DATASET = Path(__file__).resolve().parents[1] / "app" / "data" / "dataset.csv"
+
+def test_heuristic_short_circuit():
+    assert langid.heuristic("¿qué tal?") == "es"
+    assert langid.heuristic("what is the price") == "en"
+    assert langid.heuristic("black scholes S=100 K=105") is None
+
+def test_ngram_profile_decides_ambiguous_text():
+    assert langid.detect("optimizacion frontera eficiente markowitz") == "es"
+    assert langid.detect("efficient frontier markowitz portfolio") == "en"
+    assert langid.detect("12345 = %") == langid.DEFAULT
+
+def test_deterministic_and_cached():
+    langid._detect.cache_clear()
+    a = langid.detect("Quiero una simulación Monte Carlo")
+    b = langid.detect("quiero una   simulación monte carlo")
+    assert a == b == "es"
+    assert langid.cache_info()["hits"] == 1
+
+def test_dataset_accuracy():
+    with open(DATASET, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    correct = sum(langid.detect(r["text"]) == r["lang"] for r in rows)
+    assert correct / len(rows) >= 0.95
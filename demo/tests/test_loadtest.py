@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from benchmarks import loadtest
+from benchmarks.fakes import FakeLLM
+
+def test_mix_and_requests_from_dataset():
+    assert loadtest.parse_mix("calc=3,ask") == {"calc": 3.0, "ask": 1.0}
+    with pytest.raises(ValueError):
+        loadtest.parse_mix("foo=1")
+    reqs = loadtest.build_requests()
+    assert {"calc", "ml", "ask", "valerio"} <= set(reqs)
+    routes = {r[1] for r in reqs["calc"]}
+    assert {"/calc/black-scholes", "/calc/capm", "/calc/markowitz"} <= routes
+    assert all(r[3]["row"] >= 0 for r in reqs["ml"])
+
+def test_summary_and_rss():
+    records = [("calc", "POST /calc/capm", 200, 0.01), ("calc", "POST /calc/capm", 500, 0.03),
+               ("ask", "POST /ask", 0, 0.02), ("ask", "POST /ask", 200, 0.02)]
+    s = loadtest.summarize(records, 2.0, [(0.0, 100.0), (1.0, 120.0)])
+    assert s["throughput_rps"] == 2.0 and s["error_rate"] == 0.5
+    assert s["errors"] == {"500": 1, "exception": 1}
+    assert s["routes"]["POST /calc/capm"]["error_rate"] == 0.5
+    assert s["rss_mb"]["peak"] == 120.0
+    assert loadtest.rss_mb(os.getpid()) > 10
+
+def test_fake_llm_has_openai_shape():
+    llm = FakeLLM()
+    r = llm.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "hola"}])
+    assert "hola" in r.choices[0].message.content and llm.calls == 1
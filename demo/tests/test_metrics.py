@@ -0,0 +1,59 @@
+import time
+
+from fastapi import FastAPI, APIRouter
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.agent.agent import understand
+
+def _value(text: str, prefix: str) -> float:
+    return sum(float(l.rsplit(" ", 1)[1]) for l in text.splitlines() if l.startswith(prefix))
+
+def test_span_histogram_is_cumulative():
+    with metrics.span("test.stage"):
+        time.sleep(0.002)
+    text = metrics.render()
+    assert _value(text, 'valerio_span_duration_seconds_count{stage="test.stage"}') >= 1
+    assert _value(text, 'valerio_span_duration_seconds_bucket{stage="test.stage",le="0.001"}') == 0
+    assert _value(text, 'valerio_span_duration_seconds_bucket{stage="test.stage",le="+Inf"}') >= 1
+
+def test_span_overhead_is_microseconds():
+    # ~1.5 µs en un portátil; el límite holgado (mejor de 5 rondas) solo pilla regresiones
+    # groseras (bloqueos, formateo por llamada) sin fallar en CI compartida
+    n, best = 5_000, float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            with metrics.span("test.overhead"):
+                pass
+        best = min(best, (time.perf_counter() - t0) / n)
+    assert best < 50e-6
+
+def test_middleware_labels_by_route_template():
+    router = APIRouter()
+
+    @router.get("/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/items")
+    app.add_middleware(metrics.MetricsMiddleware)
+    client = TestClient(app)
+    for i in range(3):
+        client.get(f"/items/{i}")
+    client.get("/missing")
+    text = metrics.render()
+    assert _value(text, 'valerio_http_requests_total{method="GET",route="/items/{item_id}",status="200"}') >= 3
+    assert _value(text, 'valerio_http_requests_total{method="GET",route="<unmatched>",status="404"}') >= 1
+    assert _value(text, 'valerio_http_response_size_bytes_sum{method="GET",route="/items/{item_id}"}') > 0
+    assert 'route="/items/1"' not in text
+    assert metrics.IN_FLIGHT.value == 0
+
+def test_caches_exported():
+    understand("capm rf=0.02 beta=1.1 rm=0.07")
+    understand("capm rf=0.02 beta=1.1 rm=0.07")
+    text = metrics.render()
+    assert _value(text, 'valerio_cache_hits_total{cache="questions"}') >= 1
+    assert 'valerio_cache_misses_total{cache="langid"}' in text
+    assert 'valerio_tool_calls_total{tool="calc_capm"}' in text
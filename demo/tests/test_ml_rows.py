@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pytest
+
+from app.ml import valerio_core_adapter as core
+from app.ml.valerio_core_adapter import parse_rows
+
+@pytest.mark.parametrize("spec, expected", [
+    ("0-4", [0, 1, 2, 3, 4]),
+    ("1,5,7", [1, 5, 7]),
+    ("0-2, 9", [0, 1, 2, 9]),
+    ("8-100", [8, 9]),          # el rango se recorta al tamaño del dataset
+    ("3-3,", [3]),
+])
+def test_parse_rows(spec, expected):
+    assert parse_rows(spec, 10).tolist() == expected
+
+@pytest.mark.parametrize("spec", ["5-2", "-1", "10", "20-30", "", "a-b", "1,x"])
+def test_parse_rows_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_rows(spec, 10)
+
+def test_predict_rows_matches_single_rows():
+    out = core.predict_rows("0-4,7")
+    assert out["rows"] == [0, 1, 2, 3, 4, 7]
+    for i, row in enumerate(out["rows"]):
+        one = core.predict_one(row)
+        assert out["predictions"][i] == one["prediction"] and out["actual"][i] == one["actual"]
+        assert out["probabilities"][i] == pytest.approx(one["probability"])
+    with pytest.raises(ValueError):
+        core.predict_rows([0, 10 ** 6])
+
+def test_dataset_change_invalidates_matrix_and_scores(tmp_path, monkeypatch):
+    csv = tmp_path / "data.csv"
+    shutil.copy(core.DATA_CSV, csv)
+    monkeypatch.setattr(core, "DATA_CSV", csv)
+    monkeypatch.setattr(core, "_core", None)
+    monkeypatch.setattr(core, "_proba_cache", {})
+
+    old = core.load_core()
+    n = len(old.X)
+    core.predict_rows("0-1")
+    misses = core._proba_stats["misses"]
+    core.predict_rows("0-1")
+    assert core._proba_stats["misses"] == misses                 # misma versión: caché
+
+    with open(csv, "a", encoding="utf-8") as f:
+        f.write("0.5,0.9,-0.2,0.95,1\n")
+    st = csv.stat()
+    os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    out = core.predict_rows(f"{n}")
+    assert len(core.get_matrix()[0]) == n + 1 and out["actual"] == [1]
+    assert len(old.X) == len(old.y) == n                          # la instantánea anterior no cambia
+    assert core._proba_stats["misses"] == misses + 1 and len(core._proba_cache) == 1
+
+def test_predict_endpoint(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline-test")   # main crea el cliente de OpenAI al importarse
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    assert client.get("/ml/predict", params={"rows": "0-2"}).json()["rows"] == [0, 1, 2]
+    assert client.get("/ml/predict", params={"row": 1}).json()["row"] == 1
+    assert client.get("/ml/predict", params={"rows": "999"}).status_code == 400
+    assert client.get("/ml/predict").status_code == 400
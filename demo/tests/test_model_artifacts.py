@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from app.ml import predict_stock
+from app.ml.artifacts import save_artifact
+from app.ml.feature_store import FEATURES
+
+def _fit(scale: float):
+    X = np.random.default_rng(0).normal(size=(50, len(FEATURES)))
+    return LinearRegression().fit(X, scale * X[:, 0])
+
+def test_model_and_sidecar_reload_together(tmp_path, monkeypatch):
+    monkeypatch.setattr(predict_stock, "MODELS_DIR", str(tmp_path))
+    monkeypatch.setitem(predict_stock.MODEL_FILES, "lr_test", "lr_test.pkl")
+    monkeypatch.setattr(predict_stock, "_artifacts", {})
+    save_artifact(_fit(1.0), "lr_test", {"version": "v1", "features": FEATURES}, models_dir=tmp_path)
+
+    clf, info = predict_stock.load_artifact("lr_test")
+    assert info["version"] == "v1" and predict_stock.load_artifact("lr_test")[0] is clf
+
+    # reentrenamiento: nuevo pkl + sidecar con otro orden de features
+    reordered = FEATURES[::-1]
+    save_artifact(_fit(2.0), "lr_test", {"version": "v2", "features": reordered}, models_dir=tmp_path)
+    pkl = tmp_path / "lr_test.pkl"
+    os.utime(pkl, ns=(pkl.stat().st_atime_ns, pkl.stat().st_mtime_ns + 10 ** 9))
+    clf2, info2 = predict_stock.load_artifact("lr_test")
+    assert clf2 is not clf and info2["version"] == "v2"
+    assert np.isclose(clf2.coef_[0], 2.0)
+    assert predict_stock.feature_index(info2) == [FEATURES.index(c) for c in reordered]
+    assert predict_stock.model_info("lr_test") is info2
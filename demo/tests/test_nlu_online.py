@@ -0,0 +1,62 @@
+import pytest
+
+from app.agent import nlu, nlu_online
+from app.agent.nlu_online import OnlineIntentModel
+
+TEXTS, LABELS = nlu_online.read_csv(nlu_online.DATA)
+
+@pytest.fixture(scope="module")
+def model():
+    return OnlineIntentModel(4096).fit(TEXTS, LABELS, epochs=10)
+
+def test_fixed_footprint_and_roundtrip(model, tmp_path):
+    small = OnlineIntentModel(4096).fit(TEXTS[:40], LABELS[:40], epochs=2)
+    per_class = model.nbytes / len(model.classes_)
+    assert small.nbytes / len(small.classes_) == per_class      # no depende del corpus
+    path = model.save(tmp_path / "m.npz")
+    loaded = OnlineIntentModel.load(path)
+    assert list(loaded.predict(TEXTS)) == list(model.predict(TEXTS))
+
+def test_partial_fit_appends_examples(model, tmp_path):
+    path = model.save(tmp_path / "m.npz")
+    q = "necesito el beta ajustado del activo según capm"
+    updated = nlu_online.append([q] * 3, ["calc_capm"] * 3, path, tmp_path / "log.jsonl")
+    assert updated.predict([q])[0] == "calc_capm"
+    assert updated.n_examples == len(TEXTS) + 3
+    assert len((tmp_path / "log.jsonl").read_text(encoding="utf-8").splitlines()) == 3
+    with pytest.raises(ValueError):
+        updated.partial_fit(["hola"], ["intent_nueva"])
+
+def test_hot_swap_through_nlu(model, tmp_path, monkeypatch):
+    path = model.save(tmp_path / "nlu_online.npz")
+    monkeypatch.setattr(nlu, "BACKEND", "online")
+    monkeypatch.setattr(nlu, "MODEL_NPZ", path)
+    monkeypatch.setattr(nlu, "_model", None)
+    before = nlu.model_signature()
+    assert nlu.predict_intents(TEXTS[:5]) == [str(i) for i in model.predict(TEXTS[:5])]
+    out = nlu.learn(["quiero el retorno esperado capm de mi acción"], ["calc_capm"])
+    assert out["examples"] == len(TEXTS) + 1
+    # el registro va junto al modelo en uso, no al de producción
+    assert len((tmp_path / "nlu_online_examples.jsonl").read_text(encoding="utf-8").splitlines()) == 1
+    assert nlu.model_signature() != before
+    assert nlu.load_model() is not model and isinstance(nlu.load_model(), OnlineIntentModel)
+    monkeypatch.setattr(nlu, "BACKEND", "tfidf")
+    monkeypatch.setattr(nlu, "_model", None)
+    with pytest.raises(ValueError):
+        nlu.learn(["x"], ["help"])
+
+def test_examples_endpoint_requires_admin_token(model, tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline-test")   # main crea el cliente de OpenAI al importarse
+    from fastapi.testclient import TestClient
+    from app import profiling
+    from app.main import app
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(nlu, "BACKEND", "online")
+    monkeypatch.setattr(nlu, "MODEL_NPZ", model.save(tmp_path / "nlu_online.npz"))
+    monkeypatch.setattr(nlu, "_model", None)
+    client = TestClient(app)
+    body = {"examples": [{"text": "capm de mi cartera por favor", "intent": "calc_capm"}]}
+    assert client.post("/nlu/examples", json=body).status_code == 403
+    assert client.post("/nlu/examples", json=body, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    r = client.post("/nlu/examples", json=body, headers={"X-Admin-Token": "secret"})
+    assert r.status_code == 200 and r.json()["examples"] == len(TEXTS) + 1
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from app.rng import make_rng
+from app.calculators.path_models import model_steps, terminal_values
+from app.calculators.montecarlo import calc_montecarlo
+from app.calculators.var_montecarlo import var_montecarlo, calc_var_montecarlo, VarMontecarloIn
+from app.calculators.streaming import stream_montecarlo
+
+@pytest.mark.parametrize("model", ["gbm", "heston", "merton"])
+def test_terminal_mean_matches_drift(model):
+    # Heston y Merton (drift compensado) conservan E[S_T] = S0·e^{μT}
+    ST = terminal_values(model, 100.0, 0.05, 0.2, 1.0, 100, 100_000, make_rng(0))
+    se = ST.std() / np.sqrt(len(ST))
+    assert abs(ST.mean() - 100.0 * np.exp(0.05)) < 4 * se
+
+def test_models_change_the_distribution():
+    kurt = {}
+    for model in ("gbm", "merton"):
+        logret = np.log(terminal_values(model, 1.0, 0.0, 0.1, 0.1, 25, 100_000, make_rng(1),
+                                        params={"lam": 5.0, "mu_j": -0.05} if model == "merton" else None))
+        z = (logret - logret.mean()) / logret.std()
+        kurt[model] = float((z ** 4).mean())
+    assert abs(kurt["gbm"] - 3.0) < 0.1 and kurt["merton"] > 3.5
+
+    gbm = var_montecarlo(sims=50_000, horizon=10, seed=2, model="gbm")["result"]
+    merton = var_montecarlo(sims=50_000, horizon=10, seed=2, model="merton",
+                            model_params={"lam": 10.0, "mu_j": -0.03, "sigma_j": 0.05})["result"]
+    assert merton["var_ret"] > gbm["var_ret"]
+
+def test_seeded_models_are_reproducible():
+    a = calc_montecarlo(100, 0.05, 0.2, 1.0, 50, 5_000, seed=3, model="heston")["result"]
+    b = calc_montecarlo(100, 0.05, 0.2, 1.0, 50, 5_000, seed=3, model="heston")["result"]
+    assert a == b
+    e1 = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 20, 20_000, seed=4, model="merton"))[-1]
+    e2 = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 20, 20_000, seed=4, model="merton"))[-1]
+    assert e1["expected_price"] == e2["expected_price"]
+
+def test_invalid_model_or_params():
+    with pytest.raises(ValueError):
+        model_steps("sabr", 100, 0.05, 0.2, 1.0, 10, 10, make_rng(0))
+    with pytest.raises(ValueError):
+        next(model_steps("heston", 100, 0.05, 0.2, 1.0, 10, 10, make_rng(0), params={"beta": 1.0}))
+    r = calc_var_montecarlo(VarMontecarloIn(model="merton", model_params={"lam": -1}), None)
+    assert r.status_code == 400
@@ -0,0 +1,56 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling, routes_profiling
+
+def _busy(seconds: float) -> float:
+    t0, x = time.perf_counter(), 0.0
+    while time.perf_counter() - t0 < seconds:
+        x += 1.0
+    return x
+
+def _client(mode: str) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow():
+        return {"x": _busy(0.05)}
+
+    app.include_router(routes_profiling.router, prefix="/admin/profiles")
+    app.add_middleware(profiling.ProfilingMiddleware, mode=mode)
+    return TestClient(app)
+
+def test_only_requests_with_admin_header_are_profiled(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "store", profiling.ProfileStore(keep=5))
+    client = _client("header")
+    assert "x-profile-id" not in client.get("/slow").headers
+    assert "x-profile-id" not in client.get("/slow", headers={"X-Valerio-Profile": "wrong"}).headers
+    r = client.get("/slow", headers={"X-Valerio-Profile": "secret", "X-Request-ID": "req-1"})
+    assert r.headers["x-profile-id"] == "req-1"
+
+    assert client.get("/admin/profiles").status_code == 403
+    admin = {"X-Admin-Token": "secret"}
+    listed = client.get("/admin/profiles", headers=admin).json()["profiles"]
+    assert [p["id"] for p in listed] == ["req-1"]
+    detail = client.get("/admin/profiles/req-1", headers=admin).json()
+    assert detail["status"] == 200 and detail["samples"] > 0
+    assert detail["memory"]["peak_bytes"] >= 0 and "top" in detail["memory"]
+    collapsed = client.get("/admin/profiles/req-1/collapsed", headers=admin).text
+    assert "test_profiling:_busy" in collapsed
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+    assert client.get("/admin/profiles/nope", headers=admin).status_code == 404
+
+def test_store_keeps_most_recent():
+    store = profiling.ProfileStore(keep=2)
+    for i in range(3):
+        store.add(profiling.Profile(str(i), "GET", "/"))
+    assert [p.id for p in store.list()] == ["2", "1"]
+    assert store.get("0") is None
+
+def test_admin_token_required_to_be_configured(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "")
+    assert not profiling.authorized("")
+    assert not profiling.authorized(None)
@@ -0,0 +1,44 @@
+from app.agent import qcache
+from app.agent.agent import understand, understand_many
+from app.agent.qcache import QuestionCache, cache
+
+def test_lru_eviction_and_stats():
+    c = QuestionCache(maxsize=2, max_key_chars=10)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1          # 'a' pasa a ser la más reciente
+    c.put("c", 3)                   # expulsa 'b'
+    assert c.get("b") is None
+    c.put("x" * 11, 4)              # clave demasiado larga: no se guarda
+    s = c.stats()
+    assert (s["size"], s["hits"], s["misses"], s["evictions"], s["skipped"]) == (2, 1, 1, 1, 1)
+    assert s["hit_rate"] == 0.5
+
+def test_invalidated_when_model_changes(monkeypatch):
+    c = QuestionCache(maxsize=10)
+    sig = [(1, 1)]
+    monkeypatch.setattr(qcache, "model_signature", lambda: sig[0])
+    c.get("q")
+    c.put("q", "v")
+    assert c.get("q") == "v"
+    sig[0] = (2, 1)                 # pkl reentrenado
+    assert c.get("q") is None
+    assert c.stats()["invalidations"] == 1
+
+def test_shared_by_normalized_text():
+    cache.clear()
+    u1 = understand("Hola Valerio CAPM rf=0.02 beta=1.2 rm=0.08")
+    before = cache.stats()["hits"]
+    u2 = understand("capm rf=0.02   beta=1.2 rm=0.08")
+    assert u2 is u1 and cache.stats()["hits"] == before + 1
+    assert u1.slots("calc_capm") == {"rf": 0.02, "beta": 1.2, "rm": 0.08}
+    u1.slots("calc_capm")["rf"] = 9   # copia: la entrada no cambia
+    assert u2.slots("calc_capm")["rf"] == 0.02
+
+def test_understand_many_matches_single():
+    qs = ["VaR 95% 5 días 200k", "hola valerio", "VaR 95% 5 días 200k", "predict row 7"]
+    cache.clear()
+    batch = understand_many(qs)
+    assert batch[0] is batch[2]
+    cache.clear()
+    assert [(u.intent, u.lang) for u in batch] == [(understand(q).intent, understand(q).lang) for q in qs]
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from app import progress
+from app.agent import registry
+from app.agent.agent import answer
+from app.agent.registry import Tool, ToolBusy, ToolTimeout, route
+
+def test_route_keywords_and_intents():
+    assert route("calc_capm", {"var", "montecarlo"}).name == "calc_var_montecarlo"   # antes inalcanzable
+    assert route("help", {"montecarlo"}).name == "calc_montecarlo"
+    assert route("calc_var", {"var"}).name == "calc_var_montecarlo"
+    assert route("help", {"var", "ewma"}).name == "calc_var_simple"
+    assert route("other", {"apple"}).name == "predict_stock"
+    assert route("ml_predict", set()).name == "ml_predict"
+    assert route("help", {"hola"}) is None
+
+def _slow(n: int = 50):
+    for i in range(n):
+        time.sleep(0.01)
+        progress.report(i + 1, n)
+    return {"done": n}
+
+def test_thread_timeout_stops_engine():
+    tool = Tool("slow", _slow, {"n": int}, policy="thread", timeout=0.05)
+    with pytest.raises(ToolTimeout):
+        tool.run(n=200)
+    s = tool.stats()
+    assert (s["calls"], s["timeouts"], s["errors"], s["in_flight"]) == (1, 1, 0, 0)
+    assert tool.run(n=1) == {"done": 1}
+
+def test_concurrency_cap_and_schema():
+    gate = threading.Event()
+    tool = Tool("gated", lambda: gate.wait(2), {}, concurrency=1, timeout=0.05)
+    t = threading.Thread(target=tool.run)
+    t.start()
+    time.sleep(0.02)
+    with pytest.raises(ToolBusy):
+        tool.run()
+    gate.set()
+    t.join()
+    assert tool.stats()["busy"] == 1
+    with pytest.raises(ValueError):
+        tool.run(bogus=1)
+
+def test_agent_tools_return_results():
+    capm = answer("CAPM rf=0.02 beta=1.1 rm=0.08")
+    assert capm["result"]["expected_return"] == pytest.approx(0.086)
+    mk = answer("Markowitz rend=[0.1,0.15,0.2] cov=[[0.005,-0.01,0.004],[-0.01,0.04,-0.002],[0.004,-0.002,0.023]]")
+    assert len(mk["result"]["weights"]) == 3
+    mc = answer("monte carlo S0=100 mu=0.05 sigma=0.2 T=1 steps=50 sims=2000")
+    assert mc["result"]["expected_price"] > 0
+    assert answer("predict row 7")["result"]["row"] == 7
+    var = answer("VaR 95% 5 días 200k ewma")
+    assert var["result"]["method"] == "ewma" and var["result"]["var_money"] > 0
+    assert registry.stats()["tools"]["calc_capm"]["calls"] >= 1
+
+def test_global_job_policy_only_for_tools_with_target(monkeypatch):
+    monkeypatch.setenv("VALERIO_TOOL_POLICY", "job")
+    plain = Tool("t_plain", lambda: 1, {}, policy="thread")
+    queued = Tool("t_queued", lambda: 1, {}, policy="thread", job="calc_montecarlo")
+    assert plain.policy == "thread" and queued.policy == "job"
+    monkeypatch.setenv("VALERIO_TOOL_POLICY", "process")
+    assert Tool("t_plain", lambda: 1, {}).policy == "process"
+    monkeypatch.setenv("VALERIO_TOOL_T_PLAIN_POLICY", "job")   # explícito por herramienta: error claro
+    with pytest.raises(ValueError, match="target de jobs"):
+        Tool("t_plain", lambda: 1, {})
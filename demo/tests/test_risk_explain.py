@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.ml import risk_explain
+from app.ml.model import risk_model
+
+def _X(n=257, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(0, 4, n), rng.uniform(0.05, 0.6, n),
+                            rng.uniform(-0.2, 0.2, n), rng.uniform(0.1, 0.9, n)])
+
+def test_chunked_contributions_match_unchunked(monkeypatch):
+    X = _X()
+    full = risk_explain.explain_matrix(X)
+    monkeypatch.setattr(risk_explain, "CHUNK_ROWS", 50)   # 6 bloques, el último incompleto
+    chunked = risk_explain.explain_matrix(X)
+    assert np.array_equal(chunked["contributions"], full["contributions"])
+    assert chunked["margin"] == full["margin"] and chunked["base_value"] == full["base_value"]
+
+def test_contributions_add_up_to_model_probability():
+    X = _X(20)
+    out = risk_explain.explain_matrix(X)
+    margin = np.sum(out["contributions"], axis=1) + out["base_value"]
+    assert np.allclose(margin, out["margin"], atol=1e-4)
+    assert np.allclose(out["probability"], risk_model.predict_proba(X)[:, 1], atol=1e-5)
+    one = risk_explain.explain_one(*X[0])
+    assert list(one["contributions"]) == risk_explain.FEATURES
+    assert one["probability"] == pytest.approx(out["probability"][0])
+
+def test_explain_empty_batch():
+    out = risk_explain.explain_matrix(np.empty((0, 4)))
+    assert out["contributions"] == [] and out["base_value"] is None
+
+def test_global_importance_is_cached_until_cleared():
+    risk_explain.global_importance.cache_clear()
+    first = risk_explain.global_importance()
+    assert risk_explain.global_importance() is first
+    info = risk_explain.global_importance.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    risk_explain.global_importance.cache_clear()
+    again = risk_explain.global_importance()
+    assert again is not first and again["importance"] == first["importance"]
+    assert sum(first["importance"].values()) == pytest.approx(1.0, abs=1e-5)
+
+def test_endpoints(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline-test")   # main crea el cliente de OpenAI al importarse
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    by_rows = client.post("/risk_explain", json={"rows": "0-2"}).json()
+    assert by_rows["rows"] == [0, 1, 2] and len(by_rows["contributions"]) == 3
+    assert client.post("/risk_explain", json={"X": [[1, 2, 3]]}).status_code == 400
+    assert client.post("/risk_explain", json={"rows": "5-1"}).status_code == 400
+    assert set(client.get("/risk_feature_importance").json()["importance"]) == set(risk_explain.FEATURES)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from app.rng import make_rng, spawn
+from app.calculators.var_montecarlo import var_montecarlo
+from app.calculators.streaming import stream_montecarlo
+
+def test_bit_generators():
+    assert isinstance(make_rng(0).bit_generator, np.random.PCG64)
+    assert isinstance(make_rng(0, "philox").bit_generator, np.random.Philox)
+    # PCG64 con semilla = default_rng con semilla (mismos datos por defecto que antes)
+    assert np.array_equal(make_rng(42).normal(size=5), np.random.default_rng(42).normal(size=5))
+    with pytest.raises(ValueError):
+        make_rng(0, "mt19937x")
+
+def test_spawned_streams_differ():
+    a, b = spawn(1, 2)
+    assert not np.array_equal(a.random(4), b.random(4))
+
+def test_seed_reproducible_and_independent_of_global_state():
+    first = var_montecarlo(sims=2000, seed=5)["result"]
+    np.random.seed(0)
+    np.random.normal(size=100)
+    assert var_montecarlo(sims=2000, seed=5)["result"] == first
+    a = list(stream_montecarlo(100, 0.05, 0.2, 1, 10, 3000, chunk=1000, seed=9))
+    b = list(stream_montecarlo(100, 0.05, 0.2, 1, 10, 3000, chunk=1000, seed=9))
+    assert a == b
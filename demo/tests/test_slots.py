@@ -0,0 +1,47 @@
+import pytest
+
+from app.agent.slots import extract, parse_numeric_list, scan, typed_slots, MAX_LIST_ITEMS
+
+def test_black_scholes_rates_and_option():
+    s = extract("black scholes put S=110 K=115 r=2% vol=0.22 T=0.4", "calc_black_scholes")
+    assert s == {"S": 110.0, "K": 115.0, "T": 0.4, "r": 0.02, "sigma": 0.22, "option": "put"}
+
+@pytest.mark.parametrize("text, expected", [
+    ("VaR 95% 5 días sobre 200k", {"alpha": 0.05, "horizon": 5, "amount": 200_000.0}),
+    ("var 90% horizonte 1 mes monto 1M", {"alpha": 0.1, "horizon": 21, "amount": 1_000_000.0}),
+    ("value at risk 95 percent 5 days 200k", {"alpha": 0.05, "horizon": 5, "amount": 200_000.0}),
+    ("var con alfa 5% horizonte 10 días y 20000 simulaciones", {"alpha": 0.05, "horizon": 10, "sims": 20_000}),
+    ("var 97.5% a 2 semanas con ewma lambda=0.94", {"alpha": 0.025, "horizon": 10, "method": "ewma", "lambda": 0.94}),
+])
+def test_var_slots(text, expected):
+    assert extract(text, "calc_var") == expected
+
+def test_uppercase_and_accented_units():
+    # 'DÍAS' en mayúsculas no se reconocía
+    s = extract("Predice MSFT para los próximos 3 DÍAS usando SVM", "predict_stock")
+    assert s == {"ticker": "MSFT", "tickers": ["MSFT"], "days": 3, "model": "svr"}
+    assert extract("predice AAPL y TSLA con regresión a 10 días", "predict_stock")["model"] == "linear_regression"
+
+def test_one_scan_serves_every_intent():
+    sc = scan("monte carlo s0=100 mu=5% sigma=0.2 t=1 252 pasos 10000 simulaciones fila 7")
+    assert typed_slots(sc, "calc_montecarlo") == {"s0": 100.0, "mu": 0.05, "sigma": 0.2, "t": 1.0,
+                                                  "steps": 252, "sims": 10_000}
+    assert typed_slots(sc, "ml_predict") == {"row": 7}
+    assert typed_slots(sc, "help") == {}
+    risk = typed_slots(scan("riesgo zscore 1.8, volatilidad 0.12, retornos 0.05 y ratio de deuda 0.4"), "predict_risk")
+    assert risk == {"zscore": 1.8, "volatility": 0.12, "returns": 0.05, "debt_ratio": 0.4}
+
+def test_markowitz_lists():
+    s = extract("markowitz rend=[0.1, 0.15] cov=[[0.005,-0.01],[-0.01,0.04]]", "calc_markowitz")
+    assert s == {"rendimientos": [0.1, 0.15], "covarianzas": [[0.005, -0.01], [-0.01, 0.04]]}
+    assert "error" in extract("markowitz rend=[0.1,[0.2]]", "calc_markowitz")
+    assert extract("markowitz sin datos", "calc_markowitz") == {}
+
+def test_numeric_list_parser_is_bounded():
+    assert parse_numeric_list("[ 1, 2.5 ,-3 ]") == [1.0, 2.5, -3.0]
+    with pytest.raises(ValueError):
+        parse_numeric_list("[[1,2],[3]]")
+    with pytest.raises(ValueError):
+        parse_numeric_list("[" + ",".join(["1"] * (MAX_LIST_ITEMS + 1)) + "]")
+    with pytest.raises(ValueError):
+        parse_numeric_list("[__import__('os')]")
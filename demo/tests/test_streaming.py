@@ -0,0 +1,53 @@
+import numpy as np
+
+from app.calculators.streaming import stream_montecarlo, stream_markowitz
+
+def test_montecarlo_stream_matches_gbm_moments():
+    ests = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 50, 40_000, chunk=10_000, seed=0))
+    assert [e["simulations"] for e in ests] == [10_000, 20_000, 30_000, 40_000]
+    last = ests[-1]
+    assert abs(last["expected_price"] - 100 * np.exp(0.05)) < 4 * last["std_error"]
+    assert ests[0]["std_error"] > last["std_error"]
+    assert last["es_ret"] >= last["var_ret"]
+
+def test_montecarlo_stream_stops_at_tolerance():
+    ests = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 10, 1_000_000, tol=0.2, chunk=5000, seed=1))
+    assert ests[-1]["converged"] and ests[-1]["std_error"] <= 0.2
+    assert ests[-1]["simulations"] < 1_000_000
+
+def test_markowitz_stream_best_is_monotone():
+    mu = [0.1, 0.12, 0.08]
+    cov = [[0.04, 0.01, 0.0], [0.01, 0.05, 0.01], [0.0, 0.01, 0.03]]
+    ests = list(stream_markowitz(mu, cov, n_portafolios=20_000, chunk=2000, seed=0))
+    sharpes = [e["sharpe"] for e in ests]
+    assert sharpes == sorted(sharpes) and len(ests) == 10
+    assert abs(sum(ests[-1]["weights"]) - 1) < 1e-3
+
+def test_montecarlo_stream_memory_is_bounded(monkeypatch):
+    from app.calculators import streaming
+    assert streaming._chunk_size(100_000, 10 ** 7, 10 ** 7) == streaming.CHUNK_ELEMENTS // 100_000
+    exact = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 10, 40_000, chunk=10_000, seed=0))
+    monkeypatch.setattr(streaming, "QUANTILE_SAMPLE", 5000)
+    sampled = list(stream_montecarlo(100, 0.05, 0.2, 1.0, 10, 40_000, chunk=10_000, seed=0))
+    # el muestreo no cambia las trayectorias; el VaR muestreado queda cerca del exacto
+    assert [e["expected_price"] for e in sampled] == [e["expected_price"] for e in exact]
+    assert abs(sampled[-1]["var_ret"] - exact[-1]["var_ret"]) < 0.03
+
+def test_stream_endpoints_apply_admission_control():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.calculators import streaming
+    app = FastAPI()
+    app.include_router(streaming.router, prefix="/calc")
+    client = TestClient(app)
+    huge = {"S0": 100, "mu": 0.05, "sigma": 0.2, "T": 1, "steps": 100_000, "sims": 10 ** 7, "chunk": 10 ** 7}
+    r = client.post("/calc/montecarlo/stream", json=huge)
+    assert r.status_code == 413 and r.json()["budget"]["mode"] == "reject"
+    with client.websocket_connect("/calc/montecarlo/stream") as ws:
+        ws.send_json({**huge, "model": "heston"})
+        assert ws.receive_json()["type"] == "error"
+    mu = [0.1] * 3000
+    r = client.post("/calc/markowitz/stream", json={"rendimientos": mu, "covarianzas": [[0.0]], "n_portafolios": 10})
+    assert r.status_code == 413
+    ok = client.post("/calc/montecarlo/stream", json={**huge, "steps": 10, "sims": 2000, "seed": 0})
+    assert ok.status_code == 200 and '"type": "done"' in ok.text
@@ -0,0 +1,37 @@
+import warnings
+from pathlib import Path
+import numpy as np
+import joblib
+import pytest
+
+from app.ml.tree_inference import compile_model, validate_parity
+
+MODELS_DIR = Path(__file__).resolve().parents[1] / "app" / "ml" / "models"
+
+
+def _load(name):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load(MODELS_DIR / name)
+
+
+@pytest.mark.parametrize("name", ["risk_xgboost.pkl", "random_forest_reg_apple.pkl", "xgboost_reg_apple.pkl"])
+def test_compiled_matches_original(name):
+    model = _load(name)
+    compiled = compile_model(model)
+    # umbrales exactos + entradas aleatorias
+    validate_parity(model, compiled)
+    X = np.random.default_rng(1).normal(size=(300, compiled.n_features_in_)).astype(np.float32)
+    validate_parity(model, compiled, X)
+
+
+def test_classifier_labels_match():
+    model = _load("risk_xgboost.pkl")
+    compiled = compile_model(model)
+    X = np.random.default_rng(2).uniform(0, 3, size=(200, 4)).astype(np.float32)
+    assert (compiled.predict(X) == model.predict(X)).all()
+
+
+def test_unsupported_model_raises():
+    with pytest.raises(NotImplementedError):
+        compile_model(_load("svr_apple.pkl"))
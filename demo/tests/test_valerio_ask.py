@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import render
+
+@pytest.fixture
+def ask(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline-test")   # el módulo crea el cliente al importarse
+    from app import routes_openai
+    sent = []
+
+    def create(model, messages, **kwargs):
+        sent.append(messages[-1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+    monkeypatch.setattr(routes_openai, "client",
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    app = FastAPI()
+    app.include_router(routes_openai.router, prefix="/valerio")
+    client = TestClient(app)
+
+    def call(question: str) -> str:
+        with render.disabled():
+            assert client.post("/valerio/ask", json={"question": question}).status_code == 200
+        return sent[-1]
+    return call
+
+def test_demo_inputs_are_declared_as_assumptions(ask):
+    context = ask("black scholes S=200")
+    note = context.split("Datos supuestos")[1]
+    assert "K=145" in note and "S=" not in note       # S es del usuario, K sale del ejemplo
+    assert "supuestos" not in ask("black scholes S=200 K=190 r=0.03 sigma=0.25 T=0.5 call")
+    assert "Assumed inputs" in ask("please compute capm for me")